@@ -1,13 +1,20 @@
 """Agent implementation."""
 import asyncio
+import os
 import typing
-from time import time
+from base64 import b64encode
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor
+from functools import lru_cache
+from http import HTTPStatus
+from time import monotonic, time
 from typing import (
     Any,
     AsyncIterable,
     AsyncIterator,
     Awaitable,
     Callable,
+    Deque,
     Dict,
     Iterable,
     List,
@@ -25,19 +32,25 @@ from typing import (
 from uuid import uuid4
 from weakref import WeakSet, WeakValueDictionary
 
+from aiohttp import ClientError
 from mode import (
     CrashingSupervisor,
     Service,
     ServiceT,
     SupervisorStrategyT,
 )
-from mode.utils.aiter import aenumerate, aiter
+from mode.utils.aiter import aenumerate, aiter, chunks
+from mode.utils.contexts import asynccontextmanager
 from mode.utils.futures import maybe_async
+from mode.utils.imports import symbol_by_name
 from mode.utils.objects import canonshortname, qualname
 from mode.utils.text import shorten_fqdn
+from mode.utils.times import Seconds, want_seconds
 from mode.utils.types.trees import NodeT
+from yarl import URL
 
-from faust.exceptions import ImproperlyConfigured
+from faust.exceptions import ImproperlyConfigured, Skip
+from faust.streams import current_event
 
 from faust.types import (
     AppT,
@@ -65,6 +78,7 @@ from faust.types.agents import (
     ReplyToArg,
     SinkT,
 )
+from faust.web.exceptions import ServiceUnavailable
 
 from .actor import Actor, AsyncIterableActor, AwaitableActor
 from .models import (
@@ -74,11 +88,14 @@ from .models import (
     ReqRepResponse,
 )
 from .replies import BarrierState, ReplyPromise
+from .sinks import SinkBuffer
 
 if typing.TYPE_CHECKING:  # pragma: no cover
     from faust.app.base import App
+    from faust.transport.conductor import Conductor
 else:
     class App: ...   # noqa
+    class Conductor: ...  # noqa
 
 __all__ = ['Agent']
 
@@ -139,6 +156,38 @@ __all__ = ['Agent']
 #      ``@app.agent(sinks=[other_agent])``.
 
 
+#: Executors that can be used with the ``executor`` argument of agents.
+EXECUTORS: Mapping[str, Type[ProcessPoolExecutor]] = {
+    'process': ProcessPoolExecutor,
+}
+
+#: Ways to dispatch events to actors when using ``concurrency`` with
+#: the ``ordering`` argument of agents: events having the same
+#: value are always processed by the same actor, in order.
+ORDERINGS: Mapping[str, Callable[[EventT], Any]] = {
+    'partition': lambda event: event.message.tp,
+    'key': lambda event: event.message.key,
+}
+
+
+@lru_cache(maxsize=None)
+def _resolve_agent_fun(path: str) -> Callable[[Any], Any]:
+    # The @app.agent decorator replaced the function in its module,
+    # so it cannot be pickled by reference.
+    obj = symbol_by_name(path)
+    return obj.fun if isinstance(obj, AgentT) else obj
+
+
+def _execute_agent_fun(path: str, value: Any) -> Any:
+    # This is executed in the process pool.
+    return _resolve_agent_fun(path)(value)
+
+
+def _executor_ready() -> None:
+    # Executed in the process pool to start the worker processes.
+    ...
+
+
 class Agent(AgentT, Service):
     """Agent.
 
@@ -166,6 +215,34 @@ class Agent(AgentT, Service):
 
     _first_assignment_done: bool = False
 
+    #: Pool executing the agent function when ``executor`` is set.
+    _executor: Optional[Executor] = None
+
+    #: Task dispatching events to actors when ``ordering`` is set.
+    _dispatcher: Optional[asyncio.Future] = None
+
+    #: Max number of requests sent together by
+    #: :meth:`map`/:meth:`kvmap`/:meth:`join`/:meth:`kvjoin`.
+    map_batch_size: int = 100
+
+    #: Replies to requests sent directly to this worker
+    #: (:setting:`reply_direct`), by correlation id.
+    _direct_replies: MutableMapping[str, asyncio.Future]
+
+    #: Requests delivered directly to this worker, by correlation id,
+    #: with the time they expire and the response once the agent replied.
+    _direct_requests: MutableMapping[
+        str, Tuple[float, Optional[ReqRepResponse]]]
+
+    #: Time (in seconds) requests delivered directly are remembered
+    #: after :setting:`reply_direct_timeout`, to drop the copy sent
+    #: through Kafka when the asker did not get the reply.
+    direct_request_expires: float = 300.0
+
+    #: Default time (in seconds) values are kept in the sink buffer when
+    #: ``sink_batch_size`` is set without ``sink_batch_timeout``.
+    default_sink_batch_timeout: float = 1.0
+
     def __init__(self,
                  fun: AgentFun,
                  *,
@@ -180,6 +257,11 @@ class Agent(AgentT, Service):
                  key_type: ModelArg = None,
                  value_type: ModelArg = None,
                  isolated_partitions: bool = False,
+                 executor: str = None,
+                 workers: int = None,
+                 ordering: str = None,
+                 sink_batch_size: int = None,
+                 sink_batch_timeout: Seconds = None,
                  **kwargs: Any) -> None:
         self.app = app
         self.fun: AgentFun = fun
@@ -202,9 +284,31 @@ class Agent(AgentT, Service):
         self.supervisor_strategy = supervisor_strategy
         self._actors = WeakSet()
         self._actor_by_partition = WeakValueDictionary()
+        self._direct_replies = {}
+        self._direct_requests = {}
         if self.isolated_partitions and self.concurrency > 1:
             raise ImproperlyConfigured(
                 'Agent concurrency must be 1 when using isolated partitions')
+        if executor is not None and executor not in EXECUTORS:
+            raise ImproperlyConfigured(
+                f'Unknown agent executor {executor!r}, '
+                f'expected one of: {", ".join(EXECUTORS)}')
+        if executor is not None and '<locals>' in fun.__qualname__:
+            # the worker processes import the function by name.
+            raise ImproperlyConfigured(
+                f'Agent function {fun.__qualname__!r} must be defined '
+                f'at module level to use executor {executor!r}')
+        self.executor = executor
+        self.workers = workers
+        if ordering is not None and ordering not in ORDERINGS:
+            raise ImproperlyConfigured(
+                f'Unknown agent ordering {ordering!r}, '
+                f'expected one of: {", ".join(ORDERINGS)}')
+        self.ordering = ordering
+        if sink_batch_size is not None and sink_batch_timeout is None:
+            sink_batch_timeout = self.default_sink_batch_timeout
+        self.sink_batch_size = sink_batch_size
+        self.sink_batch_timeout = sink_batch_timeout
         Service.__init__(self)
 
     async def _start_one(self,
@@ -245,7 +349,26 @@ class Agent(AgentT, Service):
         self.log.info('Starting actor for partitions %s', active_partitions)
         return await self._start_one_supervised(None, active_partitions)
 
+    async def start_executor(self) -> None:
+        """Start the processes of the pool used by ``executor``.
+
+        The app calls this before starting any other service, as the
+        processes are forked, and forking after threads are started
+        (e.g. by the default executor of the event loop) can deadlock
+        a child process on a lock held by a thread at that time.
+        """
+        if self.executor is not None and self._executor is None:
+            executor = self._executor = EXECUTORS[self.executor](
+                max_workers=self.workers)
+            # processes are started lazily when submitting work.
+            await asyncio.gather(*[
+                self.loop.run_in_executor(executor, _executor_ready)
+                for _ in range(self.workers or os.cpu_count() or 1)
+            ], loop=self.loop)
+
     async def on_start(self) -> None:
+        # usually already started by the app.
+        await self.start_executor()
         self.supervisor = self._new_supervisor()
         await self._on_start_supervisor()
 
@@ -274,6 +397,8 @@ class Agent(AgentT, Service):
         return SupervisorStrategy
 
     async def _on_start_supervisor(self) -> None:
+        if self.ordering is not None and self.concurrency > 1:
+            return await self._on_start_ordered_supervisor()
         active_partitions = self._get_active_partitions()
         channel: ChannelT = cast(ChannelT, None)
         for i in range(self.concurrency):
@@ -290,6 +415,52 @@ class Agent(AgentT, Service):
             self.supervisor.add(res)
         await self.supervisor.start()
 
+    async def _on_start_ordered_supervisor(self) -> None:
+        # Every actor reads from a private channel, and we dispatch
+        # events from the shared channel to them, so that events
+        # having the same partition/key are processed in order.
+        # Consumer only commits offsets up to the first message
+        # read but not yet acked in a partition, so the actors may ack
+        # messages out of order.
+        channel_iterator = cast(TopicT, self.channel_iterator)
+        source = cast(ChannelT, aiter(channel_iterator.clone(
+            is_iterator=False,
+        )))
+        channels = [self._new_actor_channel(source)
+                    for _ in range(self.concurrency)]
+        for i, channel in enumerate(channels):
+            self.supervisor.add(await self._start_one(
+                index=i,
+                channel=channel,
+            ))
+        # Agent._execute_task runs actors, so we let the app supervise
+        # the dispatcher: it crashes if the dispatcher fails.
+        self._dispatcher = self.app.add_future(
+            self._dispatch(source, channels))
+        await self.supervisor.start()
+
+    def _new_actor_channel(self, source: ChannelT) -> ChannelT:
+        # The channel is not added as a subscriber of the source,
+        # as it only receives the events we dispatch to it.
+        return source._clone(is_iterator=True)  # type: ignore
+
+    async def _dispatch(self,
+                        source: ChannelT,
+                        channels: List[ChannelT]) -> None:
+        get = source.queue.get
+        queues = [channel.queue for channel in channels]
+        assert self.ordering is not None
+        ordered_by = ORDERINGS[self.ordering]
+        n = len(queues)
+        while not self.should_stop:
+            try:
+                event = await get()
+            except Exception as exc:
+                # e.g. decode errors are raised by the first actor.
+                await queues[0].throw(exc)
+            else:
+                await queues[hash(ordered_by(event)) % n].put(event)
+
     def _get_active_partitions(self) -> Optional[Set[TP]]:
         active_partitions: Optional[Set[TP]] = None
         if self.isolated_partitions:
@@ -307,6 +478,14 @@ class Agent(AgentT, Service):
         # last message processed (but not the message causing the error
         # to be raised).
         await self._stop_supervisor()
+        if self._dispatcher is not None:
+            self._dispatcher.cancel()
+            self._dispatcher = None
+        if self._executor is not None:
+            # values still being processed by the pool were not acked,
+            # but we wait for the worker processes to exit.
+            executor, self._executor = self._executor, None
+            await self.loop.run_in_executor(None, executor.shutdown)
 
     async def _stop_supervisor(self) -> None:
         if self.supervisor:
@@ -388,6 +567,11 @@ class Agent(AgentT, Service):
             'on_error': self._on_error,
             'supervisor_strategy': self.supervisor_strategy,
             'isolated_partitions': self.isolated_partitions,
+            'executor': self.executor,
+            'workers': self.workers,
+            'ordering': self.ordering,
+            'sink_batch_size': self.sink_batch_size,
+            'sink_batch_timeout': self.sink_batch_timeout,
         }
 
     def clone(self, *, cls: Type[AgentT] = None, **kwargs: Any) -> AgentT:
@@ -470,7 +654,11 @@ class Agent(AgentT, Service):
         return self.actor_from_stream(stream)
 
     def actor_from_stream(self, stream: StreamT) -> ActorRefT:
-        res = self.fun(stream)
+        res: Any
+        if self.executor is not None:
+            res = self._execute_in_executor(stream)
+        else:
+            res = self.fun(stream)
         typ = cast(Type[Actor],
                    (AwaitableActor
                     if isinstance(res, Awaitable) else AsyncIterableActor))
@@ -509,9 +697,29 @@ class Agent(AgentT, Service):
 
     def _maybe_unwrap_reply_request(self, value: V) -> Any:
         if isinstance(value, ReqRepRequest):
+            if (value.correlation_id in self._direct_requests and
+                    not self._is_direct_event()):
+                return self._drop_duplicate_request(value)
             return value.value
         return value
 
+    def _is_direct_event(self) -> bool:
+        # messages delivered by deliver_direct have no offset.
+        event = current_event()
+        return event is not None and event.message.offset < 0
+
+    async def _drop_duplicate_request(self, req: ReqRepRequest) -> Any:
+        # The asker did not get the reply to a request delivered directly
+        # (see ask), and sent it through Kafka using the same correlation
+        # id: we reply through Kafka instead of processing it again.
+        _, response = self._direct_requests[req.correlation_id]
+        if response is None:
+            # still processing: _reply sends the reply through Kafka.
+            self._direct_replies.pop(req.correlation_id, None)
+        else:
+            await self.app.send(req.reply_to, key=None, value=response)
+        raise Skip()
+
     async def _start_task(self,
                           *,
                           index: Optional[int],
@@ -536,11 +744,14 @@ class Agent(AgentT, Service):
         if isinstance(aref, Awaitable):
             # agent does not yield
             coro = aref
-            if self._sinks:
+            if self._sinks and self.executor is None:
                 raise ImproperlyConfigured('Agent must yield to use sinks')
         else:
             # agent yields and is an AsyncIterator so we have to consume it.
             coro = self._slurp(aref, aiter(aref))
+        if self.app.conf.worker_profiling:
+            # record the time spent in every step of the agent.
+            coro = self.app.profiler.profile(self.name, coro)
         task = asyncio.Task(self._execute_task(coro, aref), loop=self.loop)
         task._beacon = beacon  # type: ignore
         aref.actor_task = task
@@ -568,14 +779,148 @@ class Agent(AgentT, Service):
         # this is used when the agent returns an AsyncIterator,
         # and simply consumes that async iterator.
         stream: Optional[StreamT] = None
-        async for value in it:
-            self.log.debug('%r yielded: %r', self.fun, value)
-            if stream is None:
-                stream = res.stream.get_active_stream()
-            event = stream.current_event
-            if event is not None and isinstance(event.value, ReqRepRequest):
-                await self._reply(event.key, value, event.value)
+        async with self._buffered_sinks() as sink_buffer:
+            async for value in it:
+                self.log.debug('%r yielded: %r', self.fun, value)
+                if stream is None:
+                    stream = res.stream.get_active_stream()
+                event = stream.current_event
+                if (event is not None and
+                        isinstance(event.value, ReqRepRequest)):
+                    await self._reply(event.key, value, event.value)
+                if sink_buffer is None:
+                    await self._delegate_to_sinks(value)
+                else:
+                    await sink_buffer.add(value, event)
+
+    @asynccontextmanager
+    async def _buffered_sinks(self) -> AsyncIterator[Optional[SinkBuffer]]:
+        # Gives the buffer used to deliver values to sinks in batches,
+        # or None if sink batching is not enabled.
+        sink_buffer = self._new_sink_buffer()
+        if sink_buffer is None:
+            yield None
+            return
+        try:
+            yield sink_buffer
+        except asyncio.CancelledError:
+            # buffered values are not delivered, but the events
+            # are not acked either, so will be processed again.
+            sink_buffer.cancel()
+            raise
+        except Exception:
+            # deliver values yielded before the error,
+            # so that their events can be acked.
+            try:
+                await sink_buffer.close()
+            except Exception as exc:
+                self.log.exception('Cannot deliver to sinks: %r', exc)
+            raise
+        else:
+            await sink_buffer.close()
+
+    def _new_sink_buffer(self) -> Optional[SinkBuffer]:
+        if not self._sinks or (self.sink_batch_size is None and
+                               self.sink_batch_timeout is None):
+            return None
+        timeout = self.sink_batch_timeout
+        return SinkBuffer(
+            self.app,
+            self._delegate_many_to_sinks,
+            size=self.sink_batch_size,
+            timeout=want_seconds(timeout) if timeout is not None else None,
+            loop=self.loop,
+        )
+
+    async def _execute_in_executor(self, stream: StreamT) -> None:
+        # The agent function is a regular function called for every
+        # value in the pool, and we process up to `workers` values at a
+        # time.  The results are delivered (and the events acked) in the
+        # order the events were received for every partition, so a slow
+        # value only delays the results of the same partition.
+        executor = cast(Executor, self._executor)
+        max_pending = self.workers or os.cpu_count() or 1
+        path = f'{self.fun.__module__}:{self.fun.__qualname__}'
+        loop = self.loop
+        pending: Dict[TP, Deque[Tuple[EventT, asyncio.Future]]] = {}
+        n_pending = 0
+        stream = stream.noack()
+        events: Optional[AsyncIterator] = aiter(stream.events())
+        next_event: Optional[asyncio.Future] = None
+        async with self._buffered_sinks() as sink_buffer:
+            try:
+                while next_event is not None or pending or events is not None:
+                    if (next_event is None and events is not None and
+                            n_pending < max_pending):
+                        next_event = asyncio.ensure_future(
+                            events.__anext__(), loop=loop)
+                    waiting = [queue[0][1] for queue in pending.values()]
+                    if next_event is not None:
+                        waiting.append(next_event)
+                    await asyncio.wait(
+                        waiting,
+                        return_when=asyncio.FIRST_COMPLETED,
+                        loop=loop,
+                    )
+                    # deliver results in order for every partition
+                    for tp, queue in list(pending.items()):
+                        while queue and queue[0][1].done():
+                            event, fut = queue.popleft()
+                            n_pending -= 1
+                            await self._on_executor_result(
+                                stream, event, fut.result(), sink_buffer)
+                        if not queue:
+                            del pending[tp]
+                    if next_event is not None and next_event.done():
+                        try:
+                            event = next_event.result()
+                        except StopAsyncIteration:
+                            events = None
+                        else:
+                            tp = event.message.tp
+                            if tp not in pending:
+                                pending[tp] = deque()
+                            pending[tp].append((event, loop.run_in_executor(
+                                executor,
+                                _execute_agent_fun,
+                                path,
+                                self._maybe_unwrap_reply_request(event.value),
+                            )))
+                            n_pending += 1
+                        next_event = None
+            finally:
+                if next_event is not None:
+                    next_event.cancel()
+                for queue in pending.values():
+                    for _, fut in queue:
+                        fut.cancel()
+
+    async def _on_executor_result(
+            self,
+            stream: StreamT,
+            event: EventT,
+            value: Any,
+            sink_buffer: Optional[SinkBuffer] = None) -> None:
+        if isinstance(event.value, ReqRepRequest):
+            await self._reply(event.key, value, event.value)
+        if sink_buffer is None:
             await self._delegate_to_sinks(value)
+        else:
+            await sink_buffer.add(value, event)
+        await stream.ack(event)
+
+    async def _delegate_many_to_sinks(self, values: List[Any]) -> None:
+        # Callable sinks are called with the list of values,
+        # agents and channels are sent the values one by one.
+        for sink in self._sinks:
+            if isinstance(sink, AgentT):
+                for value in values:
+                    await sink.send(value=value)
+            elif isinstance(sink, ChannelT):
+                for value in values:
+                    await cast(TopicT, sink).send(value=value)
+            else:
+                await maybe_async(cast(Callable, sink)(values))
 
     async def _delegate_to_sinks(self, value: Any) -> None:
         for sink in self._sinks:
@@ -593,6 +938,18 @@ class Agent(AgentT, Service):
             value=value,
             correlation_id=req.correlation_id,
         )
+        direct_request = self._direct_requests.get(req.correlation_id)
+        if direct_request is not None:
+            # remember the response in case the request is also
+            # sent through Kafka, see _drop_duplicate_request.
+            self._direct_requests[req.correlation_id] = (
+                direct_request[0], response)
+        reply = self._direct_replies.pop(req.correlation_id, None)
+        if reply is not None:
+            # request was sent directly to us, see deliver_direct.
+            if not reply.done():
+                reply.set_result(response)
+            return
         await self.app.send(
             req.reply_to,
             key=None,
@@ -625,6 +982,21 @@ class Agent(AgentT, Service):
                   timestamp: float = None,
                   reply_to: ReplyToArg = None,
                   correlation_id: str = None) -> Any:
+        app = cast(App, self.app)
+        if app.conf.reply_direct and reply_to is None:
+            # the request is sent through Kafka with the same
+            # correlation id if we do not get the reply directly,
+            # so that the worker can drop it if it already got it.
+            correlation_id = correlation_id or str(uuid4())
+            response = await self._ask_direct(
+                value,
+                key=key,
+                partition=partition,
+                timestamp=timestamp,
+                correlation_id=correlation_id,
+            )
+            if response is not None:
+                return response.value
         p = await self.ask_nowait(
             value,
             key=key,
@@ -634,10 +1006,162 @@ class Agent(AgentT, Service):
             correlation_id=correlation_id,
             force=True,  # Send immediately, since we are waiting for result.
         )
-        app = cast(App, self.app)
         await app._reply_consumer.add(p.correlation_id, p)
         await app.maybe_start_client()
-        return await p
+        try:
+            return await p
+        finally:
+            if not p.done():
+                app._reply_consumer.discard([p.correlation_id])
+
+    async def _ask_direct(self,
+                          value: V = None,
+                          *,
+                          key: K = None,
+                          partition: int = None,
+                          timestamp: float = None,
+                          correlation_id: str = None,
+                          ) -> Optional[ReqRepResponse]:
+        # Send request directly to the worker processing the partition,
+        # returns None if the request must be sent through Kafka instead.
+        app = cast(App, self.app)
+        channel = self.channel
+        if (not isinstance(channel, TopicT) or channel.pattern or
+                len(channel.topics) != 1):
+            return None
+        topic = channel.get_topic_name()
+        req = self._create_req(key, value, app.conf.reply_to, correlation_id)
+        key_bytes = channel.prepare_key(key, None)
+        value_bytes = channel.prepare_value(req, None)
+        producer = await app.maybe_start_producer()
+        try:
+            if partition is None:
+                partition = producer.key_partition(topic, key_bytes).partition
+            url = app.assignor.partition_store(TP(topic, partition))
+        except (KeyError, TypeError):
+            # topic metadata not available yet, or no worker owns
+            # the partition (e.g. rebalancing).
+            return None
+        if url == app.conf.canonical_url:
+            try:
+                return await self.deliver_direct(
+                    partition, key_bytes, value_bytes,
+                    correlation_id=req.correlation_id,
+                    timestamp=timestamp,
+                )
+            except ServiceUnavailable:
+                self.log.info('Sending request through Kafka: %r', req)
+                return None
+        return await self._post_direct(
+            url, partition, key_bytes, value_bytes,
+            correlation_id=req.correlation_id,
+            timestamp=timestamp,
+        )
+
+    async def _post_direct(self,
+                           url: URL,
+                           partition: int,
+                           key: Optional[bytes],
+                           value: Optional[bytes],
+                           *,
+                           correlation_id: str,
+                           timestamp: float = None,
+                           ) -> Optional[ReqRepResponse]:
+        app = self.app
+        params = {'correlation_id': correlation_id}
+        if key is not None:
+            params['key'] = b64encode(key).decode()
+        if timestamp is not None:
+            params['timestamp'] = str(timestamp)
+        try:
+            payload = await asyncio.wait_for(
+                self._post_direct_request(
+                    url.with_path(f'/agents/{self.name}/ask/{partition}/'),
+                    params, value),
+                timeout=app.conf.reply_direct_timeout,
+                loop=self.loop,
+            )
+        except (ClientError, asyncio.TimeoutError) as exc:
+            # worker not reachable, or did not reply in time.
+            self.log.info('Sending request through Kafka: %r', exc)
+            return None
+        if payload is None:
+            return None
+        return app.serializers.loads_value(ReqRepResponse, payload)
+
+    async def _post_direct_request(self,
+                                   url: URL,
+                                   params: Mapping[str, str],
+                                   value: Optional[bytes]) -> Optional[bytes]:
+        async with self.app.http_client.post(
+                url, params=params, data=value) as response:
+            if response.status == HTTPStatus.SERVICE_UNAVAILABLE:
+                # partition moved to another worker.
+                return None
+            response.raise_for_status()
+            return await response.read()
+
+    async def deliver_direct(self,
+                             partition: int,
+                             key: Optional[bytes],
+                             value: Optional[bytes],
+                             *,
+                             correlation_id: str,
+                             timestamp: float = None) -> ReqRepResponse:
+        """Process request sent directly to this worker by :meth:`ask`.
+
+        The request is delivered to the streams reading from the
+        agent topic partition like any other message, but it's not
+        written to the topic and its offset is never committed.
+
+        If the asker does not get the reply it sends the request
+        through Kafka with the same correlation id, and this worker
+        then replies through Kafka instead of processing it again.
+
+        Raises:
+            ServiceUnavailable: if the partition is not assigned
+                to this worker, or the agent did not reply within
+                :setting:`reply_direct_timeout` seconds.
+        """
+        topic = cast(TopicT, self.channel).get_topic_name()
+        tp = TP(topic, partition)
+        if not self.app.assignor.is_active(tp):
+            raise ServiceUnavailable()
+        message = Message(
+            topic, partition, -1,
+            timestamp if timestamp is not None else time(),
+            0, key, value, None,
+            tp=tp,
+        )
+        reply = self._direct_replies[correlation_id] = asyncio.Future(
+            loop=self.loop)
+        self._remember_direct_request(correlation_id)
+        try:
+            await cast(Conductor, self.app.topics).on_message(message)
+            return await asyncio.wait_for(
+                reply,
+                timeout=self.app.conf.reply_direct_timeout,
+                loop=self.loop,
+            )
+        except asyncio.TimeoutError:
+            raise ServiceUnavailable()
+        finally:
+            self._direct_replies.pop(correlation_id, None)
+
+    def _remember_direct_request(self, correlation_id: str) -> None:
+        requests = self._direct_requests
+        now = monotonic()
+        # requests are ordered by expiry time.
+        while requests:
+            oldest, (expires, _) = next(iter(requests.items()))
+            if expires > now:
+                break
+            del requests[oldest]
+        requests[correlation_id] = (
+            now + self.app.conf.reply_direct_timeout +
+            self.direct_request_expires,
+            None,
+        )
 
     async def ask_nowait(self,
                          value: V = None,
@@ -734,22 +1258,28 @@ class Agent(AgentT, Service):
         # BarrierState is the promise that keeps track of pending results.
         # It contains a list of individual ReplyPromises.
         barrier = BarrierState(reply_to)
+        sent: List[str] = []
 
-        async for _ in self._barrier_send(barrier, items, reply_to):
-            # Now that we've sent a message, try to see if we have any
-            # replies.
-            try:
-                _, val = barrier.get_nowait()
-            except asyncio.QueueEmpty:
-                pass
-            else:
-                yield val
-        # All the messages have been sent so finalize the barrier.
-        barrier.finalize()
-
-        # Then iterate over the results in the group.
-        async for _, value in barrier.iterate():
-            yield value
+        try:
+            async for correlation_id in self._barrier_send(
+                    barrier, items, reply_to):
+                sent.append(correlation_id)
+                # Now that we've sent a message, try to see if we have any
+                # replies.
+                try:
+                    _, val = barrier.get_nowait()
+                except asyncio.QueueEmpty:
+                    pass
+                else:
+                    yield val
+            # All the messages have been sent so finalize the barrier.
+            barrier.finalize()
+
+            # Then iterate over the results in the group.
+            async for _, value in barrier.iterate():
+                yield value
+        finally:
+            self._discard_replies(barrier, sent)
 
     async def join(self,
                    values: Union[AsyncIterable[V], Iterable[V]],
@@ -769,17 +1299,19 @@ class Agent(AgentT, Service):
         barrier = BarrierState(reply_to)
 
         # Map correlation_id -> index
-        posindex: MutableMapping[str, int] = {
-            cid: i
+        posindex: MutableMapping[str, int] = {}
+        try:
             async for i, cid in aenumerate(
-                self._barrier_send(barrier, items, reply_to))
-        }
+                    self._barrier_send(barrier, items, reply_to)):
+                posindex[cid] = i
 
-        # All the messages have been sent so finalize the barrier.
-        barrier.finalize()
+            # All the messages have been sent so finalize the barrier.
+            barrier.finalize()
 
-        # wait until all replies received
-        await barrier
+            # wait until all replies received
+            await barrier
+        finally:
+            self._discard_replies(barrier, posindex)
         # then construct a list in the correct order.
         values: List = [None] * barrier.total
         async for correlation_id, value in barrier.iterate():
@@ -789,26 +1321,42 @@ class Agent(AgentT, Service):
     async def _barrier_send(
             self, barrier: BarrierState,
             items: Union[AsyncIterable[Tuple[K, V]], Iterable[Tuple[K, V]]],
-            reply_to: ReplyToArg) -> AsyncIterator[str]:  # pragma: no cover
-        # map: send many tasks to agents
+            reply_to: ReplyToArg) -> AsyncIterator[str]:
+        # map: send many tasks to agents, in batches of map_batch_size,
         # while trying to pop incoming results off.
-        async for key, value in aiter(items):
-            correlation_id = str(uuid4())
-            p = await self.ask_nowait(
-                key=key,
-                value=value,
-                reply_to=reply_to,
-                correlation_id=correlation_id)
-            # add reply promise to the barrier
-            barrier.add(p)
-
-            # the ReplyConsumer will call the barrier whenever a new
-            # result comes in.
-            app = cast(App, self.app)
-            await app.maybe_start_client()
-            await app._reply_consumer.add(p.correlation_id, barrier)
-
-            yield correlation_id
+        app = cast(App, self.app)
+        await app.maybe_start_client()
+        reply_consumer = app._reply_consumer
+        topic_name = self._get_strtopic(reply_to)
+        # One uuid per map operation, the requests are numbered.
+        prefix = str(uuid4())
+        n = 0
+        async for batch in chunks(aiter(items), self.map_batch_size):
+            correlation_ids = [f'{prefix}-{i}'
+                               for i in range(n, n + len(batch))]
+            n += len(batch)
+            # The ReplyConsumer will call the barrier whenever a new
+            # result comes in: register before sending so that
+            # a fast reply cannot arrive before we are waiting for it.
+            await reply_consumer.add_many(correlation_ids, barrier)
+            barrier.add_many(len(batch))
+            await self.channel.send_many([
+                (key, self._request_class(value)(
+                    value=value,
+                    reply_to=topic_name,
+                    correlation_id=correlation_id,
+                ))
+                for (key, value), correlation_id in zip(
+                    batch, correlation_ids)
+            ])
+            for correlation_id in correlation_ids:
+                yield correlation_id
+
+    def _discard_replies(self, barrier: BarrierState,
+                         correlation_ids: Iterable[str]) -> None:
+        # Stop waiting for the replies of an abandoned map operation.
+        if not barrier.done():
+            cast(App, self.app)._reply_consumer.discard(correlation_ids)
 
     def _repr_info(self) -> str:
         return shorten_fqdn(self.name)
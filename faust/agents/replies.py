@@ -1,15 +1,15 @@
 """Agent replies: waiting for replies, sending them, etc."""
 import asyncio
-from collections import defaultdict
 from typing import (
     Any,
     AsyncIterator,
+    Iterable,
     MutableMapping,
     MutableSet,
     NamedTuple,
     Optional,
+    Union,
 )
-from weakref import WeakSet
 from mode import Service
 from faust.types import AppT, ChannelT, TopicT
 from .models import ReqRepResponse
@@ -80,6 +80,10 @@ class BarrierState(asyncio.Future):
         self.pending.add(p)
         self.size += 1
 
+    def add_many(self, n: int) -> None:
+        """Add ``n`` requests sent without an individual promise."""
+        self.size += n
+
     def finalize(self) -> None:
         self.total = self.size
         # The barrier may have been filled up already at this point,
@@ -112,15 +116,25 @@ class BarrierState(asyncio.Future):
                 break
 
 
+#: Anything waiting for a reply: a single promise, or a barrier
+#: waiting for a group of replies.
+Waiter = Union[ReplyPromise, BarrierState]
+
+
 class ReplyConsumer(Service):
-    """Consumer responsible for redelegation of replies received."""
+    """Consumer responsible for redelegation of replies received.
+
+    Every correlation id maps to exactly one waiter, that is removed
+    when the reply is received (or when the waiter is discarded),
+    so delivering a reply is a single dictionary lookup.
+    """
 
-    _waiting: MutableMapping[str, MutableSet[ReplyPromise]]
+    _waiting: MutableMapping[str, Waiter]
     _fetchers: MutableMapping[str, Optional[asyncio.Future]]
 
     def __init__(self, app: AppT, **kwargs: Any) -> None:
         self.app = app
-        self._waiting = defaultdict(WeakSet)
+        self._waiting = {}
         self._fetchers = {}
         super().__init__(**kwargs)
 
@@ -128,11 +142,26 @@ class ReplyConsumer(Service):
         if self.app.conf.reply_create_topic:
             await self._start_fetcher(self.app.conf.reply_to)
 
-    async def add(self, correlation_id: str, promise: ReplyPromise) -> None:
+    async def add(self, correlation_id: str, promise: Waiter) -> None:
         reply_topic = promise.reply_to
         if reply_topic not in self._fetchers:
             await self._start_fetcher(reply_topic)
-        self._waiting[correlation_id].add(promise)
+        self._waiting[correlation_id] = promise
+
+    async def add_many(self,
+                       correlation_ids: Iterable[str],
+                       promise: Waiter) -> None:
+        """Register the same waiter for many correlation ids at once."""
+        reply_topic = promise.reply_to
+        if reply_topic not in self._fetchers:
+            await self._start_fetcher(reply_topic)
+        self._waiting.update(dict.fromkeys(correlation_ids, promise))
+
+    def discard(self, correlation_ids: Iterable[str]) -> None:
+        """Stop waiting for replies to these correlation ids."""
+        pop = self._waiting.pop
+        for correlation_id in correlation_ids:
+            pop(correlation_id, None)
 
     async def _start_fetcher(self, topic_name: str) -> None:
         if topic_name not in self._fetchers:
@@ -147,8 +176,12 @@ class ReplyConsumer(Service):
                 self._drain_replies(topic))
 
     async def _drain_replies(self, channel: ChannelT) -> None:
+        pop = self._waiting.pop
         async for reply in channel.stream():
-            for promise in self._waiting[reply.correlation_id]:
+            # Replies that nobody is waiting for (e.g. duplicates
+            # redelivered after a crash) are ignored.
+            promise = pop(reply.correlation_id, None)
+            if promise is not None and not promise.done():
                 promise.fulfill(reply.correlation_id, reply.value)
 
     def _reply_topic(self, topic: str) -> TopicT:
@@ -0,0 +1,119 @@
+"""Delivering values yielded by agents to sinks in batches."""
+import asyncio
+from typing import Any, Awaitable, Callable, List, Optional
+
+from faust.types import AppT, EventT
+
+__all__ = ['SinkBuffer']
+
+
+class SinkBuffer:
+    """Buffer values yielded by an actor, and deliver them in batches.
+
+    The buffer is flushed when it contains ``size`` values, or
+    ``timeout`` seconds after the first value was added.
+
+    The events the values were yielded for are only acknowledged
+    after the values are delivered, so that they are processed
+    again if the worker crashes before the buffer is flushed.
+
+    If delivering the values raises an exception, the events are
+    acknowledged only when ``ack_exceptions`` is enabled (the
+    :setting:`stream_ack_exceptions` setting by default), same as
+    for events raising an exception in the stream.
+    """
+
+    #: Value of the last exception raised while flushing in the
+    #: background, raised again by the next call to :meth:`add`.
+    error: Optional[BaseException] = None
+
+    _timer: Optional[asyncio.Future] = None
+
+    def __init__(self,
+                 app: AppT,
+                 deliver: Callable[[List[Any]], Awaitable[None]],
+                 *,
+                 size: int = None,
+                 timeout: float = None,
+                 ack_exceptions: bool = None,
+                 loop: asyncio.AbstractEventLoop = None) -> None:
+        self.app = app
+        self.deliver = deliver
+        self.size = size
+        self.timeout = timeout
+        self.ack_exceptions = (
+            ack_exceptions if ack_exceptions is not None
+            else app.conf.stream_ack_exceptions)
+        self.loop = loop or asyncio.get_event_loop()
+        self.values: List[Any] = []
+        self.events: List[EventT] = []
+        self._flushing = asyncio.Lock(loop=self.loop)
+
+    async def add(self, value: Any, event: Optional[EventT]) -> None:
+        """Add value yielded while processing event to the buffer."""
+        self._maybe_raise()
+        self.values.append(value)
+        if event is not None:
+            # keep message from being acked until value delivered.
+            event.message.incref()
+            self.events.append(event)
+        if self.size is not None and len(self.values) >= self.size:
+            await self.flush()
+        elif self.timeout is not None and self._timer is None:
+            self._timer = self.app.add_future(
+                self._flush_after(self.timeout))
+
+    async def flush(self) -> None:
+        """Deliver all buffered values, and ack their events."""
+        timer, self._timer = self._timer, None
+        if timer is not None and timer is not asyncio.Task.current_task(
+                loop=self.loop):
+            timer.cancel()
+        async with self._flushing:
+            values, self.values = self.values, []
+            events, self.events = self.events, []
+            if values:
+                try:
+                    await self.deliver(values)
+                except Exception:
+                    # same as for events raising in the stream,
+                    # events not acked are processed again later.
+                    if self.ack_exceptions:
+                        self._ack_all(events)
+                    raise
+            self._ack_all(events)
+
+    async def close(self) -> None:
+        """Flush the buffer for the last time."""
+        await self.flush()
+        self._maybe_raise()
+
+    def cancel(self) -> None:
+        """Stop without delivering the values in the buffer."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+    async def _flush_after(self, timeout: float) -> None:
+        await asyncio.sleep(timeout, loop=self.loop)
+        try:
+            await self.flush()
+        except Exception as exc:
+            self.error = exc
+
+    def _ack_all(self, events: List[EventT]) -> None:
+        for event in events:
+            self._ack(event)
+
+    def _ack(self, event: EventT) -> None:
+        # the stream already acked the event, so this releases the
+        # reference we added, and is the last ack for the message.
+        message = event.message
+        if event.ack():
+            self.app.sensors.on_message_out(
+                message.tp, message.offset, message)
+
+    def _maybe_raise(self) -> None:
+        error, self.error = self.error, None
+        if error is not None:
+            raise error
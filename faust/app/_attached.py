@@ -1,16 +1,16 @@
 import asyncio
 import typing
-from collections import defaultdict
-from heapq import heappop, heappush
+from collections import defaultdict, deque
 from typing import (
-    Awaitable, Callable, Iterator, List,
-    MutableMapping, NamedTuple, Union, cast,
+    Awaitable, Callable, Deque, Iterator, List,
+    Mapping, MutableMapping, NamedTuple, Union, cast,
 )
 
-from mode.utils.objects import Unordered, cached_property
+from mode.utils.objects import cached_property
 
 from faust.streams import current_event
 from faust.types import AppT, ChannelT, CodecArg, K, RecordMetadata, TP, V
+from faust.types.topics import TopicT
 from faust.types.tuples import FutureMessage, Message, MessageSentCallback
 
 if typing.TYPE_CHECKING:
@@ -22,7 +22,7 @@ __all__ = ['Attachment', 'Attachments']
 
 
 class Attachment(NamedTuple):
-    # Tuple used in heapq entry for Attachments._pending
+    # Tuple used as entry in the Attachments._pending queues.
     # These are used to delay producing of messages until source offset is
     # committed:
     #
@@ -39,7 +39,7 @@ class Attachment(NamedTuple):
     # Note though: we need Kafka transactions to cover all cases of
     # inconsistencies.
     offset: int
-    message: Unordered[FutureMessage]
+    message: FutureMessage
 
 
 class Attachments:
@@ -49,18 +49,22 @@ class Attachments:
     # only when the source message is acked, only then do we publish
     # its attached messages.
     #
-    # The mapping maintains one list for each TopicPartition,
-    # where the lists are used as heap queues containing tuples
-    # of ``(source_message_offset, FutureMessage)``.
-    _pending: MutableMapping[TP, List[Attachment]]
+    # The mapping maintains one deque for each TopicPartition,
+    # containing tuples of ``(source_message_offset, FutureMessage)``
+    # in the order they were attached.
+    _pending: MutableMapping[TP, Deque[Attachment]]
 
     def __init__(self, app: AppT) -> None:
         self.app = app
-        self._pending = defaultdict(list)
+        self._pending = defaultdict(deque)
 
     @cached_property
     def enabled(self) -> bool:
-        return self.app.conf.stream_publish_on_commit
+        conf = self.app.conf
+        # with exactly-once processing messages are sent as part of
+        # the open transaction, so there is no need to buffer them.
+        return (conf.stream_publish_on_commit and
+                conf.processing_guarantee != 'exactly_once')
 
     async def maybe_put(self,
                         channel: Union[ChannelT, str],
@@ -76,11 +80,13 @@ class Attachments:
         # have Kafka transaction support (:kip:`KIP-98`).
         # This is why the interface related to attaching is private.
 
-        # attach message to current event if there is one.
+        # attach message to current event if there is one,
+        # and the offset of the event will be committed (events
+        # sent directly to an agent are never committed).
         send: Callable = self.app.send
         if self.enabled and not force:
             event = current_event()
-            if event is not None:
+            if event is not None and event.message.use_tracking:
                 return cast(Event, event)._attach(
                     channel,
                     key,
@@ -115,19 +121,14 @@ class Attachments:
         # This attaches message to be published when source message' is
         # acknowledged.  To be replaced by transactions in :kip:`KIP-98`.
 
-        # get heap queue for this TopicPartition
-        # items in this list are ``(source_offset, Unordered[FutureMessage])``
-        # tuples.
+        # get queue for this TopicPartition
+        # items in this deque are ``(source_offset, FutureMessage)`` tuples.
         buf = self._pending[message.tp]
         chan = self.app.topic(channel) if isinstance(channel, str) else channel
         fut = chan.as_future_message(
             key, value, partition, timestamp,
             key_serializer, value_serializer, callback)
-        # Note: Since FutureMessage have members that are unhashable
-        # we wrap it in an Unordered object to stop heappush from crashing.
-        # Unordered simply orders by random order, which is fine
-        # since offsets are always unique.
-        heappush(buf, Attachment(message.offset, Unordered(fut)))
+        buf.append(Attachment(message.offset, fut))
         return fut
 
     async def commit(self, tp: TP, offset: int) -> None:
@@ -140,30 +141,40 @@ class Attachments:
     async def publish_for_tp_offset(
             self, tp: TP, offset: int) -> List[Awaitable[RecordMetadata]]:
         # publish pending messages attached to this TP+offset
-
-        # make shallow copy to allow concurrent modifications (append)
-        attached = list(self._attachments_for(tp, offset))
-        return [
-            await fut.message.channel.publish_message(fut, wait=False)
-            for fut in attached
-        ]
+        return await self.publish_for_tp_offsets({tp: offset})
+
+    async def publish_for_tp_offsets(
+            self,
+            offsets: Mapping[TP, int]) -> List[Awaitable]:
+        # publish pending messages attached to these TP+offsets,
+        # using one batch for every channel we publish to.
+        # Returns futures resolving to the RecordMetadata of a message,
+        # or to the list of RecordMetadata of a batch.
+        by_channel: MutableMapping[ChannelT, List[FutureMessage]]
+        by_channel = defaultdict(list)
+        # we take all the messages before publishing anything,
+        # to allow concurrent modifications (append).
+        for tp, offset in offsets.items():
+            for fut in self._attachments_for(tp, offset):
+                by_channel[fut.message.channel].append(fut)
+        pending: List[Awaitable] = []
+        for channel, futs in by_channel.items():
+            if isinstance(channel, TopicT):
+                pending.append(await channel.publish_many(futs))
+            else:
+                pending.extend([
+                    await channel.publish_message(fut, wait=False)
+                    for fut in futs
+                ])
+        return pending
 
     def _attachments_for(self, tp: TP,
                          commit_offset: int) -> Iterator[FutureMessage]:
         # Return attached messages for TopicPartition within committed offset.
+        # Events in a partition are usually processed in order, so the
+        # offsets in the queue are increasing.  If not (agent concurrency),
+        # we stop at the first message attached to an offset not yet
+        # committed: later messages are delayed, but never sent early.
         attached = self._pending.get(tp)
-        while attached:
-            # get the entry with the smallest offset in this TP
-            entry = heappop(attached)
-
-            # if the entry offset is smaller or equal to the offset
-            # being committed
-            if entry[0] <= commit_offset:
-                # we use it by extracting the FutureMessage
-                # from Attachment tuple, where entry.message is
-                # Unordered[FutureMessage].
-                yield entry.message.value
-            else:
-                # else we put it back and exit (this was the smallest offset).
-                heappush(attached, entry)
-                break
+        while attached and attached[0].offset <= commit_offset:
+            yield attached.popleft().message
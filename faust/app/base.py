@@ -51,7 +51,7 @@ from faust.agents import (
 from faust.channels import Channel, ChannelT
 from faust.exceptions import ConsumerNotStarted, ImproperlyConfigured, SameNode
 from faust.fixups import FixupT, fixups
-from faust.sensors import Monitor, SensorDelegate
+from faust.sensors import Monitor, Profiler, SensorDelegate
 from faust.utils import cron, venusian
 from faust.web import drivers as web_drivers
 from faust.web.cache import backends as cache_backends
@@ -478,6 +478,8 @@ class App(AppT, Service):
         self.monitor.beacon.reattach(self.beacon)
         self.monitor.loop = self.loop
         self.sensors.add(self.monitor)
+        if self.conf.worker_profiling:
+            self.sensors.add(self.profiler)
 
         if self.producer_only:
             return self.boot_strategy.producer_only()
@@ -488,6 +490,11 @@ class App(AppT, Service):
 
     async def on_first_start(self) -> None:
         self._create_directories()
+        if not self.producer_only and not self.client_only:
+            # start process pools of agents before any other
+            # service starts threads (see Agent.start_executor).
+            for agent in self.agents.values():
+                await agent.start_executor()
 
     async def on_start(self) -> None:
         self.finalize()
@@ -512,6 +519,16 @@ class App(AppT, Service):
             return await self.wait_for_stopped(self.tables.recovery.completed)
         return False
 
+    @Service.task
+    async def _sensor_batch_flusher(self) -> None:
+        # Sensors with batched=True receive events aggregated
+        # over the sensor_batch_interval, instead of per-message hooks.
+        flush_batch = self.sensors.flush_batch
+        interval = self.conf.sensor_batch_interval
+        while not self.should_stop:
+            await self.sleep(interval)
+            flush_batch()
+
     async def on_started_init_extra_tasks(self) -> None:
         for task in self._tasks:
             self.add_future(task())
@@ -736,6 +753,14 @@ class App(AppT, Service):
                 async for number in requests:
                     yield number * 2
 
+        Or, using ``executor='process'``, a regular function called for
+        every value in a pool of ``workers`` processes, to keep CPU-bound
+        work from blocking the event loop::
+
+            @app.agent(executor='process', workers=4)
+            def my_agent(number):
+                return number * 2
+
         """
 
         def _inner(fun: AgentFun) -> AgentT:
@@ -1348,7 +1373,7 @@ class App(AppT, Service):
     def _create_directories(self) -> None:
         self.conf.datadir.mkdir(exist_ok=True)
         self.conf.appdir.mkdir(exist_ok=True)
-        self.conf.tabledir.mkdir(exist_ok=True)
+        self.conf.tabledir.mkdir(parents=True, exist_ok=True)
 
     def __repr__(self) -> str:
         return APP_REPR.format(
@@ -1499,6 +1524,19 @@ class App(AppT, Service):
     def monitor(self, monitor: Monitor) -> None:
         self._monitor = monitor
 
+    @cached_property
+    def profiler(self) -> Profiler:
+        """Profiler measuring event loop lag and agent CPU time.
+
+        Only started by the worker if :setting:`worker_profiling`
+        is enabled.
+        """
+        return Profiler(
+            interval=self.conf.worker_profiling_interval,
+            loop=self.loop,
+            beacon=self.beacon,
+        )
+
     @cached_property
     def _fetcher(self) -> ServiceT:
         """Fetcher helps Kafka Consumer retrieve records in topics."""
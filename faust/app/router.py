@@ -1,5 +1,6 @@
 """Route messages to Faust nodes by partitioning."""
-from typing import Tuple
+import asyncio
+from typing import List, MutableMapping, Tuple
 from yarl import URL
 from faust.exceptions import SameNode
 from faust.types.app import AppT
@@ -10,15 +11,24 @@ from faust.types.tables import CollectionT
 from faust.types.web import Request, Response, Web
 from faust.web.exceptions import ServiceUnavailable
 
+#: Keys waiting to be looked up in one request, mapped to their result.
+KeyBatch = MutableMapping[str, asyncio.Future]
+
 
 class Router(RouterT):
     """Router for ``app.router``."""
 
+    #: Max number of keys looked up in a single request by
+    #: :meth:`route_key_req`.
+    max_batch_size: int = 1000
+
     _assignor: PartitionAssignorT
+    _batches: MutableMapping[Tuple[Tuple[str, int], str], KeyBatch]
 
     def __init__(self, app: AppT) -> None:
         self.app = app
         self._assignor = self.app.assignor
+        self._batches = {}
 
     def key_store(self, table_name: str, key: K) -> URL:
         table = self._get_table(table_name)
@@ -48,17 +58,88 @@ class Router(RouterT):
     async def route_req(self, table_name: str, key: K, web: Web,
                         request: Request) -> Response:
         app = self.app
+        dest_url = self._get_dest_url(table_name, key)
+        host, port = self._urlident(dest_url)
+        routed_url = request.url.with_host(host).with_port(int(port))
+        async with app.http_client.get(routed_url) as response:
+            return web.bytes(
+                await response.read(),
+                content_type=response.content_type,
+                status=response.status,
+            )
+
+    async def route_key_req(self, table_name: str, key: str,
+                            web: Web) -> Response:
+        """Get the value of a table key from the node that owns it.
+
+        Lookups for keys stored on the same node that happen
+        concurrently are sent together in one request to the
+        table detail endpoint of that node, and lookups for the
+        same key share the same result.
+
+        Raises:
+            SameNode: if the key is stored on this node.
+            KeyError: if the key is not in the table.
+        """
+        dest_url = self._get_dest_url(table_name, key)
+        batch_key = (self._urlident(dest_url), table_name)
+        batch = self._batches.get(batch_key)
+        if batch is None:
+            batch = self._batches[batch_key] = {}
+            (host, port), _ = batch_key
+            url = URL.build(
+                scheme=dest_url.scheme or 'http',
+                host=host,
+                port=port,
+                path=web.url_for('tables:detail', name=table_name),
+            )
+            self.app.add_future(self._route_batch(url, batch_key, batch))
+        fut = batch.get(key)
+        if fut is None:
+            fut = batch[key] = self.app.loop.create_future()
+            if len(batch) >= self.max_batch_size:
+                # batch is full: further lookups will start a new one.
+                del self._batches[batch_key]
+        # shielded as the result is shared by all requests for this key.
+        value = await asyncio.shield(fut)
+        return web.bytes(value, content_type='application/json')
+
+    async def _route_batch(self, url: URL,
+                           batch_key: Tuple[Tuple[str, int], str],
+                           batch: KeyBatch) -> None:
+        if self._batches.get(batch_key) is batch:
+            del self._batches[batch_key]
+        keys: List[str] = list(batch)
+        try:
+            # The connection pool of app.http_client keeps connections
+            # to every node alive, and batching means there's usually
+            # only one request in flight per node and table.
+            async with self.app.http_client.post(url, json=keys) as response:
+                response.raise_for_status()
+                values = (await response.read()).split(b'\n')
+        except Exception as exc:
+            for fut in batch.values():
+                if not fut.done():
+                    fut.set_exception(exc)
+        else:
+            for i, key in enumerate(keys):
+                fut = batch[key]
+                value = values[i] if i < len(values) else None
+                if not fut.done():
+                    if value:
+                        fut.set_result(value)
+                    else:
+                        fut.set_exception(KeyError(key))
+
+    def _get_dest_url(self, table_name: str, key: K) -> URL:
         try:
-            dest_url: URL = app.router.key_store(table_name, key)
+            dest_url: URL = self.app.router.key_store(table_name, key)
         except KeyError:
             raise ServiceUnavailable()
-        dest_ident = (host, port) = self._urlident(dest_url)
-        if dest_ident == self._urlident(app.conf.canonical_url):
+        if self._urlident(dest_url) == self._urlident(
+                self.app.conf.canonical_url):
             raise SameNode()
-        routed_url = request.url.with_host(host).with_port(int(port))
-        async with app.http_client.get(routed_url) as response:
-            return web.text(
-                await response.text(), content_type=response.content_type)
+        return dest_url
 
     def _urlident(self, url: URL) -> Tuple[str, int]:
         return (
@@ -1,6 +1,6 @@
 """Client Assignment."""
 import copy
-from typing import List, MutableMapping, Sequence, Set, Tuple
+from typing import List, MutableMapping, Optional, Sequence, Set, Tuple
 from faust.models import Record
 from faust.types import TP
 from faust.types.assignor import HostToPartitionMap
@@ -152,3 +152,7 @@ class ClientMetadata(Record,
     assignment: ClientAssignment
     url: str
     changelog_distribution: HostToPartitionMap
+
+    #: Partitions of agent topics by host URL,
+    #: only when the :setting:`reply_direct` setting is enabled.
+    agent_distribution: Optional[HostToPartitionMap] = None
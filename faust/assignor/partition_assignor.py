@@ -1,7 +1,15 @@
 """Partition assignor."""
 import zlib
 from collections import defaultdict
-from typing import Iterable, List, MutableMapping, Sequence, Set, cast
+from typing import (
+    Iterable,
+    List,
+    MutableMapping,
+    Optional,
+    Sequence,
+    Set,
+    cast,
+)
 
 from rhkafka.cluster import ClusterMetadata
 from rhkafka.coordinator.assignors.abstract import AbstractPartitionAssignor
@@ -61,6 +69,7 @@ class PartitionAssignor(AbstractPartitionAssignor, PartitionAssignorT):
     _table_manager: TableManagerT
     _member_urls: MutableMapping[str, str]
     _changelog_distribution: HostToPartitionMap
+    _agent_distribution: HostToPartitionMap
     _active_tps: Set[TP]
     _standby_tps: Set[TP]
     _tps_url: MutableMapping[TP, str]
@@ -71,6 +80,7 @@ class PartitionAssignor(AbstractPartitionAssignor, PartitionAssignorT):
         self._table_manager = self.app.tables
         self._assignment = ClientAssignment(actives={}, standbys={})
         self._changelog_distribution = {}
+        self._agent_distribution = {}
         self.replicas = replicas
         self._member_urls = {}
         self._tps_url = {}
@@ -84,9 +94,23 @@ class PartitionAssignor(AbstractPartitionAssignor, PartitionAssignorT):
     @changelog_distribution.setter
     def changelog_distribution(self, value: HostToPartitionMap) -> None:
         self._changelog_distribution = value
+        self._update_tps_url()
+
+    @property
+    def agent_distribution(self) -> HostToPartitionMap:
+        return self._agent_distribution
+
+    @agent_distribution.setter
+    def agent_distribution(self, value: HostToPartitionMap) -> None:
+        self._agent_distribution = value
+        self._update_tps_url()
+
+    def _update_tps_url(self) -> None:
         self._tps_url = {
             TP(topic, partition): url
-            for url, tps in self._changelog_distribution.items()
+            for distribution in (self._changelog_distribution,
+                                 self._agent_distribution)
+            for url, tps in distribution.items()
             for topic, partitions in tps.items() for partition in partitions
         }
 
@@ -111,6 +135,7 @@ class PartitionAssignor(AbstractPartitionAssignor, PartitionAssignorT):
         self._active_tps = self._assignment.active_tps
         self._standby_tps = self._assignment.standby_tps
         self.changelog_distribution = metadata.changelog_distribution
+        self.agent_distribution = metadata.agent_distribution or {}
         a = sorted(assignment.assignment)
         b = sorted(
             self._assignment.kafka_protocol_assignment(self._table_manager))
@@ -219,13 +244,17 @@ class PartitionAssignor(AbstractPartitionAssignor, PartitionAssignorT):
                         copart_assn)
 
         changelog_distribution = self._get_changelog_distribution(assignments)
-        res = self._protocol_assignments(assignments, changelog_distribution)
+        agent_distribution = self._get_agent_distribution(assignments)
+        res = self._protocol_assignments(
+            assignments, changelog_distribution, agent_distribution)
         return res
 
     def _protocol_assignments(
             self,
             assignments: ClientAssignmentMapping,
-            cl_distribution: HostToPartitionMap) -> MemberAssignmentMapping:
+            cl_distribution: HostToPartitionMap,
+            agent_distribution: HostToPartitionMap = None,
+    ) -> MemberAssignmentMapping:
         return {
             client: ConsumerProtocolMemberAssignment(
                 self.version,
@@ -236,6 +265,7 @@ class PartitionAssignor(AbstractPartitionAssignor, PartitionAssignorT):
                         assignment=assignment,
                         url=self._member_urls[client],
                         changelog_distribution=cl_distribution,
+                        agent_distribution=agent_distribution,
                     ).dumps(),
                 ),
             )
@@ -267,6 +297,24 @@ class PartitionAssignor(AbstractPartitionAssignor, PartitionAssignorT):
             for client, assignment in assignments.items()
         }
 
+    def _get_agent_distribution(
+            self,
+            assignments: ClientAssignmentMapping,
+    ) -> Optional[HostToPartitionMap]:
+        # Only needed to route requests sent directly to agents.
+        if not self.app.conf.reply_direct:
+            return None
+        topics = {
+            topic
+            for agent in self.app.agents.values()
+            for topic in agent.get_topic_names()
+        }
+        return {
+            self._member_urls[client]: self._topics_filtered(
+                assignment.actives, topics)
+            for client, assignment in assignments.items()
+        }
+
     @property
     def name(self) -> str:
         return 'faust'
@@ -301,6 +349,9 @@ class PartitionAssignor(AbstractPartitionAssignor, PartitionAssignorT):
     def key_store(self, topic: str, key: bytes) -> URL:
         return URL(self._tps_url[self.app.producer.key_partition(topic, key)])
 
+    def partition_store(self, tp: TP) -> URL:
+        return URL(self._tps_url[tp])
+
     def is_active(self, tp: TP) -> bool:
         return tp in self._active_tps
 
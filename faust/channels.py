@@ -11,10 +11,13 @@ from typing import (
     Any,
     Awaitable,
     Callable,
+    Iterable,
+    List,
     Mapping,
     MutableSet,
     Optional,
     Set,
+    Tuple,
     cast,
 )
 from weakref import WeakSet
@@ -170,6 +173,31 @@ class Channel(ChannelT):
             callback=callback,
         )
 
+    async def send_many(
+            self,
+            items: Iterable[Tuple[K, V]],
+            *,
+            partition: int = None,
+            timestamp: float = None,
+            key_serializer: CodecArg = None,
+            value_serializer: CodecArg = None,
+            callback: MessageSentCallback = None,
+            force: bool = False) -> List[Awaitable[RecordMetadata]]:
+        """Send many ``(key, value)`` messages to channel."""
+        return [
+            await self.send(
+                key=key,
+                value=value,
+                partition=partition,
+                timestamp=timestamp,
+                key_serializer=key_serializer,
+                value_serializer=value_serializer,
+                callback=callback,
+                force=force,
+            )
+            for key, value in items
+        ]
+
     def as_future_message(
             self,
             key: K = None,
@@ -3,14 +3,23 @@ import asyncio
 import os
 import platform
 import socket
+import warnings
 from typing import Any, List, Optional, cast
 
+import click
 from mode import ServiceT, Worker
 from mode.utils.imports import symbol_by_name
 from mode.utils.logging import level_name
 from yarl import URL
 
-from faust.types._env import WEB_BIND, WEB_PORT, WEB_TRANSPORT
+from faust.exceptions import AlreadyConfiguredWarning
+from faust.types._env import (
+    WEB_BIND,
+    WEB_PORT,
+    WEB_TRANSPORT,
+    WORKER_PROCESS,
+)
+from faust.worker import ProcessSupervisor
 
 from . import params
 from .base import AppCommand, now_builtin_worker_options, option
@@ -44,17 +53,44 @@ class worker(AppCommand):
                default=socket.gethostname(), type=str,
                help=f'Canonical host name for the web server '
                     f'(default: {WEB_BIND})'),
+        option('--profile/--no-profile',
+               default=None,
+               help='Measure event loop lag and CPU time by agent.'),
+        option('--profile-interval',
+               default=None, type=float,
+               help='when --profile: How often to measure event loop lag.'),
+        option('--processes',
+               default=None, type=click.IntRange(min=1),
+               help='Number of worker processes to start (default: 1)'),
     ]
 
     options = (cast(List, worker_options) +
                cast(List, now_builtin_worker_options))
 
+    #: Index of this worker process when started with ``--processes``.
+    process_index: Optional[int] = WORKER_PROCESS
+
+    def run_using_worker(self, *args: Any, **kwargs: Any) -> Any:
+        if self.process_index is None:
+            processes = ({**self.kwargs, **kwargs}.get('processes') or
+                         self.app.conf.worker_processes)
+            if processes > 1:
+                supervisor = ProcessSupervisor(
+                    processes,
+                    loglevel=self.loglevel,
+                    logfile=self.logfile,
+                )
+                return supervisor.execute_from_commandline()
+        return super().run_using_worker(*args, **kwargs)
+
     def on_worker_created(self, worker: Worker) -> None:
         self.say(self.banner(worker))
 
     def as_service(self, loop: asyncio.AbstractEventLoop,
                    *args: Any, **kwargs: Any) -> ServiceT:
         self._init_worker_options(*args, **kwargs)
+        if self.process_index is not None:
+            self._init_process(self.process_index)
         return self.app
 
     def _init_worker_options(self,
@@ -64,6 +100,9 @@ class worker(AppCommand):
                              web_bind: Optional[str],
                              web_host: str,
                              web_transport: URL,
+                             profile: Optional[bool] = None,
+                             profile_interval: Optional[float] = None,
+                             processes: Optional[int] = None,
                              **kwargs: Any) -> None:
         self.app.conf.web_enabled = with_web
         if web_port is not None:
@@ -74,6 +113,31 @@ class worker(AppCommand):
             self.app.conf.web_host = web_host
         if web_transport is not None:
             self.app.conf.web_transport = web_transport
+        if profile is not None:
+            self.app.conf.worker_profiling = profile
+        if profile_interval is not None:
+            self.app.conf.worker_profiling_interval = profile_interval
+        if processes is not None:
+            self.app.conf.worker_processes = processes
+
+    def _init_process(self, index: int) -> None:
+        # Every worker process needs a separate web server port,
+        # and the assignor identifies workers by the canonical URL.
+        conf = self.app.conf
+        with warnings.catch_warnings():
+            # we read the values to change them, so the worker
+            # is not using an old value.
+            warnings.simplefilter('ignore', AlreadyConfiguredWarning)
+            canonical_url = conf.canonical_url
+            conf.canonical_url = canonical_url.with_port(
+                (canonical_url.port or 0) + index)
+            conf.web_port += index
+            if conf.web_transport.scheme == 'unix':
+                conf.web_transport = conf.web_transport.with_path(
+                    f'{conf.web_transport.path}.{index}')
+            # RocksDB locks the partition databases, so processes
+            # cannot share them (e.g. when one is standby for another).
+            conf.tabledir = conf.tabledir.absolute() / f'process-{index}'
 
     @property
     def _Worker(self) -> Worker:
@@ -100,6 +164,9 @@ class worker(AppCommand):
             ('web', app.web.url) if app.conf.web_enabled else None,
             ('log', f'{logfile} ({loglevel})'),
             ('pid', f'{os.getpid()}'),
+            ('process', f'{self.process_index + 1}/'
+                        f'{app.conf.worker_processes}')
+            if self.process_index is not None else None,
             ('hostname', f'{socket.gethostname()}'),
             ('platform', self.platform()),
             ('drivers', '{transport_v} {http_v}'.format(
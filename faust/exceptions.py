@@ -10,6 +10,7 @@ __all__ = [
     'ValueDecodeError',
     'ConsumerNotStarted',
     'PartitionsMismatch',
+    'Skip',
 ]
 
 
@@ -29,6 +30,10 @@ class ImproperlyConfigured(FaustError):
     """The library is not configured/installed correctly."""
 
 
+class Skip(FaustError):
+    """Raised in stream processors to skip processing of an event."""
+
+
 class DecodeError(FaustError):
     """Error while decoding/deserializing message key/value."""
 
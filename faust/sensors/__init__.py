@@ -1,9 +1,17 @@
 from .base import Sensor, SensorDelegate
+from .batch import SensorBatch, TPStats
+from .histogram import Histogram, SlidingHistogram
 from .monitor import Monitor, TableState
+from .profiler import Profiler
 
 __all__ = [
+    'Histogram',
     'Monitor',
+    'Profiler',
     'Sensor',
+    'SensorBatch',
     'SensorDelegate',
+    'SlidingHistogram',
+    'TPStats',
     'TableState',
 ]
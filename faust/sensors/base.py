@@ -1,5 +1,5 @@
 """Base-interface for sensors."""
-from typing import Any, Iterator, Set
+from typing import Any, Iterator, Optional, Set
 
 from mode import Service
 
@@ -8,6 +8,8 @@ from faust.types.sensors import SensorDelegateT, SensorT
 from faust.types.topics import TopicT
 from faust.types.transports import ConsumerT, ProducerT
 
+from .batch import SensorBatch
+
 __all__ = ['Sensor', 'SensorDelegate']
 
 
@@ -16,8 +18,23 @@ class Sensor(SensorT, Service):
 
     This sensor does not do anything at all, but can be subclassed
     to create new monitors.
+
+    Notes:
+        Calling every sensor for every message is expensive,
+        so sensors that only need counts and latencies should set
+        ``per_message = False`` and ``batched = True``, to instead have
+        :meth:`on_batch` called with the aggregated events
+        of every :setting:`sensor_batch_interval`.
     """
 
+    #: Set to False to not receive the per-message hooks:
+    #: :meth:`on_message_in`, :meth:`on_stream_event_in`,
+    #: :meth:`on_stream_event_out`, and :meth:`on_message_out`.
+    per_message: bool = True
+
+    #: Set to True to receive :meth:`on_batch`.
+    batched: bool = False
+
     def on_message_in(self, tp: TP, offset: int, message: Message) -> None:
         """Message received by a consumer."""
         ...
@@ -79,6 +96,11 @@ class Sensor(SensorT, Service):
 
     def on_send_completed(self, producer: ProducerT, state: Any) -> None:
         """Message successfully sent."""
+        ...
+
+    def on_batch(self, batch: SensorBatch) -> None:
+        """Aggregated per-message events collected over an interval."""
+        ...
 
 
 class SensorDelegate(SensorDelegateT):
@@ -86,33 +108,72 @@ class SensorDelegate(SensorDelegateT):
 
     _sensors: Set[SensorT]
 
+    #: Sensors receiving the per-message hooks.
+    _per_message_sensors: Set[SensorT]
+
+    #: Sensors receiving :meth:`on_batch`.
+    _batched_sensors: Set[SensorT]
+
+    #: Batch currently collecting events (None if no batched sensors).
+    _batch: Optional[SensorBatch] = None
+
     def __init__(self, app: AppT) -> None:
         self.app = app
         self._sensors = set()
+        self._per_message_sensors = set()
+        self._batched_sensors = set()
 
     def add(self, sensor: SensorT) -> None:
         # connect beacons
         sensor.beacon = self.app.beacon.new(sensor)
         self._sensors.add(sensor)
+        if sensor.per_message:
+            self._per_message_sensors.add(sensor)
+        if sensor.batched:
+            self._batched_sensors.add(sensor)
+            if self._batch is None:
+                self._batch = SensorBatch()
 
     def remove(self, sensor: SensorT) -> None:
         self._sensors.remove(sensor)
+        self._per_message_sensors.discard(sensor)
+        self._batched_sensors.discard(sensor)
+        if not self._batched_sensors:
+            self._batch = None
+
+    def flush_batch(self) -> None:
+        """Send events aggregated since last flush to batched sensors."""
+        batch = self._batch
+        if batch is not None:
+            self._batch = SensorBatch()
+            batch.finish()
+            for sensor in self._batched_sensors:
+                sensor.on_batch(batch)
 
     def __iter__(self) -> Iterator:
         return iter(self._sensors)
 
     def on_message_in(self, tp: TP, offset: int, message: Message) -> None:
-        for sensor in self._sensors:
+        batch = self._batch
+        if batch is not None:
+            batch.on_message_in(tp, offset, message)
+        for sensor in self._per_message_sensors:
             sensor.on_message_in(tp, offset, message)
 
     def on_stream_event_in(self, tp: TP, offset: int, stream: StreamT,
                            event: EventT) -> None:
-        for sensor in self._sensors:
+        batch = self._batch
+        if batch is not None:
+            batch.on_stream_event_in(tp, offset, stream, event)
+        for sensor in self._per_message_sensors:
             sensor.on_stream_event_in(tp, offset, stream, event)
 
     def on_stream_event_out(self, tp: TP, offset: int, stream: StreamT,
                             event: EventT) -> None:
-        for sensor in self._sensors:
+        batch = self._batch
+        if batch is not None:
+            batch.on_stream_event_out(tp, offset, stream, event)
+        for sensor in self._per_message_sensors:
             sensor.on_stream_event_out(tp, offset, stream, event)
 
     def on_topic_buffer_full(self, topic: TopicT) -> None:
@@ -123,7 +184,10 @@ class SensorDelegate(SensorDelegateT):
                        tp: TP,
                        offset: int,
                        message: Message) -> None:
-        for sensor in self._sensors:
+        batch = self._batch
+        if batch is not None:
+            batch.on_message_out(tp, offset, message)
+        for sensor in self._per_message_sensors:
             sensor.on_message_out(tp, offset, message)
 
     def on_table_get(self, table: CollectionT, key: Any) -> None:
@@ -163,5 +227,9 @@ class SensorDelegate(SensorDelegateT):
         for sensor in self._sensors:
             sensor.on_send_completed(producer, state[sensor])
 
+    def on_batch(self, batch: SensorBatch) -> None:
+        for sensor in self._batched_sensors:
+            sensor.on_batch(batch)
+
     def __repr__(self) -> str:
         return f'<{type(self).__name__}: {self._sensors!r}>'
@@ -0,0 +1,168 @@
+"""Per-message sensor events aggregated over an interval."""
+from time import monotonic
+from typing import Callable, Mapping, MutableMapping, Optional
+
+from mode.utils.compat import Counter
+
+from faust.types import EventT, Message, StreamT, TP
+
+from .histogram import Histogram
+
+__all__ = ['TPStats', 'SensorBatch']
+
+
+class TPStats:
+    """Counters for a single topic partition over one batch interval."""
+
+    __slots__ = (
+        'messages_in',
+        'messages_out',
+        'events_in',
+        'events_out',
+        'last_offset_in',
+        'last_offset_out',
+        'latency',
+    )
+
+    #: Number of messages received by the consumer.
+    messages_in: int
+
+    #: Number of messages fully processed (acked by all streams).
+    messages_out: int
+
+    #: Number of events delivered to streams.
+    events_in: int
+
+    #: Number of events acknowledged by streams.
+    events_out: int
+
+    #: Offset of the last message received (or :const:`None`).
+    last_offset_in: Optional[int]
+
+    #: Offset of the last message fully processed (or :const:`None`).
+    last_offset_out: Optional[int]
+
+    #: Time from message received to message processed, in seconds.
+    latency: Histogram
+
+    def __init__(self) -> None:
+        self.messages_in = 0
+        self.messages_out = 0
+        self.events_in = 0
+        self.events_out = 0
+        self.last_offset_in = None
+        self.last_offset_out = None
+        self.latency = Histogram()
+
+    def asdict(self) -> Mapping:
+        return {
+            'messages_in': self.messages_in,
+            'messages_out': self.messages_out,
+            'events_in': self.events_in,
+            'events_out': self.events_out,
+            'last_offset_in': self.last_offset_in,
+            'last_offset_out': self.last_offset_out,
+            'latency': self.latency.asdict(),
+        }
+
+
+class SensorBatch:
+    """Aggregated per-message sensor events.
+
+    Sensors that set :attr:`~faust.sensors.Sensor.batched` receive
+    one of these every :setting:`sensor_batch_interval` seconds,
+    instead of having to handle every single message.
+    """
+
+    #: Counters by topic partition.
+    tps: MutableMapping[TP, TPStats]
+
+    #: Number of events delivered by stream.
+    events_by_stream: Counter[StreamT]
+
+    #: :func:`~time.monotonic` time when batch started collecting.
+    time_start: float
+
+    #: :func:`~time.monotonic` time when batch was flushed.
+    time_end: Optional[float] = None
+
+    def __init__(self, *,
+                 time: Callable[[], float] = monotonic) -> None:
+        self.time = time
+        self.time_start = self.time()
+        self.tps = {}
+        self.events_by_stream = Counter()
+
+    def on_message_in(self, tp: TP, offset: int, message: Message) -> None:
+        stats = self._stats_for(tp)
+        stats.messages_in += 1
+        stats.last_offset_in = offset
+        message.time_in = self.time()
+
+    def on_stream_event_in(self, tp: TP, offset: int, stream: StreamT,
+                           event: EventT) -> None:
+        self._stats_for(tp).events_in += 1
+        self.events_by_stream[stream] += 1
+
+    def on_stream_event_out(self, tp: TP, offset: int, stream: StreamT,
+                            event: EventT) -> None:
+        self._stats_for(tp).events_out += 1
+
+    def on_message_out(self, tp: TP, offset: int, message: Message) -> None:
+        stats = self._stats_for(tp)
+        stats.messages_out += 1
+        stats.last_offset_out = offset
+        time_in = message.time_in
+        if time_in is not None:
+            stats.latency.record(self.time() - time_in)
+
+    def _stats_for(self, tp: TP) -> TPStats:
+        try:
+            return self.tps[tp]
+        except KeyError:
+            stats = self.tps[tp] = TPStats()
+            return stats
+
+    def finish(self) -> None:
+        """Mark batch as complete."""
+        self.time_end = self.time()
+
+    def latency(self) -> Histogram:
+        """Return message latency histogram for all partitions."""
+        histogram = Histogram()
+        for stats in self.tps.values():
+            histogram.merge(stats.latency)
+        return histogram
+
+    @property
+    def interval(self) -> float:
+        """Number of seconds this batch was collecting events."""
+        end = self.time_end if self.time_end is not None else self.time()
+        return end - self.time_start
+
+    @property
+    def messages_in(self) -> int:
+        return sum(stats.messages_in for stats in self.tps.values())
+
+    @property
+    def messages_out(self) -> int:
+        return sum(stats.messages_out for stats in self.tps.values())
+
+    @property
+    def events_in(self) -> int:
+        return sum(stats.events_in for stats in self.tps.values())
+
+    @property
+    def events_out(self) -> int:
+        return sum(stats.events_out for stats in self.tps.values())
+
+    def asdict(self) -> Mapping:
+        return {
+            'interval': self.interval,
+            'tps': {tp: stats.asdict() for tp, stats in self.tps.items()},
+        }
+
+    def __repr__(self) -> str:
+        return (f'<{type(self).__name__}: tps={len(self.tps)} '
+                f'messages_in={self.messages_in} '
+                f'messages_out={self.messages_out}>')
@@ -6,6 +6,7 @@ from typing import Any, Dict, List, Optional, Pattern, cast
 from mode.utils.objects import cached_property
 
 from faust.exceptions import ImproperlyConfigured
+from faust.sensors.batch import SensorBatch
 from faust.sensors.monitor import Monitor, TPOffsetMapping
 from faust.types import CollectionT, EventT, Message, StreamT, TP
 from faust.types.transports import ConsumerT, ProducerT
@@ -28,6 +29,9 @@ __all__ = ['DatadogMonitor']
 RE_NORMALIZE = re.compile(r'[\<\>:\s]+')
 RE_NORMALIZE_SUBSTITUTION = '_'
 
+#: Latency percentiles sent for every sensor batch.
+LATENCY_PERCENTILES = (50.0, 99.0, 99.9)
+
 
 class DatadogStatsClient:
     """Statsd compliant datadog client
@@ -128,6 +132,13 @@ class DatadogMonitor(Monitor):
 
     This sensor, records statistics to datadog agents along
     with computing metrics for the stats server
+
+    Message and event counters are sent once every
+    :setting:`sensor_batch_interval`, aggregated by topic partition.
+    The monitor is then not called for every message, so event
+    runtimes are not recorded.
+    Pass ``batched=False`` to send them for every message instead
+    (this was the default before Faust 1.5, and is considerably slower).
     """
 
     host: str
@@ -139,11 +150,16 @@ class DatadogMonitor(Monitor):
                  port: int = 8125,
                  prefix: str = 'faust-app',
                  rate: float = 1.0,
+                 batched: bool = True,
                  **kwargs: Any) -> None:
         self.host = host
         self.port = port
         self.prefix = prefix
         self.rate = rate
+        # batched monitors only get aggregated counts in on_batch,
+        # and are no longer called for every message.
+        self.batched = batched
+        self.per_message = not batched
         if datadog is None:
             raise ImproperlyConfigured(
                 f'{type(self).__name__} requires `pip install datadog`.')
@@ -172,9 +188,10 @@ class DatadogMonitor(Monitor):
         super().on_stream_event_out(tp, offset, stream, event)
         labels = self._format_label(tp, stream)
         self.client.decrement('events_active', labels=labels)
+        time_total = event.message.stream_meta[id(stream)]['time_total']
         self.client.timing(
             'events_runtime',
-            self._time(self.events_runtime[-1]),
+            self._time(time_total),
             labels=labels,
         )
 
@@ -186,6 +203,38 @@ class DatadogMonitor(Monitor):
         self.client.decrement('messages_active',
                               labels=self._format_label(tp))
 
+    def on_batch(self, batch: SensorBatch) -> None:
+        super().on_batch(batch)
+        client = self.client
+        for tp, stats in batch.tps.items():
+            labels = self._format_label(tp)
+            if stats.messages_in:
+                client.increment('messages_received',
+                                 value=stats.messages_in, labels=labels)
+                client.gauge('read_offset', stats.last_offset_in,
+                             labels=labels)
+            if stats.events_in:
+                client.increment('events',
+                                 value=stats.events_in, labels=labels)
+            messages_active = stats.messages_in - stats.messages_out
+            if messages_active:
+                client.increment('messages_active',
+                                 value=messages_active, labels=labels)
+            events_active = stats.events_in - stats.events_out
+            if events_active:
+                client.increment('events_active',
+                                 value=events_active, labels=labels)
+            latency = stats.latency
+            if latency.count:
+                for percentile, value in latency.percentiles(
+                        LATENCY_PERCENTILES).items():
+                    key = latency.percentile_key(percentile)
+                    client.gauge(f'message_latency_{key}',
+                                 self._time(value), labels=labels)
+        for stream, count in batch.events_by_stream.items():
+            client.increment('stream_events', value=count,
+                             labels=self._format_label(stream=stream))
+
     def on_table_get(self, table: CollectionT, key: Any) -> None:
         super().on_table_get(table, key)
         self.client.increment(
@@ -213,6 +262,8 @@ class DatadogMonitor(Monitor):
             'commit_latency',
             self._time(monotonic() - cast(float, state)),
         )
+        self.client.gauge(
+            'commit_interval', self._time(self.commit_interval))
 
     def on_send_initiated(self, producer: ProducerT, topic: str,
                           keysize: int, valsize: int) -> Any:
@@ -0,0 +1,282 @@
+"""Constant-memory histogram used to track latencies."""
+from collections import deque
+from math import ceil
+from time import monotonic
+from typing import Callable, Deque, Iterable, Mapping, MutableMapping
+
+__all__ = ['Histogram', 'SlidingHistogram']
+
+#: Number of significant bits kept for every recorded value.
+#: The relative error of reported percentiles is ``2 ** -(precision - 1)``,
+#: so the default of 7 keeps values accurate to within ~1.6%.
+DEFAULT_PRECISION = 7
+
+#: Smallest unit recorded (values are floats in seconds,
+#: so the default resolution is one microsecond).
+DEFAULT_UNIT = 1e-6
+
+#: Percentiles reported by :meth:`Histogram.asdict`.
+DEFAULT_PERCENTILES = (50.0, 75.0, 95.0, 99.0, 99.9)
+
+#: Number of seconds of values described by a :class:`SlidingHistogram`.
+DEFAULT_WINDOW = 60.0
+
+#: Number of histograms the window is split into (the window
+#: slides forward by ``window / window_buckets`` seconds at a time).
+DEFAULT_WINDOW_BUCKETS = 6
+
+
+class Histogram:
+    """Log-linear bucketed histogram (like HdrHistogram).
+
+    Values are counted in buckets that grow wider with the magnitude
+    of the value, so the memory used is bound by the number of distinct
+    buckets (a few hundred at most for any realistic latency),
+    not by the number of values recorded.
+
+    Example:
+        >>> h = Histogram()
+        >>> for latency in (0.001, 0.002, 0.250):
+        ...     h.record(latency)
+        >>> h.percentile(99.0)
+        0.25
+    """
+
+    __slots__ = (
+        'precision',
+        'unit',
+        'count',
+        'total',
+        'min',
+        'max',
+        'buckets',
+    )
+
+    #: Mapping of bucket index to number of values in that bucket.
+    buckets: MutableMapping[int, int]
+
+    def __init__(self,
+                 *,
+                 precision: int = DEFAULT_PRECISION,
+                 unit: float = DEFAULT_UNIT) -> None:
+        self.precision = precision
+        self.unit = unit
+        self.reset()
+
+    def reset(self) -> None:
+        """Forget all recorded values."""
+        self.count = 0
+        self.total = 0.0
+        self.min = 0.0
+        self.max = 0.0
+        self.buckets = {}
+
+    def record(self, value: float, count: int = 1) -> None:
+        """Record value (e.g. latency in seconds)."""
+        index = self._index(value)
+        buckets = self.buckets
+        buckets[index] = buckets.get(index, 0) + count
+        if not self.count:
+            self.min = self.max = value
+        elif value < self.min:
+            self.min = value
+        elif value > self.max:
+            self.max = value
+        self.count += count
+        self.total += value * count
+
+    def merge(self, other: 'Histogram') -> None:
+        """Add all values recorded by another histogram to this one."""
+        if (other.precision, other.unit) != (self.precision, self.unit):
+            raise ValueError('Cannot merge histograms of different precision')
+        if not other.count:
+            return
+        buckets = self.buckets
+        for index, count in other.buckets.items():
+            buckets[index] = buckets.get(index, 0) + count
+        if not self.count:
+            self.min, self.max = other.min, other.max
+        else:
+            self.min = min(self.min, other.min)
+            self.max = max(self.max, other.max)
+        self.count += other.count
+        self.total += other.total
+
+    def percentile(self, percentile: float) -> float:
+        """Return value at percentile (between 0.0 and 100.0)."""
+        return self.percentiles([percentile])[percentile]
+
+    def percentiles(
+            self, percentiles: Iterable[float]) -> Mapping[float, float]:
+        """Return mapping of percentile to value for many percentiles.
+
+        This only traverses the buckets once.
+        """
+        wanted = sorted(percentiles)
+        if not self.count:
+            return {p: 0.0 for p in wanted}
+        count, lowest, highest = self.count, self.min, self.max
+        ranks = [(p, max(ceil(count * p / 100.0), 1)) for p in wanted]
+        result: MutableMapping[float, float] = {}
+        seen = 0
+        buckets = self.buckets
+        for index in sorted(buckets):
+            seen += buckets[index]
+            while ranks and seen >= ranks[0][1]:
+                value = min(self._value_at(index), highest)
+                result[ranks.pop(0)[0]] = max(value, lowest)
+            if not ranks:
+                break
+        for p, _ in ranks:
+            result[p] = highest
+        return result
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def asdict(self,
+               percentiles: Iterable[float] = DEFAULT_PERCENTILES) -> Mapping:
+        return {
+            'count': self.count,
+            'min': self.min,
+            'max': self.max,
+            'mean': self.mean,
+            **{self.percentile_key(p): value
+               for p, value in self.percentiles(percentiles).items()},
+        }
+
+    @staticmethod
+    def percentile_key(percentile: float) -> str:
+        """Return name for percentile (e.g. 99.9 -> ``"p999"``)."""
+        return 'p' + f'{percentile:g}'.replace('.', '')
+
+    def _index(self, value: float) -> int:
+        n = int(value / self.unit)
+        if n < 0:
+            return 0
+        precision = self.precision
+        if n < (1 << precision):
+            return n
+        shift = n.bit_length() - precision
+        return (shift << (precision - 1)) + (n >> shift)
+
+    def _value_at(self, index: int) -> float:
+        # Returns the highest value that is counted by bucket ``index``.
+        if index < (1 << self.precision):
+            return index * self.unit
+        shift = (index >> (self.precision - 1)) - 1
+        mantissa = index - (shift << (self.precision - 1))
+        return (((mantissa + 1) << shift) - 1) * self.unit
+
+    def __repr__(self) -> str:
+        return (f'<{type(self).__name__}: count={self.count} '
+                f'p50={self.percentile(50.0)} p99={self.percentile(99.0)}>')
+
+
+class SlidingHistogram:
+    """Histogram of the values recorded in the last ``window`` seconds.
+
+    The window is split into ``window_buckets`` :class:`Histogram`
+    instances, values are recorded in the newest one, and the
+    oldest is dropped whenever the window slides forward,
+    so percentiles describe recent values only (like the age buckets
+    of a Prometheus summary).
+
+    :attr:`count` and :attr:`total` are never reset, so they can be
+    used to calculate rates over any interval.
+    """
+
+    #: Number of values recorded in total.
+    count: int
+
+    #: Sum of all values recorded.
+    total: float
+
+    def __init__(self,
+                 *,
+                 window: float = DEFAULT_WINDOW,
+                 window_buckets: int = DEFAULT_WINDOW_BUCKETS,
+                 precision: int = DEFAULT_PRECISION,
+                 unit: float = DEFAULT_UNIT,
+                 clock: Callable[[], float] = monotonic) -> None:
+        self.window = window
+        self.window_buckets = window_buckets
+        self.interval = window / window_buckets
+        self.precision = precision
+        self.unit = unit
+        self.clock = clock
+        self.reset()
+
+    def reset(self) -> None:
+        """Forget all recorded values."""
+        self.count = 0
+        self.total = 0.0
+        self.histograms: Deque[Histogram] = deque(
+            [self._new_histogram()], maxlen=self.window_buckets)
+        self.rotated_at = self.clock()
+
+    def record(self, value: float, count: int = 1) -> None:
+        """Record value (e.g. latency in seconds)."""
+        self._current().record(value, count)
+        self.count += count
+        self.total += value * count
+
+    def merge(self, other: Histogram) -> None:
+        """Add all values recorded by a histogram to the current window."""
+        self._current().merge(other)
+        self.count += other.count
+        self.total += other.total
+
+    def snapshot(self) -> Histogram:
+        """Return :class:`Histogram` of the values in the current window."""
+        self._rotate()
+        histogram = self._new_histogram()
+        for h in self.histograms:
+            histogram.merge(h)
+        return histogram
+
+    @property
+    def min(self) -> float:
+        return self.snapshot().min
+
+    @property
+    def max(self) -> float:
+        return self.snapshot().max
+
+    @property
+    def mean(self) -> float:
+        return self.snapshot().mean
+
+    def percentile(self, percentile: float) -> float:
+        """Return value at percentile (between 0.0 and 100.0)."""
+        return self.snapshot().percentile(percentile)
+
+    def percentiles(
+            self, percentiles: Iterable[float]) -> Mapping[float, float]:
+        """Return mapping of percentile to value for many percentiles."""
+        return self.snapshot().percentiles(percentiles)
+
+    def asdict(self,
+               percentiles: Iterable[float] = DEFAULT_PERCENTILES) -> Mapping:
+        """Return statistics for the values in the current window."""
+        return self.snapshot().asdict(percentiles)
+
+    def _current(self) -> Histogram:
+        self._rotate()
+        return self.histograms[-1]
+
+    def _rotate(self) -> None:
+        elapsed = self.clock() - self.rotated_at
+        if elapsed >= self.interval:
+            periods = int(elapsed / self.interval)
+            for _ in range(min(periods, self.window_buckets)):
+                self.histograms.append(self._new_histogram())
+            self.rotated_at += periods * self.interval
+
+    def _new_histogram(self) -> Histogram:
+        return Histogram(precision=self.precision, unit=self.unit)
+
+    def __repr__(self) -> str:
+        return (f'<{type(self).__name__}: count={self.count} '
+                f'window={self.window}>')
@@ -1,8 +1,7 @@
 """Monitor - sensor tracking metrics."""
 import asyncio
-import statistics
 from time import monotonic
-from typing import Any, Callable, List, Mapping, MutableMapping, cast
+from typing import Any, Callable, Mapping, MutableMapping, cast
 
 from mode import Service, label
 from mode.utils.compat import Counter
@@ -12,6 +11,8 @@ from faust.types import CollectionT, EventT, Message, StreamT, TP, TopicT
 from faust.types.transports import ConsumerT, ProducerT
 
 from .base import Sensor
+from .batch import SensorBatch
+from .histogram import DEFAULT_WINDOW, SlidingHistogram
 
 __all__ = ['TableState', 'Monitor']
 
@@ -22,6 +23,7 @@ MAX_SEND_LATENCY_HISTORY = 30
 TPOffsetMapping = MutableMapping[TP, int]
 PartitionOffsetMapping = MutableMapping[int, int]
 TPOffsetDict = MutableMapping[str, PartitionOffsetMapping]
+HistogramDict = MutableMapping[str, Mapping]
 
 
 class TableState(KeywordReduce):
@@ -70,15 +72,22 @@ class Monitor(Sensor, KeywordReduce):
     events, etc.
     """
 
-    #: Max number of total run time values to keep to build average.
+    #: Deprecated: Latencies are recorded in constant-memory
+    #: histograms, so this is no longer used.
     max_avg_history: int = 0
 
-    #: Max number of commit latency numbers to keep.
+    #: Deprecated: Latencies are recorded in constant-memory
+    #: histograms, so this is no longer used.
     max_commit_latency_history: int = 0
 
-    #: Max number of send latency numbers to keep.
+    #: Deprecated: Latencies are recorded in constant-memory
+    #: histograms, so this is no longer used.
     max_send_latency_history: int = 0
 
+    #: Latency percentiles describe the values recorded
+    #: in the last ``histogram_window`` seconds.
+    histogram_window: float = DEFAULT_WINDOW
+
     #: Mapping of tables
     tables: MutableMapping[str, TableState] = cast(
         MutableMapping[str, TableState], None)
@@ -119,14 +128,27 @@ class Monitor(Sensor, KeywordReduce):
     #: Average event runtime over the last second.
     events_runtime_avg: float = 0.0
 
-    #: List of run times used for averages
-    events_runtime: List[float] = cast(List[float], None)
+    #: Histogram of event run times.
+    events_runtime: SlidingHistogram = cast(SlidingHistogram, None)
+
+    #: Histogram of event run times by stream.
+    events_runtime_by_stream: MutableMapping[
+        StreamT, SlidingHistogram] = cast(
+            MutableMapping[StreamT, SlidingHistogram], None)
+
+    #: Histogram of message latency (received to processed) by topic.
+    message_latency_by_topic: MutableMapping[str, SlidingHistogram] = cast(
+        MutableMapping[str, SlidingHistogram], None)
 
-    #: List of commit latency values
-    commit_latency: List[float] = cast(List[float], None)
+    #: Histogram of commit latency values
+    commit_latency: SlidingHistogram = cast(SlidingHistogram, None)
 
-    #: List of send latency values
-    send_latency: List[float] = cast(List[float], None)
+    #: Number of seconds between commits, as decided by the
+    #: commit policy after the last commit.
+    commit_interval: float = 0.0
+
+    #: Histogram of send latency values
+    send_latency: SlidingHistogram = cast(SlidingHistogram, None)
 
     #: Counter of times a topics buffer was full
     topic_buffer_full: Counter[TopicT] = cast(Counter[TopicT], None)
@@ -157,21 +179,30 @@ class Monitor(Sensor, KeywordReduce):
                  events_total: int = 0,
                  events_by_stream: Counter[StreamT] = None,
                  events_by_task: Counter[asyncio.Task] = None,
-                 events_runtime: List[float] = None,
-                 commit_latency: List[float] = None,
-                 send_latency: List[float] = None,
+                 events_runtime: SlidingHistogram = None,
+                 commit_latency: SlidingHistogram = None,
+                 commit_interval: float = 0.0,
+                 send_latency: SlidingHistogram = None,
                  events_s: int = 0,
                  messages_s: int = 0,
                  events_runtime_avg: float = 0.0,
                  topic_buffer_full: Counter[TopicT] = None,
+                 histogram_window: float = None,
                  **kwargs: Any) -> None:
         self.max_avg_history = max_avg_history
         self.max_commit_latency_history = max_commit_latency_history
         self.max_send_latency_history = max_send_latency_history
+        if histogram_window is not None:
+            self.histogram_window = histogram_window
 
         self.tables = {} if tables is None else tables
-        self.commit_latency = [] if commit_latency is None else commit_latency
-        self.send_latency = [] if send_latency is None else send_latency
+        self.commit_latency = (
+            self._new_histogram() if commit_latency is None
+            else commit_latency)
+        self.commit_interval = commit_interval
+        self.send_latency = (
+            self._new_histogram() if send_latency is None
+            else send_latency)
 
         self.messages_active = messages_active
         self.messages_received_total = messages_received_total
@@ -186,7 +217,11 @@ class Monitor(Sensor, KeywordReduce):
         self.events_by_stream = Counter()
         self.events_s = events_s
         self.events_runtime_avg = events_runtime_avg
-        self.events_runtime = [] if events_runtime is None else events_runtime
+        self.events_runtime = (
+            self._new_histogram() if events_runtime is None
+            else events_runtime)
+        self.events_runtime_by_stream = {}
+        self.message_latency_by_topic = {}
         self.topic_buffer_full = Counter()
         self.time: Callable[[], float] = monotonic
 
@@ -197,17 +232,26 @@ class Monitor(Sensor, KeywordReduce):
         self.tp_end_offsets = {}
         Service.__init__(self, **kwargs)
 
+    def _new_histogram(self) -> SlidingHistogram:
+        return SlidingHistogram(window=self.histogram_window)
+
     @Service.task
     async def _sampler(self) -> None:
-        median = statistics.median
         prev_message_total = self.messages_received_total
         prev_event_total = self.events_total
+        prev_runtime_count = self.events_runtime.count
+        prev_runtime_total = self.events_runtime.total
         while not self.should_stop:
             await self.sleep(1.0)
 
-            # Update average event runtime.
-            if self.events_runtime:
-                self.events_runtime_avg = median(self.events_runtime)
+            # Update average event runtime (over the last second).
+            runtime_count = self.events_runtime.count - prev_runtime_count
+            if runtime_count:
+                self.events_runtime_avg = (
+                    self.events_runtime.total - prev_runtime_total
+                ) / runtime_count
+            prev_runtime_count = self.events_runtime.count
+            prev_runtime_total = self.events_runtime.total
 
             # Update events/s
             self.events_s, prev_event_total = (
@@ -220,9 +264,6 @@ class Monitor(Sensor, KeywordReduce):
                 self.messages_received_total - prev_message_total,
                 self.messages_received_total)
 
-            # Cleanup
-            self._cleanup()
-
     def asdict(self) -> Mapping:
         return {
             'messages_active': self.messages_active,
@@ -235,10 +276,14 @@ class Monitor(Sensor, KeywordReduce):
             'events_total': self.events_total,
             'events_s': self.events_s,
             'events_runtime_avg': self.events_runtime_avg,
+            'events_runtime': self.events_runtime.asdict(),
+            'events_runtime_by_stream': self._events_runtime_by_stream_dict(),
             'events_by_task': self._events_by_task_dict(),
             'events_by_stream': self._events_by_stream_dict(),
-            'commit_latency': self.commit_latency,
-            'send_latency': self.send_latency,
+            'message_latency_by_topic': self._message_latency_by_topic_dict(),
+            'commit_latency': self.commit_latency.asdict(),
+            'commit_interval': self.commit_interval,
+            'send_latency': self.send_latency.asdict(),
             'topic_buffer_full': self._topic_buffer_full_dict(),
             'tables': {
                 name: table.asdict() for name, table in self.tables.items()
@@ -253,6 +298,14 @@ class Monitor(Sensor, KeywordReduce):
         return {label(stream): count
                 for stream, count in self.events_by_stream.items()}
 
+    def _events_runtime_by_stream_dict(self) -> HistogramDict:
+        return {label(stream): histogram.asdict()
+                for stream, histogram in self.events_runtime_by_stream.items()}
+
+    def _message_latency_by_topic_dict(self) -> HistogramDict:
+        return {topic: histogram.asdict()
+                for topic, histogram in self.message_latency_by_topic.items()}
+
     def _events_by_task_dict(self) -> MutableMapping[str, int]:
         return {label(task): count
                 for task, count in self.events_by_task.items()}
@@ -282,29 +335,6 @@ class Monitor(Sensor, KeywordReduce):
             topic_partition_offsets[tp.topic] = partition_offsets
         return topic_partition_offsets
 
-    def _cleanup(self) -> None:
-        self._cleanup_max_avg_history()
-        self._cleanup_commit_latency_history()
-        self._cleanup_send_latency_history()
-
-    def _cleanup_max_avg_history(self) -> None:
-        max_history = self.max_avg_history
-        events_runtime = self.events_runtime
-        if max_history is not None and len(events_runtime) > max_history:
-            events_runtime[:len(events_runtime) - max_history] = []
-
-    def _cleanup_commit_latency_history(self) -> None:
-        max_history = self.max_commit_latency_history
-        commit_latency = self.commit_latency
-        if max_history is not None and len(commit_latency) > max_history:
-            commit_latency[:len(commit_latency) - max_history] = []
-
-    def _cleanup_send_latency_history(self) -> None:
-        max_history = self.max_send_latency_history
-        send_latency = self.send_latency
-        if max_history is not None and len(send_latency) > max_history:
-            send_latency[:len(send_latency) - max_history] = []
-
     def on_message_in(self, tp: TP, offset: int, message: Message) -> None:
         # WARNING: Sensors must never keep a reference to the Message,
         #          as this means the message won't go out of scope!
@@ -337,7 +367,13 @@ class Monitor(Sensor, KeywordReduce):
             time_out=time_out,
             time_total=time_total,
         )
-        self.events_runtime.append(time_total)
+        self.events_runtime.record(time_total)
+        try:
+            histogram = self.events_runtime_by_stream[stream]
+        except KeyError:
+            histogram = self.events_runtime_by_stream[stream] = (
+                self._new_histogram())
+        histogram.record(time_total)
 
     def on_topic_buffer_full(self, topic: TopicT) -> None:
         self.topic_buffer_full[topic] += 1
@@ -350,7 +386,34 @@ class Monitor(Sensor, KeywordReduce):
         time_out = message.time_out = self.time()
         time_in = message.time_in
         if time_in is not None:
-            message.time_total = time_out - time_in
+            time_total = message.time_total = time_out - time_in
+            try:
+                histogram = self.message_latency_by_topic[tp.topic]
+            except KeyError:
+                histogram = self.message_latency_by_topic[tp.topic] = (
+                    self._new_histogram())
+            histogram.record(time_total)
+
+    def on_batch(self, batch: SensorBatch) -> None:
+        # Monitors that are batched do not get the per-message hooks,
+        # so we update the counters from the batch instead.
+        # Event runtimes are not measured in this mode.
+        for tp, stats in batch.tps.items():
+            self.messages_received_total += stats.messages_in
+            self.messages_received_by_topic[tp.topic] += stats.messages_in
+            self.messages_active += stats.messages_in - stats.messages_out
+            self.events_total += stats.events_in
+            self.events_active += stats.events_in - stats.events_out
+            if stats.last_offset_in is not None:
+                self.tp_read_offsets[tp] = stats.last_offset_in
+            if stats.latency.count:
+                try:
+                    histogram = self.message_latency_by_topic[tp.topic]
+                except KeyError:
+                    histogram = self.message_latency_by_topic[tp.topic] = (
+                        self._new_histogram())
+                histogram.merge(stats.latency)
+        self.events_by_stream.update(batch.events_by_stream)
 
     def on_table_get(self, table: CollectionT, key: Any) -> None:
         self._table_or_create(table).keys_retrieved += 1
@@ -372,7 +435,8 @@ class Monitor(Sensor, KeywordReduce):
         return self.time()
 
     def on_commit_completed(self, consumer: ConsumerT, state: Any) -> None:
-        self.commit_latency.append(self.time() - cast(float, state))
+        self.commit_latency.record(self.time() - cast(float, state))
+        self.commit_interval = consumer.commit_policy.interval
 
     def on_send_initiated(self, producer: ProducerT, topic: str,
                           keysize: int, valsize: int) -> Any:
@@ -381,7 +445,7 @@ class Monitor(Sensor, KeywordReduce):
         return self.time()
 
     def on_send_completed(self, producer: ProducerT, state: Any) -> None:
-        self.send_latency.append(self.time() - cast(float, state))
+        self.send_latency.record(self.time() - cast(float, state))
 
     def count(self, metric_name: str, count: int = 1) -> None:
         self.metric_counts[metric_name] += count
@@ -0,0 +1,247 @@
+"""Event loop lag and agent CPU time profiler."""
+import sys
+import threading
+import time
+from time import monotonic
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Generator,
+    Mapping,
+    MutableMapping,
+    Optional,
+)
+
+from mode import Service
+from mode.utils.compat import Counter
+
+from .base import Sensor
+from .histogram import Histogram
+
+__all__ = ['AgentProfile', 'ProfiledAwaitable', 'Profiler']
+
+#: How often we measure event loop lag (seconds).
+#: Used as the default value for :setting:`worker_profiling_interval`.
+DEFAULT_INTERVAL = 0.1
+
+#: How often the sampling profiler records the stack of the event loop.
+DEFAULT_SAMPLE_INTERVAL = 0.005
+
+#: Maximum number of seconds a single stack snapshot can take.
+MAX_SAMPLE_SECONDS = 60.0
+
+# Time spent executing Python code in the current thread.
+# Python 3.6 does not have thread_time, so we fall back to process_time.
+cpu_time: Callable[[], float] = getattr(time, 'thread_time', time.process_time)
+
+
+class AgentProfile:
+    """Time spent by an agent, counted for every step of its task.
+
+    A step is the code executed between two ``await`` points
+    in the agent, and this is the time where nothing else in the worker
+    can run, so an agent with slow steps blocks all the other agents.
+    """
+
+    __slots__ = ('steps', 'cpu_time', 'wall_time', 'step_time')
+
+    #: Number of times the agent was resumed by the event loop.
+    steps: int
+
+    #: Total CPU time spent in the agent (in seconds).
+    cpu_time: float
+
+    #: Total wall-clock time spent in the agent (in seconds).
+    wall_time: float
+
+    #: Wall-clock time of every step.
+    step_time: Histogram
+
+    def __init__(self) -> None:
+        self.steps = 0
+        self.cpu_time = 0.0
+        self.wall_time = 0.0
+        self.step_time = Histogram()
+
+    def record(self, wall_time: float, cpu_time: float) -> None:
+        self.steps += 1
+        self.wall_time += wall_time
+        self.cpu_time += cpu_time
+        self.step_time.record(wall_time)
+
+    def asdict(self) -> Mapping:
+        return {
+            'steps': self.steps,
+            'cpu_time': self.cpu_time,
+            'wall_time': self.wall_time,
+            'step_time': self.step_time.asdict(),
+        }
+
+
+class ProfiledAwaitable(Awaitable):
+    """Awaitable recording the time spent in every step of a coroutine."""
+
+    __slots__ = ('awaitable', 'profile')
+
+    def __init__(self, awaitable: Awaitable, profile: AgentProfile) -> None:
+        self.awaitable = awaitable
+        self.profile = profile
+
+    def __await__(self) -> Generator[Any, Any, Any]:
+        it = self.awaitable.__await__()
+        record = self.profile.record
+        value: Any = None
+        exc: Optional[BaseException] = None
+        while 1:
+            wall_start, cpu_start = monotonic(), cpu_time()
+            try:
+                if exc is None:
+                    future = it.send(value)
+                else:
+                    future = it.throw(type(exc), exc, exc.__traceback__)
+            except StopIteration as stop:
+                return stop.value
+            finally:
+                record(monotonic() - wall_start, cpu_time() - cpu_start)
+            try:
+                value, exc = (yield future), None
+            except GeneratorExit:
+                it.close()
+                raise
+            except BaseException as thrown:
+                value, exc = None, thrown
+
+
+class Profiler(Sensor):
+    """Worker profiler.
+
+    Enabled by the :setting:`worker_profiling` setting
+    (or ``faust worker --profile``), this measures:
+
+    - Event loop lag: how much later than expected the event
+      loop wakes up a sleeping task.  When something blocks the
+      event loop the lag goes up for everything in the worker.
+
+    - CPU time by agent: to find which agent is blocking
+      the event loop.
+
+    - On-demand stack snapshots of the event loop thread
+      taken by a sampling profiler (see :meth:`snapshot`).
+
+    The results are available in the ``/profiling/`` web views.
+    """
+
+    #: This sensor is not interested in per-message events.
+    per_message = False
+
+    #: How often we measure the event loop lag (seconds).
+    interval: float
+
+    #: Event loop lag (in seconds).
+    loop_lag: Histogram
+
+    #: Last event loop lag measured (in seconds).
+    loop_lag_last: float = 0.0
+
+    #: Profile of every agent by agent name.
+    agents: MutableMapping[str, AgentProfile]
+
+    #: Identifier of the thread running the event loop
+    #: (set when the profiler starts).
+    loop_thread_id: Optional[int] = None
+
+    def __init__(self,
+                 *,
+                 interval: float = DEFAULT_INTERVAL,
+                 sample_interval: float = DEFAULT_SAMPLE_INTERVAL,
+                 time: Callable[[], float] = monotonic,
+                 **kwargs: Any) -> None:
+        self.interval = interval
+        self.sample_interval = sample_interval
+        self.time = time
+        self.loop_lag = Histogram()
+        self.agents = {}
+        super().__init__(**kwargs)
+
+    def profile(self, name: str, awaitable: Awaitable) -> Awaitable:
+        """Wrap agent coroutine to record the time spent in it."""
+        try:
+            profile = self.agents[name]
+        except KeyError:
+            profile = self.agents[name] = AgentProfile()
+        return ProfiledAwaitable(awaitable, profile)
+
+    async def on_start(self) -> None:
+        # snapshot() may be called from the web server thread
+        # (web_in_thread), so remember which thread runs the loop.
+        self.loop_thread_id = threading.get_ident()
+
+    @Service.task
+    async def _loop_lag_sampler(self) -> None:
+        time = self.time
+        interval = self.interval
+        record = self.loop_lag.record
+        while not self.should_stop:
+            expected = time() + interval
+            await self.sleep(interval)
+            self.loop_lag_last = lag = max(time() - expected, 0.0)
+            record(lag)
+
+    async def snapshot(self, seconds: float) -> Counter[str]:
+        """Sample stacks of the event loop thread for ``seconds``.
+
+        The sampling is done in a separate thread, so this can
+        find code blocking the event loop.
+
+        Returns:
+            Counter of stacks in collapsed format (frames separated by
+            semicolon), with the number of times each stack was seen.
+        """
+        seconds = min(seconds, MAX_SAMPLE_SECONDS)
+        thread_id = self.loop_thread_id
+        if thread_id is None:
+            thread_id = threading.get_ident()
+        return await self.loop.run_in_executor(
+            None, self.sample_stacks, thread_id, seconds)
+
+    def sample_stacks(self, thread_id: int, seconds: float) -> Counter[str]:
+        """Sample stacks of thread (blocking)."""
+        stacks: Counter[str] = Counter()
+        sample_interval = self.sample_interval
+        get_frames = sys._current_frames
+        deadline = monotonic() + seconds
+        while monotonic() < deadline:
+            frame = get_frames().get(thread_id)
+            if frame is not None:
+                stacks[self._format_stack(frame)] += 1
+            time.sleep(sample_interval)
+        return stacks
+
+    @staticmethod
+    def _format_stack(frame: Any) -> str:
+        frames = []
+        while frame is not None:
+            code = frame.f_code
+            frames.append(
+                f'{code.co_name} ({code.co_filename}:{frame.f_lineno})')
+            frame = frame.f_back
+        return ';'.join(reversed(frames))
+
+    @staticmethod
+    def format_snapshot(stacks: Counter[str]) -> str:
+        """Format snapshot in the format used by flame graph tools."""
+        return ''.join(
+            f'{stack} {count}\n' for stack, count in stacks.most_common())
+
+    def asdict(self) -> Mapping:
+        return {
+            'loop_lag': {
+                'last': self.loop_lag_last,
+                **self.loop_lag.asdict(),
+            },
+            'agents': {
+                name: profile.asdict()
+                for name, profile in list(self.agents.items())
+            },
+        }
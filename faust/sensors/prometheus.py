@@ -0,0 +1,322 @@
+"""Monitor exposing metrics to Prometheus."""
+import re
+from typing import (
+    Any,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    NamedTuple,
+    Optional,
+    Pattern,
+    Tuple,
+)
+
+from faust.types import AppT
+from faust.web import Request, Response, View
+
+from .histogram import SlidingHistogram
+from .monitor import Monitor
+
+__all__ = [
+    'Sample',
+    'MetricFamily',
+    'PrometheusMonitor',
+    'setup_prometheus_sensors',
+]
+
+#: Content type of the Prometheus text exposition format.
+CONTENT_TYPE = 'text/plain; version=0.0.4'
+
+#: Quantiles exported for every latency summary.
+QUANTILES = (0.5, 0.75, 0.95, 0.99, 0.999)
+
+# This regular expression is used to turn Faust names into metric names
+# and label values, e.g. "Stream: <Topic: withdrawals>" -> "topic_withdrawals"
+RE_METRIC_NAME = re.compile(r'[^a-zA-Z0-9_:]+')
+RE_NORMALIZE = re.compile(r'[\<\>:\s]+')
+RE_NORMALIZE_SUBSTITUTION = '_'
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+class Sample(NamedTuple):
+    """Single value of a metric."""
+
+    suffix: str
+    labels: Labels
+    value: float
+
+
+class MetricFamily:
+    """Metric and its samples, as rendered by Prometheus."""
+
+    name: str
+    type: str
+    help: str
+    samples: List[Sample]
+
+    def __init__(self, name: str, type: str, help: str) -> None:
+        self.name = name
+        self.type = type
+        self.help = help
+        self.samples = []
+
+    def add(self, value: float, suffix: str = '', **labels: Any) -> None:
+        self.samples.append(Sample(
+            suffix, tuple((k, str(v)) for k, v in labels.items()), value))
+
+    def add_histogram(self, histogram: SlidingHistogram,
+                      **labels: Any) -> None:
+        # Our histograms are exported as Prometheus summaries,
+        # with precomputed quantiles.  Like the summaries of the
+        # Prometheus client libraries, the quantiles only describe
+        # the values in the sliding window, while _sum and _count
+        # are cumulative.
+        percentiles = histogram.percentiles(q * 100.0 for q in QUANTILES)
+        for quantile in QUANTILES:
+            self.add(percentiles[quantile * 100.0],
+                     quantile=f'{quantile:g}', **labels)
+        self.add(histogram.total, suffix='_sum', **labels)
+        self.add(histogram.count, suffix='_count', **labels)
+
+    def render(self) -> Iterator[str]:
+        yield f'# HELP {self.name} {self._escape_help(self.help)}'
+        yield f'# TYPE {self.name} {self.type}'
+        for sample in self.samples:
+            labels = ','.join(
+                f'{key}="{self._escape_label(value)}"'
+                for key, value in sample.labels)
+            labels = f'{{{labels}}}' if labels else ''
+            yield (f'{self.name}{sample.suffix}{labels} '
+                   f'{self._format_value(sample.value)}')
+
+    @staticmethod
+    def _escape_help(value: str) -> str:
+        return value.replace('\\', r'\\').replace('\n', r'\n')
+
+    @staticmethod
+    def _escape_label(value: str) -> str:
+        return (value.replace('\\', r'\\')
+                     .replace('\n', r'\n')
+                     .replace('"', r'\"'))
+
+    @staticmethod
+    def _format_value(value: Optional[float]) -> str:
+        if value is None:
+            return 'NaN'
+        return repr(float(value))
+
+    def __repr__(self) -> str:
+        return (f'<{type(self).__name__}: {self.name} '
+                f'samples={len(self.samples)}>')
+
+
+class PrometheusMonitor(Monitor):
+    """Monitor exposing metrics in the Prometheus text format.
+
+    Unlike the Statsd and Datadog monitors this sensor does not send
+    anything while processing messages: metrics are generated
+    from the counters and histograms kept by :class:`Monitor`
+    only when Prometheus scrapes the ``/metrics`` page,
+    so the worker does no extra work between scrapes.
+
+    The easiest way to enable it is to use
+    :func:`setup_prometheus_sensors`::
+
+        from faust.sensors.prometheus import setup_prometheus_sensors
+
+        app = faust.App('myapp')
+        setup_prometheus_sensors(app)
+    """
+
+    prefix: str
+
+    def __init__(self, prefix: str = 'faust', **kwargs: Any) -> None:
+        self.prefix = self._metric_name(prefix)
+        super().__init__(**kwargs)
+
+    def expose(self) -> str:
+        """Return all metrics in the Prometheus text exposition format."""
+        return '\n'.join(
+            line
+            for family in self.collect()
+            for line in family.render()
+        ) + '\n'
+
+    def collect(self) -> Iterator[MetricFamily]:
+        """Generate metric families from the current state."""
+        # The worker may be updating the counters while we are
+        # reading them (e.g. with web_in_thread), so we iterate over
+        # copies of the mappings.  This is safe without locks,
+        # as copying a dict is atomic in CPython.
+        yield self._counters_by_topic(
+            'messages_received_total',
+            'Number of messages received.',
+            self.messages_received_by_topic)
+        yield self._counters_by_topic(
+            'messages_sent_total',
+            'Number of messages sent.',
+            self.messages_sent_by_topic)
+        yield self._gauge(
+            'messages_active',
+            'Number of messages currently being processed.',
+            self.messages_active)
+        yield self._gauge(
+            'events_active',
+            'Number of events currently being processed.',
+            self.events_active)
+        yield self._events_by_stream()
+        yield self._topic_buffer_full()
+        yield self._offsets(
+            'read_offset',
+            'Offset of last message received.',
+            self.tp_read_offsets)
+        yield self._offsets(
+            'committed_offset',
+            'Last committed offset.',
+            self.tp_committed_offsets)
+        yield self._offsets(
+            'end_offset',
+            'Log end offset (highwater).',
+            self.tp_end_offsets)
+        yield from self._table_counters()
+        yield self._metric_counts()
+        yield self._histograms_by(
+            'events_runtime_seconds',
+            'Time from event received by stream until acked.',
+            'stream',
+            ((self._stream_label(stream), histogram)
+             for stream, histogram in list(
+                 self.events_runtime_by_stream.items())))
+        yield self._histograms_by(
+            'message_latency_seconds',
+            'Time from message received until processed by all streams.',
+            'topic',
+            list(self.message_latency_by_topic.items()))
+        yield self._histogram(
+            'commit_latency_seconds',
+            'Time taken to commit offsets.',
+            self.commit_latency)
+        yield self._gauge(
+            'commit_interval_seconds',
+            'Time between commits, as decided by the commit policy.',
+            self.commit_interval)
+        yield self._histogram(
+            'send_latency_seconds',
+            'Time taken to send a message.',
+            self.send_latency)
+
+    def _family(self, name: str, type: str, help: str) -> MetricFamily:
+        return MetricFamily(f'{self.prefix}_{name}', type, help)
+
+    def _gauge(self, name: str, help: str, value: float) -> MetricFamily:
+        family = self._family(name, 'gauge', help)
+        family.add(value)
+        return family
+
+    def _counters_by_topic(self, name: str, help: str,
+                           counts: Mapping[str, int]) -> MetricFamily:
+        family = self._family(name, 'counter', help)
+        for topic, count in list(counts.items()):
+            family.add(count, topic=topic)
+        return family
+
+    def _events_by_stream(self) -> MetricFamily:
+        family = self._family(
+            'events_total', 'counter', 'Number of events by stream.')
+        for stream, count in list(self.events_by_stream.items()):
+            family.add(count, stream=self._stream_label(stream))
+        return family
+
+    def _topic_buffer_full(self) -> MetricFamily:
+        family = self._family(
+            'topic_buffer_full_total', 'counter',
+            'Number of times a topic buffer was full.')
+        for topic, count in list(self.topic_buffer_full.items()):
+            family.add(count, topic=str(topic))
+        return family
+
+    def _offsets(self, name: str, help: str,
+                 offsets: Mapping[Any, int]) -> MetricFamily:
+        family = self._family(name, 'gauge', help)
+        for tp, offset in list(offsets.items()):
+            family.add(offset, topic=tp.topic, partition=tp.partition)
+        return family
+
+    def _table_counters(self) -> Iterator[MetricFamily]:
+        retrieved = self._family(
+            'table_keys_retrieved_total', 'counter',
+            'Number of keys retrieved from table.')
+        updated = self._family(
+            'table_keys_updated_total', 'counter',
+            'Number of keys created/changed in table.')
+        deleted = self._family(
+            'table_keys_deleted_total', 'counter',
+            'Number of keys deleted from table.')
+        for name, state in list(self.tables.items()):
+            retrieved.add(state.keys_retrieved, table=name)
+            updated.add(state.keys_updated, table=name)
+            deleted.add(state.keys_deleted, table=name)
+        return iter([retrieved, updated, deleted])
+
+    def _metric_counts(self) -> MetricFamily:
+        family = self._family(
+            'metric_counts_total', 'counter',
+            'Arbitrary counts added by the app using Monitor.count().')
+        for metric, count in list(self.metric_counts.items()):
+            family.add(count, metric=metric)
+        return family
+
+    def _histogram(self, name: str, help: str,
+                   histogram: SlidingHistogram) -> MetricFamily:
+        family = self._family(name, 'summary', help)
+        family.add_histogram(histogram)
+        return family
+
+    def _histograms_by(
+            self, name: str, help: str, label: str,
+            histograms: Iterable[Tuple[str, SlidingHistogram]],
+    ) -> MetricFamily:
+        family = self._family(name, 'summary', help)
+        for value, histogram in histograms:
+            family.add_histogram(histogram, **{label: value})
+        return family
+
+    def _stream_label(self, stream: Any,
+                      *,
+                      prefix: str = 'Stream:') -> str:
+        name = stream.shortlabel
+        if name.startswith(prefix):
+            name = name[len(prefix):]
+        return self._normalize(name).strip('_').lower()
+
+    def _normalize(self, name: str,
+                   *,
+                   pattern: Pattern = RE_NORMALIZE,
+                   substitution: str = RE_NORMALIZE_SUBSTITUTION) -> str:
+        return pattern.sub(substitution, name)
+
+    @staticmethod
+    def _metric_name(name: str) -> str:
+        return RE_METRIC_NAME.sub('_', name)
+
+
+def setup_prometheus_sensors(app: AppT,
+                             pattern: str = '/metrics',
+                             prefix: str = 'faust') -> PrometheusMonitor:
+    """Use :class:`PrometheusMonitor` and serve metrics at ``pattern``.
+
+    This replaces the :attr:`app.monitor <faust.App.monitor>`,
+    so it must be called before the worker is started.
+    """
+    monitor = PrometheusMonitor(prefix=prefix, loop=app.loop)
+    app.monitor = monitor
+
+    @app.page(pattern)
+    class Metrics(View):
+
+        async def get(self, request: Request) -> Response:
+            return self.text(monitor.expose(), content_type=CONTENT_TYPE)
+
+    return monitor
@@ -10,6 +10,7 @@ from faust.exceptions import ImproperlyConfigured
 from faust.types import CollectionT, EventT, Message, StreamT, TP
 from faust.types.transports import ConsumerT, ProducerT
 
+from .batch import SensorBatch
 from .monitor import Monitor, TPOffsetMapping
 
 try:
@@ -33,12 +34,22 @@ __all__ = ['StatsdMonitor']
 RE_NORMALIZE = re.compile(r'[\<\>:\s]+')
 RE_NORMALIZE_SUBSTITUTION = '_'
 
+#: Latency percentiles sent for every sensor batch.
+LATENCY_PERCENTILES = (50.0, 99.0, 99.9)
+
 
 class StatsdMonitor(Monitor):
     """Statsd Faust Sensor.
 
     This sensor, records statistics to Statsd along with computing metrics
     for the stats server
+
+    Message and event counters are sent once every
+    :setting:`sensor_batch_interval`, aggregated by topic partition.
+    The monitor is then not called for every message, so event
+    runtimes are not recorded.
+    Pass ``batched=False`` to send them for every message instead
+    (this was the default before Faust 1.5, and is considerably slower).
     """
 
     host: str
@@ -50,11 +61,16 @@ class StatsdMonitor(Monitor):
                  port: int = 8125,
                  prefix: str = 'faust-app',
                  rate: float = 1.0,
+                 batched: bool = True,
                  **kwargs: Any) -> None:
         self.host = host
         self.port = port
         self.prefix = prefix
         self.rate = rate
+        # batched monitors only get aggregated counts in on_batch,
+        # and are no longer called for every message.
+        self.batched = batched
+        self.per_message = not batched
         if statsd is None:
             raise ImproperlyConfigured(
                 'StatsMonitor requires `pip install statsd`.')
@@ -66,7 +82,6 @@ class StatsdMonitor(Monitor):
 
     def on_message_in(self, tp: TP, offset: int, message: Message) -> None:
         super().on_message_in(tp, offset, message)
-
         self.client.incr('messages_received', rate=self.rate)
         self.client.incr('messages_active', rate=self.rate)
         self.client.incr(f'topic.{tp.topic}.messages_received', rate=self.rate)
@@ -91,9 +106,10 @@ class StatsdMonitor(Monitor):
                             event: EventT) -> None:
         super().on_stream_event_out(tp, offset, stream, event)
         self.client.decr('events_active', rate=self.rate)
+        time_total = event.message.stream_meta[id(stream)]['time_total']
         self.client.timing(
             'events_runtime',
-            self._time(self.events_runtime[-1]),
+            self._time(time_total),
             rate=self.rate)
 
     def on_message_out(self,
@@ -103,6 +119,38 @@ class StatsdMonitor(Monitor):
         super().on_message_out(tp, offset, message)
         self.client.decr('messages_active', rate=self.rate)
 
+    def on_batch(self, batch: SensorBatch) -> None:
+        super().on_batch(batch)
+        rate = self.rate
+        with self.client.pipeline() as client:
+            for tp, stats in batch.tps.items():
+                if stats.messages_in:
+                    client.incr('messages_received',
+                                count=stats.messages_in, rate=rate)
+                    client.incr(f'topic.{tp.topic}.messages_received',
+                                count=stats.messages_in, rate=rate)
+                    client.gauge(f'read_offset.{tp.topic}.{tp.partition}',
+                                 stats.last_offset_in)
+                if stats.events_in:
+                    client.incr('events', count=stats.events_in, rate=rate)
+                messages_active = stats.messages_in - stats.messages_out
+                if messages_active:
+                    client.incr('messages_active',
+                                count=messages_active, rate=rate)
+                events_active = stats.events_in - stats.events_out
+                if events_active:
+                    client.incr('events_active',
+                                count=events_active, rate=rate)
+            for stream, count in batch.events_by_stream.items():
+                client.incr(f'stream.{self._stream_label(stream)}.events',
+                            count=count, rate=rate)
+            latency = batch.latency()
+            if latency.count:
+                for percentile, value in latency.percentiles(
+                        LATENCY_PERCENTILES).items():
+                    key = latency.percentile_key(percentile)
+                    client.gauge(f'message_latency.{key}', self._time(value))
+
     def on_table_get(self, table: CollectionT, key: Any) -> None:
         super().on_table_get(table, key)
         self.client.incr(f'table.{table.name}.keys_retrieved', rate=self.rate)
@@ -121,6 +169,7 @@ class StatsdMonitor(Monitor):
             'commit_latency',
             self._time(monotonic() - cast(float, state)),
             rate=self.rate)
+        self.client.gauge('commit_interval', self._time(self.commit_interval))
 
     def on_send_initiated(self, producer: ProducerT, topic: str,
                           keysize: int, valsize: int) -> Any:
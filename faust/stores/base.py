@@ -1,6 +1,7 @@
 """Base class for table storage drivers."""
 import abc
 from collections.abc import ItemsView, KeysView, ValuesView
+from itertools import islice
 from typing import (
     Any,
     Callable,
@@ -70,6 +71,26 @@ class Store(StoreT[KT, VT], Service):
                            newly_assigned: Set[TP]) -> None:
         ...
 
+    def scan(self, cursor: str = None) -> Iterator[Tuple[str, KT, VT]]:
+        """Iterate over the items in the store.
+
+        Yields ``(cursor, key, value)`` tuples, where ``cursor`` can be
+        passed to a later call to continue after that item.
+
+        The default implementation uses the position of the item as
+        cursor, so items may be skipped or repeated when keys are
+        added or removed between calls.
+
+        Raises:
+            ValueError: if the cursor is not valid.
+        """
+        start = int(cursor) if cursor else 0
+        if start < 0:
+            raise ValueError(f'Invalid cursor: {cursor!r}')
+        items = islice(self.items(), start, None)
+        for position, (key, value) in enumerate(items, start + 1):
+            yield str(position), key, value
+
     def _encode_key(self, key: KT) -> bytes:
         key_bytes = self.app.serializers.dumps_key(
             self.key_type, key, serializer=self.key_serializer)
@@ -2,8 +2,10 @@
 import math
 import shutil
 import typing
+from base64 import urlsafe_b64decode, urlsafe_b64encode
 from collections import defaultdict
 from contextlib import suppress
+from operator import itemgetter
 from pathlib import Path
 from typing import (
     Any,
@@ -304,12 +306,16 @@ class Store(base.SerializedStore):
             return self._dbs.values()
 
     def _dbs_for_actives(self) -> Iterator[DB]:
+        for _, db in self._active_partition_dbs():
+            yield db
+
+    def _active_partition_dbs(self) -> Iterator[Tuple[int, DB]]:
         actives = self.app.assignor.assigned_actives()
         topic = self.table._changelog_topic_name()
         for partition, db in self._dbs.items():
             tp = TP(topic=topic, partition=partition)
             if tp in actives:
-                yield db
+                yield partition, db
 
     def _size(self) -> int:
         return sum(self._size1(db) for db in self._dbs_for_actives())
@@ -321,9 +327,13 @@ class Store(base.SerializedStore):
             if key != self.offset_key:
                 yield key
 
-    def _visible_items(self, db: DB) -> Iterator[Tuple[bytes, bytes]]:
+    def _visible_items(self, db: DB,
+                       start: bytes = None) -> Iterator[Tuple[bytes, bytes]]:
         it = db.iteritems()  # noqa: B301
-        it.seek_to_first()
+        if start is None:
+            it.seek_to_first()
+        else:
+            it.seek(start)
         for key, value in it:
             if key != self.offset_key:
                 yield key, value
@@ -336,7 +346,7 @@ class Store(base.SerializedStore):
         return sum(1 for _ in self._visible_keys(db))
 
     def _iterkeys(self) -> Iterator[bytes]:
-        for db in self.dbs_for_actives():
+        for db in self._dbs_for_actives():
             yield from self._visible_keys(db)
 
     def _itervalues(self) -> Iterator[bytes]:
@@ -347,6 +357,36 @@ class Store(base.SerializedStore):
         for db in self._dbs_for_actives():
             yield from self._visible_items(db)
 
+    def scan(self, cursor: str = None) -> Iterator[Tuple[str, Any, Any]]:
+        """Iterate over the items in the store.
+
+        Partitions are iterated over in order, and the cursor is the
+        partition and key of the last item returned, so iteration
+        continues by seeking to that key.
+        """
+        start_partition, start_key = -1, None
+        if cursor:
+            start_partition, start_key = self._decode_cursor(cursor)
+        dbs = sorted(self._active_partition_dbs(), key=itemgetter(0))
+        for partition, db in dbs:
+            if partition < start_partition:
+                continue
+            start = start_key if partition == start_partition else None
+            for key, value in self._visible_items(db, start):
+                if key != start:
+                    yield (self._encode_cursor(partition, key),
+                           self._decode_key(key),
+                           self._decode_value(value))
+
+    def _encode_cursor(self, partition: int, key: bytes) -> str:
+        return f'{partition}:{urlsafe_b64encode(key).decode()}'
+
+    def _decode_cursor(self, cursor: str) -> Tuple[int, bytes]:
+        partition, sep, key = cursor.partition(':')
+        if not sep:
+            raise ValueError(f'Invalid cursor: {cursor!r}')
+        return int(partition), urlsafe_b64decode(key.encode())
+
     def _clear(self) -> None:
         raise NotImplementedError('TODO')  # XXX cannot reset tables
 
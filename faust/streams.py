@@ -5,11 +5,13 @@ import typing
 import weakref
 from asyncio import CancelledError
 from contextvars import ContextVar
+from inspect import isawaitable
 from time import monotonic
 from typing import (
     Any,
     AsyncIterable,
     AsyncIterator,
+    Awaitable,
     Callable,
     Iterable,
     Iterator,
@@ -28,12 +30,12 @@ from typing import (
 from mode import Seconds, Service, get_logger, want_seconds
 from mode.utils.aiter import aenumerate, aiter
 from mode.utils.compat import current_task
-from mode.utils.futures import maybe_async, notify
+from mode.utils.futures import maybe_async
 from mode.utils.objects import cached_property
 from mode.utils.types.trees import NodeT
 
 from . import joins
-from .exceptions import ImproperlyConfigured
+from .exceptions import ImproperlyConfigured, Skip
 from .types import AppT, ConsumerT, EventT, K, ModelArg, ModelT, TP, TopicT
 from .types.joins import JoinT
 from .types.models import FieldDescriptorT
@@ -75,6 +77,13 @@ async def maybe_forward(value: Any, channel: ChannelT) -> Any:
     return value
 
 
+async def _skip_unless(keep: Awaitable[bool], value: Any) -> Any:
+    # used by Stream.filter when the predicate is an async function.
+    if not await keep:
+        raise Skip()
+    return value
+
+
 class _LinkedListDirection(NamedTuple):
     attr: str
     getter: Callable[[StreamT], Optional[StreamT]]
@@ -223,6 +232,7 @@ class Stream(StreamT[T_co], Service):
             'concurrency_index': self.concurrency_index,
             'prev': self._prev,
             'active_partitions': self.active_partitions,
+            'enable_acks': self.enable_acks,
         }
 
     def clone(self, **kwargs: Any) -> StreamT:
@@ -279,84 +289,23 @@ class Stream(StreamT[T_co], Service):
             if self.current_event is not None:
                 yield self.current_event
 
-    async def take(self, max_: int,
-                   within: Seconds) -> AsyncIterable[Sequence[T_co]]:
+    def take(self, max_: int,
+             within: Seconds) -> AsyncIterable[Sequence[T_co]]:
         """Buffer n values at a time and yield a list of buffered values.
 
+        The values are read directly from the channel into a buffer
+        preallocated for ``max_`` values, and the events they came from
+        are acknowledged together after the list has been processed.
+
         Arguments:
             within: Timeout for when we give up waiting for another value,
-                and process the values we have.
+                and process the values we have.  The timer starts when
+                the first value is added to the buffer.
                 Warning: If there's no timeout (i.e. `timeout=None`),
                 the agent is likely to stall and block buffered events for an
                 unreasonable length of time(!).
         """
-        buffer: List[T_co] = []
-        events: List[EventT] = []
-        buffer_add = buffer.append
-        event_add = events.append
-        buffer_size = buffer.__len__
-        buffer_full = asyncio.Event(loop=self.loop)
-        buffer_consumed = asyncio.Event(loop=self.loop)
-        timeout = want_seconds(within) if within else None
-        stream_enable_acks: bool = self.enable_acks
-
-        buffer_consuming: Optional[asyncio.Future] = None
-
-        channel_it = aiter(self.channel)
-
-        # We add this processor to populate the buffer, and the stream
-        # is passively consumed in the background (enable_passive below).
-        async def add_to_buffer(value: T) -> T:
-            # buffer_consuming is set when consuming buffer after timeout.
-            nonlocal buffer_consuming
-            if buffer_consuming is not None:
-                try:
-                    await buffer_consuming
-                finally:
-                    buffer_consuming = None
-            buffer_add(cast(T_co, value))
-            event = self.current_event
-            if event is not None:
-                event_add(event)
-            if buffer_size() >= max_:
-                # signal that the buffer is full and should be emptied.
-                buffer_full.set()
-                # strict wait for buffer to be consumed after buffer full.
-                # (if max_ is 1000, we are not allowed to return 1001 values.)
-                buffer_consumed.clear()
-                await self.wait(buffer_consumed)
-            return value
-
-        # Disable acks to ensure this method acks manually
-        # events only after they are consumed by the user
-        self.enable_acks = False
-
-        self.add_processor(add_to_buffer)
-        self._enable_passive(cast(ChannelT, channel_it))
-        try:
-            while not self.should_stop:
-                # wait until buffer full, or timeout
-                await self.wait_for_stopped(buffer_full, timeout=timeout)
-                if buffer:
-                    # make sure background thread does not add new times to
-                    # budfer while we read.
-                    buffer_consuming = self.loop.create_future()
-                    try:
-                        yield list(buffer)
-                    finally:
-                        buffer.clear()
-                        for event in events:
-                            await self.ack(event)
-                        events.clear()
-                        # allow writing to buffer again
-                        notify(buffer_consuming)
-                        buffer_full.clear()
-                        buffer_consumed.set()
-
-        finally:
-            # Restore last behaviour of "enable_acks"
-            self.enable_acks = stream_enable_acks
-            self._processors.remove(add_to_buffer)
+        return self._aiter(max_, want_seconds(within) if within else None)
 
     def enumerate(self, start: int = 0) -> AsyncIterable[Tuple[int, T_co]]:
         """Enumerate values received on this stream.
@@ -366,6 +315,65 @@ class Stream(StreamT[T_co], Service):
         """
         return aenumerate(self, start)
 
+    def filter(self,
+               fun: Callable[[T], Union[bool, Awaitable[bool]]]) -> StreamT:
+        """Filter values from stream using callback.
+
+        The callback may be a regular function or an async function,
+        and is called for every value received on the stream.
+        Values for which it returns a false value are skipped, and
+        their events are acknowledged right away without being
+        yielded to the code iterating over the stream.
+
+        Returns a new stream, that supersedes this stream.
+
+        Example:
+            .. sourcecode:: python
+
+                @app.agent(orders_topic)
+                async def process_large_orders(orders):
+                    async for order in orders.filter(
+                            lambda order: order.amount > 1000):
+                        ...
+
+        Notes:
+            Like other processors, the filter is applied after the
+            processors added before it, see :meth:`add_processor`.
+        """
+        def on_value(value: T) -> Any:
+            keep = fun(value)
+            if isawaitable(keep):
+                return _skip_unless(cast(Awaitable[bool], keep), value)
+            if not keep:
+                raise Skip()
+            return value
+
+        stream = self._chain()
+        stream.add_processor(on_value)
+        return stream
+
+    def map(self, fun: Processor[T]) -> StreamT:
+        """Transform values in the stream using callback.
+
+        The callback may be a regular function or an async function,
+        and the value it returns replaces the value in the stream.
+        If it returns :const:`None` the value is skipped, and its
+        event is acknowledged right away, like with :meth:`filter`.
+
+        Returns a new stream, that supersedes this stream.
+
+        Example:
+            .. sourcecode:: python
+
+                @app.agent(orders_topic)
+                async def process_orders(orders):
+                    async for amount in orders.map(lambda o: o.amount):
+                        ...
+        """
+        stream = self._chain()
+        stream.add_processor(fun)
+        return stream
+
     def through(self, channel: Union[str, ChannelT]) -> StreamT:
         """Forward values to in this stream to channel.
 
@@ -677,7 +685,13 @@ class Stream(StreamT[T_co], Service):
     def __next__(self) -> Any:
         raise NotImplementedError('Streams are asynchronous: use `async for`')
 
-    async def __aiter__(self) -> AsyncIterator:
+    def __aiter__(self) -> AsyncIterator:
+        return self._aiter()
+
+    async def _aiter(self, take_max: int = None,  # noqa: C901
+                     take_within: float = None) -> AsyncIterator:
+        # Iterates over values in the stream, or over lists of up to
+        # ``take_max`` values when called by :meth:`take`.
         self._finalized = True
         loop = self.loop
         await self.maybe_start()
@@ -708,7 +722,6 @@ class Stream(StreamT[T_co], Service):
 
         # localize global variables
         create_ref = weakref.ref
-        _maybe_async = maybe_async
         event_cls = EventT
         _current_event_contextvar = _current_event
         ack_exceptions = self.app.conf.stream_ack_exceptions
@@ -721,30 +734,71 @@ class Stream(StreamT[T_co], Service):
         on_message_in = self.app.sensors.on_message_in
         sleep = asyncio.sleep
 
+        # take(): values and their events are collected into buffers
+        # allocated once, and the buffer is flushed when full or when
+        # the deadline set by the first value in the buffer is reached.
+        buffering = take_max is not None
+        buffer_size: int = take_max or 0
+        buffer: List[Any] = [None] * buffer_size
+        buffer_events: List[Optional[EventT]] = [None] * buffer_size
+        buffered = 0
+        deadline: Optional[float] = None
+        # get from channel that did not complete before the deadline.
+        pending: Optional[asyncio.Future] = None
+        exhausted = False
+        wait = asyncio.wait
+        ensure_future = asyncio.ensure_future
+
         try:
             while not self.should_stop:
                 event = None
                 do_ack = self.enable_acks  # set to False to not ack event.
+                await sleep(0, loop=loop)
                 # wait for next message
                 value: Any = None
                 # we iterate until on_merge gives value.
+                # Values skipped by filters do not go back to the event
+                # loop: once the channel queue is empty we wait for it.
                 while value is None:
-                    await sleep(0, loop=loop)
                     # get message from channel
                     # This inlines ThrowableQueue.get for performance:
                     # We selectively call `await Q.put`/`Q.put_nowait`,
                     # and prefer the latter if the queue is non-empty.
                     channel_value: Any
-                    if chan_is_channel:
+                    if chan_is_channel and pending is None:
                         if chan_errors:
                             raise chan_errors.popleft()
-                        if chan_queue_empty():
-                            channel_value = await chan_slow_get()
-                        else:
-                            channel_value = chan_quick_get()
+                        ready = not chan_queue_empty()
                     else:
                         # chan is an AsyncIterable
+                        ready = False
+                    if ready:
+                        channel_value = chan_quick_get()
+                    elif not buffering:
                         channel_value = await chan_slow_get()
+                    else:
+                        # take(): wait for the next value, but only
+                        # until the buffer must be flushed.
+                        try:
+                            if pending is None and deadline is None:
+                                channel_value = await chan_slow_get()
+                            else:
+                                if pending is None:
+                                    pending = ensure_future(
+                                        chan_slow_get(), loop=loop)
+                                await wait(
+                                    (pending,),
+                                    timeout=(
+                                        None if deadline is None
+                                        else max(deadline - monotonic(), 0)),
+                                    loop=loop)
+                                if not pending.done():
+                                    break  # deadline reached: flush buffer
+                                fut, pending = pending, None
+                                channel_value = fut.result()
+                        except StopAsyncIteration:
+                            exhausted = True
+                            break
 
                     if isinstance(channel_value, event_cls):
                         event = channel_value
@@ -782,9 +836,42 @@ class Stream(StreamT[T_co], Service):
                         self.current_event = None
 
                     # reduce using processors
-                    for processor in processors:
-                        value = await _maybe_async(processor(value))
-                    value = await on_merge(value)
+                    try:
+                        for processor in processors:
+                            # This inlines maybe_async(processor(value))
+                            value = processor(value)
+                            if isawaitable(value):
+                                value = await value
+                    except Skip:
+                        value = None
+                    else:
+                        value = await on_merge(value)
+                    if value is None and do_ack and event is not None:
+                        # filtered out, or a processor returned None:
+                        # the event is never yielded, so ack it now
+                        # and get the next value.
+                        # This inlines self.ack
+                        last_stream_to_ack = event.ack()
+                        on_stream_event_out(tp, offset, self, event)
+                        if last_stream_to_ack:
+                            on_message_out(tp, offset, message)
+                        event = None
+                if buffering:
+                    if value is not None:
+                        buffer[buffered] = value
+                        buffer_events[buffered] = event
+                        buffered += 1
+                        if buffered < buffer_size:
+                            if deadline is None:
+                                if take_within is not None:
+                                    deadline = monotonic() + take_within
+                                continue
+                            elif monotonic() < deadline:
+                                continue
+                    if not buffered:
+                        return  # channel exhausted
+                    value = buffer[:buffered]
+                    self.current_event = buffer_events[buffered - 1]
                 try:
                     yield value
                 except CancelledError:
@@ -804,7 +891,23 @@ class Stream(StreamT[T_co], Service):
                     raise
                 finally:
                     self.current_event = None
-                    if do_ack and event is not None:
+                    if buffering:
+                        for i in range(buffered):
+                            buffered_event = buffer_events[i]
+                            buffer[i] = buffer_events[i] = None
+                            if do_ack and buffered_event is not None:
+                                # This inlines self.ack
+                                last_stream_to_ack = buffered_event.ack()
+                                message = buffered_event.message
+                                tp = message.tp
+                                offset = message.offset
+                                on_stream_event_out(
+                                    tp, offset, self, buffered_event)
+                                if last_stream_to_ack:
+                                    on_message_out(tp, offset, message)
+                        buffered = 0
+                        deadline = None
+                    elif do_ack and event is not None:
                         # This inlines self.ack
                         last_stream_to_ack = event.ack()
                         message = event.message
@@ -813,6 +916,8 @@ class Stream(StreamT[T_co], Service):
                         on_stream_event_out(tp, offset, self, event)
                         if last_stream_to_ack:
                             on_message_out(tp, offset, message)
+                if exhausted:
+                    return
         except StopAsyncIteration:
             # We are not allowed to propagate StopAsyncIteration in __aiter__
             # (if we do, it'll be converted to RuntimeError by CPython).
@@ -823,6 +928,8 @@ class Stream(StreamT[T_co], Service):
             # the iteration.
             return
         finally:
+            if pending is not None:
+                pending.cancel()
             self._channel_stop_iteration(channel)
 
     async def __anext__(self) -> T:  # pragma: no cover
@@ -20,6 +20,7 @@ from typing import (
     cast,
     no_type_check,
 )
+from uuid import uuid4
 
 from mode import Seconds, Service
 from yarl import URL
@@ -78,6 +79,23 @@ class Collection(Service, CollectionT):
     _changelog_compacting: Optional[bool] = True
     _changelog_deleting: Optional[bool] = None
 
+    #: Number of counters used to track changes to keys,
+    #: see :meth:`key_version`.
+    key_version_slots: int = 1024
+
+    #: Incremented every time data in the table changes.
+    version: int = 0
+
+    #: Random identifier for this instance of the table.
+    #: Versions are counted in memory, and only comparable
+    #: for the same epoch.
+    epoch: str
+
+    # Incremented when keys change without knowing which ones,
+    # e.g. when applying changelog batches, or rebalancing.
+    _all_keys_version: int = 0
+    _key_versions: Optional[List[int]] = None
+
     @abc.abstractmethod
     def _has_key(self, key: Any) -> bool:  # pragma: no cover
         ...
@@ -128,6 +146,7 @@ class Collection(Service, CollectionT):
         self.recovery_buffer_size = recovery_buffer_size
         self.standby_buffer_size = standby_buffer_size or recovery_buffer_size
         assert self.recovery_buffer_size > 0 and self.standby_buffer_size > 0
+        self.epoch = uuid4().hex
 
         # Setting Serializers from key_type and value_type
         # Possible values json and raw
@@ -216,6 +235,28 @@ class Collection(Service, CollectionT):
     def reset_state(self) -> None:
         self.data.reset_state()
 
+    def key_version(self, key: Any) -> int:
+        """Return number incremented every time the value for key changes.
+
+        Keys share a fixed number of counters (:attr:`key_version_slots`),
+        so the number may also change when other keys change.
+        """
+        slots = self._key_versions
+        if slots is None:
+            return self._all_keys_version
+        return self._all_keys_version + slots[hash(key) % len(slots)]
+
+    def _on_key_changed(self, key: Any) -> None:
+        self.version += 1
+        slots = self._key_versions
+        if slots is None:
+            slots = self._key_versions = [0] * self.key_version_slots
+        slots[hash(key) % len(slots)] += 1
+
+    def _on_keys_changed(self) -> None:
+        self.version += 1
+        self._all_keys_version += 1
+
     def _send_changelog(self,
                         event: Optional[EventT],
                         key: Any,
@@ -460,6 +501,7 @@ class Collection(Service, CollectionT):
                            revoked: Set[TP],
                            newly_assigned: Set[TP]) -> None:
         await self.data.on_rebalance(self, assigned, revoked, newly_assigned)
+        self._on_keys_changed()
 
     async def on_recovery_completed(self,
                                     active_tps: Set[TP],
@@ -498,6 +540,7 @@ class Collection(Service, CollectionT):
             to_key=self._to_key,
             to_value=self._to_value,
         )
+        self._on_keys_changed()
 
     def _to_key(self, k: Any) -> Any:
         if isinstance(k, list):
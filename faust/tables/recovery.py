@@ -289,6 +289,9 @@ class Recovery(Service):
 
                 if self.need_recovery():
                     self.log.info('Restoring state from changelog topics...')
+                    # Must clear before resuming, as all changelogs
+                    # may be read before the fetcher start returns.
+                    self.signal_recovery_end.clear()
                     consumer.resume_partitions(active_tps)
                     # Resume partitions and start fetching.
                     self.log.info('Resuming flow...')
@@ -298,7 +301,6 @@ class Recovery(Service):
 
                     # Wait for actives to be up to date.
                     # This signal will be set by _slurp_changelogs
-                    self.signal_recovery_end.clear()
                     await self._wait(self.signal_recovery_end)
 
                     # recovery done.
@@ -331,7 +333,7 @@ class Recovery(Service):
                     )
 
                     for tp in standby_tps:
-                        if standby_offsets[tp] >= standby_highwaters[tp]:
+                        if standby_offsets[tp] > standby_highwaters[tp]:
                             raise ConsistencyError(
                                 E_PERSISTED_OFFSET.format(
                                     tp,
@@ -64,6 +64,7 @@ class Table(TableT[KT, VT], Collection):
         self._sensor_on_get(self, key)
 
     def on_key_set(self, key: KT, value: VT) -> None:
+        self._on_key_changed(key)
         event = current_event()
         self._send_changelog(event, key, value)
         if event is not None:
@@ -75,6 +76,7 @@ class Table(TableT[KT, VT], Collection):
                 'Setting table key from outside of stream iteration')
 
     def on_key_del(self, key: KT) -> None:
+        self._on_key_changed(key)
         event = current_event()
         self._send_changelog(event, key, value=None, value_serializer='raw')
         if event is not None:
@@ -8,11 +8,14 @@ from typing import (
     Any,
     Awaitable,
     Callable,
+    Iterable,
+    List,
     Mapping,
     Optional,
     Pattern,
     Sequence,
     Set,
+    Tuple,
     Union,
     cast,
     no_type_check,
@@ -158,7 +161,7 @@ class Topic(Channel, TopicT):
         """Send message to topic."""
         if self.app._attachments.enabled and not force:
             event = current_event()
-            if event is not None:
+            if event is not None and event.message.use_tracking:
                 return cast(Event, event)._attach(
                     self,
                     key,
@@ -179,6 +182,47 @@ class Topic(Channel, TopicT):
             callback=callback,
         )
 
+    async def send_many(
+            self,
+            items: Iterable[Tuple[K, V]],
+            *,
+            partition: int = None,
+            timestamp: float = None,
+            key_serializer: CodecArg = None,
+            value_serializer: CodecArg = None,
+            callback: MessageSentCallback = None,
+            force: bool = False) -> List[Awaitable[RecordMetadata]]:
+        """Send many ``(key, value)`` messages to topic in one batch.
+
+        Returns:
+            List[FutureMessage]: one future for every message sent,
+                in the same order as ``items``.
+        """
+        if self.app._attachments.enabled and not force:
+            event = current_event()
+            if event is not None and event.message.use_tracking:
+                return [
+                    cast(Event, event)._attach(
+                        self,
+                        key,
+                        value,
+                        partition=partition,
+                        timestamp=timestamp,
+                        key_serializer=key_serializer,
+                        value_serializer=value_serializer,
+                        callback=callback,
+                    )
+                    for key, value in items
+                ]
+        futs = [
+            self.as_future_message(
+                key, value, partition, timestamp,
+                key_serializer, value_serializer, callback)
+            for key, value in items
+        ]
+        await self.publish_many(futs)
+        return cast(List[Awaitable[RecordMetadata]], futs)
+
     async def decode(self, message: Message, *,
                      propagate: bool = False) -> EventT:
         # first call to decode compiles and caches it.
@@ -370,6 +414,49 @@ class Topic(Channel, TopicT):
                 cast(Callable, partial(self._on_published, message=fut)))
             return fut2
 
+    async def publish_many(
+            self,
+            futs: Sequence[FutureMessage]) -> Awaitable[List[RecordMetadata]]:
+        """Publish many messages to this topic in one batch.
+
+        The messages are handed to the producer in one call,
+        and every :class:`~faust.types.FutureMessage` is resolved
+        by a single callback when the batch is delivered.
+        """
+        app = self.app
+        topic = self.get_topic_name()
+        producer = await self._get_producer()
+        on_send_initiated = app.sensors.on_send_initiated
+        messages = []
+        for fut in futs:
+            message = fut.message
+            key = cast(bytes, message.key)
+            value = cast(bytes, message.value)
+            on_send_initiated(
+                producer,
+                topic,
+                keysize=len(key) if key else 0,
+                valsize=len(value) if value else 0)
+            messages.append((key, value, message.partition,
+                             cast(float, message.timestamp)))
+        fut2 = await producer.send_many(topic, messages)
+        cast(asyncio.Future, fut2).add_done_callback(
+            cast(Callable, partial(self._on_published_many, messages=futs)))
+        return fut2
+
+    def _on_published_many(self, fut: asyncio.Future,
+                           messages: Sequence[FutureMessage]) -> None:
+        exc = fut.exception()
+        if exc is not None:
+            for message in messages:
+                message.set_exception(exc)
+            return
+        results: List[RecordMetadata] = fut.result()
+        for message, res in zip(messages, results):
+            message.set_result(res)
+            if message.message.callback:
+                message.message.callback(message)
+
     def _on_published(self, fut: asyncio.Future,
                       message: FutureMessage) -> None:
         res: RecordMetadata = fut.result()
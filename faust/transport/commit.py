@@ -0,0 +1,144 @@
+"""Commit policies.
+
+The commit policy decides how often the consumer commits offsets:
+
+- :class:`CommitPolicy` commits every :setting:`broker_commit_interval`
+  seconds, or every :setting:`broker_commit_every` messages.
+
+- :class:`AdaptiveCommitPolicy` adjusts the interval based on
+  throughput, consumer lag and commit latency.
+
+The policy used is configured by the :setting:`broker_commit_policy`
+setting.
+"""
+from time import monotonic
+from typing import Any, Optional, cast
+from mode.utils.times import Seconds, want_seconds
+from faust.types.transports import CommitPolicyT, ConsumerT
+from .consumer import Consumer
+
+__all__ = ['CommitPolicy', 'AdaptiveCommitPolicy']
+
+
+class CommitPolicy(CommitPolicyT):
+    """Commit at a fixed interval, or every n messages."""
+
+    def __init__(self, consumer: ConsumerT, **kwargs: Any) -> None:
+        self.consumer = consumer
+        self.interval = consumer.commit_interval
+        self.commit_every = consumer.app.conf.broker_commit_every
+
+    def next_interval(self) -> float:
+        return self.interval
+
+    def should_commit(self, n_acked: int) -> bool:
+        return self.commit_every is not None and n_acked >= self.commit_every
+
+    def on_commit_completed(self, n_acked: int, latency: float) -> None:
+        ...
+
+
+class AdaptiveCommitPolicy(CommitPolicy):
+    """Adjust the commit interval to throughput and lag.
+
+    After every commit the interval is:
+
+    - decreased to :attr:`min_interval` while the worker is rebalancing,
+      so that as little as possible is processed again when partitions
+      move to another worker.
+
+    - doubled (up to :attr:`max_interval`) when we process more than
+      :attr:`busy_rate` messages a second, and the last commit took
+      less than :attr:`cheap_ratio` of the interval.
+
+    - halved (down to :attr:`min_interval`) when the consumer lag is
+      lower than :attr:`low_lag` messages.
+
+    - reset to :setting:`broker_commit_interval` otherwise.
+
+    The number of messages that triggers a commit
+    (:setting:`broker_commit_every`) is scaled by the same factor.
+    """
+
+    #: Shortest interval, as a fraction of :setting:`broker_commit_interval`.
+    min_ratio: float = 0.25
+
+    #: Longest interval, as a multiple of :setting:`broker_commit_interval`.
+    max_ratio: float = 8.0
+
+    #: Messages processed per second above which we consider
+    #: the consumer busy.
+    busy_rate: float = 1000.0
+
+    #: A commit is cheap when it takes less than this fraction
+    #: of the interval.
+    cheap_ratio: float = 0.05
+
+    #: Total consumer lag (in messages) below which we consider
+    #: the consumer caught up.
+    low_lag: int = 1000
+
+    #: Current interval, as a multiple of
+    #: :setting:`broker_commit_interval`.
+    factor: float = 1.0
+
+    _last_commit: Optional[float] = None
+
+    def __init__(self, consumer: ConsumerT,
+                 *,
+                 min_interval: Seconds = None,
+                 max_interval: Seconds = None,
+                 busy_rate: float = None,
+                 cheap_ratio: float = None,
+                 low_lag: int = None,
+                 **kwargs: Any) -> None:
+        super().__init__(consumer, **kwargs)
+        self.base_interval = self.interval
+        self.base_commit_every = self.commit_every
+        self.min_interval = want_seconds(
+            min_interval or self.base_interval * self.min_ratio)
+        self.max_interval = want_seconds(
+            max_interval or self.base_interval * self.max_ratio)
+        if busy_rate is not None:
+            self.busy_rate = busy_rate
+        if cheap_ratio is not None:
+            self.cheap_ratio = cheap_ratio
+        if low_lag is not None:
+            self.low_lag = low_lag
+
+    def on_commit_completed(self, n_acked: int, latency: float) -> None:
+        now = monotonic()
+        last_commit, self._last_commit = self._last_commit, now
+        if last_commit is None:
+            return
+        rate = n_acked / max(now - last_commit, 1e-3)
+        if self.consumer.app.rebalancing:
+            interval = self.min_interval
+        elif (rate >= self.busy_rate and
+                latency <= self.interval * self.cheap_ratio):
+            interval = self.interval * 2.0
+        elif self.lag() < self.low_lag:
+            interval = self.interval / 2.0
+        else:
+            interval = self.base_interval
+        self._set_interval(interval)
+
+    def _set_interval(self, interval: float) -> None:
+        self.interval = min(max(interval, self.min_interval),
+                            self.max_interval)
+        self.factor = self.interval / self.base_interval
+        if self.base_commit_every is not None:
+            self.commit_every = max(
+                int(self.base_commit_every * self.factor), 1)
+
+    def lag(self) -> int:
+        """Return the number of messages not yet read in all partitions."""
+        consumer = cast(Consumer, self.consumer)
+        lag = 0
+        for tp in consumer.assignment():
+            highwater = consumer.highwater(tp)
+            if highwater is not None:
+                read_offset = consumer._read_offset.get(tp)
+                next_offset = 0 if read_offset is None else read_offset + 1
+                lag += max(highwater - next_offset, 0)
+        return lag
@@ -38,9 +38,10 @@ The Consumer is responsible for:
         will advance the comitted offset.
 
       + To find the offset that it can safely advance to the commit thread
-        will traverse the _acked mapping of TP to list of acked offsets, by
-        finding a range of consecutive acked offsets (see note in
-        _new_offset).
+        will look in the _acked mapping of TP to acked offsets
+        (:class:`~faust.transport.utils.AckTracker`), for a range
+        of consecutive acked messages starting at the first message
+        read after the committed offset (see note in _new_offset).
 
 """
 import abc
@@ -84,9 +85,8 @@ from faust.types.transports import (
     TransportT,
 )
 from faust.utils import terminal
-from faust.utils.functional import consecutive_numbers
 
-from .utils import TopicBuffer, TopicIndexMap
+from .utils import AckTracker, TopicBuffer, TopicIndexMap
 
 if typing.TYPE_CHECKING:  # pragma: no cover
     from faust.app import App
@@ -169,11 +169,8 @@ class Consumer(Service, ConsumerT):
     #: underlying consumer driver is stopped.
     consumer_stopped_errors: ClassVar[Tuple[Type[BaseException], ...]] = ()
 
-    # Mapping of TP to list of acked offsets.
-    _acked: MutableMapping[TP, List[int]]
-
-    #: Fast lookup to see if tp+offset was acked.
-    _acked_index: MutableMapping[TP, Set[int]]
+    # Mapping of TP to acked offsets.
+    _acked: MutableMapping[TP, AckTracker]
 
     #: Keeps track of the currently read offset in each TP
     _read_offset: MutableMapping[TP, Optional[int]]
@@ -207,7 +204,7 @@ class Consumer(Service, ConsumerT):
     # How often to poll and track log end offsets.
     _end_offset_monitor_interval: float
 
-    _commit_every: Optional[int]
+    #: Number of messages acked since the last commit.
     _n_acked: int = 0
 
     _active_partitions: Optional[Set[TP]]
@@ -233,14 +230,15 @@ class Consumer(Service, ConsumerT):
         self._on_message_in = self.app.sensors.on_message_in
         self._on_partitions_revoked = on_partitions_revoked
         self._on_partitions_assigned = on_partitions_assigned
-        self._commit_every = self.app.conf.broker_commit_every
+        self.in_transaction = (
+            self.app.conf.processing_guarantee == 'exactly_once')
         self.commit_interval = (
             commit_interval or self.app.conf.broker_commit_interval)
         self.commit_livelock_soft_timeout = (
             commit_livelock_soft_timeout or
             self.app.conf.broker_commit_livelock_soft_timeout)
-        self._acked = defaultdict(list)
-        self._acked_index = defaultdict(set)
+        self.commit_policy = self.app.conf.broker_commit_policy(self)
+        self._acked = {}
         self._read_offset = defaultdict(lambda: None)
         self._committed_offset = defaultdict(lambda: None)
         self._unacked_messages = WeakSet()
@@ -302,6 +300,7 @@ class Consumer(Service, ConsumerT):
             for tp, offset in committed_offsets.items()
         })
         self._committed_offset.update(committed_offsets)
+        self._reset_ack_trackers(committed_offsets)
 
     @abc.abstractmethod
     async def seek_to_committed(self) -> Mapping[TP, int]:
@@ -313,7 +312,15 @@ class Consumer(Service, ConsumerT):
         self._last_batch = None
         # set new read offset so we will reread messages
         self._read_offset[ensure_TP(partition)] = offset if offset else None
-        self._seek(partition, offset)
+        self._reset_ack_trackers([ensure_TP(partition)])
+        await self._seek(partition, offset)
+
+    def _reset_ack_trackers(self, tps: Iterable[TP]) -> None:
+        # After seeking, the window of acked offsets starts again
+        # at the next message read (or the committed offset).
+        acked = self._acked
+        for tp in tps:
+            acked.pop(tp, None)
 
     @abc.abstractmethod
     async def _seek(self, partition: TP, offset: int) -> None:
@@ -354,6 +361,9 @@ class Consumer(Service, ConsumerT):
             self._active_partitions.difference_update(revoked)
         self._paused_partitions.difference_update(revoked)
         await self._on_partitions_revoked(revoked)
+        if self.in_transaction:
+            await self._end_transactions(revoked)
+        self._reset_ack_trackers(revoked)
 
     @Service.transitions_to(CONSUMER_PARTITIONS_ASSIGNED)
     async def on_partitions_assigned(self, assigned: Set[TP]) -> None:
@@ -365,6 +375,12 @@ class Consumer(Service, ConsumerT):
         #   need to copy set at this point, since we cannot have
         #   the callbacks mutate our active list.
         self._last_batch = None
+        if self.in_transaction:
+            # starting the transactions fences the previous owners
+            # of the partitions, before we process any events.
+            await self.app.producer.assign_transactions({
+                tp for tp in assigned if not self._is_changelog_tp(tp)
+            })
         await self._on_partitions_assigned(assigned)
 
     @abc.abstractmethod
@@ -476,9 +492,23 @@ class Consumer(Service, ConsumerT):
         # shutdown.  This is called by transport.Conductor,
         # before delivering messages to streams.
         self._unacked_messages.add(message)
+        self._ack_tracker(message.tp, message.offset)
         # call sensors
         self._on_message_in(message.tp, message.offset, message)
 
+    def _ack_tracker(self, tp: TP, offset: int) -> AckTracker:
+        # The window of acked offsets starts right after the committed
+        # offset, or at the first message read from the partition,
+        # so that we never commit past a message that was read but
+        # not acked yet.
+        try:
+            return self._acked[tp]
+        except KeyError:
+            committed = self._committed_offset[tp]
+            tracker = self._acked[tp] = AckTracker(
+                offset if committed is None else committed + 1)
+            return tracker
+
     def ack(self, message: Message) -> bool:
         if not message.acked:
             message.acked = True
@@ -488,12 +518,8 @@ class Consumer(Service, ConsumerT):
                 committed = self._committed_offset[tp]
                 try:
                     if committed is None or offset > committed:
-                        acked_index = self._acked_index[tp]
-                        if offset not in acked_index:
+                        if self._ack_tracker(tp, offset).ack(offset):
                             self._unacked_messages.discard(message)
-                            acked_index.add(offset)
-                            acked_for_tp = self._acked[tp]
-                            acked_for_tp.append(offset)
                             self._n_acked += 1
                             return True
                 finally:
@@ -542,10 +568,11 @@ class Consumer(Service, ConsumerT):
 
     @Service.task
     async def _commit_handler(self) -> None:
-        await self.sleep(self.commit_interval)
+        next_interval = self.commit_policy.next_interval
+        await self.sleep(next_interval())
         while not self.should_stop:
             await self.commit()
-            await self.sleep(self.commit_interval)
+            await self.sleep(next_interval())
 
     @Service.task
     async def _commit_livelock_detector(self) -> None:  # pragma: no cover
@@ -600,14 +627,21 @@ class Consumer(Service, ConsumerT):
     async def force_commit(self, topics: TPorTopicSet = None) -> bool:
         sensor_state = self.app.sensors.on_commit_initiated(self)
 
+        time_start = monotonic()
+        n_acked, self._n_acked = self._n_acked, 0
+
         # Go over the ack list in each topic/partition
         commit_tps = list(self._filter_tps_with_pending_acks(topics))
         did_commit = await self._commit_tps(commit_tps)
 
+        self.commit_policy.on_commit_completed(
+            n_acked, monotonic() - time_start)
         self.app.sensors.on_commit_completed(self, sensor_state)
         return did_commit
 
     async def _commit_tps(self, tps: Iterable[TP]) -> bool:
+        if self.in_transaction:
+            return await self._commit_tps_in_transaction(tps)
         commit_offsets = self._filter_committable_offsets(tps)
         if commit_offsets:
             try:
@@ -619,6 +653,60 @@ class Consumer(Service, ConsumerT):
                 return await self._commit_offsets(commit_offsets)
         return False
 
+    async def _commit_tps_in_transaction(self, tps: Iterable[TP]) -> bool:
+        # Messages sent while processing events are part of the open
+        # transaction, so the transaction must only be committed when
+        # every message read has been processed: otherwise it would
+        # contain output of events whose offsets are not committed.
+        # The fetcher does not deliver new messages while we commit.
+        if not await self._wait_for_inflight(timeout=self.commit_interval):
+            self.log.info(
+                'Postponed commit: events still being processed')
+            return False
+        # messages sent since the last commit are part of the
+        # open transaction, so we commit that even when there
+        # are no new offsets (e.g. messages sent by a timer).
+        return await self._commit_offsets(
+            self._filter_committable_offsets(tps))
+
+    async def _wait_for_inflight(self, timeout: float) -> bool:
+        # Wait for every message read to be acked,
+        # returns False if that did not happen in time.
+        time_start = monotonic()
+        while not self._all_read_acked():
+            if monotonic() - time_start > timeout:
+                return False
+            await self._wait_for_ack(timeout=1)
+        return True
+
+    def _all_read_acked(self, tps: Set[TP] = None) -> bool:
+        read_offset = self._read_offset
+        acks_enabled_for = self.app.topics.acks_enabled_for
+        if tps is None:
+            tps = self.assignment()
+        for tp, tracker in self._acked.items():
+            offset = read_offset[tp]
+            if (offset is not None and tp in tps and
+                    acks_enabled_for(tp.topic) and
+                    not tracker.acked_up_to(offset)):
+                return False
+        return True
+
+    async def _end_transactions(self, revoked: Set[TP]) -> None:
+        # The transactions must end before the partitions are
+        # assigned to another worker: we commit the offsets if every
+        # event read was processed, otherwise we abort so that the
+        # new owner processes the events again.
+        if self._all_read_acked(revoked):
+            offsets = self._filter_committable_offsets(revoked)
+            if await self._commit_transaction(offsets):
+                self._committed_offset.update(offsets)
+                self.app.monitor.on_tp_commit(offsets)
+        else:
+            self.log.info(
+                'Aborted transaction: events still being processed')
+            await self.app.producer.abort_transaction()
+
     def _filter_committable_offsets(self, tps: Iterable[TP]) -> Dict[TP, int]:
         commit_offsets = {}
         for tp in tps:
@@ -630,24 +718,23 @@ class Consumer(Service, ConsumerT):
         return commit_offsets
 
     async def _handle_attached(self, commit_offsets: Mapping[TP, int]) -> None:
-        for tp, offset in commit_offsets.items():
-            app = cast(App, self.app)
-            attachments = app._attachments
-            producer = app.producer
-            # Start publishing the messages and return a list of pending
-            # futures.
-            pending = await attachments.publish_for_tp_offset(tp, offset)
-            # then we wait for either
-            #  1) all the attached messages to be published, or
-            #  2) the producer crashing
-            #
-            # If the producer crashes we will not be able to send any messages
-            # and it only crashes when there's an irrecoverable error.
-            #
-            # If we cannot commit it means the events will be processed again,
-            # so conforms to at-least-once semantics.
-            if pending:
-                await producer.wait_many(pending)
+        app = cast(App, self.app)
+        attachments = app._attachments
+        producer = app.producer
+        # Start publishing the messages and return a list of pending
+        # futures.
+        pending = await attachments.publish_for_tp_offsets(commit_offsets)
+        # then we wait for either
+        #  1) all the attached messages to be published, or
+        #  2) the producer crashing
+        #
+        # If the producer crashes we will not be able to send any messages
+        # and it only crashes when there's an irrecoverable error.
+        #
+        # If we cannot commit it means the events will be processed again,
+        # so conforms to at-least-once semantics.
+        if pending:
+            await producer.wait_many(pending)
 
     async def _commit_offsets(self, offsets: Mapping[TP, int]) -> bool:
         table = terminal.logtable(
@@ -671,17 +758,43 @@ class Consumer(Service, ConsumerT):
                 'will be eventually processed again: %r',
                 revoked,
             )
-        if not commitable_offsets:
+        if not commitable_offsets and not self.in_transaction:
             return False
         with flight_recorder(self.log, timeout=300.0) as on_timeout:
             on_timeout.info('+consumer.commit()')
-            await self._commit(commitable_offsets)
+            if self.in_transaction:
+                if not await self._commit_transaction(commitable_offsets):
+                    return False
+            else:
+                await self._commit(commitable_offsets)
             on_timeout.info('-consumer.commit()')
+        if not commitable_offsets:
+            return False
         self._committed_offset.update(commitable_offsets)
         self.app.monitor.on_tp_commit(commitable_offsets)
         self._last_batch = None
         return True
 
+    async def _commit_transaction(self, offsets: Mapping[TP, int]) -> bool:
+        # Commits the producer transaction together with the offsets,
+        # so that the messages sent while processing the events
+        # become visible at the same time as the offsets are committed.
+        producer = self.app.producer
+        try:
+            await producer.commit_transaction(
+                offsets, group_id=self.app.conf.id)
+        except ProducerSendError as exc:
+            # abort, so that the transaction does not hold back
+            # consumers reading committed messages until it times out.
+            try:
+                await producer.abort_transaction()
+            except Exception as abort_exc:
+                self.log.exception(
+                    'Cannot abort transaction: %r', abort_exc)
+            await self.crash(exc)
+            return False
+        return True
+
     def _filter_tps_with_pending_acks(
             self, topics: TPorTopicSet = None) -> Iterator[TP]:
         return (tp for tp in self._acked
@@ -692,30 +805,27 @@ class Consumer(Service, ConsumerT):
         return committed is None or bool(offset) and offset > committed
 
     def _new_offset(self, tp: TP) -> Optional[int]:
-        # get the new offset for this tp, by going through
-        # its list of acked messages.
-        acked = self._acked[tp]
-
-        # We iterate over it until we find a gap
-        # then return the offset before that.
-        # For example if acked[tp] is:
+        # get the new offset for this tp, by finding the range of
+        # consecutive acked messages starting at the first message read
+        # after the committed offset, then return the offset before the
+        # first message not acked yet.
+        # For example if the committed offset is 0, the offsets read
+        # are 1-9, and the acked offsets are:
         #   1 2 3 4 5 6 7 8 9
         # the return value will be: 9
-        # If acked[tp] is:
-        #  34 35 36 40 41 42 43 44
-        #          ^--- gap
-        # the return value will be: 36
-        if acked:
-            acked.sort()
-            # Note: acked is always kept sorted.
-            # find first list of consecutive numbers
-            batch = next(consecutive_numbers(acked))
-            # remove them from the list to clean up.
-            acked[:len(batch)] = []
-            self._acked_index[tp].difference_update(batch)
-            # return the highest commit offset
-            return batch[-1]
-        return None
+        # If the acked offsets are:
+        #  1 2 3 7 8 9
+        #       ^--- gap
+        # the return value will be: 3
+        # If offset 1 was not acked yet, the return value is None.
+        # Offsets never read (e.g. missing from compacted topics)
+        # are not gaps: if only the offsets 1 2 3 7 8 9 are read,
+        # and all of them are acked, the return value is 9.
+        try:
+            tracker = self._acked[tp]
+        except KeyError:
+            return None
+        return tracker.pop_committable()
 
     async def on_task_error(self, exc: BaseException) -> None:
         await self.commit()
@@ -733,10 +843,14 @@ class Consumer(Service, ConsumerT):
 
         get_read_offset = self._read_offset.__getitem__
         set_read_offset = self._read_offset.__setitem__
+        ack_tracker = self._ack_tracker
+        acks_enabled_for = self.app.topics.acks_enabled_for
+        in_transaction = self.in_transaction
+        wait_for_commit = self.maybe_wait_for_commit_to_finish
         flag_consumer_fetching = CONSUMER_FETCHING
         set_flag = self.diag.set_flag
         unset_flag = self.diag.unset_flag
-        commit_every = self._commit_every
+        should_commit = self.commit_policy.should_commit
 
         try:
             while not (consumer_should_stop() or fetcher_should_stop()):
@@ -750,10 +864,18 @@ class Consumer(Service, ConsumerT):
                         offset = message.offset
                         r_offset = get_read_offset(tp)
                         if r_offset is None or offset > r_offset:
-                            if commit_every is not None:
-                                if self._n_acked >= commit_every:
-                                    self._n_acked = 0
-                                    await self.commit()
+                            if acks_enabled_for(message.topic):
+                                # offsets are not always consecutive, so
+                                # the offsets read are recorded to know
+                                # which ones must be acked to commit.
+                                ack_tracker(tp, offset).read(offset)
+                            if should_commit(self._n_acked):
+                                await self.commit()
+                            elif (in_transaction and
+                                    self._commit_fut is not None):
+                                # do not deliver messages while committing
+                                # a transaction (see _commit_tps).
+                                await wait_for_commit()
                             await callback(message)
                             set_read_offset(tp, offset)
                         else:
@@ -10,6 +10,7 @@ TRANSPORTS: FactoryMapping[Type[TransportT]] = FactoryMapping(
     confluent='faust.transport.drivers.confluent:Transport',
     kafka='faust.transport.drivers.aiokafka:Transport',
     memory='faust.transport.drivers.memory:Transport',
+    unix='faust.transport.drivers.unix:Transport',
 )
 TRANSPORTS.include_setuptools_namespace('faust.transports')
 by_name = TRANSPORTS.by_name
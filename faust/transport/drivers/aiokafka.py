@@ -1,5 +1,6 @@
 """Message transport using :pypi:`aiokafka`."""
 import asyncio
+from collections import defaultdict
 from typing import (
     Any,
     Awaitable,
@@ -14,6 +15,7 @@ from typing import (
     Type,
     cast,
 )
+from uuid import uuid4
 
 import aiokafka
 import aiokafka.abc
@@ -40,6 +42,7 @@ from mode.utils.times import Seconds, want_seconds
 from yarl import URL
 
 from faust.exceptions import ConsumerNotStarted, ProducerSendError
+from faust.streams import current_event
 from faust.transport import base
 from faust.transport.consumer import (
     ConsumerThread,
@@ -48,7 +51,7 @@ from faust.transport.consumer import (
     ensure_TPset,
 )
 from faust.types import ConsumerMessage, RecordMetadata, TP
-from faust.types.transports import ConsumerT, ProducerT
+from faust.types.transports import ConsumerT, ProducerMessage, ProducerT
 from faust.utils.kafka.protocol.admin import CreateTopicsRequest
 
 __all__ = ['Consumer', 'Producer', 'Transport']
@@ -188,8 +191,16 @@ class AIOKafkaConsumerThread(ConsumerThread):
             heartbeat_interval_ms=int(conf.broker_heartbeat_interval * 1000.0),
             security_protocol="SSL" if conf.ssl_context else "PLAINTEXT",
             ssl_context=conf.ssl_context,
+            isolation_level=self._isolation_level(),
         )
 
+    def _isolation_level(self) -> str:
+        if self.app.conf.processing_guarantee == 'exactly_once':
+            # do not read messages from transactions that are
+            # still open, or were aborted.
+            return 'read_committed'
+        return 'read_uncommitted'
+
     def _create_client_consumer(
             self,
             transport: 'Transport',
@@ -343,6 +354,11 @@ class AIOKafkaConsumerThread(ConsumerThread):
         )
 
 
+#: Batch sent by :meth:`Producer.send_many`: the future for the batch,
+#: partition, and the index/relative offset of every message in the batch.
+_SentBatch = Tuple[asyncio.Future, int, List[Tuple[int, int]]]
+
+
 class Producer(base.Producer):
     """Kafka producer using :pypi:`aiokafka`."""
 
@@ -350,9 +366,23 @@ class Producer(base.Producer):
 
     _producer: aiokafka.AIOKafkaProducer
 
+    #: Transactional producer of every partition assigned to the worker,
+    #: see :meth:`assign_transactions`.
+    _transactions: MutableMapping[TP, aiokafka.AIOKafkaProducer]
+
     def on_init(self) -> None:
+        self._producer = self._new_producer(self._new_transactional_id())
+        self._transactions = {}
+        # Messages cannot be sent after a transaction is committed
+        # and before the next one begins, so sends are serialized
+        # with switching transactions.
+        self._transaction_lock = asyncio.Lock(loop=self.loop)
+
+    def _new_producer(
+            self,
+            transactional_id: Optional[str]) -> aiokafka.AIOKafkaProducer:
         transport = cast(Transport, self.transport)
-        self._producer = aiokafka.AIOKafkaProducer(
+        return aiokafka.AIOKafkaProducer(
             loop=self.loop,
             bootstrap_servers=server_list(
                 transport.url, transport.default_port),
@@ -367,8 +397,38 @@ class Producer(base.Producer):
             ssl_context=self.ssl_context,
             partitioner=self.partitioner or DefaultPartitioner(),
             request_timeout_ms=int(self.request_timeout * 1000),
+            transactional_id=transactional_id,
         )
 
+    def _new_transactional_id(self) -> Optional[str]:
+        if self.transactional:
+            # This producer sends the messages that are not sent while
+            # processing an event (e.g. by a timer or a command), and
+            # every instance gets a unique id so that a producer started
+            # by a command cannot fence the worker.
+            return f'{self.transport.app.conf.id}-{uuid4()}'
+        return None
+
+    def _transactional_id_for(self, tp: TP) -> str:
+        # Every worker that is assigned the partition uses the same id,
+        # so starting the producer of the new owner fences the producer
+        # of the previous owner, and aborts its open transaction.
+        return f'{self.transport.app.conf.id}-{tp.topic}-{tp.partition}'
+
+    def _current_producer(self) -> aiokafka.AIOKafkaProducer:
+        # Messages sent while processing an event are part of the
+        # transaction of the partition the event was read from.
+        if self._transactions:
+            event = current_event()
+            if event is not None:
+                producer = self._transactions.get(event.message.tp)
+                if producer is not None:
+                    return producer
+        return self._producer
+
+    def _producers(self) -> List[aiokafka.AIOKafkaProducer]:
+        return [self._producer, *self._transactions.values()]
+
     async def _on_irrecoverable_error(self, exc: BaseException) -> None:
         consumer = self.transport.app.consumer
         if consumer is not None:
@@ -409,19 +469,121 @@ class Producer(base.Producer):
         self.beacon.add(self._producer)
         self._last_batch = None
         await self._producer.start()
+        if self.transactional:
+            await self.begin_transaction()
 
     async def on_stop(self) -> None:
         cast(Transport, self.transport)._topic_waiters.clear()
         self._last_batch = None
+        if self.transactional:
+            async with self._transaction_lock:
+                # the offsets of the events processed since the last
+                # commit are not committed, so their output is aborted
+                # and the events are processed again by the next owner.
+                await self._stop_transactions(list(self._transactions))
+                # messages sent outside of stream processing (e.g. by a
+                # command) are only visible once the transaction commits.
+                await self._producer.commit_transaction()
         await self._producer.stop()
 
+    async def begin_transaction(self) -> None:
+        await self._producer.begin_transaction()
+
+    async def assign_transactions(self, tps: Set[TP]) -> None:
+        async with self._transaction_lock:
+            await self._stop_transactions(
+                [tp for tp in self._transactions if tp not in tps])
+            producers = {
+                tp: self._new_producer(self._transactional_id_for(tp))
+                for tp in tps if tp not in self._transactions
+            }
+            await asyncio.gather(*[
+                self._start_transaction(producer)
+                for producer in producers.values()
+            ], loop=self.loop)
+            self._transactions.update(producers)
+
+    async def _start_transaction(
+            self, producer: aiokafka.AIOKafkaProducer) -> None:
+        try:
+            await producer.start()
+            await producer.begin_transaction()
+        except KafkaError as exc:
+            raise ProducerSendError(
+                f'Error while starting transaction: {exc!r}') from exc
+
+    async def _stop_transactions(self, tps: Iterable[TP]) -> None:
+        for tp in tps:
+            producer = self._transactions.pop(tp)
+            try:
+                await producer.abort_transaction()
+            except KafkaError as exc:
+                # e.g. fenced by the next owner, that already aborted
+                # the transaction when its producer started.
+                self.log.warning(
+                    'Cannot abort transaction of %r: %r', tp, exc)
+            finally:
+                await producer.stop()
+
+    async def commit_transaction(self,
+                                 offsets: Mapping[TP, int],
+                                 group_id: str) -> None:
+        transactions = self._transactions
+        by_producer: MutableMapping[
+            aiokafka.AIOKafkaProducer,
+            MutableMapping[TP, OffsetAndMetadata],
+        ] = defaultdict(dict)
+        for tp, offset in offsets.items():
+            by_producer[transactions.get(tp, self._producer)][tp] = (
+                OffsetAndMetadata(offset, ''))
+        async with self._transaction_lock:
+            try:
+                await asyncio.gather(*[
+                    self._commit_transaction(
+                        producer, by_producer.get(producer), group_id)
+                    for producer in self._producers()
+                ], loop=self.loop)
+            except KafkaError as exc:
+                raise ProducerSendError(
+                    f'Error while committing transaction: {exc!r}') from exc
+
+    async def _commit_transaction(
+            self, producer: aiokafka.AIOKafkaProducer,
+            offsets: Optional[Mapping[TP, OffsetAndMetadata]],
+            group_id: str) -> None:
+        if offsets:
+            await producer.send_offsets_to_transaction(offsets, group_id)
+        await producer.commit_transaction()
+        # messages are always sent as part of a transaction,
+        # so start the next one right away.
+        await producer.begin_transaction()
+
+    async def abort_transaction(self) -> None:
+        async with self._transaction_lock:
+            for producer in self._producers():
+                await producer.abort_transaction()
+                await producer.begin_transaction()
+
     async def send(self, topic: str, key: Optional[bytes],
                    value: Optional[bytes],
                    partition: Optional[int],
                    timestamp: Optional[float]) -> Awaitable[RecordMetadata]:
+        if self.transactional:
+            async with self._transaction_lock:
+                return await self._send(
+                    self._current_producer(),
+                    topic, key, value, partition, timestamp)
+        return await self._send(
+            self._producer, topic, key, value, partition, timestamp)
+
+    async def _send(self, producer: aiokafka.AIOKafkaProducer,
+                    topic: str, key: Optional[bytes],
+                    value: Optional[bytes],
+                    partition: Optional[int],
+                    timestamp: Optional[float]) -> Awaitable[RecordMetadata]:
         try:
             timestamp_ms = timestamp * 1000.0 if timestamp else timestamp
-            return cast(Awaitable[RecordMetadata], await self._producer.send(
+            return cast(Awaitable[RecordMetadata], await producer.send(
                 topic, value,
                 key=key,
                 partition=partition,
@@ -443,8 +605,101 @@ class Producer(base.Producer):
         )
         return await fut
 
+    async def send_many(
+            self, topic: str,
+            messages: Iterable[ProducerMessage],
+    ) -> Awaitable[List[RecordMetadata]]:
+        if self.transactional:
+            async with self._transaction_lock:
+                return await self._send_many(
+                    self._current_producer(), topic, messages)
+        return await self._send_many(self._producer, topic, messages)
+
+    async def _send_many(
+            self, producer: aiokafka.AIOKafkaProducer, topic: str,
+            messages: Iterable[ProducerMessage],
+    ) -> Awaitable[List[RecordMetadata]]:
+        sent: List[_SentBatch] = []
+        try:
+            count, by_partition = await self._partition_messages(
+                producer, topic, messages)
+            for partition, indexed in by_partition.items():
+                await self._send_batches(
+                    producer, topic, partition, indexed, sent)
+        except KafkaError as exc:
+            raise ProducerSendError(f'Error while sending: {exc!r}') from exc
+        return asyncio.ensure_future(
+            self._gather_batches(topic, count, sent), loop=self.loop)
+
+    async def _partition_messages(
+            self, producer: aiokafka.AIOKafkaProducer, topic: str,
+            messages: Iterable[ProducerMessage],
+    ) -> Tuple[int, Mapping[int, List[Tuple[int, ProducerMessage]]]]:
+        # Returns the number of messages, and the messages (with their
+        # index) by partition.
+        # XXX This uses the private API of AIOKafkaProducer and
+        # AIOKafkaClient (robinhood-aiokafka 0.5.x, see
+        # requirements/default.txt) to partition messages the same way
+        # as AIOKafkaProducer.send does: check that
+        # AIOKafkaClient._wait_on_metadata and AIOKafkaProducer._partition
+        # still have the same signature when upgrading aiokafka.
+        by_partition: MutableMapping[
+            int, List[Tuple[int, ProducerMessage]]] = defaultdict(list)
+        # partitioning a message requires metadata for the topic.
+        await producer.client._wait_on_metadata(topic)
+        count = 0
+        for count, message in enumerate(messages, start=1):
+            key, value, partition, _ = message
+            if partition is None:
+                partition = producer._partition(
+                    topic, None, None, None, key, value)
+            by_partition[partition].append((count - 1, message))
+        return count, by_partition
+
+    async def _send_batches(
+            self, producer: aiokafka.AIOKafkaProducer,
+            topic: str, partition: int,
+            indexed: List[Tuple[int, ProducerMessage]],
+            sent: List[_SentBatch],
+    ) -> None:
+        # Fill batches for this partition, sending a batch when full.
+        batch = producer.create_batch()
+        offsets: List[Tuple[int, int]] = []
+        for index, (key, value, _, timestamp) in indexed:
+            timestamp_ms = int(timestamp * 1000.0) if timestamp else None
+            metadata = batch.append(
+                key=key, value=value, timestamp=timestamp_ms)
+            if metadata is None:
+                sent.append((await producer.send_batch(
+                    batch, topic, partition=partition), partition, offsets))
+                batch, offsets = producer.create_batch(), []
+                # the first message is always added to a new batch.
+                metadata = batch.append(
+                    key=key, value=value, timestamp=timestamp_ms)
+            offsets.append((index, metadata.offset))
+        if offsets:
+            sent.append((await producer.send_batch(
+                batch, topic, partition=partition), partition, offsets))
+
+    async def _gather_batches(
+            self, topic: str, count: int,
+            sent: List[_SentBatch],
+    ) -> List[RecordMetadata]:
+        # The batch future gives us the offset of the first message
+        # in the batch, and offsets in the batch are relative to that.
+        results: List[RecordMetadata] = [None] * count  # type: ignore
+        for fut, partition, offsets in sent:
+            base_offset = (await fut).offset
+            tp = TP(topic, partition)
+            for index, relative_offset in offsets:
+                results[index] = RecordMetadata(
+                    topic, partition, tp, base_offset + relative_offset)
+        return results
+
     async def flush(self) -> None:
-        await self._producer.flush()
+        await asyncio.gather(*[
+            producer.flush() for producer in self._producers()
+        ], loop=self.loop)
 
     def key_partition(self, topic: str, key: bytes) -> TP:
         partition = self._producer._partition(
@@ -1,13 +1,28 @@
-"""Experimental: In-memory transport."""
+"""Experimental: In-memory transport.
+
+Messages are kept in an in-process log for every topic partition,
+and consumers keep positions and commit offsets just like with Kafka,
+so a full application (including tables and table recovery)
+can run without a broker, e.g. for tests and benchmarks.
+
+Every transport connecting to the same URL (e.g. ``memory://``)
+from the same event loop shares a :class:`Broker`, so several
+workers (apps with the same id) can run in one process: they
+join the same consumer group and the partitions are divided
+between them using the app's partition assignor.
+Use different URLs (``memory://a``, ``memory://b``) for
+isolated brokers.
+"""
 import asyncio
-from collections import defaultdict, deque
+import uuid
+from collections import defaultdict
 from time import time
 from typing import (
     Any,
-    AsyncIterator,
     Awaitable,
     ClassVar,
     Iterable,
+    List,
     Mapping,
     MutableMapping,
     Optional,
@@ -16,19 +31,230 @@ from typing import (
     Type,
     cast,
 )
+from weakref import WeakValueDictionary
 
-from mode import Seconds
-from mode.utils.compat import Deque
+from mode import Seconds, get_logger
 from mode.utils.futures import done_future
 from mode.utils.imports import symbol_by_name
+from rhkafka.partitioner.default import DefaultPartitioner
+from yarl import URL
 
+from faust.assignor import PartitionAssignor
 from faust.transport import base
-from faust.types import Message, RecordMetadata, TP
-from faust.types.transports import ConsumerT, ProducerT
+from faust.transport.consumer import RecordMap
+from faust.types import AppT, ConsumerMessage, Message, RecordMetadata, TP
+from faust.types.transports import (
+    ConsumerT,
+    PartitionerT,
+    ProducerMessage,
+    ProducerT,
+)
+
+__all__ = ['Broker', 'ConsumerGroup', 'Consumer', 'Producer', 'Transport']
 
 # XXX mypy borks on `import faust`
 faust_version = symbol_by_name('faust:__version__')
 
+logger = get_logger(__name__)
+
+#: Brokers by (URL, event loop), shared by all transports using them.
+_brokers: MutableMapping[Tuple[str, asyncio.AbstractEventLoop], 'Broker']
+_brokers = WeakValueDictionary()
+
+
+def _assignor(app: AppT) -> PartitionAssignor:
+    # The group protocol methods (metadata/assign/on_assignment) are
+    # specific to the Kafka partition assignor used by default,
+    # and are not part of PartitionAssignorT.
+    return cast(PartitionAssignor, app.assignor)
+
+
+class ConsumerGroup:
+    """Consumer group membership, assignment and committed offsets.
+
+    Any change in membership or subscription triggers a rebalance
+    after :attr:`Broker.rebalance_delay` seconds (so that workers
+    starting at the same time are assigned partitions in one go).
+
+    Like the Kafka "eager" rebalance protocol, all members first
+    have their partitions revoked, then the assignor of the first
+    member (the group leader) divides the partitions.
+    """
+
+    broker: 'Broker'
+    group_id: str
+
+    #: Members by member id, in the order they joined.
+    members: MutableMapping[str, 'Consumer']
+
+    #: Topics subscribed to by every member.
+    subscriptions: MutableMapping[str, Set[str]]
+
+    #: Last committed offset for every topic partition.
+    committed: MutableMapping[TP, int]
+
+    #: Incremented for every completed rebalance.
+    generation: int = 0
+
+    _rebalance_requested: bool = False
+    _rebalancer: Optional[asyncio.Future] = None
+
+    def __init__(self, broker: 'Broker', group_id: str) -> None:
+        self.broker = broker
+        self.group_id = group_id
+        self.members = {}
+        self.subscriptions = {}
+        self.committed = {}
+
+    def join(self,
+             member_id: str,
+             consumer: 'Consumer',
+             topics: Iterable[str]) -> None:
+        self.members[member_id] = consumer
+        self.subscriptions[member_id] = set(topics)
+        self.request_rebalance()
+
+    def leave(self, member_id: str) -> None:
+        if self.members.pop(member_id, None) is not None:
+            self.subscriptions.pop(member_id, None)
+            self.request_rebalance()
+
+    def request_rebalance(self) -> None:
+        self._rebalance_requested = True
+        if self._rebalancer is None or self._rebalancer.done():
+            self._rebalancer = asyncio.ensure_future(
+                self._rebalance_loop(), loop=self.broker.loop)
+
+    async def _rebalance_loop(self) -> None:
+        while self._rebalance_requested:
+            await asyncio.sleep(
+                self.broker.rebalance_delay, loop=self.broker.loop)
+            self._rebalance_requested = False
+            try:
+                await self.rebalance()
+            except Exception as exc:
+                logger.exception('Rebalance of group %r failed: %r',
+                                 self.group_id, exc)
+
+    async def rebalance(self) -> None:
+        members = dict(self.members)
+        await asyncio.gather(
+            *[member._revoke_assignment() for member in members.values()],
+            loop=self.broker.loop)
+        if members:
+            leader = next(iter(members.values()))
+            metadata = {
+                member_id: _assignor(member.app).metadata(
+                    self.subscriptions[member_id])
+                for member_id, member in members.items()
+            }
+            assignments = _assignor(leader.app).assign(
+                self.broker, metadata)
+            await asyncio.gather(
+                *[member._receive_assignment(
+                    assignments[member_id], self.committed)
+                  for member_id, member in members.items()],
+                loop=self.broker.loop)
+        self.generation += 1
+
+
+class Broker:
+    """In-memory broker keeping topic partition logs and groups.
+
+    Topics are created with the default number of partitions
+    when first used, unless created explicitly before that.
+    """
+
+    #: Seconds to wait before rebalancing after a member joins/leaves.
+    rebalance_delay: float = 0.1
+
+    loop: asyncio.AbstractEventLoop
+
+    #: Number of partitions by topic name.
+    topics: MutableMapping[str, int]
+
+    #: Message log for every topic partition.
+    logs: MutableMapping[TP, List[Message]]
+
+    groups: MutableMapping[str, ConsumerGroup]
+
+    #: Set every time a message is appended to any log.
+    messages_ready: asyncio.Event
+
+    def __init__(self,
+                 *,
+                 default_partitions: int = 1,
+                 loop: asyncio.AbstractEventLoop = None) -> None:
+        self.default_partitions = default_partitions
+        self.loop = loop or asyncio.get_event_loop()
+        self.topics = {}
+        self.logs = defaultdict(list)
+        self.groups = {}
+        self.messages_ready = asyncio.Event(loop=self.loop)
+        self._default_partitioner = DefaultPartitioner()
+
+    def create_topic(self, topic: str, partitions: int = None) -> None:
+        if topic not in self.topics:
+            self.topics[topic] = partitions or self.default_partitions
+
+    def partitions_for_topic(self, topic: str) -> Set[int]:
+        self.create_topic(topic)
+        return set(range(self.topics[topic]))
+
+    def group(self, group_id: str) -> ConsumerGroup:
+        try:
+            return self.groups[group_id]
+        except KeyError:
+            group = self.groups[group_id] = ConsumerGroup(self, group_id)
+            return group
+
+    def key_partition(self,
+                      topic: str,
+                      key: Optional[bytes],
+                      partitioner: PartitionerT = None) -> int:
+        # Same partitioner as the Kafka transport, so keys
+        # end up in the same partitions.
+        partitions = sorted(self.partitions_for_topic(topic))
+        return (partitioner or self._default_partitioner)(
+            key, partitions, partitions)
+
+    def send(self, topic: str, key: Optional[bytes],
+             value: Optional[bytes],
+             partition: Optional[int],
+             timestamp: Optional[float],
+             partitioner: PartitionerT = None) -> RecordMetadata:
+        if partition is None:
+            partition = self.key_partition(topic, key, partitioner)
+        elif partition not in self.partitions_for_topic(topic):
+            raise ValueError(
+                f'Topic {topic!r} has no partition {partition!r}')
+        tp = TP(topic, partition)
+        log = self.logs[tp]
+        offset = len(log)
+        log.append(Message(
+            topic,
+            partition=partition,
+            offset=offset,
+            timestamp=timestamp or time(),
+            timestamp_type=1 if timestamp else 0,
+            key=key,
+            value=value,
+            checksum=None,
+            serialized_key_size=len(key) if key else 0,
+            serialized_value_size=len(value) if value else 0,
+            tp=tp,
+        ))
+        self.messages_ready.set()
+        return RecordMetadata(
+            topic=topic,
+            partition=partition,
+            topic_partition=tp,
+            offset=offset,
+        )
+
+    def highwater(self, tp: TP) -> int:
+        return len(self.logs.get(tp, ()))
+
 
 class RebalanceListener:
     """In-memory rebalance listener."""
@@ -42,7 +268,34 @@ class Consumer(base.Consumer):
 
     RebalanceListener: ClassVar[Type] = RebalanceListener
 
-    consumer_stopped_errors: ClassVar[Tuple[Type[Exception], ...]] = ()
+    consumer_stopped_errors: ClassVar[Tuple[Type[BaseException], ...]] = ()
+
+    #: Max number of records returned for every partition by getmany.
+    max_poll_records: int
+
+    #: Unique id of this consumer in the consumer group.
+    member_id: str
+
+    #: Currently assigned topic partitions.
+    _assignment: Set[TP]
+
+    #: Offset of the next message to read for every topic partition.
+    _position: MutableMapping[TP, int]
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        self._assignment = set()
+        self._position = {}
+        super().__init__(*args, **kwargs)
+        self.max_poll_records = self.app.conf.broker_max_poll_records
+        self.member_id = f'{self.app.conf.broker_client_id}-{uuid.uuid4()}'
+
+    @property
+    def broker(self) -> Broker:
+        return cast(Transport, self.transport).broker
+
+    @property
+    def group(self) -> ConsumerGroup:
+        return self.broker.group(self.app.conf.id)
 
     async def create_topic(self,
                            topic: str,
@@ -55,77 +308,169 @@ class Consumer(base.Consumer):
                            compacting: bool = None,
                            deleting: bool = None,
                            ensure_created: bool = False) -> None:
-        ...
+        self.broker.create_topic(topic, partitions)
 
     async def subscribe(self, topics: Iterable[str]) -> None:
-        await cast(Transport, self.transport).subscribe(topics)
-
-    async def getmany(self,
-                      timeout: float) -> AsyncIterator[Tuple[TP, Message]]:
-        transport = cast(Transport, self.transport)
-        max_per_partition = 100
-        partitions = tuple(self.assignment())
-
-        if not partitions:
-            if await self.wait_for_stopped(transport._subscription_ready):
-                return
-
-        for tp in partitions:
-            messages = transport._messages[tp.topic]
-            if not messages:
-                if await self.wait_for_stopped(transport._messages_ready):
-                    return
-                transport._messages_ready.clear()
-
-            i = 0
-            while messages:
-                yield tp, messages.popleft()
-                i += 1
-                if i > max_per_partition:
-                    break
+        # Kafka rebalances in the background after subscribing,
+        # and the rebalance callbacks wait for the subscription
+        # to complete, so the group calls them later.
+        self.group.join(self.member_id, self, topics)
+
+    async def on_stop(self) -> None:
+        await super().on_stop()
+        await self._leave_group()
+        self._assignment = set()
+
+    async def _leave_group(self) -> None:
+        self.group.leave(self.member_id)
+
+    async def _revoke_assignment(self) -> None:
+        await self.on_partitions_revoked(set(self._assignment))
+        # Offsets are committed by the revoked callback,
+        # so we cannot clear the assignment before this.
+        self._assignment = set()
+
+    async def _receive_assignment(self,
+                                  assignment: Any,
+                                  committed: Mapping[TP, int]) -> None:
+        _assignor(self.app).on_assignment(assignment)
+        assigned = {
+            TP(topic, partition)
+            for topic, partitions in assignment.assignment
+            for partition in partitions
+        }
+        self._assignment = assigned
+        self._position.clear()
+        for tp in assigned:
+            # Faust commits the offset of the last processed message,
+            # so we start reading at the message after that.
+            offset = committed.get(tp)
+            self._position[tp] = 0 if offset is None else offset + 1
+        await self.on_partitions_assigned(set(assigned))
+
+    def resume_partitions(self, tps: Iterable[TP]) -> None:
+        super().resume_partitions(tps)
+        # Wake up any fetch waiting for messages in the previous
+        # set of active partitions, so it can start over.
+        self._wakeup_fetch()
+
+    def _wakeup_fetch(self) -> None:
+        self.broker.messages_ready.set()
+
+    async def _getmany(self,
+                       active_partitions: Set[TP],
+                       timeout: float) -> RecordMap:
+        messages_ready = self.broker.messages_ready
+        records = self._fetch(active_partitions)
+        if not records:
+            messages_ready.clear()
+            try:
+                await asyncio.wait_for(
+                    messages_ready.wait(),
+                    timeout=timeout,
+                    loop=self.loop,
+                )
+            except asyncio.TimeoutError:
+                return {}
+            records = self._fetch(active_partitions)
+        return records
+
+    def _fetch(self, active_partitions: Set[TP]) -> RecordMap:
+        logs = self.broker.logs
+        assignment = self._assignment
+        position = self._position
+        max_records = self.max_poll_records
+        records: MutableMapping[TP, List[Any]] = {}
+        for tp in active_partitions:
+            if tp not in assignment:
+                continue
+            log = logs.get(tp)
+            if log:
+                offset = position.get(tp, 0)
+                if offset < len(log):
+                    batch = log[offset:offset + max_records]
+                    position[tp] = offset + len(batch)
+                    records[tp] = batch
+        return records
+
+    def _to_message(self, tp: TP, record: Any) -> ConsumerMessage:
+        return ConsumerMessage(
+            record.topic,
+            record.partition,
+            record.offset,
+            record.timestamp,
+            record.timestamp_type,
+            record.key,
+            record.value,
+            record.checksum,
+            record.serialized_key_size,
+            record.serialized_value_size,
+            tp,
+        )
 
     def _new_topicpartition(self, topic: str, partition: int) -> TP:
         return TP(topic, partition)
 
-    async def perform_seek(self) -> None:
-        ...
-
     async def _commit(self, offsets: Mapping[TP, int]) -> bool:
+        # Like Kafka we only accept commits for partitions
+        # currently assigned to this member.
+        assignment = self._assignment
+        self.group.committed.update({
+            tp: offset
+            for tp, offset in offsets.items()
+            if tp in assignment
+        })
         return True
 
-    def pause_partitions(self, tps: Iterable[TP]) -> None:
-        ...
+    async def _committed_offsets(self) -> Mapping[TP, int]:
+        return self.group.committed
 
-    async def position(self, tp: TP) -> Optional[int]:
-        return 0
+    async def seek_to_committed(self) -> Mapping[TP, int]:
+        committed = await self._committed_offsets()
+        offsets = {
+            tp: committed[tp]
+            for tp in self._assignment
+            if tp in committed
+        }
+        for tp, offset in offsets.items():
+            self._position[tp] = offset
+        return offsets
 
-    def resume_partitions(self, partitions: Iterable[TP]) -> None:
-        ...
+    async def _seek(self, partition: TP, offset: int) -> None:
+        self._position[partition] = offset
+
+    async def seek_wait(self, partitions: Mapping[TP, int]) -> None:
+        # Also resets the read offset (see Consumer.seek), so that
+        # messages already read (e.g. by a standby that is now
+        # active) are not dropped when reread.
+        for tp, offset in partitions.items():
+            await self.seek(tp, offset)
+
+    async def position(self, tp: TP) -> Optional[int]:
+        return self._position.get(tp)
 
     async def seek_to_latest(self, *partitions: TP) -> None:
-        ...
+        self._position.update(await self.highwaters(*partitions))
 
     async def seek_to_beginning(self, *partitions: TP) -> None:
-        ...
-
-    async def seek(self, partition: TP, offset: int) -> None:
-        ...
+        for tp in partitions:
+            self._position[tp] = 0
 
     def assignment(self) -> Set[TP]:
-        return {
-            TP(t, 0)
-            for t in cast(Transport, self.transport)._subscription
-        }
+        return set(self._assignment)
 
     def highwater(self, tp: TP) -> int:
-        return 0
+        return self.broker.highwater(tp)
+
+    def topic_partitions(self, topic: str) -> Optional[int]:
+        return self.broker.topics.get(topic)
 
     async def earliest_offsets(self,
                                *partitions: TP) -> MutableMapping[TP, int]:
         return {tp: 0 for tp in partitions}
 
     async def highwaters(self, *partitions: TP) -> MutableMapping[TP, int]:
-        return {tp: 0 for tp in partitions}
+        return {tp: self.highwater(tp) for tp in partitions}
 
 
 class Producer(base.Producer):
@@ -142,7 +487,8 @@ class Producer(base.Producer):
                            compacting: bool = None,
                            deleting: bool = None,
                            ensure_created: bool = False) -> None:
-        ...
+        cast(Transport, self.transport).broker.create_topic(
+            topic, partitions)
 
     async def send(self, topic: str, key: Optional[bytes],
                    value: Optional[bytes],
@@ -155,8 +501,42 @@ class Producer(base.Producer):
                             value: Optional[bytes],
                             partition: Optional[int],
                             timestamp: Optional[float]) -> RecordMetadata:
-        return await cast(Transport, self.transport).send(
-            topic, value, key, partition, timestamp)
+        return cast(Transport, self.transport).broker.send(
+            topic, key, value, partition, timestamp,
+            partitioner=self.partitioner)
+
+    async def send_many(
+            self, topic: str,
+            messages: Iterable[ProducerMessage],
+    ) -> Awaitable[List[RecordMetadata]]:
+        send = cast(Transport, self.transport).broker.send
+        partitioner = self.partitioner
+        return cast(Awaitable[List[RecordMetadata]], done_future([
+            send(topic, key, value, partition, timestamp,
+                 partitioner=partitioner)
+            for key, value, partition, timestamp in messages
+        ]))
+
+    def key_partition(self, topic: str, key: bytes) -> TP:
+        return TP(topic, cast(Transport, self.transport).broker.key_partition(
+            topic, key, self.partitioner))
+
+    async def begin_transaction(self) -> None:
+        ...
+
+    async def assign_transactions(self, tps: Set[TP]) -> None:
+        ...
+
+    async def commit_transaction(self,
+                                 offsets: Mapping[TP, int],
+                                 group_id: str) -> None:
+        # Messages are visible as soon as they are sent (there is no
+        # isolation), so committing a transaction only commits offsets.
+        broker = cast(Transport, self.transport).broker
+        broker.group(group_id).committed.update(offsets)
+
+    async def abort_transaction(self) -> None:
+        ...
 
 
 class Transport(base.Transport):
@@ -168,47 +548,24 @@ class Transport(base.Transport):
     default_port = 9092
     driver_version = f'memory-{faust_version}'
 
-    _subscription: Set[str]
-    _messages: MutableMapping[str, Deque[Message]]
-    _messages_ready: asyncio.Event
-    _subscription_ready: asyncio.Event
-
-    def __init__(self, *args: Any, **kwargs: Any) -> None:
-        super().__init__(*args, **kwargs)
-        self._subscription = set()
-        self._messages = defaultdict(deque)
-        self._messages_ready = asyncio.Event(loop=self.loop)
-        self._subscription_ready = asyncio.Event(loop=self.loop)
-
-    async def subscribe(self, topics: Iterable[str]) -> None:
-        self._subscription_ready.clear()
-        self._subscription.clear()
-        self._subscription.update(topics)
-        self._subscription_ready.set()
+    broker: Broker
+
+    def __init__(self,
+                 url: List[URL],
+                 app: AppT,
+                 loop: asyncio.AbstractEventLoop = None) -> None:
+        super().__init__(url, app, loop=loop)
+        key = (str(self.url[0]), self.loop)
+        try:
+            self.broker = _brokers[key]
+        except KeyError:
+            self.broker = _brokers[key] = Broker(
+                default_partitions=app.conf.topic_partitions,
+                loop=self.loop,
+            )
 
     async def send(self, topic: str, key: Optional[bytes],
                    value: Optional[bytes],
                    partition: Optional[int],
                    timestamp: Optional[float]) -> RecordMetadata:
-        if partition is None:
-            partition = 0
-        message = Message(
-            topic,
-            partition=partition,
-            offset=0,
-            timestamp=timestamp or time(),
-            timestamp_type=1 if timestamp else 0,
-            key=key,
-            value=value,
-            checksum=None,
-            serialized_key_size=len(key) if key else 0,
-            serialized_value_size=len(value) if value else 0,
-        )
-        self._messages[topic].append(message)
-        self._messages_ready.set()
-        return RecordMetadata(
-            topic=topic,
-            partition=partition,
-            topic_partition=message.tp,
-            offset=0,
-        )
+        return self.broker.send(topic, key, value, partition, timestamp)
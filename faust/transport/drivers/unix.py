@@ -0,0 +1,1007 @@
+"""Experimental: Unix socket transport for workers on one host.
+
+Worker processes on the same host connecting to the same socket
+path (e.g. ``unix:///run/user/1000/myapp.sock``) share an in-memory broker
+(see :class:`faust.transport.drivers.memory.Broker`), so messages
+between co-located agents, including ``group_by`` repartitioning,
+never leave the host.
+
+The broker is hosted by the first worker to start: it binds the
+socket, and every worker (including itself) connects to it.
+Topics keep partition semantics, and workers with the same app id
+form a consumer group using the same join/sync protocol as Kafka,
+so the partitions are divided between them by the Faust partition
+assignor.
+
+Notes:
+    Messages are only kept in memory by the hosting worker,
+    so when that worker exits the other workers will crash
+    with a connection error and all messages and committed
+    offsets are lost.
+
+    Only workers started by the same user can connect: the
+    default socket path is in a directory only accessible by the
+    user (:envvar:`XDG_RUNTIME_DIR`, or a ``faust-{uid}`` directory
+    in the temporary directory), and the user of the process at the
+    other end of the socket is verified when connecting.
+    Frames are serialized with pickle, but only builtin types and
+    topic partitions can be loaded from them.
+
+    The ``exactly_once`` :setting:`processing_guarantee` is not
+    supported, as the broker does not implement transactions.
+"""
+import asyncio
+import fcntl
+import inspect
+import io
+import os
+import pickle
+import socket
+import stat
+import struct
+import tempfile
+from typing import (
+    Any,
+    Awaitable,
+    ClassVar,
+    IO,
+    Iterable,
+    List,
+    Mapping,
+    MutableMapping,
+    NamedTuple,
+    Optional,
+    Set,
+    Tuple,
+    Type,
+    cast,
+)
+
+from mode import Seconds, Service, get_logger
+from mode.utils.futures import notify
+from mode.utils.imports import symbol_by_name
+from rhkafka.coordinator.protocol import (
+    ConsumerProtocolMemberAssignment,
+    ConsumerProtocolMemberMetadata,
+)
+from rhkafka.partitioner.default import DefaultPartitioner
+from yarl import URL
+
+from faust.exceptions import ImproperlyConfigured
+from faust.transport import base
+from faust.transport.consumer import RecordMap
+from faust.types import AppT, ConsumerMessage, RecordMetadata, TP
+from faust.types.transports import ConsumerT, ProducerT
+
+from . import memory
+
+__all__ = [
+    'BrokerClient',
+    'BrokerServer',
+    'GroupCoordinator',
+    'Consumer',
+    'Producer',
+    'Transport',
+]
+
+# XXX mypy borks on `import faust`
+faust_version = symbol_by_name('faust:__version__')
+
+logger = get_logger(__name__)
+
+#: Length prefix of every frame sent over the socket.
+FRAME_HEADER = struct.Struct('>I')
+
+#: ``struct ucred`` returned by the ``SO_PEERCRED`` socket option.
+PEER_CREDENTIALS = struct.Struct('3i')
+
+#: Record sent to consumers: (offset, timestamp, timestamp_type, key, value)
+RecordTuple = Tuple[int, float, int, Optional[bytes], Optional[bytes]]
+
+#: Brokers hosted by this process by socket path.
+_servers: MutableMapping[str, 'BrokerServer'] = {}
+
+
+class FrameUnpickler(pickle.Unpickler):
+    """Unpickler only loading the types sent in frames.
+
+    Frames only contain builtin types (tuples, lists, dicts, str,
+    bytes, numbers and :const:`None`) and topic partitions, so loading
+    any other class (that could run code when loaded) is an error.
+    """
+
+    def find_class(self, module: str, name: str) -> Any:
+        if module == TP.__module__ and name == TP.__name__:
+            return TP
+        raise pickle.UnpicklingError(
+            f'Frame contains forbidden type: {module}.{name}')
+
+
+async def read_frame(reader: asyncio.StreamReader) -> Any:
+    """Read one length prefixed frame."""
+    header = await reader.readexactly(FRAME_HEADER.size)
+    size, = FRAME_HEADER.unpack(header)
+    data = await reader.readexactly(size)
+    return FrameUnpickler(io.BytesIO(data)).load()
+
+
+def write_frame(writer: asyncio.StreamWriter, obj: Any) -> None:
+    """Write one length prefixed frame."""
+    data = pickle.dumps(obj, protocol=pickle.HIGHEST_PROTOCOL)
+    writer.write(FRAME_HEADER.pack(len(data)) + data)
+
+
+def private_dir(path: str) -> str:
+    """Create directory only accessible by the current user.
+
+    Raises:
+        PermissionError: if the directory already exists, but is owned
+            by another user or accessible by other users.
+    """
+    try:
+        os.mkdir(path, 0o700)
+    except FileExistsError:
+        pass
+    st = os.lstat(path)
+    if (not stat.S_ISDIR(st.st_mode) or st.st_uid != os.getuid() or
+            st.st_mode & 0o077):
+        raise PermissionError(
+            f'Directory {path!r} must be owned by the current user '
+            f'and not accessible by other users')
+    return path
+
+
+def default_socket_dir() -> str:
+    """Return directory used for sockets when no path is given."""
+    runtime_dir = os.environ.get('XDG_RUNTIME_DIR')
+    if runtime_dir:
+        return runtime_dir
+    return os.path.join(tempfile.gettempdir(), f'faust-{os.getuid()}')
+
+
+def peer_uid(writer: asyncio.StreamWriter, path: str) -> int:
+    """Return the user id of the process at the other end of a socket.
+
+    Uses the ``SO_PEERCRED`` socket option where supported (Linux),
+    and the owner of the socket file otherwise.
+    """
+    sock = writer.get_extra_info('socket')
+    if sock is not None and hasattr(socket, 'SO_PEERCRED'):
+        _, uid, _ = PEER_CREDENTIALS.unpack(sock.getsockopt(
+            socket.SOL_SOCKET, socket.SO_PEERCRED, PEER_CREDENTIALS.size))
+        return uid
+    return os.stat(path).st_uid
+
+
+def verify_peer(writer: asyncio.StreamWriter, path: str) -> None:
+    """Make sure the other end of the socket is run by the same user.
+
+    Raises:
+        PermissionError: if the peer is run by another user.
+    """
+    uid = peer_uid(writer, path)
+    if uid != os.getuid():
+        writer.close()
+        raise PermissionError(
+            f'Socket {path!r} is used by another user (uid={uid})')
+
+
+class Cluster(NamedTuple):
+    """Cluster metadata passed to the partition assignor."""
+
+    partitions: Mapping[str, int]
+
+    def partitions_for_topic(self, topic: str) -> Set[int]:
+        return set(range(self.partitions.get(topic, 0)))
+
+
+class GroupCoordinator:
+    """Consumer group managed by the broker server.
+
+    Implements the Kafka group membership protocol:
+
+    1) When a member joins or leaves, the group starts a new round.
+       The other members notice by their heartbeat failing, and
+       revoke their partitions before they join again.
+
+    2) After every member has joined (or :attr:`rebalance_timeout`
+       passed and the missing members are evicted), the generation
+       is incremented and the first member is elected leader.
+       The leader receives the metadata of every member.
+
+    3) Every member then calls :meth:`sync`, the leader with the
+       assignments computed by its partition assignor, and
+       every member receives its own assignment.
+    """
+
+    #: Encoded :class:`ConsumerProtocolMemberMetadata` by member id.
+    members: MutableMapping[str, bytes]
+
+    #: Last committed offset for every topic partition.
+    committed: MutableMapping[TP, int]
+
+    generation: int = 0
+
+    #: Set while waiting for members to join.
+    rebalancing: bool = False
+
+    _assignments: Optional[asyncio.Future] = None
+
+    def __init__(self,
+                 group_id: str,
+                 *,
+                 rebalance_delay: float,
+                 rebalance_timeout: float,
+                 loop: asyncio.AbstractEventLoop) -> None:
+        self.group_id = group_id
+        self.rebalance_delay = rebalance_delay
+        self.rebalance_timeout = rebalance_timeout
+        self.loop = loop
+        self.members = {}
+        self.committed = {}
+        self._joining: MutableMapping[str, asyncio.Future] = {}
+        self._all_joined = asyncio.Event(loop=loop)
+
+    async def join(self, member_id: str,
+                   metadata: bytes) -> Tuple[int, str, Any]:
+        previous = self._joining.pop(member_id, None)
+        if previous is not None and not previous.done():
+            previous.cancel()
+        self.members[member_id] = metadata
+        fut = self._joining[member_id] = self.loop.create_future()
+        self._start_round()
+        self._check_all_joined()
+        return await fut
+
+    async def sync(self, member_id: str, generation: int,
+                   assignments: Optional[Mapping[str, bytes]],
+                   ) -> Optional[bytes]:
+        if not self._is_current(member_id, generation):
+            return None
+        ready = cast(asyncio.Future, self._assignments)
+        if assignments is not None and not ready.done():
+            ready.set_result(assignments)
+        try:
+            result = await asyncio.wait_for(
+                asyncio.shield(ready, loop=self.loop),
+                timeout=self.rebalance_timeout,
+                loop=self.loop,
+            )
+        except asyncio.TimeoutError:
+            return None
+        if result is None or not self._is_current(member_id, generation):
+            return None
+        return result.get(member_id)
+
+    def heartbeat(self, member_id: str, generation: int) -> bool:
+        return self._is_current(member_id, generation)
+
+    def leave(self, member_id: str) -> None:
+        fut = self._joining.pop(member_id, None)
+        if fut is not None and not fut.done():
+            fut.cancel()
+        if self.members.pop(member_id, None) is not None and self.members:
+            self._start_round()
+            self._check_all_joined()
+
+    def commit(self, member_id: str, generation: int,
+               offsets: Mapping[TP, int]) -> bool:
+        # Like Kafka, commits from members of a previous generation
+        # are rejected, but members can still commit while the group
+        # is rebalancing (e.g. when partitions are revoked).
+        if member_id in self.members and generation == self.generation:
+            self.committed.update(offsets)
+            return True
+        return False
+
+    def _is_current(self, member_id: str, generation: int) -> bool:
+        return (not self.rebalancing and
+                generation == self.generation and
+                member_id in self.members)
+
+    def _start_round(self) -> None:
+        if not self.rebalancing:
+            self.rebalancing = True
+            self._all_joined.clear()
+            # members waiting for the previous assignment must rejoin.
+            if self._assignments is not None:
+                notify(self._assignments, None)
+            asyncio.ensure_future(self._complete_round(), loop=self.loop)
+
+    def _check_all_joined(self) -> None:
+        if self.rebalancing and set(self.members) <= set(self._joining):
+            self._all_joined.set()
+
+    async def _complete_round(self) -> None:
+        await asyncio.sleep(self.rebalance_delay, loop=self.loop)
+        try:
+            await asyncio.wait_for(
+                self._all_joined.wait(),
+                timeout=self.rebalance_timeout,
+                loop=self.loop,
+            )
+        except asyncio.TimeoutError:
+            pass
+        joining, self._joining = self._joining, {}
+        for member_id in list(self.members):
+            if member_id not in joining:
+                logger.info('Group %r evicted member %r (did not rejoin)',
+                            self.group_id, member_id)
+                del self.members[member_id]
+        self.generation += 1
+        self._assignments = self.loop.create_future()
+        self.rebalancing = False
+        if joining:
+            # the member that joined first is the leader.
+            members = {
+                member_id: metadata
+                for member_id, metadata in self.members.items()
+                if member_id in joining
+            }
+            leader_id = next(iter(members))
+            for member_id, fut in joining.items():
+                notify(fut, (
+                    self.generation,
+                    leader_id,
+                    members if member_id == leader_id else None,
+                ))
+
+
+class BrokerServer:
+    """Serve a :class:`~faust.transport.drivers.memory.Broker`.
+
+    Every request is a ``(request_id, method, args)`` frame,
+    answered by a ``(request_id, error, result)`` frame.
+    Requests are handled concurrently, so fetch and join requests
+    waiting for messages/members do not block the connection.
+    """
+
+    #: Seconds to wait before rebalancing after a member joins/leaves.
+    rebalance_delay: float = 0.5
+
+    _server: Optional[asyncio.AbstractServer] = None
+
+    def __init__(self,
+                 path: str,
+                 *,
+                 broker: memory.Broker,
+                 rebalance_timeout: float,
+                 loop: asyncio.AbstractEventLoop = None) -> None:
+        self.path = path
+        self.broker = broker
+        self.rebalance_timeout = rebalance_timeout
+        self.loop = loop or asyncio.get_event_loop()
+        self.groups: MutableMapping[str, GroupCoordinator] = {}
+        self._writers: Set[asyncio.StreamWriter] = set()
+
+    async def start(self) -> None:
+        self._server = await asyncio.start_unix_server(
+            self._handle_connection, path=self.path, loop=self.loop)
+        os.chmod(self.path, 0o600)
+
+    async def stop(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            for writer in list(self._writers):
+                writer.close()
+            await self._server.wait_closed()
+            self._server = None
+            try:
+                os.unlink(self.path)
+            except FileNotFoundError:
+                pass
+
+    def group(self, group_id: str) -> GroupCoordinator:
+        try:
+            return self.groups[group_id]
+        except KeyError:
+            group = self.groups[group_id] = GroupCoordinator(
+                group_id,
+                rebalance_delay=self.rebalance_delay,
+                rebalance_timeout=self.rebalance_timeout,
+                loop=self.loop,
+            )
+            return group
+
+    async def _handle_connection(self,
+                                 reader: asyncio.StreamReader,
+                                 writer: asyncio.StreamWriter) -> None:
+        # members joined using this connection, so that they
+        # leave their group when the worker exits.
+        members: Set[Tuple[str, str]] = set()
+        try:
+            verify_peer(writer, self.path)
+        except PermissionError as exc:
+            logger.warning('Broker refused connection: %r', exc)
+            return
+        self._writers.add(writer)
+        try:
+            while True:
+                try:
+                    request_id, method, args = await read_frame(reader)
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    break
+                if method == 'join':
+                    members.add((args[0], args[1]))
+                elif method == 'leave':
+                    members.discard((args[0], args[1]))
+                asyncio.ensure_future(
+                    self._handle_request(writer, request_id, method, args),
+                    loop=self.loop)
+        finally:
+            self._writers.discard(writer)
+            for group_id, member_id in members:
+                self.group(group_id).leave(member_id)
+            writer.close()
+
+    async def _handle_request(self,
+                              writer: asyncio.StreamWriter,
+                              request_id: int,
+                              method: str,
+                              args: Tuple) -> None:
+        response: Tuple[int, Optional[str], Any]
+        try:
+            result = getattr(self, f'on_{method}')(*args)
+            if inspect.isawaitable(result):
+                result = await result
+        except asyncio.CancelledError:
+            return
+        except Exception as exc:
+            logger.exception('Broker request %r failed: %r', method, exc)
+            response = (request_id, repr(exc), None)
+        else:
+            response = (request_id, None, result)
+        if not writer.transport.is_closing():
+            write_frame(writer, response)
+
+    def on_create_topic(self, topic: str, partitions: Optional[int]) -> int:
+        self.broker.create_topic(topic, partitions)
+        return self.broker.topics[topic]
+
+    def on_metadata(self, topics: Iterable[str]) -> Mapping[str, int]:
+        return {
+            topic: len(self.broker.partitions_for_topic(topic))
+            for topic in topics
+        }
+
+    def on_send(self, records: List[Tuple]) -> List[Tuple[int, int]]:
+        send = self.broker.send
+        results = []
+        for topic, key, value, partition, timestamp in records:
+            md = send(topic, key, value, partition, timestamp)
+            results.append((md.partition, md.offset))
+        return results
+
+    async def on_fetch(
+            self,
+            positions: Mapping[TP, int],
+            max_records: int,
+            timeout: float) -> Mapping[TP, Tuple[int, List[RecordTuple]]]:
+        messages_ready = self.broker.messages_ready
+        records = self._fetch(positions, max_records)
+        if not any(batch for _, batch in records.values()):
+            messages_ready.clear()
+            try:
+                await asyncio.wait_for(
+                    messages_ready.wait(), timeout=timeout, loop=self.loop)
+            except asyncio.TimeoutError:
+                return records
+            records = self._fetch(positions, max_records)
+        return records
+
+    def _fetch(
+            self,
+            positions: Mapping[TP, int],
+            max_records: int) -> MutableMapping[TP, Tuple[int, List]]:
+        logs = self.broker.logs
+        records: MutableMapping[TP, Tuple[int, List]] = {}
+        for tp, offset in positions.items():
+            log = logs.get(tp) or []
+            records[tp] = (len(log), [
+                (m.offset, m.timestamp, m.timestamp_type, m.key, m.value)
+                for m in log[offset:offset + max_records]
+            ])
+        return records
+
+    def on_highwaters(self, tps: Iterable[TP]) -> Mapping[TP, int]:
+        return {tp: self.broker.highwater(tp) for tp in tps}
+
+    def on_join(self, group_id: str, member_id: str,
+                metadata: bytes) -> Awaitable[Tuple[int, str, Any]]:
+        return self.group(group_id).join(member_id, metadata)
+
+    def on_sync(self, group_id: str, member_id: str, generation: int,
+                assignments: Optional[Mapping[str, bytes]],
+                ) -> Awaitable[Optional[bytes]]:
+        return self.group(group_id).sync(member_id, generation, assignments)
+
+    def on_heartbeat(self, group_id: str, member_id: str,
+                     generation: int) -> bool:
+        return self.group(group_id).heartbeat(member_id, generation)
+
+    def on_leave(self, group_id: str, member_id: str) -> None:
+        self.group(group_id).leave(member_id)
+
+    def on_commit(self, group_id: str, member_id: str, generation: int,
+                  offsets: Mapping[TP, int]) -> bool:
+        return self.group(group_id).commit(member_id, generation, offsets)
+
+    def on_committed(self, group_id: str) -> Mapping[TP, int]:
+        return dict(self.group(group_id).committed)
+
+
+class BrokerClient:
+    """Connection to a :class:`BrokerServer`."""
+
+    _reader_task: Optional[asyncio.Future] = None
+
+    def __init__(self,
+                 reader: asyncio.StreamReader,
+                 writer: asyncio.StreamWriter,
+                 *,
+                 loop: asyncio.AbstractEventLoop) -> None:
+        self.reader = reader
+        self.writer = writer
+        self.loop = loop
+        self._next_id = 0
+        self._pending: MutableMapping[int, asyncio.Future] = {}
+        self._reader_task = asyncio.ensure_future(
+            self._read_responses(), loop=self.loop)
+
+    @classmethod
+    async def connect(cls, path: str, *,
+                      loop: asyncio.AbstractEventLoop) -> 'BrokerClient':
+        reader, writer = await asyncio.open_unix_connection(
+            path=path, loop=loop)
+        # frames are unpickled, so never talk to a broker
+        # hosted by another user.
+        verify_peer(writer, path)
+        return cls(reader, writer, loop=loop)
+
+    async def request(self, method: str, *args: Any) -> Any:
+        if self.writer.transport.is_closing():
+            raise ConnectionResetError('Connection to broker closed')
+        self._next_id += 1
+        request_id = self._next_id
+        fut = self._pending[request_id] = self.loop.create_future()
+        try:
+            write_frame(self.writer, (request_id, method, args))
+            await self.writer.drain()
+            return await fut
+        finally:
+            self._pending.pop(request_id, None)
+
+    async def _read_responses(self) -> None:
+        pending = self._pending
+        try:
+            while True:
+                request_id, error, result = await read_frame(self.reader)
+                fut = pending.get(request_id)
+                if fut is not None and not fut.done():
+                    if error is not None:
+                        fut.set_exception(RuntimeError(
+                            f'Broker request failed: {error}'))
+                    else:
+                        fut.set_result(result)
+        except (asyncio.IncompleteReadError, ConnectionError) as exc:
+            for fut in pending.values():
+                if not fut.done():
+                    fut.set_exception(ConnectionResetError(
+                        f'Connection to broker lost: {exc!r}'))
+        finally:
+            self.writer.close()
+
+    def close(self) -> None:
+        self.writer.close()
+        if self._reader_task is not None:
+            self._reader_task.cancel()
+        for fut in self._pending.values():
+            if not fut.done():
+                fut.set_exception(
+                    ConnectionResetError('Connection to broker closed'))
+
+
+class Consumer(memory.Consumer):
+    """Unix socket consumer."""
+
+    consumer_stopped_errors: ClassVar[Tuple[Type[BaseException], ...]] = (
+        ConnectionError,
+    )
+
+    #: Generation of the group the current assignment belongs to.
+    generation: int = -1
+
+    _subscription: Set[str]
+    _highwaters: MutableMapping[TP, int]
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        self._subscription = set()
+        self._highwaters = {}
+        super().__init__(*args, **kwargs)
+        self._rejoin_needed = asyncio.Event(loop=self.loop)
+        self._fetch_wakeup = asyncio.Event(loop=self.loop)
+        cast(Transport, self.transport).acquire(self)
+
+    async def on_stop(self) -> None:
+        await super().on_stop()
+        await cast(Transport, self.transport).release(self)
+
+    async def create_topic(self,
+                           topic: str,
+                           partitions: int,
+                           replication: int,
+                           *,
+                           config: Mapping[str, Any] = None,
+                           timeout: Seconds = 1000.0,
+                           retention: Seconds = None,
+                           compacting: bool = None,
+                           deleting: bool = None,
+                           ensure_created: bool = False) -> None:
+        await cast(Transport, self.transport).create_topic(topic, partitions)
+
+    async def subscribe(self, topics: Iterable[str]) -> None:
+        # Kafka rebalances in the background after subscribing,
+        # and the rebalance callbacks wait for the subscription
+        # to complete, so we cannot call them directly here.
+        self._subscription = set(topics)
+        self._rejoin_needed.set()
+
+    async def _request(self, method: str, *args: Any) -> Any:
+        client = await cast(Transport, self.transport).connect()
+        return await client.request(method, *args)
+
+    @Service.task
+    async def _group_coordinator(self) -> None:
+        heartbeat_interval = self.app.conf.broker_heartbeat_interval
+        group_id = self.app.conf.id
+        while not self.should_stop:
+            await self.wait(self._rejoin_needed, timeout=heartbeat_interval)
+            if self.should_stop:
+                break
+            if not self._subscription:
+                continue
+            if not self._rejoin_needed.is_set():
+                if await self._request('heartbeat', group_id,
+                                       self.member_id, self.generation):
+                    continue
+            self._rejoin_needed.clear()
+            if not await self._join_group():
+                self._rejoin_needed.set()
+
+    async def _join_group(self) -> bool:
+        group_id = self.app.conf.id
+        assignor = memory._assignor(self.app)
+        await self._revoke_assignment()
+        # XXX Struct.encode is a weak method, so we must keep
+        # a reference to the struct while encoding it.
+        metadata = assignor.metadata(self._subscription)
+        generation, leader_id, members = await self._request(
+            'join', group_id, self.member_id, metadata.encode())
+        assignments: Optional[Mapping[str, bytes]] = None
+        if members is not None:
+            # we are the leader, so we assign the partitions.
+            member_metadata = {
+                member_id: ConsumerProtocolMemberMetadata.decode(metadata)
+                for member_id, metadata in members.items()
+            }
+            topics: Set[str] = set()
+            for metadata in member_metadata.values():
+                topics.update(metadata.subscription)
+            cluster = Cluster(
+                await cast(Transport, self.transport).metadata(topics))
+            member_assignments = assignor.assign(cluster, member_metadata)
+            assignments = {
+                member_id: assignment.encode()
+                for member_id, assignment in member_assignments.items()
+            }
+        assignment = await self._request(
+            'sync', group_id, self.member_id, generation, assignments)
+        if assignment is None:
+            return False  # group started rebalancing again
+        self.generation = generation
+        await self._receive_assignment(
+            ConsumerProtocolMemberAssignment.decode(assignment),
+            await self._committed_offsets())
+        return True
+
+    async def _leave_group(self) -> None:
+        client = cast(Transport, self.transport)._client
+        if client is not None:
+            try:
+                await client.request('leave', self.app.conf.id, self.member_id)
+            except ConnectionError:
+                pass
+
+    def _wakeup_fetch(self) -> None:
+        self._fetch_wakeup.set()
+
+    async def _getmany(self,
+                       active_partitions: Set[TP],
+                       timeout: float) -> RecordMap:
+        assignment = self._assignment
+        position = self._position
+        positions = {
+            tp: position.get(tp, 0)
+            for tp in active_partitions
+            if tp in assignment
+        }
+        self._fetch_wakeup.clear()
+        if not positions:
+            await self.wait(self._fetch_wakeup, timeout=timeout)
+            return {}
+        fetch = asyncio.ensure_future(
+            self._request('fetch', positions, self.max_poll_records, timeout),
+            loop=self.loop)
+        results = await self.wait_first(fetch, self._fetch_wakeup)
+        if fetch not in results.done:
+            # woken up or stopping: discard the records, since
+            # the set of active partitions changed.
+            fetch.cancel()
+            return {}
+        records: MutableMapping[TP, List[Any]] = {}
+        for tp, (highwater, batch) in fetch.result().items():
+            self._highwaters[tp] = highwater
+            # discard records if we seeked while fetching.
+            if batch and position.get(tp, 0) == positions[tp]:
+                position[tp] = batch[-1][0] + 1
+                records[tp] = batch
+        return records
+
+    def _to_message(self, tp: TP, record: Any) -> ConsumerMessage:
+        offset, timestamp, timestamp_type, key, value = record
+        return ConsumerMessage(
+            tp.topic,
+            tp.partition,
+            offset,
+            timestamp,
+            timestamp_type,
+            key,
+            value,
+            None,
+            len(key) if key else 0,
+            len(value) if value else 0,
+            tp,
+        )
+
+    async def _commit(self, offsets: Mapping[TP, int]) -> bool:
+        assignment = self._assignment
+        return await self._request(
+            'commit', self.app.conf.id, self.member_id, self.generation,
+            {tp: offset for tp, offset in offsets.items()
+             if tp in assignment})
+
+    async def _committed_offsets(self) -> Mapping[TP, int]:
+        return await self._request('committed', self.app.conf.id)
+
+    def highwater(self, tp: TP) -> int:
+        return self._highwaters.get(tp, 0)
+
+    def topic_partitions(self, topic: str) -> Optional[int]:
+        return cast(Transport, self.transport).topic_partitions.get(topic)
+
+    async def highwaters(self, *partitions: TP) -> MutableMapping[TP, int]:
+        highwaters = await self._request('highwaters', partitions)
+        self._highwaters.update(highwaters)
+        return highwaters
+
+
+class Producer(base.Producer):
+    """Unix socket producer.
+
+    Messages sent in the same iteration of the event loop
+    are sent to the broker in one request.
+    """
+
+    _flush_scheduled: bool = False
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self._buffer: List[Tuple[Tuple, asyncio.Future]] = []
+        self._inflight: Set[asyncio.Future] = set()
+        cast(Transport, self.transport).acquire(self)
+
+    async def on_stop(self) -> None:
+        await self.flush()
+        await cast(Transport, self.transport).release(self)
+
+    async def create_topic(self,
+                           topic: str,
+                           partitions: int,
+                           replication: int,
+                           *,
+                           config: Mapping[str, Any] = None,
+                           timeout: Seconds = None,
+                           retention: Seconds = None,
+                           compacting: bool = None,
+                           deleting: bool = None,
+                           ensure_created: bool = False) -> None:
+        await cast(Transport, self.transport).create_topic(topic, partitions)
+
+    async def send(self, topic: str, key: Optional[bytes],
+                   value: Optional[bytes],
+                   partition: Optional[int],
+                   timestamp: Optional[float]) -> Awaitable[RecordMetadata]:
+        if partition is None and self.partitioner is not None:
+            transport = cast(Transport, self.transport)
+            if topic not in transport.topic_partitions:
+                await transport.metadata([topic])
+            partition = self.key_partition(topic, cast(bytes, key)).partition
+        fut = self.loop.create_future()
+        self._buffer.append(((topic, key, value, partition, timestamp), fut))
+        if not self._flush_scheduled:
+            self._flush_scheduled = True
+            self.loop.call_soon(self._send_buffer)
+        return fut
+
+    async def send_and_wait(self, topic: str, key: Optional[bytes],
+                            value: Optional[bytes],
+                            partition: Optional[int],
+                            timestamp: Optional[float]) -> RecordMetadata:
+        fut = await self.send(topic, key, value, partition, timestamp)
+        return await fut
+
+    def _send_buffer(self) -> None:
+        self._flush_scheduled = False
+        buffer, self._buffer = self._buffer, []
+        if buffer:
+            task = asyncio.ensure_future(
+                self._send_batch(buffer), loop=self.loop)
+            self._inflight.add(task)
+            task.add_done_callback(self._inflight.discard)
+
+    async def _send_batch(self,
+                          buffer: List[Tuple[Tuple, asyncio.Future]]) -> None:
+        try:
+            client = await cast(Transport, self.transport).connect()
+            results = await client.request(
+                'send', [record for record, _ in buffer])
+        except Exception as exc:
+            for _, fut in buffer:
+                if not fut.done():
+                    fut.set_exception(exc)
+        else:
+            for ((topic, *_), fut), (partition, offset) in zip(buffer,
+                                                               results):
+                tp = TP(topic, partition)
+                notify(fut, RecordMetadata(
+                    topic=topic,
+                    partition=partition,
+                    topic_partition=tp,
+                    offset=offset,
+                ))
+
+    async def flush(self) -> None:
+        self._send_buffer()
+        if self._inflight:
+            await asyncio.wait(self._inflight, loop=self.loop)
+
+    def key_partition(self, topic: str, key: bytes) -> TP:
+        # Same partitioner as the broker uses for messages without
+        # a partition, so this is consistent with where keys end up.
+        # Raises KeyError if we have not asked the broker for the
+        # number of partitions in the topic yet (see Transport.metadata).
+        n = cast(Transport, self.transport).topic_partitions[topic]
+        partitions = list(range(n))
+        partitioner = self.partitioner or DefaultPartitioner()
+        return TP(topic, partitioner(key, partitions, partitions))
+
+
+class Transport(base.Transport):
+    """Unix socket transport."""
+
+    Consumer: ClassVar[Type[ConsumerT]] = Consumer
+    Producer: ClassVar[Type[ProducerT]] = Producer
+
+    driver_version = f'unix-{faust_version}'
+
+    #: Path to the Unix socket.
+    path: str
+
+    #: Number of partitions by topic name, for topics we know of.
+    topic_partitions: MutableMapping[str, int]
+
+    #: Seconds to sleep between attempts to take the lock
+    #: deciding which worker hosts the broker.
+    lock_retry_interval: float = 0.1
+
+    _client: Optional[BrokerClient] = None
+
+    #: Broker hosted by this transport.
+    _server: Optional[BrokerServer] = None
+
+    def __init__(self,
+                 url: List[URL],
+                 app: AppT,
+                 loop: asyncio.AbstractEventLoop = None) -> None:
+        if app.conf.processing_guarantee == 'exactly_once':
+            raise ImproperlyConfigured(
+                'The unix:// transport does not support transactions: '
+                'processing_guarantee cannot be exactly_once')
+        super().__init__(url, app, loop=loop)
+        self.path = self.url[0].path or os.path.join(
+            default_socket_dir(), f'faust-{app.conf.id}.sock')
+        self.topic_partitions = {}
+        self._connect_lock = asyncio.Lock(loop=self.loop)
+        self._users: Set[Any] = set()
+
+    def acquire(self, user: Any) -> None:
+        """Register consumer/producer using the connection."""
+        self._users.add(user)
+
+    async def release(self, user: Any) -> None:
+        """Consumer/producer stopped: close when the last one stops."""
+        self._users.discard(user)
+        if not self._users:
+            await self.close()
+
+    async def close(self) -> None:
+        """Close connection, and stop the broker if we host it."""
+        client, self._client = self._client, None
+        if client is not None:
+            client.close()
+        server, self._server = self._server, None
+        if server is not None:
+            if _servers.get(self.path) is server:
+                del _servers[self.path]
+            await server.stop()
+
+    async def connect(self) -> BrokerClient:
+        if self._client is None:
+            async with self._connect_lock:
+                if self._client is None:
+                    self._client = await self._connect_or_host()
+        return self._client
+
+    async def _connect_or_host(self) -> BrokerClient:
+        if not self.url[0].path:
+            private_dir(os.path.dirname(self.path))
+        try:
+            return await BrokerClient.connect(self.path, loop=self.loop)
+        except (FileNotFoundError, ConnectionRefusedError):
+            # No broker yet: the lock file makes sure only one
+            # of the workers starting at the same time hosts it.
+            with open(f'{self.path}.lock', 'w') as lockfile:
+                await self._lock(lockfile)
+                try:
+                    return await BrokerClient.connect(
+                        self.path, loop=self.loop)
+                except (FileNotFoundError, ConnectionRefusedError):
+                    await self._host_broker()
+            return await BrokerClient.connect(self.path, loop=self.loop)
+
+    async def _lock(self, lockfile: IO) -> None:
+        # Do not block the event loop while another worker holds
+        # the lock.
+        while 1:
+            try:
+                fcntl.flock(lockfile, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                await asyncio.sleep(self.lock_retry_interval, loop=self.loop)
+            else:
+                return
+
+    async def _host_broker(self) -> None:
+        logger.info('Hosting broker at %r', self.path)
+        server = BrokerServer(
+            self.path,
+            broker=memory.Broker(
+                default_partitions=self.app.conf.topic_partitions,
+                loop=self.loop,
+            ),
+            rebalance_timeout=self.app.conf.broker_session_timeout,
+            loop=self.loop,
+        )
+        await server.start()
+        self._server = _servers[self.path] = server
+
+    async def create_topic(self, topic: str,
+                           partitions: Optional[int]) -> None:
+        client = await self.connect()
+        self.topic_partitions[topic] = await client.request(
+            'create_topic', topic, partitions)
+
+    async def metadata(self, topics: Iterable[str]) -> Mapping[str, int]:
+        client = await self.connect()
+        partitions = await client.request('metadata', list(topics))
+        self.topic_partitions.update(partitions)
+        return partitions
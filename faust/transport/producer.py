@@ -5,12 +5,21 @@ The Producer is responsible for:
    - Holds reference to the transport that created it
    - ... and the app via ``self.transport.app``.
    - Sending messages.
+   - Committing transactions (when exactly-once processing is enabled).
 """
 import asyncio
-from typing import Any, Awaitable, Mapping, Optional
+from typing import (
+    Any,
+    Awaitable,
+    Iterable,
+    List,
+    Mapping,
+    Optional,
+    Set,
+)
 from mode import Seconds, Service
 from faust.types.tuples import RecordMetadata, TP
-from faust.types.transports import ProducerT, TransportT
+from faust.types.transports import ProducerMessage, ProducerT, TransportT
 
 __all__ = ['Producer']
 
@@ -32,6 +41,7 @@ class Producer(Service, ProducerT):
         self.request_timeout = conf.producer_request_timeout
         self.ssl_context = conf.ssl_context
         self.partitioner = conf.producer_partitioner
+        self.transactional = conf.processing_guarantee == 'exactly_once'
         super().__init__(loop=loop or self.transport.loop, **kwargs)
 
     async def send(self, topic: str, key: Optional[bytes],
@@ -46,9 +56,38 @@ class Producer(Service, ProducerT):
                             timestamp: Optional[float]) -> RecordMetadata:
         raise NotImplementedError()
 
+    async def send_many(
+            self, topic: str,
+            messages: Iterable[ProducerMessage],
+    ) -> Awaitable[List[RecordMetadata]]:
+        # Transports that cannot send a batch of messages in one go
+        # send them one by one.
+        futs = [await self.send(topic, key, value, partition, timestamp)
+                for key, value, partition, timestamp in messages]
+        return asyncio.ensure_future(self._gather(futs), loop=self.loop)
+
+    async def _gather(
+            self,
+            futs: List[Awaitable[RecordMetadata]]) -> List[RecordMetadata]:
+        return list(await asyncio.gather(*futs, loop=self.loop))
+
     async def flush(self) -> None:
         ...
 
+    async def begin_transaction(self) -> None:
+        raise NotImplementedError()
+
+    async def assign_transactions(self, tps: Set[TP]) -> None:
+        raise NotImplementedError()
+
+    async def commit_transaction(self,
+                                 offsets: Mapping[TP, int],
+                                 group_id: str) -> None:
+        raise NotImplementedError()
+
+    async def abort_transaction(self) -> None:
+        raise NotImplementedError()
+
     async def create_topic(self,
                            topic: str,
                            partitions: int,
@@ -1,5 +1,7 @@
+from collections import deque
 from typing import (
     Any,
+    Deque,
     Dict,
     Iterator,
     List,
@@ -71,3 +73,98 @@ class TopicBuffer(Iterator):
         if it is None:
             it = self._it = iter(self)
         return it.__next__()
+
+
+class AckTracker:
+    """Acked offsets of a topic partition.
+
+    Offsets in a partition are not always consecutive (compacted
+    topics, transaction markers and aborted messages all leave holes),
+    so the offsets of the messages read are recorded in the order they
+    were read, and committing stops at the first message read that
+    was not acked yet.  Reading, acking and finding the offset to
+    commit are amortized O(1), and memory is only used for messages
+    in flight.
+
+    Arguments:
+        base: The first offset that can be acked: the offset after
+            the committed offset, or the first offset read from the
+            partition if nothing was committed.
+    """
+
+    __slots__ = ('base', 'reads', 'acked')
+
+    #: Offsets before this were committed (or never read).
+    base: int
+
+    #: Offsets read that were not committed yet, in the order read.
+    reads: Deque[int]
+
+    #: Offsets acked that were not committed yet.
+    acked: Set[int]
+
+    def __init__(self, base: int) -> None:
+        self.base = base
+        self.reads = deque()
+        self.acked = set()
+
+    def read(self, offset: int) -> None:
+        """Record that the message at offset was read.
+
+        Messages are read in order, so offsets between the last
+        offset read and this one are not in the partition, and
+        never keep the offsets after them from being committed.
+        """
+        reads = self.reads
+        if offset >= self.base and (not reads or offset > reads[-1]):
+            reads.append(offset)
+
+    def ack(self, offset: int) -> bool:
+        """Mark offset as acked, returns :const:`False` if already acked.
+
+        Offsets before the window (already committed)
+        are also ignored.
+        """
+        acked = self.acked
+        if offset < self.base or offset in acked:
+            return False
+        acked.add(offset)
+        return True
+
+    def acked_up_to(self, offset: int) -> bool:
+        """Return :const:`True` if all messages read up to offset are acked."""
+        acked = self.acked
+        for read_offset in self.reads:
+            if read_offset > offset:
+                break
+            if read_offset not in acked:
+                return False
+        return True
+
+    def pop_committable(self) -> Optional[int]:
+        """Return the highest offset of the consecutive acked offsets.
+
+        Only offsets acked consecutively from the first message
+        read after the committed offset can be committed, and they
+        are removed from the window.  For example if the offsets
+        read are::
+
+            34 35 36 37 40 41 42 43 44
+
+        and every offset except 37 was acked, the return value will
+        be: 36, and :const:`None` is returned until 37 is acked.
+        Once 37 is acked, the return value will be 44, as offsets
+        38 and 39 were never read.
+        """
+        reads = self.reads
+        acked = self.acked
+        offset: Optional[int] = None
+        while reads and reads[0] in acked:
+            offset = reads.popleft()
+            acked.discard(offset)
+        if offset is not None:
+            self.base = offset + 1
+        return offset
+
+    def __len__(self) -> int:
+        return len(self.acked)
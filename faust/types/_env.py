@@ -1,6 +1,6 @@
 """Faust environment variables."""
 import os
-from typing import Any, Sequence
+from typing import Any, Optional, Sequence
 from yarl import URL
 
 __all__ = [
@@ -13,6 +13,7 @@ __all__ = [
     'WEB_BIND',
     'WEB_TRANSPORT',
     'WORKDIR',
+    'WORKER_PROCESS',
 ]
 
 PREFICES: Sequence[str] = ['FAUST_', 'F_']
@@ -50,3 +51,9 @@ STRICT: bool = bool(_getenv('STRICT', False))
 WEB_PORT: int = int(_getenv('WEB_PORT', '6066'))
 WEB_BIND: str = _getenv('F_WEB_BIND', '0.0.0.0')
 WEB_TRANSPORT: URL = URL(_getenv('WEB_TRANSPORT', 'tcp://'))
+
+#: Index of this worker process, set by :program:`faust worker --processes`
+#: for the worker processes it starts.
+WORKER_PROCESS: Optional[int] = (
+    int(_getenv('WORKER_PROCESS')) if _getenv('WORKER_PROCESS', None)
+    else None)
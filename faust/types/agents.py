@@ -116,6 +116,9 @@ class AgentT(ServiceT):
     help: str
     supervisor_strategy: Optional[Type[SupervisorStrategyT]]
     isolated_partitions: bool
+    executor: Optional[str]
+    workers: Optional[int]
+    ordering: Optional[str]
 
     @abc.abstractmethod
     def __init__(self,
@@ -132,6 +135,9 @@ class AgentT(ServiceT):
                  key_type: ModelArg = None,
                  value_type: ModelArg = None,
                  isolated_partitions: bool = False,
+                 executor: str = None,
+                 workers: int = None,
+                 ordering: str = None,
                  **kwargs: Any) -> None:
         self.fun: AgentFun = fun
 
@@ -166,6 +172,10 @@ class AgentT(ServiceT):
     async def on_partitions_revoked(self, revoked: Set[TP]) -> None:
         ...
 
+    @abc.abstractmethod
+    async def start_executor(self) -> None:
+        ...
+
     @abc.abstractmethod
     async def cast(self,
                    value: V = None,
@@ -52,12 +52,14 @@ from .windows import WindowT
 if typing.TYPE_CHECKING:
     from faust.cli.base import AppCommand
     from faust.sensors.monitor import Monitor
+    from faust.sensors.profiler import Profiler
     from faust.worker import Worker as WorkerT
     from .models import ModelArg
     from .settings import Settings
 else:
     class AppCommand: ...     # noqa
     class Monitor: ...        # noqa
+    class Profiler: ...       # noqa
     class ModelArg: ...       # noqa
     class WorkerT: ...        # noqa
     class Settings: ...       # noqa
@@ -392,6 +394,11 @@ class AppT(ServiceT):
     def monitor(self, value: Monitor) -> None:
         ...
 
+    @cached_property
+    @abc.abstractmethod
+    def profiler(self) -> Profiler:
+        ...
+
     @cached_property
     @abc.abstractmethod
     def flow_control(self) -> FlowControlEvent:
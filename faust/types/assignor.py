@@ -52,6 +52,10 @@ class PartitionAssignorT(abc.ABC):
     def key_store(self, topic: str, key: bytes) -> URL:
         ...
 
+    @abc.abstractmethod
+    def partition_store(self, tp: TP) -> URL:
+        ...
+
     @abc.abstractmethod
     def table_metadata(self, topic: str) -> HostToPartitionMap:
         ...
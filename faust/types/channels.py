@@ -1,7 +1,16 @@
 import abc
 import asyncio
 import typing
-from typing import Any, AsyncIterator, Awaitable, Optional, Set
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Iterable,
+    List,
+    Optional,
+    Set,
+    Tuple,
+)
 
 from mode import Seconds
 from mode.utils.futures import stampede
@@ -83,6 +92,19 @@ class ChannelT(AsyncIterator):
                    force: bool = False) -> Awaitable[RecordMetadata]:
         ...
 
+    @abc.abstractmethod
+    async def send_many(
+            self,
+            items: Iterable[Tuple[K, V]],
+            *,
+            partition: int = None,
+            timestamp: float = None,
+            key_serializer: CodecArg = None,
+            value_serializer: CodecArg = None,
+            callback: MessageSentCallback = None,
+            force: bool = False) -> List[Awaitable[RecordMetadata]]:
+        ...
+
     @abc.abstractmethod
     def as_future_message(
             self,
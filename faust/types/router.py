@@ -39,3 +39,8 @@ class RouterT(abc.ABC):
     async def route_req(self, table_name: str, key: K, web: web.Web,
                         request: web.Request) -> web.Response:
         ...
+
+    @abc.abstractmethod
+    async def route_key_req(self, table_name: str, key: str,
+                            web: web.Web) -> web.Response:
+        ...
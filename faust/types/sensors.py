@@ -12,9 +12,11 @@ from .transports import ConsumerT, ProducerT
 from .tuples import Message, TP
 
 if typing.TYPE_CHECKING:
+    from faust.sensors.batch import SensorBatch
     from .app import AppT
 else:
     class AppT: ...  # noqa
+    class SensorBatch: ...  # noqa
 
 __all__ = ['SensorInterfaceT', 'SensorT', 'SensorDelegateT']
 
@@ -75,9 +77,19 @@ class SensorInterfaceT(abc.ABC):
     def on_send_completed(self, producer: ProducerT, state: Any) -> None:
         ...
 
+    @abc.abstractmethod
+    def on_batch(self, batch: SensorBatch) -> None:
+        ...
+
 
 class SensorT(SensorInterfaceT, ServiceT):
-    ...
+
+    #: Receive per-message hooks
+    #: (on_message_in/on_stream_event_in/on_stream_event_out/on_message_out)
+    per_message: bool = True
+
+    #: Receive aggregated per-message events in :meth:`on_batch`.
+    batched: bool = False
 
 
 class SensorDelegateT(SensorInterfaceT, Iterable):
@@ -91,3 +103,7 @@ class SensorDelegateT(SensorInterfaceT, Iterable):
     @abc.abstractmethod
     def remove(self, sensor: SensorT) -> None:
         ...
+
+    @abc.abstractmethod
+    def flush_batch(self) -> None:
+        ...
@@ -37,7 +37,7 @@ from .router import RouterT
 from .sensors import SensorT
 from .serializers import RegistryT
 from .streams import StreamT
-from .transports import PartitionerT
+from .transports import CommitPolicyT, PartitionerT
 from .tables import TableManagerT, TableT
 from .topics import TopicT
 from .web import HttpClientT
@@ -127,6 +127,10 @@ REGISTRY_TYPE = 'faust.serializers.Registry'
 #: Path to worker class, providing the default for :setting:`Worker`.
 WORKER_TYPE = 'faust.worker.Worker'
 
+#: Path to commit policy class, providing the default for
+#: :setting:`broker_commit_policy`.
+COMMIT_POLICY_TYPE = 'faust.transport.commit:CommitPolicy'
+
 #: Path to partition assignor class, providing the default for
 #: :setting:`PartitionAssignor`.
 PARTITION_ASSIGNOR_TYPE = 'faust.assignor:PartitionAssignor'
@@ -181,12 +185,24 @@ BROKER_MAX_POLL_RECORDS = 500
 #: Used as the default value for :setting:`table_cleanup_interval`.
 TABLE_CLEANUP_INTERVAL = 30.0
 
+#: How often we send aggregated per-message events to batched sensors.
+#: Used as the default value for :setting:`sensor_batch_interval`.
+SENSOR_BATCH_INTERVAL = 1.0
+
+#: How often the worker profiler measures event loop lag.
+#: Used as the default value for :setting:`worker_profiling_interval`.
+WORKER_PROFILING_INTERVAL = 0.1
+
 #: Prefix used for reply topics.
 REPLY_TO_PREFIX = 'f-reply-'
 
 #: Default expiry time for replies, in seconds (float).
 REPLY_EXPIRES = want_seconds(timedelta(days=1))
 
+#: How long to wait for the reply to a request sent directly
+#: to a worker (:setting:`reply_direct`), in seconds (float).
+REPLY_DIRECT_TIMEOUT = 30.0
+
 #: Max number of messages channels/streams/topics can "prefetch".
 STREAM_BUFFER_MAXSIZE = 4096
 
@@ -205,6 +221,15 @@ STREAM_RECOVERY_DELAY = 3.0
 #: is added in a later version.
 STREAM_PUBLISH_ON_COMMIT = False
 
+#: Processing guarantee of the worker: ``at_least_once`` commits offsets
+#: after processing, while ``exactly_once`` uses Kafka transactions
+#: to commit produced messages and offsets atomically.
+#: Used as the default value for :setting:`processing_guarantee`.
+PROCESSING_GUARANTEE = 'at_least_once'
+
+#: Supported values for :setting:`processing_guarantee`.
+PROCESSING_GUARANTEES = frozenset({'at_least_once', 'exactly_once'})
+
 #: Maximum size of a request in bytes in the consumer.
 #: Used as the default value for :setting:`max_fetch_size`.
 CONSUMER_MAX_FETCH_SIZE = 4 * 1024 ** 2
@@ -284,6 +309,7 @@ class Settings(abc.ABC):
     reply_to: str
     reply_to_prefix: str = REPLY_TO_PREFIX
     reply_create_topic: bool = False
+    reply_direct: bool = False
     stream_buffer_maxsize: int = STREAM_BUFFER_MAXSIZE
     stream_wait_empty: bool = True
     stream_ack_cancelled_tasks: bool = False
@@ -310,6 +336,8 @@ class Settings(abc.ABC):
     web_in_thread: bool = False
     worker_redirect_stdouts: bool = True
     worker_redirect_stdouts_level: Severity = 'WARN'
+    worker_profiling: bool = False
+    worker_processes: int = 1
 
     _id: str
     _origin: Optional[str] = None
@@ -328,12 +356,17 @@ class Settings(abc.ABC):
     _broker_heartbeat_interval: float = BROKER_HEARTBEAT_INTERVAL
     _broker_commit_interval: float = BROKER_COMMIT_INTERVAL
     _broker_commit_livelock_soft_timeout: float = BROKER_LIVELOCK_SOFT
+    _processing_guarantee: str = PROCESSING_GUARANTEE
+    _broker_commit_policy: Type[CommitPolicyT]
     _broker_max_poll_records: int = BROKER_MAX_POLL_RECORDS
     _producer_partitioner: Optional[PartitionerT] = None
     _producer_request_timeout: Seconds = PRODUCER_REQUEST_TIMEOUT
     _stream_recovery_delay: float = STREAM_RECOVERY_DELAY
     _table_cleanup_interval: float = TABLE_CLEANUP_INTERVAL
     _reply_expires: float = REPLY_EXPIRES
+    _reply_direct_timeout: float = REPLY_DIRECT_TIMEOUT
+    _sensor_batch_interval: float = SENSOR_BATCH_INTERVAL
+    _worker_profiling_interval: float = WORKER_PROFILING_INTERVAL
     _web_transport: URL = WEB_TRANSPORT
     _Agent: Type[AgentT]
     _Stream: Type[StreamT]
@@ -387,6 +420,7 @@ class Settings(abc.ABC):
             broker_client_id: str = None,
             broker_request_timeout: Seconds = None,
             broker_commit_every: int = None,
+            broker_commit_policy: SymbolArg[Type[CommitPolicyT]] = None,
             broker_commit_interval: Seconds = None,
             broker_commit_livelock_soft_timeout: Seconds = None,
             broker_session_timeout: Seconds = None,
@@ -416,13 +450,17 @@ class Settings(abc.ABC):
             reply_to: str = None,
             reply_to_prefix: str = None,
             reply_create_topic: bool = None,
+            reply_direct: bool = None,
+            reply_direct_timeout: Seconds = None,
             reply_expires: Seconds = None,
             ssl_context: ssl.SSLContext = None,
+            sensor_batch_interval: Seconds = None,
             stream_buffer_maxsize: int = None,
             stream_wait_empty: bool = None,
             stream_ack_cancelled_tasks: bool = None,
             stream_ack_exceptions: bool = None,
             stream_publish_on_commit: bool = None,
+            processing_guarantee: str = None,
             stream_recovery_delay: Seconds = None,
             producer_linger_ms: int = None,
             producer_max_batch_size: int = None,
@@ -440,6 +478,9 @@ class Settings(abc.ABC):
             web_in_thread: bool = None,
             worker_redirect_stdouts: bool = None,
             worker_redirect_stdouts_level: Severity = None,
+            worker_profiling: bool = None,
+            worker_profiling_interval: Seconds = None,
+            worker_processes: int = None,
             Agent: SymbolArg[Type[AgentT]] = None,
             Stream: SymbolArg[Type[StreamT]] = None,
             Table: SymbolArg[Type[TableT]] = None,
@@ -513,6 +554,10 @@ class Settings(abc.ABC):
             self.topic_partitions = topic_partitions
         if reply_create_topic is not None:
             self.reply_create_topic = reply_create_topic
+        if reply_direct is not None:
+            self.reply_direct = reply_direct
+        if reply_direct_timeout is not None:
+            self.reply_direct_timeout = reply_direct_timeout
         if logging_config is not None:
             self.logging_config = logging_config
         self.loghandlers = loghandlers if loghandlers is not None else []
@@ -526,6 +571,8 @@ class Settings(abc.ABC):
             self.stream_ack_exceptions = stream_ack_exceptions
         if stream_publish_on_commit is not None:
             self.stream_publish_on_commit = stream_publish_on_commit
+        if processing_guarantee is not None:
+            self.processing_guarantee = processing_guarantee
         if stream_recovery_delay is not None:
             self.stream_recovery_delay = stream_recovery_delay
         if producer_linger_ms is not None:
@@ -560,6 +607,12 @@ class Settings(abc.ABC):
             self.worker_redirect_stdouts = worker_redirect_stdouts
         if worker_redirect_stdouts_level is not None:
             self.worker_redirect_stdouts_level = worker_redirect_stdouts_level
+        if worker_profiling is not None:
+            self.worker_profiling = worker_profiling
+        if worker_profiling_interval is not None:
+            self.worker_profiling_interval = worker_profiling_interval
+        if worker_processes is not None:
+            self.worker_processes = worker_processes
 
         if reply_to_prefix is not None:
             self.reply_to_prefix = reply_to_prefix
@@ -569,7 +622,11 @@ class Settings(abc.ABC):
             self.reply_to = f'{self.reply_to_prefix}{uuid4()}'
         if reply_expires is not None:
             self.reply_expires = reply_expires
+        if sensor_batch_interval is not None:
+            self.sensor_batch_interval = sensor_batch_interval
 
+        self.broker_commit_policy = (
+            broker_commit_policy or COMMIT_POLICY_TYPE)
         self.agent_supervisor = agent_supervisor or AGENT_SUPERVISOR_TYPE
 
         self.Agent = Agent or AGENT_TYPE
@@ -656,6 +713,18 @@ class Settings(abc.ABC):
                 f'Version cannot be {version}, please start at 1')
         self._version = version
 
+    @property
+    def processing_guarantee(self) -> str:
+        return self._processing_guarantee
+
+    @processing_guarantee.setter
+    def processing_guarantee(self, value: str) -> None:
+        if value not in PROCESSING_GUARANTEES:
+            raise ImproperlyConfigured(
+                f'Unknown processing_guarantee: {value!r} '
+                f'(expected one of {sorted(PROCESSING_GUARANTEES)!r})')
+        self._processing_guarantee = value
+
     @property
     def broker(self) -> List[URL]:
         return self._broker
@@ -809,6 +878,30 @@ class Settings(abc.ABC):
     def reply_expires(self, reply_expires: Seconds) -> None:
         self._reply_expires = want_seconds(reply_expires)
 
+    @property
+    def reply_direct_timeout(self) -> float:
+        return self._reply_direct_timeout
+
+    @reply_direct_timeout.setter
+    def reply_direct_timeout(self, timeout: Seconds) -> None:
+        self._reply_direct_timeout = want_seconds(timeout)
+
+    @property
+    def sensor_batch_interval(self) -> float:
+        return self._sensor_batch_interval
+
+    @sensor_batch_interval.setter
+    def sensor_batch_interval(self, interval: Seconds) -> None:
+        self._sensor_batch_interval = want_seconds(interval)
+
+    @property
+    def worker_profiling_interval(self) -> float:
+        return self._worker_profiling_interval
+
+    @worker_profiling_interval.setter
+    def worker_profiling_interval(self, interval: Seconds) -> None:
+        self._worker_profiling_interval = want_seconds(interval)
+
     @property
     def stream_recovery_delay(self) -> float:
         return self._stream_recovery_delay
@@ -817,6 +910,15 @@ class Settings(abc.ABC):
     def stream_recovery_delay(self, delay: Seconds) -> None:
         self._stream_recovery_delay = want_seconds(delay)
 
+    @property
+    def broker_commit_policy(self) -> Type[CommitPolicyT]:
+        return self._broker_commit_policy
+
+    @broker_commit_policy.setter
+    def broker_commit_policy(
+            self, policy: SymbolArg[Type[CommitPolicyT]]) -> None:
+        self._broker_commit_policy = symbol_by_name(policy)
+
     @property
     def agent_supervisor(self) -> Type[SupervisorStrategyT]:
         return self._agent_supervisor
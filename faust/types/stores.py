@@ -4,8 +4,10 @@ from typing import (
     Any,
     Callable,
     Iterable,
+    Iterator,
     Optional,
     Set,
+    Tuple,
     TypeVar,
     Union,
 )
@@ -80,6 +82,10 @@ class StoreT(ServiceT, FastUserDict[KT, VT]):
     def reset_state(self) -> None:
         ...
 
+    @abc.abstractmethod
+    def scan(self, cursor: str = None) -> Iterator[Tuple[str, KT, VT]]:
+        ...
+
     @abc.abstractmethod
     async def on_rebalance(self,
                            table: CollectionT,
@@ -174,6 +174,15 @@ class StreamT(AsyncIterable[T_co], JoinableT, ServiceT):
     def enumerate(self, start: int = 0) -> AsyncIterable[Tuple[int, T_co]]:
         ...
 
+    @abc.abstractmethod
+    def filter(self,
+               fun: Callable[[T], Union[bool, Awaitable[bool]]]) -> 'StreamT':
+        ...
+
+    @abc.abstractmethod
+    def map(self, fun: Processor[T]) -> 'StreamT':
+        ...
+
     @abc.abstractmethod
     def through(self, channel: Union[str, ChannelT]) -> 'StreamT':
         ...
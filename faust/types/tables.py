@@ -77,6 +77,8 @@ class CollectionT(ServiceT, JoinableT):
     help: str
     recovery_buffer_size: int
     standby_buffer_size: int
+    version: int
+    epoch: str
 
     @abc.abstractmethod
     def __init__(self,
@@ -112,6 +114,10 @@ class CollectionT(ServiceT, JoinableT):
     def apply_changelog_batch(self, batch: Iterable[EventT]) -> None:
         ...
 
+    @abc.abstractmethod
+    def key_version(self, key: Any) -> int:
+        ...
+
     @abc.abstractmethod
     def persisted_offset(self, tp: TP) -> Optional[int]:
         ...
@@ -1,14 +1,24 @@
 import abc
 import asyncio
 import typing
-from typing import Any, Mapping, Optional, Pattern, Sequence, Set, Union
+from typing import (
+    Any,
+    Awaitable,
+    List,
+    Mapping,
+    Optional,
+    Pattern,
+    Sequence,
+    Set,
+    Union,
+)
 
 from mode import Seconds
 from mode.utils.queues import ThrowableQueue
 
 from .channels import ChannelT
 from .codecs import CodecArg
-from .tuples import TP
+from .tuples import FutureMessage, RecordMetadata, TP
 
 if typing.TYPE_CHECKING:
     from .app import AppT
@@ -120,3 +130,9 @@ class TopicT(ChannelT):
                      suffix: str = '',
                      **kwargs: Any) -> 'TopicT':
         ...
+
+    @abc.abstractmethod
+    async def publish_many(
+            self,
+            futs: Sequence[FutureMessage]) -> Awaitable[List[RecordMetadata]]:
+        ...
@@ -41,7 +41,9 @@ __all__ = [
     'PartitionsRevokedCallback',
     'PartitionsAssignedCallback',
     'PartitionerT',
+    'ProducerMessage',
     'ConsumerT',
+    'CommitPolicyT',
     'ProducerT',
     'ConductorT',
     'TransportT',
@@ -69,6 +71,14 @@ PartitionerT = Callable[
     int,
 ]
 
+#: Message sent in a batch using :meth:`ProducerT.send_many`.
+ProducerMessage = Tuple[
+    Optional[bytes],    # key
+    Optional[bytes],    # value
+    Optional[int],      # partition
+    Optional[float],    # timestamp
+]
+
 
 class ConsumerT(ServiceT):
 
@@ -79,6 +89,14 @@ class ConsumerT(ServiceT):
     #: See :setting:`broker_commit_interval`.
     commit_interval: float
 
+    #: True when offsets are committed as part of a producer transaction.
+    #: See :setting:`processing_guarantee`.
+    in_transaction: bool
+
+    #: Decides how often we commit offsets.
+    #: See :setting:`broker_commit_policy`.
+    commit_policy: 'CommitPolicyT'
+
     #: Set of topic names that are considered "randomly assigned".
     #: This means we don't crash if it's not part of our assignment.
     #: Used by e.g. the leader assignor service.
@@ -204,6 +222,34 @@ class ConsumerT(ServiceT):
         ...
 
 
+class CommitPolicyT(abc.ABC):
+
+    #: The consumer committing offsets.
+    consumer: ConsumerT
+
+    #: Current number of seconds between commits.
+    interval: float
+
+    #: Current number of acked messages that triggers a commit.
+    commit_every: Optional[int]
+
+    @abc.abstractmethod
+    def __init__(self, consumer: ConsumerT, **kwargs: Any) -> None:
+        ...
+
+    @abc.abstractmethod
+    def next_interval(self) -> float:
+        ...
+
+    @abc.abstractmethod
+    def should_commit(self, n_acked: int) -> bool:
+        ...
+
+    @abc.abstractmethod
+    def on_commit_completed(self, n_acked: int, latency: float) -> None:
+        ...
+
+
 class ProducerT(ServiceT):
 
     #: The transport that created this Producer.
@@ -219,6 +265,10 @@ class ProducerT(ServiceT):
     partitioner: Optional[PartitionerT]
     request_timeout: float
 
+    #: True when messages are sent as part of a transaction.
+    #: See :setting:`processing_guarantee`.
+    transactional: bool
+
     @abc.abstractmethod
     def __init__(self, transport: 'TransportT',
                  loop: asyncio.AbstractEventLoop = None,
@@ -239,6 +289,13 @@ class ProducerT(ServiceT):
                             timestamp: Optional[float]) -> RecordMetadata:
         ...
 
+    @abc.abstractmethod
+    async def send_many(
+            self, topic: str,
+            messages: Iterable[ProducerMessage],
+    ) -> Awaitable[List[RecordMetadata]]:
+        ...
+
     @abc.abstractmethod
     async def create_topic(self,
                            topic: str,
@@ -261,6 +318,24 @@ class ProducerT(ServiceT):
     async def flush(self) -> None:
         ...
 
+    @abc.abstractmethod
+    async def begin_transaction(self) -> None:
+        ...
+
+    @abc.abstractmethod
+    async def assign_transactions(self, tps: Set[TP]) -> None:
+        ...
+
+    @abc.abstractmethod
+    async def commit_transaction(self,
+                                 offsets: Mapping[TP, int],
+                                 group_id: str) -> None:
+        ...
+
+    @abc.abstractmethod
+    async def abort_transaction(self) -> None:
+        ...
+
 
 class ConductorT(ServiceT, MutableSet[ChannelT]):
 
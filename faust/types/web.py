@@ -1,7 +1,17 @@
 import abc
 import typing
 from pathlib import Path
-from typing import Any, Awaitable, Callable, Coroutine, Optional, Type, Union
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Coroutine,
+    Iterable,
+    Optional,
+    Tuple,
+    Type,
+    Union,
+)
 
 from aiohttp.client import ClientSession as HttpClientT
 from mode import Seconds, ServiceT
@@ -85,12 +95,15 @@ class CacheT(abc.ABC):
     timeout: Seconds
     key_prefix: str
     backend: Optional[Union[Type[CacheBackendT], str]]
+    stale_timeout: Optional[Seconds]
 
     @abc.abstractmethod
     def __init__(self,
                  timeout: Seconds = None,
                  key_prefix: str = None,
                  backend: Union[Type[CacheBackendT], str] = None,
+                 *,
+                 stale_timeout: Seconds = None,
                  **kwargs: Any) -> None:
         ...
 
@@ -98,6 +111,10 @@ class CacheT(abc.ABC):
     def view(self,
              timeout: Seconds = None,
              key_prefix: str = None,
+             *,
+             stale_timeout: Seconds = None,
+             tables: Iterable[Any] = None,
+             table_keys: Callable[..., Iterable[Tuple[Any, Any]]] = None,
              **kwargs: Any) -> Callable[[Callable], Callable]:
         ...
 
@@ -110,7 +127,9 @@ class BlueprintT(abc.ABC):
     def cache(self,
               timeout: Seconds = None,
               key_prefix: str = None,
-              backend: Union[Type[CacheBackendT], str] = None) -> CacheT:
+              backend: Union[Type[CacheBackendT], str] = None,
+              *,
+              stale_timeout: Seconds = None) -> CacheT:
         ...
 
     @abc.abstractmethod
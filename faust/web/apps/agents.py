@@ -0,0 +1,47 @@
+"""HTTP endpoint processing requests sent directly to agents."""
+from base64 import b64decode
+from typing import cast
+from faust import web
+from faust.agents import Agent
+from faust.agents.models import ReqRepResponse
+
+__all__ = ['AgentAsk', 'blueprint']
+
+blueprint = web.Blueprint('agents')
+
+
+@blueprint.route('/{name}/ask/{partition}/', name='ask')
+class AgentAsk(web.View):
+    """Process :meth:`Agent.ask() <faust.Agent.ask>` request.
+
+    Requests are only sent here when the :setting:`reply_direct`
+    setting is enabled.
+    """
+
+    async def post(self,
+                   request: web.Request,
+                   name: str,
+                   partition: str) -> web.Response:
+        app = self.app
+        if not app.conf.reply_direct:
+            raise self.NotFound('direct requests not enabled')
+        try:
+            agent = cast(Agent, app.agents[name])
+        except KeyError:
+            raise self.NotFound('unknown agent', name=name)
+        query = request.query
+        key = query.get('key')
+        timestamp = query.get('timestamp')
+        response = await agent.deliver_direct(
+            int(partition),
+            b64decode(key) if key is not None else None,
+            await request.read(),
+            correlation_id=query['correlation_id'],
+            timestamp=float(timestamp) if timestamp is not None else None,
+        )
+        # the response is never None, so neither is the payload.
+        payload = app.serializers.dumps_value(ReqRepResponse, response)
+        return self.bytes(
+            cast(bytes, payload),
+            content_type='application/json',
+        )
@@ -0,0 +1,49 @@
+"""HTTP endpoint showing results from the worker profiler."""
+from faust import web
+from faust.sensors.profiler import Profiler
+
+__all__ = ['ProfilingView', 'Stats', 'Snapshot', 'blueprint']
+
+#: Default number of seconds to sample stacks for.
+DEFAULT_SNAPSHOT_SECONDS = 5.0
+
+blueprint = web.Blueprint('profiling')
+
+
+class ProfilingView(web.View):
+    """Base class for profiler views."""
+
+    def get_profiler_or_404(self) -> Profiler:
+        if not self.app.conf.worker_profiling:
+            raise self.NotFound(
+                'profiling not enabled (start worker with --profile)')
+        return self.app.profiler
+
+
+@blueprint.route('/', name='index')
+class Stats(ProfilingView):
+    """Event loop lag and CPU time by agent."""
+
+    async def get(self, request: web.Request) -> web.Response:
+        return self.json(self.get_profiler_or_404().asdict())
+
+
+@blueprint.route('/snapshot/', name='snapshot')
+class Snapshot(ProfilingView):
+    """Sample stacks of the event loop thread.
+
+    The number of seconds to sample for is specified using
+    the ``seconds`` query parameter (default: 5 seconds).
+
+    Returns stacks in the "collapsed" format used by flame graph tools.
+    """
+
+    async def get(self, request: web.Request) -> web.Response:
+        profiler = self.get_profiler_or_404()
+        try:
+            seconds = float(
+                request.query.get('seconds', DEFAULT_SNAPSHOT_SECONDS))
+        except ValueError:
+            raise self.ValidationError('seconds must be a number')
+        stacks = await profiler.snapshot(seconds)
+        return self.text(profiler.format_snapshot(stacks))
@@ -1,14 +1,20 @@
 """HTTP endpoint showing partition routing destinations."""
-from typing import Any, Mapping
+import asyncio
+from itertools import islice
+from typing import Any, Mapping, Optional, Tuple, cast
 from faust import web
 from faust.app.router import SameNode
 from faust.models import Record
 from faust.types import K, TableT, V
+from faust.utils import json
+from faust.web.exceptions import ValidationError
 
 __all__ = [
     'TableView',
     'TableList',
     'TableDetail',
+    'TableItems',
+    'TableKeys',
     'TableKeyDetail',
     'blueprint',
 ]
@@ -58,6 +64,111 @@ class TableDetail(TableView):
         table = self.get_table_or_404(name)
         return self.json(self.table_json(table))
 
+    async def post(self, request: web.Request, name: str) -> web.Response:
+        """Get the values of a list of keys.
+
+        The response has one line for every key requested,
+        containing the JSON encoded value, or an empty line
+        if the key is not in the table.
+
+        Used by :meth:`faust.app.router.Router.route_key_req`
+        to look up many keys in one request.
+        """
+        table = self.get_table_or_404(name)
+        keys = await request.json()
+        return self.bytes(
+            b'\n'.join(self._dumps_value(table, key) for key in keys),
+            content_type='application/x-ndjson',
+        )
+
+    def _dumps_value(self, table: TableT, key: K) -> bytes:
+        try:
+            value = table[key]
+        except KeyError:
+            return b''
+        return json.dumps(value).encode()
+
+
+@blueprint.route('/{name}/-/items/', name='items')
+class TableItems(TableView):
+    """List items in table, one page at a time.
+
+    Takes the max number of items to return as the ``limit`` query
+    parameter, and the ``cursor`` returned with the previous page
+    to get the next page.  The cursor is :const:`None` for the last page.
+
+    Only items stored by this worker are included: with the
+    ``rocksdb://`` store these are the partitions it owns, while the
+    ``memory://`` store also includes the standby partitions it keeps
+    a copy of.
+    """
+
+    #: Number of items in a page when ``limit`` is not specified.
+    default_limit: int = 100
+
+    #: Max number of items in a page.
+    max_limit: int = 1000
+
+    async def get(self, request: web.Request, name: str) -> web.Response:
+        table = self.get_table_or_404(name)
+        limit = self._get_limit(request)
+        try:
+            page = list(islice(
+                table.data.scan(request.query.get('cursor')), limit + 1))
+        except ValueError:
+            raise ValidationError('invalid cursor')
+        cursor: Optional[str] = None
+        if len(page) > limit:
+            page.pop()
+            cursor = page[-1][0]
+        return self.json({
+            'items': [[key, value] for _, key, value in page],
+            'cursor': cursor,
+        })
+
+    def _get_limit(self, request: web.Request) -> int:
+        try:
+            limit = int(request.query.get('limit') or self.default_limit)
+        except ValueError:
+            raise ValidationError('invalid limit')
+        if limit < 1:
+            raise ValidationError('invalid limit')
+        return min(limit, self.max_limit)
+
+
+@blueprint.route('/{name}/-/keys/', name='keys')
+class TableKeys(TableView):
+    """Get the values of many keys.
+
+    Keys are given as one or more ``key`` query parameters, and
+    looked up on the workers owning them.  Keys missing from the
+    table are not included in the response.
+    """
+
+    async def get(self, request: web.Request, name: str) -> web.Response:
+        table = self.get_table_or_404(name)
+        query = cast(Any, request.query)  # XXX Aiohttp specific (MultiDict)
+        keys = list(dict.fromkeys(query.getall('key', [])))
+        values = await asyncio.gather(
+            *[self._get_value(table, key) for key in keys])
+        return self.json({
+            key: value for key, (found, value) in zip(keys, values)
+            if found
+        })
+
+    async def _get_value(self, table: TableT, key: str) -> Tuple[bool, Any]:
+        try:
+            response = await self.app.router.route_key_req(
+                table.name, key, self.web)
+        except SameNode:
+            try:
+                return True, table[key]
+            except KeyError:
+                return False, None
+        except KeyError:
+            return False, None
+        return True, json.loads(response.body.decode())
+
 
 @blueprint.route('/{name}/{key}/', name='key-detail')
 class TableKeyDetail(TableView):
@@ -72,8 +183,10 @@ class TableKeyDetail(TableView):
                   key: str) -> web.Response:
         router = self.app.router
         try:
-            return await router.route_req(name, key, self.web, request)
+            return await router.route_key_req(name, key, self.web)
         except SameNode:
             table = self.get_table_or_404(name)
             value = self.get_table_value_or_404(table, key)
             return self.json(value)
+        except KeyError:
+            raise self.NotFound(f'key not found', key=key, table=name)
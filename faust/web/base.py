@@ -41,7 +41,9 @@ DEFAULT_BLUEPRINTS: _BPList = [
     ('/graph', 'faust.web.apps.graph:blueprint'),
     ('', 'faust.web.apps.stats:blueprint'),
     ('/router', 'faust.web.apps.router:blueprint'),
+    ('/profiling', 'faust.web.apps.profiling:blueprint'),
     ('/table', 'faust.web.apps.tables.blueprint'),
+    ('/agents', 'faust.web.apps.agents:blueprint'),
 ]
 
 CONTENT_SEPARATOR: bytes = b'\r\n\r\n'
@@ -50,6 +50,34 @@ The blueprint is registered with a prefix, so the URL for the
 is ``/user/{user_id}/``.
 
 Blueprints can be registered to multiple apps at the same time.
+
+Expensive views can keep serving the expired response while it is
+being refreshed in the background, by setting ``stale_timeout``
+to the number of seconds an expired response can still be used:
+
+.. sourcecode:: python
+
+    cache = blueprint.cache(timeout=10.0, stale_timeout=60.0)
+
+Views reading from tables can instead be cached until the data
+they depend on changes:
+
+.. sourcecode:: python
+
+    @blueprint.route('/{user_id}/', name='detail')
+    class UserDetailView(web.View):
+
+        @cache.view(
+            timeout=3600.0,
+            table_keys=lambda view, request, user_id: [('users', user_id)],
+        )
+        async def get(self,
+                      request: web.Request,
+                      user_id: str) -> web.Response:
+            return self.json(users[user_id])
+
+Using ``tables=['users']`` instead, the response depends on the
+whole table.
 """
 import typing
 from pathlib import Path
@@ -109,10 +137,13 @@ class Blueprint(BlueprintT):
     def cache(self,
               timeout: Seconds = None,
               key_prefix: str = None,
-              backend: Union[Type[CacheBackendT], str] = None) -> CacheT:
+              backend: Union[Type[CacheBackendT], str] = None,
+              *,
+              stale_timeout: Seconds = None) -> CacheT:
         if key_prefix is None:
             key_prefix = self.name
-        return Cache(timeout, key_prefix, backend)
+        return Cache(timeout, key_prefix, backend,
+                     stale_timeout=stale_timeout)
 
     def route(self,
               uri: str,
@@ -1,9 +1,25 @@
 import sys
 import time
+from collections import Counter, OrderedDict
 from contextlib import suppress
-from typing import Callable, Dict, Generic, Optional, TypeVar
-
+from itertools import islice
+from typing import (
+    Any,
+    Callable,
+    Counter as CounterT,
+    Dict,
+    Generic,
+    Optional,
+    TypeVar,
+    Union,
+)
+
+from mode import Service
 from mode.utils.compat import want_bytes
+from yarl import URL
+
+from faust.exceptions import ImproperlyConfigured
+from faust.types import AppT
 
 from . import base
 
@@ -16,11 +32,47 @@ if sys.platform == 'win32':
 else:
     TIME_MONOTONIC = time.monotonic
 
+#: Evict the least recently used key first.
+EVICT_LRU = 'lru'
 
-class CacheStorage(Generic[KT, VT]):
+#: Evict the least frequently used key first.
+EVICT_LFU = 'lfu'
 
-    def __init__(self) -> None:
-        self._data: Dict[KT, VT] = {}
+EVICTION_POLICIES = {EVICT_LRU, EVICT_LFU}
+
+
+class CacheStorage(Generic[KT, VT]):
+    """In-memory key/value storage with expiry.
+
+    Arguments:
+        max_size: Max total size of keys and values stored (in bytes,
+            as reported by :func:`sys.getsizeof`).  When exceeded,
+            keys are evicted according to ``eviction``.
+            Unlimited by default.
+        eviction: Key eviction policy: ``"lru"`` to evict the least
+            recently used key, or ``"lfu"`` to evict the least frequently
+            used key among the :attr:`eviction_sample` least
+            recently used keys.
+    """
+
+    #: Number of least recently used keys considered when
+    #: evicting with the ``lfu`` policy.
+    eviction_sample: int = 8
+
+    #: Total size of keys and values stored.
+    size: int = 0
+
+    def __init__(self,
+                 max_size: int = None,
+                 eviction: str = EVICT_LRU) -> None:
+        if eviction not in EVICTION_POLICIES:
+            raise ImproperlyConfigured(
+                f'Unknown cache eviction policy: {eviction!r}')
+        self.max_size = max_size
+        self.eviction = eviction
+        self._data: Dict[KT, VT] = OrderedDict()
+        self._sizes: Dict[KT, int] = {}
+        self._hits: CounterT[KT] = Counter()
         self._time_index: Dict[KT, float] = {}
         self._expires: Dict[KT, float] = {}
 
@@ -34,7 +86,11 @@ class CacheStorage(Generic[KT, VT]):
             self._time_index[key] = now
 
         with suppress(KeyError):
-            return self._data[key]
+            value = self._data[key]
+            self._data.move_to_end(key)  # type: ignore
+            if self.eviction == EVICT_LFU:
+                self._hits[key] += 1
+            return value
 
     def last_set_ttl(self, key: KT) -> Optional[float]:
         return self._expires.get(key)
@@ -43,7 +99,13 @@ class CacheStorage(Generic[KT, VT]):
         self._time_index[key] -= self._expires[key]
 
     def set(self, key: KT, value: VT) -> None:
+        size = sys.getsizeof(key) + sys.getsizeof(value)
+        self.size += size - self._sizes.get(key, 0)
+        self._sizes[key] = size
         self._data[key] = value
+        self._data.move_to_end(key)  # type: ignore
+        if self.max_size is not None and self.size > self.max_size:
+            self._evict(self.max_size)
 
     def setex(self, key: KT, timeout: float, value: VT) -> None:
         self._expires[key] = timeout
@@ -61,18 +123,95 @@ class CacheStorage(Generic[KT, VT]):
         self._expires.pop(key, None)
         self._data.pop(key, None)  # type: ignore
         self._time_index.pop(key, None)
+        self._hits.pop(key, None)
+        self.size -= self._sizes.pop(key, 0)
 
     def clear(self) -> None:
         self._expires.clear()
         self._data.clear()
+        self._sizes.clear()
+        self._hits.clear()
         self._time_index.clear()
+        self.size = 0
+
+    def sweep(self) -> int:
+        """Delete all expired keys, and return the number deleted."""
+        now = TIME_MONOTONIC()
+        time_index = self._time_index
+        expired = [
+            key for key, expires in self._expires.items()
+            if now - time_index[key] > expires
+        ]
+        for key in expired:
+            self.delete(key)
+        return len(expired)
+
+    def _evict(self, max_size: int) -> None:
+        # keys are ordered from least to most recently used,
+        # and the key just set is only evicted when it's the last one.
+        while self._data and self.size > max_size:
+            if self.eviction == EVICT_LFU and len(self._data) > 1:
+                key = min(
+                    islice(self._data, min(self.eviction_sample,
+                                           len(self._data) - 1)),
+                    key=self._hits.__getitem__,
+                )
+            else:
+                key = next(iter(self._data))
+            self.delete(key)
+
+    def __len__(self) -> int:
+        return len(self._data)
 
 
 class CacheBackend(base.CacheBackend):
+    """In-memory cache backend.
+
+    The size of the cache can be limited using the ``max_size``
+    argument, or URL query parameter (e.g. ``memory://?max_size=1048576``),
+    see :class:`CacheStorage`.
+
+    Expired keys are deleted when read, and every ``sweep_interval``
+    seconds.
+    """
+
+    #: Delete expired keys every n seconds.
+    sweep_interval: float = 60.0
+
+    def __init__(self,
+                 app: AppT,
+                 url: Union[URL, str] = 'memory://',
+                 *,
+                 max_size: int = None,
+                 eviction: str = None,
+                 sweep_interval: float = None,
+                 **kwargs: Any) -> None:
+        url = URL(url)
+        query = url.query
+        if max_size is None and query.get('max_size'):
+            max_size = int(query['max_size'])
+        if eviction is None:
+            eviction = query.get('eviction') or EVICT_LRU
+        if sweep_interval is None and query.get('sweep_interval'):
+            sweep_interval = float(query['sweep_interval'])
+        if sweep_interval is not None:
+            self.sweep_interval = sweep_interval
+        self.max_size = max_size
+        self.eviction = eviction
+        super().__init__(app, url, **kwargs)
 
     def on_init(self) -> None:
         # we reuse this in t/conftest to mock a Redis server :D
-        self.storage: CacheStorage[str, bytes] = CacheStorage()
+        self.storage: CacheStorage[str, bytes] = CacheStorage(
+            max_size=self.max_size,
+            eviction=self.eviction,
+        )
+
+    @Service.task
+    async def _sweep_expired(self) -> None:
+        while not self.should_stop:
+            await self.sleep(self.sweep_interval)
+            self.storage.sweep()
 
     async def _get(self, key: str) -> Optional[bytes]:
         return self.storage.get(key)
@@ -1,12 +1,28 @@
+import asyncio
 import hashlib
 from contextlib import suppress
 from functools import wraps
-from typing import Any, Callable, ClassVar, List, Optional, Type, Union, cast
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    ClassVar,
+    Iterable,
+    List,
+    MutableMapping,
+    Optional,
+    Tuple,
+    Type,
+    Union,
+    cast,
+)
 from urllib.parse import quote
 
 from mode.utils.times import Seconds, want_seconds
 from mode.utils.logging import get_logger
 
+from faust.exceptions import ImproperlyConfigured
+from faust.types.tables import CollectionT
 from faust.types.web import (
     CacheBackendT,
     CacheT,
@@ -19,61 +35,175 @@ logger = get_logger(__name__)
 
 IDENT: str = 'faustweb.cache.view'
 
+RefreshFun = Callable[[], Awaitable[Response]]
+TableKeysFun = Callable[..., Iterable[Tuple[Union[CollectionT, str], Any]]]
+
 
 class Cache(CacheT):
+    """Cache for views.
+
+    Concurrent requests missing the cache for the same key are
+    coalesced, so that the view is only called once and every request
+    is served the same response.
+
+    If ``stale_timeout`` is set, responses are kept for that many
+    seconds after they expire, and an expired response is still served
+    while the view is called in the background to refresh it
+    (stale-while-revalidate).  This requires responses to be cached
+    with a timeout.
+
+    Views reading table data can list the ``tables`` they depend on,
+    or set ``table_keys`` to a function returning the
+    ``(table, key)`` pairs read by a request, so that cached responses
+    are no longer used after the data in the table changes.
+    The function is called with the same arguments as the view.
+    """
+
     ident: ClassVar[str] = IDENT
 
+    #: Suffix of the key marking a cached response as fresh,
+    #: used when ``stale_timeout`` is set.
+    fresh_suffix: ClassVar[str] = '.fresh'
+
+    _pending: MutableMapping[str, asyncio.Future]
+
     def __init__(self,
                  timeout: Seconds = None,
                  key_prefix: str = None,
                  backend: Union[Type[CacheBackendT], str] = None,
+                 *,
+                 stale_timeout: Seconds = None,
                  **kwargs: Any) -> None:
         self.timeout = timeout
         self.key_prefix = key_prefix or ''
         self.backend = backend
+        self.stale_timeout = stale_timeout
+        self._pending = {}
 
     def view(self,
              timeout: Seconds = None,
              key_prefix: str = None,
+             *,
+             stale_timeout: Seconds = None,
+             tables: Iterable[Union[CollectionT, str]] = None,
+             table_keys: TableKeysFun = None,
              **kwargs: Any) -> Callable[[Callable], Callable]:
+        if stale_timeout is None:
+            stale_timeout = self.stale_timeout
+        if (stale_timeout is not None and
+                timeout is None and self.timeout is None):
+            raise ImproperlyConfigured(
+                'Cache stale_timeout requires a timeout')
 
         def _inner(fun: Callable) -> Callable:
 
             @wraps(fun)
             async def cached(view: View, request: Request,
                              *args: Any, **kwargs: Any) -> Response:
-                key: Optional[str] = None
+                if not self.can_cache_request(request):
+                    return await fun(view, request, *args, **kwargs)
                 is_head = request.method.upper() == 'HEAD'
-                if self.can_cache_request(request):
-                    key = self.key_for_request(request, key_prefix, 'GET')
+                context = self._table_versions(
+                    view, tables, table_keys, request, *args, **kwargs)
+                key = self.key_for_request(
+                    request, key_prefix, 'GET', context=context)
+                save_key = key
+                if is_head:
+                    save_key = self.key_for_request(
+                        request, key_prefix, 'HEAD', context=context)
 
+                async def refresh() -> Response:
+                    res = await fun(view, request, *args, **kwargs)
+                    if self.can_cache_response(request, res):
+                        logger.info('Saving cache for key %r', save_key)
+                        await self.set_view(
+                            save_key, view, res, timeout,
+                            stale_timeout=stale_timeout)
+                    return res
+
+                response = await self.get_view(key, view)
+                if response is None and is_head:
+                    key = save_key
                     response = await self.get_view(key, view)
-                    if response is not None:
-                        logger.info('Found cached response for %r', key)
-                        return response
-                    if is_head:
-                        response = await self.get_view(
-                            self.key_for_request(request, key_prefix, 'HEAD'),
-                            view,
-                        )
-                        if response is not None:
-                            logger.info(
-                                'Found cached HEAD response for %r', key)
-                            return response
+                if response is not None:
+                    logger.info('Found cached response for %r', key)
+                    if (stale_timeout is not None and key == save_key and
+                            key not in self._pending and
+                            not await self.is_fresh(key, view)):
+                        logger.info('Refreshing stale cache for %r', key)
+                        view.app.add_future(
+                            self._refresh_stale(key, view, refresh))
+                    return response
 
                 logger.info('No cache found for %r', key)
-                res = await fun(view, request, *args, **kwargs)
-
-                if key is not None and self.can_cache_response(request, res):
-                    logger.info('Saving cache for key %r', key)
-                    if is_head:
-                        key = self.key_for_request(
-                            request, key_prefix, 'HEAD')
-                    await self.set_view(key, view, res, timeout)
-                return res
+                return await self._coalesce(save_key, view, refresh)
             return cached
         return _inner
 
+    def _table_versions(self,
+                        view: View,
+                        tables: Optional[Iterable[Union[CollectionT, str]]],
+                        table_keys: Optional[TableKeysFun],
+                        *args: Any, **kwargs: Any) -> List[str]:
+        # The version of every table and key read by the view is part
+        # of the cache key, so changes to them makes the key change.
+        # Versions are counted by each process (and key versions
+        # depend on the randomized hash of the key), so the epoch
+        # of the table is included to never share these entries
+        # between processes using the same cache backend.
+        versions: List[str] = []
+        if tables:
+            for table in tables:
+                table = self._get_table(view, table)
+                versions.append(
+                    f'{table.name}:{table.epoch}:{table.version}')
+        if table_keys is not None:
+            for table, table_key in table_keys(view, *args, **kwargs):
+                table = self._get_table(view, table)
+                versions.append(
+                    f'{table.name}:{table.epoch}:'
+                    f'{table.key_version(table_key)}')
+        return versions
+
+    def _get_table(self,
+                   view: View,
+                   table: Union[CollectionT, str]) -> CollectionT:
+        if isinstance(table, str):
+            return view.app.tables[table]
+        return table
+
+    async def _coalesce(self,
+                        key: str,
+                        view: View,
+                        refresh: RefreshFun) -> Response:
+        pending = self._pending.get(key)
+        if pending is not None:
+            # another request is already calling the view for this key,
+            # so wait for it and serve the same response.
+            payload = await asyncio.shield(pending)
+            if payload is not None:
+                return view.bytes_to_response(payload)
+            # the view raised an exception: call it again.
+            return await refresh()
+        fut = self._pending[key] = view.app.loop.create_future()
+        payload = None
+        try:
+            response = await refresh()
+            payload = view.response_to_bytes(response)
+            return response
+        finally:
+            del self._pending[key]
+            fut.set_result(payload)
+
+    async def _refresh_stale(self,
+                             key: str,
+                             view: View,
+                             refresh: RefreshFun) -> None:
+        try:
+            await self._coalesce(key, view, refresh)
+        except Exception as exc:
+            logger.exception('Cannot refresh stale cache for %r: %r', key, exc)
+
     async def get_view(self,
                        key: str, view: View) -> Optional[Response]:
         backend = self._view_backend(view)
@@ -83,6 +213,13 @@ class Cache(CacheT):
                 return view.bytes_to_response(payload)
         return None
 
+    async def is_fresh(self, key: str, view: View) -> bool:
+        """Return :const:`True` if the response cached is not stale."""
+        backend = self._view_backend(view)
+        with suppress(backend.Unavailable):
+            return await backend.get(key + self.fresh_suffix) is not None
+        return True
+
     def _view_backend(self, view: View) -> CacheBackendT:
         return cast(CacheBackendT, self.backend or view.app.cache)
 
@@ -90,13 +227,20 @@ class Cache(CacheT):
                        key: str,
                        view: View,
                        response: Response,
-                       timeout: Seconds) -> None:
+                       timeout: Seconds,
+                       *,
+                       stale_timeout: Seconds = None) -> None:
         backend = self._view_backend(view)
+        timeout = want_seconds(
+            timeout if timeout is not None else self.timeout)
         with suppress(backend.Unavailable):
+            if stale_timeout is not None:
+                await backend.set(key + self.fresh_suffix, b'1', timeout)
+                timeout += want_seconds(stale_timeout)
             return await backend.set(
                 key,
                 view.response_to_bytes(response),
-                want_seconds(timeout if timeout is not None else self.timeout),
+                timeout,
             )
 
     def can_cache_request(self, request: Request) -> bool:
@@ -110,11 +254,13 @@ class Cache(CacheT):
     def key_for_request(self,
                         request: Request,
                         prefix: str = None,
-                        method: str = None) -> str:
+                        method: str = None,
+                        *,
+                        context: List[str] = None) -> str:
         actual_method: str = request.method if method is None else method
         if prefix is None:
             prefix = self.key_prefix
-        return self.build_key(request, actual_method, prefix, [])
+        return self.build_key(request, actual_method, prefix, context or [])
 
     def build_key(self,
                   request: Request,
@@ -8,15 +8,31 @@ See Also:
 import asyncio
 import logging
 import os
+import signal
+import subprocess
 import sys
 from collections import defaultdict
 from itertools import chain
 from pathlib import Path
-from typing import Any, Dict, IO, Iterable, Mapping, Optional, Set, Union
+from time import monotonic, sleep
+from typing import (
+    Any,
+    Dict,
+    IO,
+    Iterable,
+    List,
+    Mapping,
+    MutableMapping,
+    NoReturn,
+    Optional,
+    Sequence,
+    Set,
+    Union,
+)
 
 import mode
 from mode import ServiceT, get_logger
-from mode.utils.logging import formatter
+from mode.utils.logging import formatter, setup_logging
 
 from .types import AppT, SensorT, TP, TopicT
 from .types._env import BLOCKING_TIMEOUT, CONSOLE_PORT, DEBUG
@@ -28,7 +44,7 @@ try:  # pragma: no cover
 except ImportError:  # pragma: no cover
     def setproctitle(title: str) -> None: ...  # noqa
 
-__all__ = ['Worker']
+__all__ = ['Worker', 'ProcessSupervisor']
 
 #: Name prefix of process in ps/top listings.
 PSIDENT = '[Faust:Worker]'
@@ -282,3 +298,171 @@ class Worker(mode.Worker):
             logger.addHandler(
                 terminal.SpinnerHandler(self.spinner, level=logging.DEBUG))
             logger.setLevel(logging.DEBUG)
+
+
+class ProcessSupervisor:
+    """Start and supervise a number of worker child processes.
+
+    Used by :program:`faust worker --processes` to use more than
+    one CPU core on a host: every child process runs the same command
+    again, starting a separate :class:`Worker` with its own event loop.
+    The children join the same consumer group, so the assigned partitions
+    are divided between them by the partition assignor.
+
+    The :envvar:`FAUST_WORKER_PROCESS` environment variable is set to the
+    index of the child process (``0 <= index < processes``), so the child
+    can configure itself (see :setting:`worker_processes`).
+
+    Child processes that crash are restarted, and stopping the
+    supervisor (:sig:`SIGTERM`/:sig:`SIGINT`) stops all of them.
+    The delay before restarting a child doubles every time it crashes
+    again shortly after starting (e.g. an error at startup), and if it
+    crashes :attr:`max_restarts` times in a row the supervisor stops
+    all child processes and exits with an error.
+
+    Note:
+        The children are not forked from the supervisor, as the app
+        has already created objects bound to the event loop of this
+        process.
+
+    Arguments:
+        processes: Number of child processes to start.
+        argv: Command used to start a child process.
+            Default is to run the current program again
+            (see :meth:`current_argv`).
+        loglevel (Union[str, int]): Level to use for logging.
+        logfile (Union[str, IO]): Name of file or a stream to log to.
+    """
+
+    #: Seconds to wait before restarting a child process that crashed.
+    restart_delay: float = 1.0
+
+    #: Max seconds to wait before restarting a child process,
+    #: as the delay doubles every time it crashes in a row.
+    max_restart_delay: float = 60.0
+
+    #: Child processes running for this long (in seconds) before
+    #: crashing are restarted after :attr:`restart_delay` again.
+    restart_reset_after: float = 60.0
+
+    #: Give up when a child process crashes this many times in a row
+    #: (:const:`None` to restart forever).
+    max_restarts: Optional[int] = 10
+
+    #: Exit status of the supervisor: set when giving up restarting.
+    exitcode: int = os.EX_OK
+
+    #: How often we check if child processes exited (in seconds).
+    poll_interval: float = 0.5
+
+    #: Child processes by index.
+    children: MutableMapping[int, subprocess.Popen]
+
+    _shutdown: bool = False
+
+    def __init__(self,
+                 processes: int,
+                 *,
+                 argv: Sequence[str] = None,
+                 loglevel: Union[str, int] = None,
+                 logfile: Union[str, IO] = None) -> None:
+        self.processes = processes
+        self.argv = list(argv or self.current_argv())
+        self.loglevel = loglevel
+        self.logfile = logfile
+        self.children = {}
+        self._started_at: Dict[int, float] = {}
+        self._crashes: Dict[int, int] = {}
+
+    @staticmethod
+    def current_argv() -> List[str]:
+        """Return command-line used to start the current program."""
+        spec = getattr(sys.modules['__main__'], '__spec__', None)
+        if spec is not None and spec.name:
+            # started using python -m package
+            name = spec.name
+            if name.endswith('.__main__'):
+                name = name[:-len('.__main__')]
+            return [sys.executable, '-m', name] + sys.argv[1:]
+        return [sys.executable] + sys.argv
+
+    def execute_from_commandline(self) -> NoReturn:
+        setup_logging(loglevel=self.loglevel, logfile=self.logfile)
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            signal.signal(sig, self._on_signal)
+        for index in range(self.processes):
+            self.start_child(index)
+        self.run()
+        raise SystemExit(self.exitcode)
+
+    def start_child(self, index: int) -> subprocess.Popen:
+        process = self.children[index] = subprocess.Popen(
+            self.argv,
+            env={**os.environ, 'FAUST_WORKER_PROCESS': str(index)},
+        )
+        self._started_at[index] = monotonic()
+        logger.info('Started worker process #%r (pid %r)',
+                    index, process.pid)
+        return process
+
+    def run(self) -> None:
+        """Wait for child processes to exit, restarting those that crash."""
+        restarts: Dict[int, float] = {}
+        while self.children or restarts:
+            sleep(self.poll_interval)
+            for index, process in list(self.children.items()):
+                exitcode = process.poll()
+                if exitcode is None:
+                    continue
+                del self.children[index]
+                if exitcode and not self._shutdown:
+                    delay = self._restart_delay_for(index)
+                    if delay is None:
+                        logger.error(
+                            'Worker process #%r (pid %r) exited with %r: '
+                            'crashed %r times in a row, giving up',
+                            index, process.pid, exitcode,
+                            self._crashes[index])
+                        # negative exit code means killed by signal.
+                        self.exitcode = (
+                            exitcode if exitcode > 0 else os.EX_SOFTWARE)
+                        self.stop()
+                        continue
+                    logger.warning(
+                        'Worker process #%r (pid %r) exited with %r: '
+                        'restarting in %rs',
+                        index, process.pid, exitcode, delay)
+                    restarts[index] = monotonic() + delay
+                elif exitcode:
+                    logger.info('Worker process #%r (pid %r) exited with %r',
+                                index, process.pid, exitcode)
+            now = monotonic()
+            for index, restart_at in list(restarts.items()):
+                if self._shutdown:
+                    del restarts[index]
+                elif restart_at <= now:
+                    del restarts[index]
+                    self.start_child(index)
+
+    def _restart_delay_for(self, index: int) -> Optional[float]:
+        # Returns seconds to wait before restarting crashed child,
+        # or None if it crashed too many times in a row.
+        started_at = self._started_at.get(index)
+        if (started_at is not None and
+                monotonic() - started_at >= self.restart_reset_after):
+            self._crashes[index] = 0
+        crashes = self._crashes[index] = self._crashes.get(index, 0) + 1
+        if self.max_restarts is not None and crashes > self.max_restarts:
+            return None
+        return min(self.restart_delay * 2 ** (crashes - 1),
+                   self.max_restart_delay)
+
+    def stop(self) -> None:
+        """Stop all child processes."""
+        self._shutdown = True
+        for process in self.children.values():
+            if process.poll() is None:
+                process.terminate()
+
+    def _on_signal(self, signum: int, frame: Any) -> None:
+        self.stop()
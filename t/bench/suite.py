@@ -0,0 +1,440 @@
+"""Benchmark suite running on the in-memory transport.
+
+This does not need a Kafka cluster, so the results only depend
+on the machine and the version of Faust and its dependencies,
+which makes it useful for comparing the effect of changes
+between commits.
+
+Usage::
+
+    # run all benchmarks
+    $ python t/bench/suite.py
+
+    # run some of them, with 50k messages
+    $ python t/bench/suite.py -n 50000 stream table
+
+    # write results as JSON, then compare with them later
+    $ python t/bench/suite.py --json before.json
+    $ git checkout feature
+    $ python t/bench/suite.py --compare before.json
+"""
+import asyncio
+import gc
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+from datetime import datetime
+from time import monotonic
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Iterable,
+    List,
+    Mapping,
+    MutableMapping,
+    NamedTuple,
+    Optional,
+    Tuple,
+)
+
+import click
+
+sys.path.insert(0, '.')
+
+import faust  # noqa
+from faust.sensors.histogram import Histogram  # noqa
+from faust.serializers import codecs  # noqa
+from faust.stores import rocksdb  # noqa
+from faust.utils import terminal  # noqa
+
+#: Default number of messages sent by every benchmark.
+DEFAULT_MESSAGES = 10_000
+
+#: Max number of seconds a single benchmark can run for.
+TIMEOUT = 300.0
+
+#: Number of messages sent before letting the consumer run.
+SEND_BATCH = 1000
+
+#: Number of distinct keys in generated messages.
+KEYS = 100
+
+BenchmarkFun = Callable[[int], Awaitable[List['Result']]]
+
+BENCHMARKS: MutableMapping[str, Tuple[BenchmarkFun, float]] = {}
+
+#: Data directories of apps created by the current run.
+DATADIRS: List[str] = []
+
+
+class Withdrawal(faust.Record, serializer='json'):
+    user: str
+    country: str
+    amount: float
+
+
+class Result(NamedTuple):
+    name: str
+    n: int
+    seconds: float
+    latency: Optional[Histogram] = None
+    skipped: Optional[str] = None
+
+    @property
+    def ops_s(self) -> float:
+        return self.n / self.seconds if self.seconds else 0.0
+
+    def asdict(self) -> Mapping[str, Any]:
+        if self.skipped:
+            return {'name': self.name, 'skipped': self.skipped}
+        return {
+            'name': self.name,
+            'n': self.n,
+            'seconds': self.seconds,
+            'ops_s': self.ops_s,
+            'latency': self.latency.asdict() if self.latency else None,
+        }
+
+
+class Countdown:
+    """Event set after :meth:`tick` is called ``n`` times."""
+
+    def __init__(self, n: int) -> None:
+        self.remaining = n
+        self.done = asyncio.Event()
+
+    def tick(self) -> None:
+        self.remaining -= 1
+        if self.remaining <= 0:
+            self.done.set()
+
+
+def benchmark(name: str, *, scale: float = 1.0) -> Callable:
+    """Register benchmark.
+
+    Arguments:
+        name: Name of benchmark.
+        scale: Fraction of ``--messages`` used by this benchmark,
+            for benchmarks much slower than the others.
+    """
+    def _inner(fun: BenchmarkFun) -> BenchmarkFun:
+        BENCHMARKS[name] = (fun, scale)
+        return fun
+    return _inner
+
+
+def create_app(name: str, **kwargs: Any) -> faust.App:
+    # data directories are removed by run() when benchmarks complete.
+    datadir = tempfile.mkdtemp(prefix='faust-bench-')
+    DATADIRS.append(datadir)
+    kwargs.setdefault('store', 'memory://')
+    return faust.App(
+        f'bench-{name}',
+        broker='memory://',
+        web_enabled=False,
+        datadir=datadir,
+        **kwargs)
+
+
+def withdrawals(n: int) -> Iterable[Tuple[str, Withdrawal]]:
+    countries = ['US', 'UK', 'DE', 'NO', 'JP']
+    for i in range(n):
+        user = f'user-{i % KEYS}'
+        yield user, Withdrawal(
+            user=user,
+            country=countries[i % len(countries)],
+            amount=float(i % 1000),
+        )
+
+
+async def produce_and_wait(app: faust.App,
+                           topic: faust.TopicT,
+                           countdown: Countdown,
+                           values: Iterable[Tuple[Any, Any]]) -> float:
+    """Send values to topic and return time until all were processed."""
+    await app.start()
+    try:
+        time_start = monotonic()
+        for i, (key, value) in enumerate(values):
+            await topic.send(key=key, value=value)
+            if not i % SEND_BATCH:
+                # let the consumer run
+                await asyncio.sleep(0)
+        await asyncio.wait_for(countdown.done.wait(), timeout=TIMEOUT)
+        return monotonic() - time_start
+    finally:
+        await app.stop()
+
+
+@benchmark('stream')
+async def bench_stream(n: int) -> List[Result]:
+    """Agent iterating over raw messages."""
+    app = create_app('stream')
+    topic = app.topic('bench-stream', value_serializer='raw')
+    countdown = Countdown(n)
+
+    @app.agent(topic)
+    async def process(stream: faust.StreamT) -> None:
+        async for value in stream:
+            countdown.tick()
+
+    values = ((None, str(i).encode()) for i in range(n))
+    return [Result('stream', n,
+                   await produce_and_wait(app, topic, countdown, values))]
+
+
+@benchmark('stream_models')
+async def bench_stream_models(n: int) -> List[Result]:
+    """Agent iterating over deserialized records."""
+    app = create_app('stream_models')
+    topic = app.topic('bench-stream-models', value_type=Withdrawal)
+    countdown = Countdown(n)
+
+    @app.agent(topic)
+    async def process(stream: faust.StreamT[Withdrawal]) -> None:
+        async for withdrawal in stream:
+            countdown.tick()
+
+    return [Result('stream_models', n,
+                   await produce_and_wait(
+                       app, topic, countdown, withdrawals(n)))]
+
+
+@benchmark('group_by')
+async def bench_group_by(n: int) -> List[Result]:
+    """Agent repartitioning stream using group_by."""
+    app = create_app('group_by')
+    topic = app.topic('bench-group-by', value_type=Withdrawal)
+    countdown = Countdown(n)
+
+    @app.agent(topic)
+    async def process(stream: faust.StreamT[Withdrawal]) -> None:
+        grouped = stream.group_by(Withdrawal.country, name='by-country')
+        async for withdrawal in grouped:
+            countdown.tick()
+
+    return [Result('group_by', n,
+                   await produce_and_wait(
+                       app, topic, countdown, withdrawals(n)))]
+
+
+async def _bench_table(name: str, n: int, **kwargs: Any) -> List[Result]:
+    app = create_app(name, **kwargs)
+    topic = app.topic(f'bench-{name}', value_type=Withdrawal)
+    table = app.Table(f'bench-{name}', default=float)
+    countdown = Countdown(n)
+
+    @app.agent(topic)
+    async def process(stream: faust.StreamT[Withdrawal]) -> None:
+        async for withdrawal in stream:
+            table[withdrawal.user] += withdrawal.amount
+            countdown.tick()
+
+    return [Result(name, n,
+                   await produce_and_wait(
+                       app, topic, countdown, withdrawals(n)))]
+
+
+@benchmark('table')
+async def bench_table(n: int) -> List[Result]:
+    """Agent updating table (in-memory store)."""
+    return await _bench_table('table', n)
+
+
+@benchmark('table_rocksdb')
+async def bench_table_rocksdb(n: int) -> List[Result]:
+    """Agent updating table (RocksDB store)."""
+    if rocksdb.rocksdb is None:
+        return [Result('table_rocksdb', n, 0.0,
+                       skipped='python-rocksdb not installed')]
+    return await _bench_table('table_rocksdb', n, store='rocksdb://')
+
+
+@benchmark('windowed')
+async def bench_windowed(n: int) -> List[Result]:
+    """Agent updating tumbling windowed table."""
+    app = create_app('windowed')
+    topic = app.topic('bench-windowed', value_type=Withdrawal)
+    table = app.Table('bench-windowed', default=float).tumbling(
+        10.0, expires=60.0).relative_to_stream()
+    countdown = Countdown(n)
+
+    @app.agent(topic)
+    async def process(stream: faust.StreamT[Withdrawal]) -> None:
+        async for withdrawal in stream:
+            table[withdrawal.user] += withdrawal.amount
+            countdown.tick()
+
+    return [Result('windowed', n,
+                   await produce_and_wait(
+                       app, topic, countdown, withdrawals(n)))]
+
+
+@benchmark('ask', scale=0.1)
+async def bench_ask(n: int) -> List[Result]:
+    """Request/reply round-trips using Agent.ask."""
+    app = create_app('ask', reply_create_topic=True)
+    latency = Histogram()
+
+    @app.agent()
+    async def echo(stream: faust.StreamT) -> None:
+        async for value in stream:
+            yield value
+
+    await app.start()
+    try:
+        time_start = monotonic()
+        for i in range(n):
+            time_ask = monotonic()
+            await asyncio.wait_for(echo.ask(i), timeout=TIMEOUT)
+            latency.record(monotonic() - time_ask)
+        return [Result('ask', n, monotonic() - time_start, latency)]
+    finally:
+        await app.stop()
+
+
+@benchmark('serializers')
+async def bench_serializers(n: int) -> List[Result]:
+    """Serializing and deserializing records."""
+    values = [withdrawal for _, withdrawal in withdrawals(n)]
+    results = []
+    for serializer in ['json', 'pickle']:
+        time_start = monotonic()
+        for value in values:
+            Withdrawal.from_data(codecs.loads(
+                serializer,
+                codecs.dumps(serializer, value.to_representation()),
+            ))
+        results.append(Result(
+            f'serializers.{serializer}', n, monotonic() - time_start))
+    return results
+
+
+def environment() -> Mapping[str, Any]:
+    return {
+        'faust': faust.__version__,
+        'python': (f'{platform.python_implementation()} '
+                   f'{platform.python_version()}'),
+        'platform': platform.platform(),
+        'commit': _git_commit(),
+        'date': datetime.utcnow().isoformat(),
+    }
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', 'HEAD'],
+            stderr=subprocess.DEVNULL,
+        ).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def run(names: Iterable[str],
+              messages: int,
+              repeat: int = 1) -> List[Result]:
+    # Every benchmark is run ``repeat`` times, and we keep the fastest
+    # run, as that is the least affected by other activity on the machine.
+    best: MutableMapping[str, Result] = {}
+    try:
+        for name in names:
+            fun, scale = BENCHMARKS[name]
+            for _ in range(repeat):
+                gc.collect()
+                for result in await fun(max(int(messages * scale), 1)):
+                    prev = best.get(result.name)
+                    if prev is None or result.seconds < prev.seconds:
+                        best[result.name] = result
+    finally:
+        while DATADIRS:
+            shutil.rmtree(DATADIRS.pop(), ignore_errors=True)
+    return list(best.values())
+
+
+def format_results(results: Iterable[Result],
+                   previous: Mapping[str, Mapping] = None) -> str:
+    previous = previous or {}
+    headers = ['benchmark', 'n', 'seconds', 'ops/s', 'p99 latency']
+    if previous:
+        headers.append('change')
+    rows = []
+    for result in results:
+        if result.skipped:
+            rows.append([result.name, 'skipped', result.skipped])
+            continue
+        row = [
+            result.name,
+            str(result.n),
+            f'{result.seconds:.3f}',
+            f'{result.ops_s:.1f}',
+            (f'{result.latency.percentile(99.0) * 1000:.3f}ms'
+             if result.latency else '-'),
+        ]
+        if previous:
+            prev_ops = previous.get(result.name, {}).get('ops_s')
+            row.append(
+                f'{(result.ops_s / prev_ops - 1.0) * 100.0:+.1f}%'
+                if prev_ops else '-')
+        rows.append(row)
+    return terminal.table(
+        [headers] + rows, title='Benchmarks', tty=False).table
+
+
+@click.command()
+@click.argument('names', nargs=-1)
+@click.option('--messages', '-n',
+              type=int, default=DEFAULT_MESSAGES,
+              help='Number of messages sent by every benchmark.')
+@click.option('--repeat', '-r',
+              type=int, default=1,
+              help='Run every benchmark N times and keep the fastest.')
+@click.option('--json', 'json_path',
+              type=click.Path(dir_okay=False, writable=True),
+              help='Write results as JSON to file.')
+@click.option('--compare',
+              type=click.Path(dir_okay=False, exists=True),
+              help='Compare with results from JSON file.')
+@click.option('--list', 'list_benchmarks', is_flag=True,
+              help='List available benchmarks.')
+def main(names: Tuple[str, ...],
+         messages: int,
+         repeat: int,
+         json_path: Optional[str],
+         compare: Optional[str],
+         list_benchmarks: bool) -> None:
+    """Run benchmarks (all if no names specified)."""
+    if list_benchmarks:
+        for name, (fun, _) in BENCHMARKS.items():
+            click.echo(f'{name:<16} {fun.__doc__}')
+        return
+    unknown = set(names) - set(BENCHMARKS)
+    if unknown:
+        raise click.BadParameter(
+            f'Unknown benchmark: {", ".join(sorted(unknown))}')
+    previous: MutableMapping[str, Mapping] = {}
+    if compare:
+        with open(compare) as fh:
+            previous = {r['name']: r for r in json.load(fh)['results']}
+    loop = asyncio.get_event_loop()
+    results = loop.run_until_complete(
+        run(names or list(BENCHMARKS), messages, repeat))
+    click.echo(format_results(results, previous))
+    if json_path:
+        with open(json_path, 'w') as fh:
+            json.dump({
+                'environment': environment(),
+                'messages': messages,
+                'repeat': repeat,
+                'results': [result.asdict() for result in results],
+            }, fh, indent=2)
+            fh.write(os.linesep)
+
+
+if __name__ == '__main__':
+    main()
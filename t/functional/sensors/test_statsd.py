@@ -1,5 +1,8 @@
 import pytest
+from faust.sensors import SensorBatch, SensorDelegate
 from faust.sensors.statsd import StatsdMonitor
+from faust.types import TP
+from mode.utils.mocks import MagicMock, Mock
 
 PREFIX = 'faust-test'
 
@@ -33,3 +36,41 @@ def stream_from_combined_streams(app):
 ])
 def test_stream_label(make_stream, expected, *, app, mon):
     assert mon._stream_label(make_stream(app)) == expected
+
+
+def test_batched__no_per_message_hooks(*, mon):
+    assert mon.batched
+    assert not mon.per_message
+    sensors = SensorDelegate(Mock(name='app'))
+    sensors.add(mon)
+    mon.client = Mock(name='client')
+    sensors.on_message_in(TP('foo', 0), 3, Mock(name='message'))
+    mon.client.incr.assert_not_called()
+    assert mon.messages_received_total == 0
+
+
+def test_on_message_in__not_batched():
+    mon = StatsdMonitor(prefix=PREFIX, batched=False)
+    assert mon.per_message
+    mon.client = Mock(name='client')
+    mon.on_message_in(TP('foo', 0), 3, Mock(name='message'))
+    mon.client.incr.assert_called()
+
+
+def test_on_batch(*, mon):
+    mon.client = MagicMock(name='client')
+    pipe = mon.client.pipeline.return_value.__enter__.return_value
+    stream = Mock(name='stream', shortlabel='Stream: Topic: foo')
+    message = Mock(name='message', time_in=None)
+    batch = SensorBatch()
+    batch.on_message_in(TP('foo', 0), 3, message)
+    batch.on_stream_event_in(TP('foo', 0), 3, stream, Mock(name='event'))
+    batch.on_message_out(TP('foo', 0), 3, message)
+    batch.finish()
+
+    mon.on_batch(batch)
+    pipe.incr.assert_any_call('messages_received', count=1, rate=1.0)
+    pipe.incr.assert_any_call(
+        'topic.foo.messages_received', count=1, rate=1.0)
+    pipe.incr.assert_any_call('stream.topic_foo.events', count=1, rate=1.0)
+    pipe.gauge.assert_any_call('read_offset.foo.0', 3)
@@ -14,6 +14,7 @@ from faust.app.router import Router
 from faust.sensors import Monitor
 from faust.serializers import Registry
 from faust.tables import TableManager
+from faust.transport.commit import AdaptiveCommitPolicy, CommitPolicy
 from faust.types import settings
 from yarl import URL
 
@@ -56,6 +57,7 @@ class test_settings:
                 settings.BROKER_HEARTBEAT_INTERVAL)
         assert conf.broker_commit_interval == settings.BROKER_COMMIT_INTERVAL
         assert conf.broker_commit_every == settings.BROKER_COMMIT_EVERY
+        assert conf.broker_commit_policy is CommitPolicy
         assert (conf.broker_commit_livelock_soft_timeout ==
                 settings.BROKER_LIVELOCK_SOFT)
         assert conf.broker_check_crcs
@@ -63,6 +65,7 @@ class test_settings:
         assert conf.table_cleanup_interval == settings.TABLE_CLEANUP_INTERVAL
         assert conf.reply_to_prefix == settings.REPLY_TO_PREFIX
         assert conf.reply_expires == settings.REPLY_EXPIRES
+        assert conf.reply_direct_timeout == settings.REPLY_DIRECT_TIMEOUT
         assert conf.stream_buffer_maxsize == settings.STREAM_BUFFER_MAXSIZE
         assert conf.stream_recovery_delay == settings.STREAM_RECOVERY_DELAY
         assert conf.producer_partitioner is None
@@ -70,6 +73,7 @@ class test_settings:
                 settings.PRODUCER_REQUEST_TIMEOUT)
         assert (conf.stream_publish_on_commit ==
                 settings.STREAM_PUBLISH_ON_COMMIT)
+        assert conf.processing_guarantee == settings.PROCESSING_GUARANTEE
         assert conf.stream_wait_empty
         assert not conf.stream_ack_cancelled_tasks
         assert conf.stream_ack_exceptions
@@ -178,6 +182,7 @@ class test_settings:
                                  reply_to='reply_to',
                                  reply_create_topic=True,
                                  reply_expires=90.9,
+                                 reply_direct_timeout=3.3,
                                  stream_buffer_maxsize=101,
                                  stream_wait_empty=True,
                                  stream_ack_cancelled_tasks=True,
@@ -229,6 +234,7 @@ class test_settings:
             reply_to=reply_to,
             reply_create_topic=reply_create_topic,
             reply_expires=reply_expires,
+            reply_direct_timeout=reply_direct_timeout,
             stream_buffer_maxsize=stream_buffer_maxsize,
             stream_wait_empty=stream_wait_empty,
             stream_ack_cancelled_tasks=stream_ack_cancelled_tasks,
@@ -279,6 +285,7 @@ class test_settings:
         assert conf.topic_replication_factor == topic_replication_factor
         assert conf.reply_to == reply_to
         assert conf.reply_expires == reply_expires
+        assert conf.reply_direct_timeout == reply_direct_timeout
         assert conf.stream_buffer_maxsize == stream_buffer_maxsize
         assert conf.stream_wait_empty == stream_wait_empty
         assert conf.stream_ack_cancelled_tasks == stream_ack_cancelled_tasks
@@ -319,6 +326,24 @@ class test_settings:
         with pytest.raises(ImproperlyConfigured):
             app.finalize()
 
+    def test_broker_commit_policy(self):
+        app = self.App(
+            'id',
+            broker_commit_policy='faust.transport.commit:AdaptiveCommitPolicy')
+        assert app.conf.broker_commit_policy is AdaptiveCommitPolicy
+
+    def test_processing_guarantee(self):
+        app = self.App('id',
+                       processing_guarantee='exactly_once',
+                       stream_publish_on_commit=True)
+        assert app.conf.processing_guarantee == 'exactly_once'
+        assert not app._attachments.enabled
+
+    def test_processing_guarantee_unknown(self):
+        app = App('id', processing_guarantee='at_most_once')
+        with pytest.raises(ImproperlyConfigured):
+            app.finalize()
+
     def test_compat_url(self):
         assert self.App(url='foo').conf.broker == [URL('kafka://foo')]
 
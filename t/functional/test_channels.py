@@ -127,6 +127,18 @@ async def test_send_receive(app):
     assert await anext(it1_2) == b'moo'
 
 
+@pytest.mark.asyncio
+async def test_send_many(app):
+    app.flow_control.resume()
+    channel = app.channel()
+    it = aiter(channel)
+    futs = await channel.send_many([('k1', 'v1'), ('k2', 'v2')])
+    assert all(fut.done() for fut in futs)
+    event1, event2 = await anext(it), await anext(it)
+    assert (event1.key, event1.value) == ('k1', 'v1')
+    assert (event2.key, event2.value) == ('k2', 'v2')
+
+
 @pytest.mark.asyncio
 async def test_on_key_decode_error(*, app):
     channel = app.channel()
@@ -2,10 +2,10 @@ import asyncio
 from copy import copy
 
 import pytest
-from faust.exceptions import ImproperlyConfigured
+from faust.exceptions import ImproperlyConfigured, Skip
 from faust.streams import maybe_forward
 from mode.utils.aiter import aiter, anext
-from mode.utils.mocks import AsyncMock, Mock
+from mode.utils.mocks import AsyncMock, Mock, patch
 
 from .helpers import channel_empty, message, put
 
@@ -489,7 +489,6 @@ async def test_take(app):
     event = None
     async for value in s.take(1, within=1):
         assert value == [1]
-        assert s.enable_acks is False
         event = mock_stream_event_ack(s)
         break
 
@@ -501,3 +500,133 @@ async def test_take(app):
 
     event.ack.assert_called_with()
     assert s.enable_acks is True
+
+
+@pytest.mark.asyncio
+async def test_take__size_and_within(app):
+    s = new_stream(app)
+    for i in range(5):
+        await s.channel.send(value=i)
+    batches = []
+    it = s.take(2, within=0.05)
+    async for values in it:
+        batches.append(values)
+        if sum(len(b) for b in batches) >= 5:
+            break
+    assert batches == [[0, 1], [2, 3], [4]]
+    await it.aclose()
+
+
+@pytest.mark.asyncio
+async def test_take__acks_buffer_when_consumed(app):
+    s = new_stream(app)
+    for i in range(3):
+        await s.channel.send(value=i)
+    with patch('faust.events.Event.ack') as ack:
+        ack.return_value = False
+        async for values in s.take(3, within=1):
+            assert values == [0, 1, 2]
+            assert s.current_event.value == 2
+            ack.assert_not_called()
+            break
+        await asyncio.sleep(0)
+        await asyncio.sleep(0)
+        assert ack.call_count == 3
+
+
+@pytest.mark.asyncio
+async def test_take__noack(app):
+    s = new_stream(app).noack()
+    await s.channel.send(value=1)
+    with patch('faust.events.Event.ack') as ack:
+        async for values in s.take(1, within=1):
+            assert values == [1]
+            break
+        await asyncio.sleep(0)
+        await asyncio.sleep(0)
+        ack.assert_not_called()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize('within', [None, 10.0])
+async def test_take__iterable(within, *, app):
+    s = app.stream([1, 2, 3, 4, 5], loop=asyncio.get_event_loop())
+    assert [values async for values in s.take(2, within=within)] == [
+        [1, 2], [3, 4], [5],
+    ]
+
+
+async def _async_is_even(value):
+    return not value % 2
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize('pred', [lambda v: not v % 2, _async_is_even])
+async def test_filter(pred, *, app):
+    s = new_stream(app)
+    for i in range(6):
+        await s.channel.send(value=i)
+    with patch('faust.events.Event.ack') as ack:
+        ack.return_value = False
+        values = []
+        async for value in s.filter(pred):
+            values.append(value)
+            if value == 4:
+                # 0, 1, 2, 3 acked, 4 is being processed.
+                assert ack.call_count == 4
+                break
+    assert values == [0, 2, 4]
+
+
+@pytest.mark.asyncio
+async def test_filter__noack(app):
+    s = new_stream(app).noack()
+    for i in range(3):
+        await s.channel.send(value=i)
+    with patch('faust.events.Event.ack') as ack:
+        async for value in s.filter(lambda v: v == 2):
+            assert value == 2
+            break
+        ack.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_map_and_filter(app):
+    async def async_double(value):
+        return value * 2
+
+    s = new_stream(app)
+    for i in range(10):
+        await s.channel.send(value=i)
+    mapped = s.map(async_double).filter(lambda v: v % 3).map(str)
+    assert mapped is not s
+    assert s.get_active_stream() is mapped
+    async for values in mapped.take(3, within=0.05):
+        assert values == ['2', '4', '8']
+        break
+
+
+@pytest.mark.asyncio
+async def test_map__returns_None(app):
+    s = new_stream(app)
+    for i in range(4):
+        await s.channel.send(value=i)
+    with patch('faust.events.Event.ack') as ack:
+        ack.return_value = False
+        async for value in s.map(lambda v: v if v == 3 else None):
+            assert value == 3
+            # 0, 1, 2 were dropped and acked.
+            assert ack.call_count == 3
+            break
+
+
+@pytest.mark.asyncio
+async def test_processor_raising_Skip(app):
+    def skip_odd(value):
+        if value % 2:
+            raise Skip()
+        return value
+
+    s = app.stream([1, 2, 3, 4], loop=asyncio.get_event_loop())
+    s.add_processor(skip_odd)
+    assert [value async for value in s] == [2, 4]
@@ -12,4 +12,6 @@ def web_client(loop, aiohttp_client, web):
 def router_same(app):
     app.router.route_req = Mock(name='app.router.route_req')
     app.router.route_req.side_effect = SameNode()
+    app.router.route_key_req = Mock(name='app.router.route_key_req')
+    app.router.route_key_req.side_effect = SameNode()
     return app.router
@@ -0,0 +1,60 @@
+from base64 import b64encode
+import pytest
+from faust.agents.models import ReqRepResponse
+from mode.utils.mocks import AsyncMock
+
+
+@pytest.fixture()
+def agent(app):
+
+    @app.agent()
+    async def double(stream):
+        async for value in stream:
+            yield value * 2
+
+    double.deliver_direct = AsyncMock(name='deliver_direct')
+    double.deliver_direct.coro.return_value = ReqRepResponse(
+        key='k', value=42, correlation_id='cid')
+    return double
+
+
+async def test_ask(web_client, agent, app):
+    app.conf.reply_direct = True
+    client = await web_client
+    resp = await client.post(
+        f'/agents/{agent.name}/ask/3/',
+        params={'correlation_id': 'cid',
+                'key': b64encode(b'k').decode(),
+                'timestamp': '303.3'},
+        data=b'value',
+    )
+    assert resp.status == 200
+    payload = await resp.json()
+    assert payload['value'] == 42
+    assert payload['correlation_id'] == 'cid'
+    agent.deliver_direct.coro.assert_called_once_with(
+        3, b'k', b'value', correlation_id='cid', timestamp=303.3)
+
+
+async def test_ask__not_enabled(web_client, agent):
+    client = await web_client
+    resp = await client.post(
+        f'/agents/{agent.name}/ask/3/',
+        params={'correlation_id': 'cid'},
+        data=b'value',
+    )
+    assert resp.status == 404
+    agent.deliver_direct.coro.assert_not_called()
+
+
+async def test_ask__unknown_agent(web_client, agent, app):
+    app.conf.reply_direct = True
+    client = await web_client
+    resp = await client.post(
+        '/agents/unknown/ask/3/',
+        params={'correlation_id': 'cid'},
+        data=b'value',
+    )
+    assert resp.status == 404
+    payload = await resp.json()
+    assert payload == {'error': 'unknown agent', 'name': 'unknown'}
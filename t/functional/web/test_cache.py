@@ -1,3 +1,5 @@
+import asyncio
+import sys
 from itertools import count
 
 import aredis
@@ -7,6 +9,7 @@ from faust.exceptions import ImproperlyConfigured
 from faust.web import Blueprint, View
 from faust.web.cache import backends
 from faust.web.cache.backends import redis
+from faust.web.cache.backends.memory import CacheStorage
 
 DEFAULT_TIMEOUT = 361.363
 VIEW_B_TIMEOUT = 64.3
@@ -51,10 +54,44 @@ class CCachedView(ACachedView):
     ...
 
 
+@blueprint.route('/E/', name='e')
+class ECachedView(ACachedView):
+
+    @cache.view(tables=['cached-table'])
+    async def get(self, request):
+        return await self._next_response(request)
+
+
+@blueprint.route('/F/{key}/', name='f')
+class FCachedView(ACachedView):
+
+    @cache.view(table_keys=lambda view, request, key: [('cached-table', key)])
+    async def get(self, request, key):
+        return await self._next_response(request)
+
+
+@blueprint.route('/D/', name='d')
+class DCachedView(ACachedView):
+
+    @cache.view(stale_timeout=30.0)
+    async def get(self, request):
+        await asyncio.sleep(0.01)
+        return await self._next_response(request)
+
+
 def test_cache():
     assert cache.key_prefix == 'test'
 
 
+def test_cache__stale_timeout_requires_timeout():
+    untimed_cache = blueprint.cache()
+    with pytest.raises(ImproperlyConfigured):
+        untimed_cache.view(stale_timeout=30.0)
+    with pytest.raises(ImproperlyConfigured):
+        blueprint.cache(stale_timeout=30.0).view()
+    assert untimed_cache.view(timeout=1.0, stale_timeout=30.0)
+
+
 @pytest.mark.asyncio
 @pytest.mark.app(cache='memory://')
 async def test_cached_view__HEAD(*, app, bp, web_client, web):
@@ -131,6 +168,71 @@ async def test_cached_view__redis(expected_backend, *,
         assert await model_value(await client.get(urlC)) == 0
 
 
+@pytest.mark.asyncio
+@pytest.mark.app(cache='memory://')
+async def test_cached_view__coalesces_misses(*, app, bp, web_client, web):
+    app.cache.storage.clear()
+    async with app.cache:
+        client = await web_client
+        urlD = web.url_for('test:d')
+        responses = await asyncio.gather(*[client.get(urlD) for _ in range(5)])
+        assert [await model_value(r) for r in responses] == [0] * 5
+
+
+@pytest.mark.asyncio
+@pytest.mark.app(cache='memory://')
+async def test_cached_view__stale_while_revalidate(
+        *, app, bp, web_client, web):
+    storage = app.cache.storage
+    storage.clear()
+    async with app.cache:
+        client = await web_client
+        urlD = web.url_for('test:d')
+        keyD = (await model_response(await client.get(urlD))).key
+        assert storage.last_set_ttl(keyD) == DEFAULT_TIMEOUT + 30.0
+        assert storage.last_set_ttl(keyD + '.fresh') == DEFAULT_TIMEOUT
+        assert await model_value(await client.get(urlD)) == 0
+
+        storage.expire(keyD + '.fresh')
+        # stale response is served while refreshed in the background.
+        assert await model_value(await client.get(urlD)) == 0
+        await asyncio.sleep(0.1)
+        assert await model_value(await client.get(urlD)) == 1
+
+        storage.expire(keyD)
+        assert await model_value(await client.get(urlD)) == 2
+
+
+@pytest.mark.asyncio
+@pytest.mark.app(cache='memory://')
+async def test_cached_view__tables(*, app, bp, web_client, web):
+    app.cache.storage.clear()
+    table = app.Table('cached-table')
+    async with app.cache:
+        client = await web_client
+        urlE = web.url_for('test:e')
+        urlF1 = web.url_for('test:f', key='k1')
+        # keys share counters, so pick a key not sharing one with k1.
+        slots = table.key_version_slots
+        k2 = next(k for k in ('k2', 'k3', 'k4')
+                  if hash(k) % slots != hash('k1') % slots)
+        urlF2 = web.url_for('test:f', key=k2)
+        assert await model_value(await client.get(urlE)) == 0
+        assert await model_value(await client.get(urlF1)) == 0
+        assert await model_value(await client.get(urlF2)) == 1
+        assert await model_value(await client.get(urlE)) == 0
+
+        table._on_key_changed('k1')
+        assert await model_value(await client.get(urlE)) == 1
+        assert await model_value(await client.get(urlF1)) == 2
+        assert await model_value(await client.get(urlF1)) == 2
+        assert await model_value(await client.get(urlF2)) == 1
+
+        table.apply_changelog_batch([])
+        assert await model_value(await client.get(urlE)) == 2
+        assert await model_value(await client.get(urlF2)) == 3
+
+
 @pytest.mark.asyncio
 @pytest.mark.parametrize('scheme,host,port,password,db,settings', [
     pytest.param('redis', 'h', 6379, None, 0, None,
@@ -259,6 +361,62 @@ async def test_memory_delete(*, app):
         assert await app.cache.get('foo') is None
 
 
+@pytest.mark.app(cache='memory://?max_size=1000&eviction=lfu&sweep_interval=3')
+def test_memory__url_query(*, app):
+    assert app.cache.storage.max_size == 1000
+    assert app.cache.storage.eviction == 'lfu'
+    assert app.cache.sweep_interval == 3.0
+
+
+def test_memory__unknown_eviction(*, app):
+    with pytest.raises(ImproperlyConfigured):
+        backends.by_name('memory')(app, 'memory://?eviction=random')
+
+
+def _entry_size(key, value):
+    return sys.getsizeof(key) + sys.getsizeof(value)
+
+
+def test_memory_storage__lru():
+    storage = CacheStorage(max_size=_entry_size('k1', b'v') * 2)
+    storage.set('k1', b'v')
+    storage.set('k2', b'v')
+    assert storage.size == storage.max_size
+    assert storage.get('k1') == b'v'
+    storage.set('k3', b'v')
+    assert storage.get('k2') is None
+    assert storage.get('k1') == b'v'
+    assert len(storage) == 2
+    storage.set('k3', b'v' * 1000)
+    assert not len(storage)
+    assert storage.size == 0
+
+
+def test_memory_storage__lfu():
+    storage = CacheStorage(
+        max_size=_entry_size('k1', b'v') * 2, eviction='lfu')
+    storage.set('k1', b'v')
+    storage.set('k2', b'v')
+    storage.get('k1')
+    storage.get('k1')
+    storage.get('k2')
+    storage.set('k3', b'v')
+    assert storage.get('k1') == b'v'
+    assert storage.get('k2') is None
+    assert storage.get('k3') == b'v'
+
+
+def test_memory_storage__sweep():
+    storage = CacheStorage()
+    storage.setex('k1', 10.0, b'v')
+    storage.setex('k2', 10.0, b'v')
+    storage.set('k3', b'v')
+    storage.expire('k1')
+    assert storage.sweep() == 1
+    assert len(storage) == 2
+    assert storage.size == _entry_size('k2', b'v') + _entry_size('k3', b'v')
+
+
 @pytest.mark.asyncio
 @pytest.mark.app(cache='redis://')
 async def test_redis_get__operational_error(*, app, mocked_redis):
@@ -1,4 +1,5 @@
 import pytest
+from mode.utils.mocks import AsyncMock
 
 
 @pytest.fixture()
@@ -70,3 +71,73 @@ async def test_table_key__missing_key(web_client,
         'table': 'foo-table',
         'key': 'MISSINGKEY',
     }
+
+
+async def test_table_key__remote_missing_key(web_client, tables, app):
+    client = await web_client
+    app.router.route_key_req = AsyncMock(name='route_key_req')
+    app.router.route_key_req.coro.side_effect = KeyError('KEY')
+    resp = await client.get('/table/foo-table/KEY/')
+    assert resp.status == 404
+    assert await resp.json() == {
+        'error': 'key not found',
+        'table': 'foo-table',
+        'key': 'KEY',
+    }
+
+
+async def test_table_detail__post_keys(web_client, tables, table_foo):
+    client = await web_client
+    table_foo.data.data.update({'A': '1', 'C': {'x': 3}})
+    resp = await client.post('/table/foo-table/', json=['A', 'B', 'C'])
+    assert resp.status == 200
+    assert await resp.read() == b'"1"\n\n{"x": 3}'
+
+
+async def test_table_items(web_client, tables, table_foo):
+    client = await web_client
+    table_foo.data.data.update({f'k{i}': i for i in range(5)})
+    resp = await client.get('/table/foo-table/-/items/?limit=2')
+    assert resp.status == 200
+    payload = await resp.json()
+    assert payload['items'] == [['k0', 0], ['k1', 1]]
+    cursor = payload['cursor']
+    items = payload['items']
+    while cursor is not None:
+        resp = await client.get(
+            '/table/foo-table/-/items/', params={'limit': 2, 'cursor': cursor})
+        payload = await resp.json()
+        items.extend(payload['items'])
+        cursor = payload['cursor']
+    assert items == [[f'k{i}', i] for i in range(5)]
+
+
+@pytest.mark.parametrize('query', [
+    'cursor=x',
+    'limit=x',
+    'limit=0',
+])
+async def test_table_items__invalid(query, web_client, tables):
+    client = await web_client
+    resp = await client.get(f'/table/foo-table/-/items/?{query}')
+    assert resp.status == 400
+
+
+async def test_table_keys(web_client, tables, table_foo, router_same):
+    client = await web_client
+    table_foo.data.data.update({'A': 1, 'B': {'x': 2}})
+    resp = await client.get('/table/foo-table/-/keys/?key=A&key=B&key=C')
+    assert resp.status == 200
+    assert await resp.json() == {'A': 1, 'B': {'x': 2}}
+
+
+async def test_table_keys__remote(web_client, tables, app, web):
+    client = await web_client
+    values = {'A': web.bytes('{"x": "\u00e5"}'.encode())}
+
+    async def route_key_req(table_name, key, web):
+        return values[key]
+    app.router.route_key_req = route_key_req
+    resp = await client.get('/table/foo-table/-/keys/?key=A&key=B')
+    assert resp.status == 200
+    assert await resp.json() == {'A': {'x': '\u00e5'}}
@@ -1,25 +1,43 @@
 import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
 
 import pytest
+from aiohttp import ClientConnectorError, ClientResponseError
 from faust import App, Channel, Record
+from faust.agents.agent import _execute_agent_fun
 from faust.agents.actor import Actor
 from faust.agents.models import ReqRepRequest, ReqRepResponse
-from faust.agents.replies import ReplyConsumer
+from faust.agents.replies import BarrierState, ReplyConsumer, ReplyPromise
 from faust.events import Event
-from faust.exceptions import ImproperlyConfigured
+from faust.exceptions import ImproperlyConfigured, Skip
 from faust.types import Message, TP
+from faust.web.exceptions import ServiceUnavailable
 from mode import SupervisorStrategy, label
 from mode.utils.aiter import aiter
 from mode.utils.futures import done_future
 from mode.utils.logging import CompositeLogger
-from mode.utils.mocks import ANY, AsyncMock, FutureMock, Mock, call, patch
+from mode.utils.mocks import (
+    ANY,
+    AsyncContextManagerMock,
+    AsyncMock,
+    FutureMock,
+    Mock,
+    call,
+    patch,
+)
 from mode.utils.trees import Node
+from yarl import URL
 
 
 class Word(Record):
     word: str
 
 
+def double(value):
+    return value * 2
+
+
 class test_AgentService:
 
     @pytest.fixture
@@ -117,6 +135,78 @@ class test_AgentService:
         ])
         agent.supervisor.start.assert_called_once_with()
 
+    @pytest.mark.asyncio
+    async def test_on_start_supervisor__ordering(self, *, agent):
+        agent.concurrency = 3
+        agent.ordering = 'key'
+        agent._start_one = AsyncMock(name='_start_one')
+        agent._dispatch = AsyncMock(name='_dispatch')
+        agent.supervisor = Mock(
+            name='supervisor',
+            autospec=SupervisorStrategy,
+            start=AsyncMock(),
+        )
+        await agent._on_start_supervisor()
+        dispatcher = agent._dispatcher
+        await dispatcher
+
+        source, channels = agent._dispatch.call_args[0]
+        assert source in agent.app.topics
+        assert len({id(channel.queue) for channel in channels}) == 3
+        assert not any(channel.queue is source.queue or
+                       channel in agent.app.topics
+                       for channel in channels)
+        agent._start_one.coro.assert_has_calls([
+            call(index=i, channel=channels[i]) for i in range(3)
+        ])
+        agent.supervisor.start.assert_called_once_with()
+
+        agent._stop_supervisor = AsyncMock(name='_stop_supervisor')
+        dispatcher = agent._dispatcher = Mock(name='dispatcher')
+        await agent.on_stop()
+        dispatcher.cancel.assert_called_once_with()
+        assert agent._dispatcher is None
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize('ordering', ['key', 'partition'])
+    async def test_dispatch(self, ordering, *, agent, app):
+        agent.ordering = ordering
+        app.flow_control.resume()
+        source = app.channel()
+        channels = [app.channel(), app.channel()]
+
+        def event(key, partition):
+            message = Mock(name='message', key=key,
+                           tp=TP('foo', partition))
+            return Mock(name='event', message=message)
+        events = [event(f'k{i % 4}'.encode(), i % 4) for i in range(20)]
+        for e in events:
+            await source.queue.put(e)
+        exc = KeyError('decode error')
+        await source.queue.throw(exc)
+
+        dispatcher = asyncio.ensure_future(agent._dispatch(source, channels))
+        try:
+            while sum(c.queue.qsize() for c in channels) < len(events):
+                await asyncio.sleep(0.01)
+            with pytest.raises(KeyError):
+                await channels[0].queue.get()
+            received = [[c.queue.get_nowait()
+                         for _ in range(c.queue.qsize())]
+                        for c in channels]
+        finally:
+            dispatcher.cancel()
+        assert sorted(map(id, received[0] + received[1])) == sorted(
+            map(id, events))
+        for actor_events in received:
+            # events are received in order, and every key/partition
+            # is only sent to one actor.
+            assert actor_events == [e for e in events if e in actor_events]
+        by = lambda e: (e.message.key if ordering == 'key'  # noqa: E731
+                        else e.message.tp)
+        assert not ({by(e) for e in received[0]} &
+                    {by(e) for e in received[1]})
+
     def test_get_active_partitions(self, *, agent):
         agent.isolated_partitions = None
         assert agent._get_active_partitions() is None
@@ -213,6 +303,152 @@ class test_Agent:
             async def foo():
                 ...
 
+    def test_init__unknown_executor(self, *, app):
+        with pytest.raises(ImproperlyConfigured):
+            @app.agent(executor='gpu')
+            def foo(value):
+                ...
+
+    def test_init__executor_nested_function(self, *, app):
+        with pytest.raises(ImproperlyConfigured):
+            @app.agent(executor='process')
+            def foo(value):
+                ...
+
+    def test_init__unknown_ordering(self, *, app):
+        with pytest.raises(ImproperlyConfigured):
+            @app.agent(concurrency=2, ordering='value')
+            async def foo():
+                ...
+
+    def test_execute_agent_fun(self, *, app):
+        assert _execute_agent_fun(f'{__name__}:double', 3) == 6
+        agent = app.agent()(double)
+        assert agent.fun is double
+        assert _execute_agent_fun(f'{__name__}:double', 4) == 8
+
+    @pytest.mark.asyncio
+    async def test_on_start_and_stop__executor(self, *, app):
+        agent = app.agent(executor='process', workers=2)(double)
+        agent._on_start_supervisor = AsyncMock(name='_on_start_supervisor')
+        await agent.on_start()
+        assert agent._executor._max_workers == 2
+        # worker processes were started.
+        assert len(agent._executor._processes) == 2
+        executor = agent._executor
+        await agent.start_executor()
+        assert agent._executor is executor
+        await agent.loop.run_in_executor(None, executor.shutdown)
+        executor = agent._executor = Mock(name='executor')
+        await agent.on_stop()
+        executor.shutdown.assert_called_once_with()
+        assert agent._executor is None
+
+    @pytest.mark.asyncio
+    async def test_start_executor__no_executor(self, *, agent):
+        await agent.start_executor()
+        assert agent._executor is None
+
+    def _executor_stream(self, values, tps=None):
+        events = [Mock(name=f'event{v}', key=None, value=v) for v in values]
+        for event, tp in zip(events, tps or [TP('foo', 0)] * len(events)):
+            event.message.tp = tp
+
+        async def _events():
+            for event in events:
+                yield event
+
+        stream = Mock(name='stream')
+        stream.noack().events = _events
+        stream.noack().ack = AsyncMock(name='ack')
+        return stream, events
+
+    def _executor_agent(self, app, **kwargs):
+        agent = app.agent(executor='process', workers=3, **kwargs)(double)
+        agent._executor = ThreadPoolExecutor(max_workers=3)
+        return agent
+
+    @pytest.mark.asyncio
+    async def test_execute_in_executor(self, *, app):
+        results = []
+        agent = self._executor_agent(app, sink=[results.append])
+        stream, events = self._executor_stream([5, 1, 4, 2, 3])
+
+        def slow_double(path, value):
+            time.sleep(value * 0.01)
+            return value * 2
+
+        with patch('faust.agents.agent._execute_agent_fun', slow_double):
+            await agent._execute_in_executor(stream)
+        assert results == [10, 2, 8, 4, 6]
+        assert stream.noack().ack.call_args_list == [
+            call(event) for event in events]
+
+    @pytest.mark.asyncio
+    async def test_execute_in_executor__ordered_by_partition(self, *, app):
+        results = []
+        agent = self._executor_agent(app, sink=[results.append])
+        stream, events = self._executor_stream(
+            [20, 1, 2, 3], tps=[TP('foo', 0), TP('foo', 1),
+                                TP('foo', 1), TP('foo', 0)])
+
+        def slow_double(path, value):
+            time.sleep(value * 0.01)
+            return value * 2
+
+        with patch('faust.agents.agent._execute_agent_fun', slow_double):
+            await agent._execute_in_executor(stream)
+        # the slow value in partition 0 does not delay partition 1,
+        # but results for partition 0 are still in order.
+        assert results == [2, 4, 40, 6]
+
+    @pytest.mark.asyncio
+    async def test_execute_in_executor__sink_batch(self, *, app):
+        results = []
+        agent = self._executor_agent(
+            app, sink=[results.append], sink_batch_size=2)
+        assert agent.sink_batch_timeout == agent.default_sink_batch_timeout
+        stream, events = self._executor_stream([5, 1, 4, 2, 3])
+        with patch('faust.agents.agent._execute_agent_fun',
+                   lambda path, value: value * 2):
+            await agent._execute_in_executor(stream)
+        assert results == [[10, 2], [8, 4], [6]]
+        for event in events:
+            event.message.incref.assert_called_once_with()
+            event.ack.assert_called_once_with()
+
+    @pytest.mark.asyncio
+    async def test_execute_in_executor__reply(self, *, app):
+        agent = self._executor_agent(app)
+        agent._reply = AsyncMock(name='_reply')
+        req = ReqRepRequest(3, 'reply_to', 'correlation_id')
+        stream, events = self._executor_stream([req])
+        with patch('faust.agents.agent._execute_agent_fun',
+                   lambda path, value: value * 2):
+            await agent._execute_in_executor(stream)
+        agent._reply.assert_called_once_with(None, 6, req)
+
+    @pytest.mark.asyncio
+    async def test_execute_in_executor__raising(self, *, app):
+        agent = self._executor_agent(app)
+        stream, events = self._executor_stream([1, 2])
+
+        def raising(path, value):
+            raise KeyError(value)
+
+        with patch('faust.agents.agent._execute_agent_fun', raising):
+            with pytest.raises(KeyError):
+                await agent._execute_in_executor(stream)
+        stream.noack().ack.assert_not_called()
+
+    def test_actor_from_stream__executor(self, *, app):
+        agent = app.agent(executor='process')(double)
+        agent._execute_in_executor = Mock(name='_execute_in_executor')
+        stream = Mock(name='stream', concurrency_index=None)
+        actor = agent.actor_from_stream(stream)
+        agent._execute_in_executor.assert_called_once_with(stream)
+        assert actor.it is agent._execute_in_executor()
+
     def test_cancel(self, *, agent):
         actor1 = Mock(name='actor1')
         actor2 = Mock(name='actor2')
@@ -345,6 +581,11 @@ class test_Agent:
             'on_error': agent._on_error,
             'supervisor_strategy': agent.supervisor_strategy,
             'isolated_partitions': agent.isolated_partitions,
+            'executor': agent.executor,
+            'workers': agent.workers,
+            'ordering': agent.ordering,
+            'sink_batch_size': agent.sink_batch_size,
+            'sink_batch_timeout': agent.sink_batch_timeout,
         }
 
     def test_clone(self, *, agent):
@@ -360,6 +601,51 @@ class test_Agent:
     def test_maybe_unwrap_reply_request(self, input, expected, *, agent):
         assert agent._maybe_unwrap_reply_request(input) == expected
 
+    def _direct_request_event(self, offset):
+        event = Mock(name='event')
+        event.message.offset = offset
+        return patch('faust.agents.agent.current_event', return_value=event)
+
+    def test_maybe_unwrap_reply_request__delivered_direct(self, *, agent):
+        agent._remember_direct_request('cid')
+        req = ReqRepRequest('value', 'reply_to', 'cid')
+        with self._direct_request_event(offset=-1):
+            assert agent._maybe_unwrap_reply_request(req) == 'value'
+
+    @pytest.mark.asyncio
+    async def test_maybe_unwrap_reply_request__duplicate(self, *, agent):
+        agent._remember_direct_request('cid')
+        reply = agent._direct_replies['cid'] = asyncio.Future()
+        agent.app.send = AsyncMock(name='app.send')
+        req = ReqRepRequest('value', 'reply_to', 'cid')
+        with self._direct_request_event(offset=3):
+            # still processing: the reply is sent through Kafka.
+            with pytest.raises(Skip):
+                await agent._maybe_unwrap_reply_request(req)
+            assert 'cid' not in agent._direct_replies
+            assert not reply.done()
+            agent.app.send.assert_not_called()
+
+            await agent._reply('k', 42, req)
+            agent.app.send.assert_called_once_with(
+                'reply_to', key=None, value=ANY)
+            response = agent.app.send.call_args[1]['value']
+            assert response.value == 42
+
+            # replied: the response is sent again.
+            agent.app.send.reset_mock()
+            with pytest.raises(Skip):
+                await agent._maybe_unwrap_reply_request(req)
+            agent.app.send.assert_called_once_with(
+                'reply_to', key=None, value=response)
+
+    def test_remember_direct_request(self, *, agent):
+        agent.direct_request_expires = 0.0
+        agent.app.conf.reply_direct_timeout = 0.0
+        agent._remember_direct_request('cid1')
+        agent._remember_direct_request('cid2')
+        assert list(agent._direct_requests) == ['cid2']
+
     @pytest.mark.asyncio
     async def test_start_task(self, *, agent):
         agent._prepare_actor = AsyncMock(name='_prepare_actor')
@@ -386,6 +672,20 @@ class test_Agent:
             assert aref in agent._actors
             assert ret is aref
 
+    @pytest.mark.asyncio
+    async def test_prepare_actor__profiling(self, *, agent):
+        agent.app.conf.worker_profiling = True
+        aref = agent(index=0, active_partitions=None)
+        with patch('asyncio.Task'):
+            agent._slurp = Mock(name='_slurp')
+            agent._execute_task = Mock(name='_execute_task')
+            with patch.object(type(agent.app), 'profiler') as profiler:
+                await agent._prepare_actor(aref, Mock(name='beacon'))
+                profiler.profile.assert_called_once_with(
+                    agent.name, agent._slurp())
+                agent._execute_task.assert_called_once_with(
+                    profiler.profile(), aref)
+
     @pytest.mark.asyncio
     async def test_prepare_actor__Awaitable(self, *, agent2):
         aref = agent2(index=0, active_partitions=None)
@@ -497,6 +797,60 @@ class test_Agent:
             call('bar'),
         ])
 
+    @pytest.mark.asyncio
+    async def test_slurp__sink_batch(self, *, agent, app):
+        agent._sinks = [Mock(name='sink')]
+        agent.sink_batch_size = 10
+        agent._delegate_many_to_sinks = AsyncMock(name='_delegate_many')
+        aref = agent(index=None, active_partitions=None)
+        stream = aref.stream.get_active_stream()
+        events = [Event(app, None, v, Mock(name='message', autospec=Message))
+                  for v in ('foo', 'bar')]
+
+        class AIT:
+
+            async def __aiter__(self):
+                for event in events:
+                    stream.current_event = event
+                    yield event.value
+        await agent._slurp(aref, aiter(AIT()))
+        agent._delegate_many_to_sinks.assert_called_once_with(['foo', 'bar'])
+        for event in events:
+            event.message.incref.assert_called_once_with()
+            event.message.ack.assert_called_once_with(app.consumer)
+
+    @pytest.mark.asyncio
+    async def test_slurp__sink_batch__raising(self, *, agent, app):
+        agent._sinks = [Mock(name='sink')]
+        agent.sink_batch_timeout = 10.0
+        agent._delegate_many_to_sinks = AsyncMock(name='_delegate_many')
+        aref = agent(index=None, active_partitions=None)
+
+        class AIT:
+
+            async def __aiter__(self):
+                yield 'foo'
+                raise KeyError()
+        with pytest.raises(KeyError):
+            await agent._slurp(aref, aiter(AIT()))
+        agent._delegate_many_to_sinks.assert_called_once_with(['foo'])
+
+    @pytest.mark.asyncio
+    async def test_delegate_many_to_sinks(
+            self, *, agent, agent2, foo_topic):
+        agent2.send = AsyncMock(name='agent2.send')
+        foo_topic.send = AsyncMock(name='foo_topic.send')
+        sink_callback = Mock(name='sink_callback')
+        agent._sinks = [agent2, foo_topic, sink_callback]
+
+        await agent._delegate_many_to_sinks([1, 2])
+
+        assert agent2.send.call_args_list == [
+            call(value=1), call(value=2)]
+        assert foo_topic.send.call_args_list == [
+            call(value=1), call(value=2)]
+        sink_callback.assert_called_once_with([1, 2])
+
     @pytest.mark.asyncio
     async def test_delegate_to_sinks(self, *, agent, agent2, foo_topic):
         agent2.send = AsyncMock(name='agent2.send')
@@ -582,6 +936,206 @@ class test_Agent:
         agent.app._reply_consumer.add.assert_called_once_with(
             pp.correlation_id, pp)
 
+    @pytest.mark.asyncio
+    async def test_ask__direct(self, *, agent, app):
+        app.conf.reply_direct = True
+        agent._ask_direct = AsyncMock(name='_ask_direct')
+        agent._ask_direct.coro.return_value = ReqRepResponse(
+            key='key', value=42, correlation_id='cid')
+        agent.ask_nowait = AsyncMock(name='ask_nowait')
+        assert await agent.ask('val', key='key', correlation_id='cid') == 42
+        agent._ask_direct.coro.assert_called_once_with(
+            'val',
+            key='key',
+            partition=None,
+            timestamp=None,
+            correlation_id='cid',
+        )
+        agent.ask_nowait.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_ask__direct_falls_back_to_kafka(self, *, agent, app):
+        app.conf.reply_direct = True
+        agent._ask_direct = AsyncMock(name='_ask_direct')
+        agent._ask_direct.coro.return_value = None
+        app.maybe_start_client = AsyncMock(name='maybe_start_client')
+        app._reply_consumer._fetchers[app.conf.reply_to] = None
+        pp = ReplyPromise(app.conf.reply_to, 'cid')
+        pp.set_result(42)
+        agent.ask_nowait = Mock(name='ask_nowait')
+        agent.ask_nowait.return_value = done_future(pp)
+        assert await agent.ask('val', key='key') == 42
+        agent._ask_direct.assert_called_once()
+        agent.ask_nowait.assert_called_once()
+        # sent with the same correlation id, see deliver_direct.
+        correlation_id = agent._ask_direct.call_args[1]['correlation_id']
+        assert correlation_id
+        assert agent.ask_nowait.call_args[1]['correlation_id'] == (
+            correlation_id)
+
+    @pytest.fixture
+    def direct(self, *, app, agent):
+        app.conf.reply_direct = True
+        producer = Mock(name='producer')
+        producer.key_partition.return_value = TP('foo', 3)
+        app.maybe_start_producer = AsyncMock(name='maybe_start_producer')
+        app.maybe_start_producer.coro.return_value = producer
+        app.assignor.partition_store = Mock(name='partition_store')
+        agent.deliver_direct = AsyncMock(name='deliver_direct')
+        agent._post_direct = AsyncMock(name='_post_direct')
+        return app.assignor.partition_store
+
+    @pytest.mark.asyncio
+    async def test_ask_direct__same_node(self, *, app, agent, direct):
+        direct.return_value = app.conf.canonical_url
+        response = await agent._ask_direct(
+            'val', key='key', correlation_id='cid', timestamp=303.3)
+        assert response is agent.deliver_direct.coro.return_value
+        direct.assert_called_once_with(TP(agent.channel.topics[0], 3))
+        agent.deliver_direct.coro.assert_called_once_with(
+            3, b'key', ANY, correlation_id='cid', timestamp=303.3)
+        value = agent.deliver_direct.coro.call_args[0][2]
+        req = app.serializers.loads_value(ReqRepRequest, value)
+        assert req.value == 'val'
+        assert req.reply_to == app.conf.reply_to
+        agent._post_direct.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_ask_direct__same_node_unavailable(
+            self, *, app, agent, direct):
+        direct.return_value = app.conf.canonical_url
+        agent.deliver_direct.coro.side_effect = ServiceUnavailable()
+        assert await agent._ask_direct('val', key='key') is None
+
+    @pytest.mark.asyncio
+    async def test_ask_direct__remote(self, *, app, agent, direct):
+        url = direct.return_value = URL('http://other:6066')
+        response = await agent._ask_direct('val', partition=1)
+        assert response is agent._post_direct.coro.return_value
+        direct.assert_called_once_with(TP(agent.channel.topics[0], 1))
+        agent._post_direct.coro.assert_called_once_with(
+            url, 1, None, ANY, correlation_id=ANY, timestamp=None)
+        agent.deliver_direct.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_ask_direct__no_route(self, *, app, agent, direct):
+        direct.side_effect = KeyError()
+        assert await agent._ask_direct('val', key='key') is None
+        agent._post_direct.assert_not_called()
+        agent.deliver_direct.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_ask_direct__not_a_topic(self, *, app, agent, direct):
+        agent._channel = Channel(app)
+        assert await agent._ask_direct('val') is None
+
+    def _http_client(self, app, status=200, payload=b''):
+        response = Mock(
+            name='response',
+            status=status,
+            read=AsyncMock(return_value=payload),
+        )
+        app.http_client = Mock(name='http_client')
+        app.http_client.post.return_value = AsyncContextManagerMock(
+            return_value=response)
+        return response
+
+    @pytest.mark.asyncio
+    async def test_post_direct(self, *, app, agent):
+        self._http_client(app, payload=app.serializers.dumps_value(
+            ReqRepResponse,
+            ReqRepResponse(key='k', value=42, correlation_id='cid')))
+        response = await agent._post_direct(
+            URL('http://other:6066'), 3, b'k', b'value',
+            correlation_id='cid', timestamp=303.3)
+        assert response.value == 42
+        app.http_client.post.assert_called_once_with(
+            URL(f'http://other:6066/agents/{agent.name}/ask/3/'),
+            params={
+                'correlation_id': 'cid',
+                'key': 'aw==',
+                'timestamp': '303.3',
+            },
+            data=b'value',
+        )
+
+    @pytest.mark.asyncio
+    async def test_post_direct__unavailable(self, *, app, agent):
+        response = self._http_client(app, status=503)
+        assert await agent._post_direct(
+            URL('http://other:6066'), 3, None, b'value',
+            correlation_id='cid') is None
+        response.raise_for_status.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_post_direct__cannot_connect(self, *, app, agent):
+        app.http_client = Mock(name='http_client')
+        app.http_client.post.side_effect = ClientConnectorError(
+            Mock(name='connection_key'), OSError())
+        assert await agent._post_direct(
+            URL('http://other:6066'), 3, None, b'value',
+            correlation_id='cid') is None
+
+    @pytest.mark.asyncio
+    async def test_post_direct__server_error(self, *, app, agent):
+        response = self._http_client(app, status=500)
+        response.raise_for_status.side_effect = ClientResponseError(
+            Mock(name='request_info'), (), status=500)
+        assert await agent._post_direct(
+            URL('http://other:6066'), 3, None, b'value',
+            correlation_id='cid') is None
+
+    @pytest.mark.asyncio
+    async def test_post_direct__timeout(self, *, app, agent):
+        app.conf.reply_direct_timeout = 0.01
+        response = self._http_client(app)
+
+        async def read():
+            await asyncio.sleep(10)
+        response.read = read
+        assert await agent._post_direct(
+            URL('http://other:6066'), 3, None, b'value',
+            correlation_id='cid') is None
+
+    @pytest.mark.asyncio
+    async def test_deliver_direct(self, *, app, agent):
+        app.assignor.is_active = Mock(return_value=True)
+        req = ReqRepRequest(value=21, reply_to='r', correlation_id='cid')
+        messages = []
+
+        async def on_message(message):
+            messages.append(message)
+            await agent._reply('k', 42, req)
+        app.topics.on_message = on_message
+
+        response = await agent.deliver_direct(
+            3, b'k', b'value', correlation_id='cid', timestamp=303.3)
+        assert response.value == 42
+        assert response.correlation_id == 'cid'
+        message, = messages
+        assert message.tp == TP(agent.channel.topics[0], 3)
+        assert (message.key, message.value) == (b'k', b'value')
+        assert message.timestamp == 303.3
+        assert not message.use_tracking
+        assert not agent._direct_replies
+        assert agent._direct_requests['cid'][1] is response
+        app.assignor.is_active.assert_called_once_with(message.tp)
+
+    @pytest.mark.asyncio
+    async def test_deliver_direct__timeout(self, *, app, agent):
+        app.conf.reply_direct_timeout = 0.01
+        app.assignor.is_active = Mock(return_value=True)
+        app.topics.on_message = AsyncMock(name='on_message')
+        with pytest.raises(ServiceUnavailable):
+            await agent.deliver_direct(3, None, b'v', correlation_id='cid')
+        assert not agent._direct_replies
+
+    @pytest.mark.asyncio
+    async def test_deliver_direct__not_active(self, *, app, agent):
+        app.assignor.is_active = Mock(return_value=False)
+        with pytest.raises(ServiceUnavailable):
+            await agent.deliver_direct(3, None, b'v', correlation_id='cid')
+
     @pytest.mark.asyncio
     async def test_ask_nowait(self, *, agent):
         agent._create_req = Mock(name='_create_req')
@@ -622,6 +1176,61 @@ class test_Agent:
             assert reqrep.reply_to == agent._get_strtopic()
             assert reqrep.correlation_id == 'vvv'
 
+    @pytest.fixture
+    def reply_consumer(self, *, app, agent):
+        app.maybe_start_client = AsyncMock(name='maybe_start_client')
+        reply_consumer = app._reply_consumer
+        # pretend the reply topic fetcher is already running.
+        reply_consumer._fetchers[app.conf.reply_to] = None
+        agent.channel.send_many = AsyncMock(name='channel.send_many')
+        return reply_consumer
+
+    @pytest.mark.asyncio
+    async def test_barrier_send(self, *, app, agent, reply_consumer):
+        agent.map_batch_size = 2
+        barrier = BarrierState(app.conf.reply_to)
+        with patch('faust.agents.agent.uuid4') as uuid4:
+            uuid4.return_value = 'uuid'
+            cids = [cid async for cid in agent._barrier_send(
+                barrier, [('k', 1), ('k', 2), ('k', 3)], app.conf.reply_to)]
+        assert cids == ['uuid-0', 'uuid-1', 'uuid-2']
+        assert barrier.size == 3
+        assert not barrier.pending
+        assert reply_consumer._waiting == dict.fromkeys(cids, barrier)
+        assert agent.channel.send_many.coro.call_count == 2
+        batch1 = agent.channel.send_many.coro.call_args_list[0][0][0]
+        assert [(k, req.value, req.correlation_id, req.reply_to)
+                for k, req in batch1] == [
+            ('k', 1, 'uuid-0', app.conf.reply_to),
+            ('k', 2, 'uuid-1', app.conf.reply_to),
+        ]
+        app.maybe_start_client.coro.assert_called_once_with()
+
+    @pytest.mark.asyncio
+    async def test_kvjoin(self, *, app, agent, reply_consumer):
+        async def send_many(items, **kwargs):
+            # replies arrive in reverse order.
+            for _, req in reversed(items):
+                reply_consumer._waiting.pop(req.correlation_id).fulfill(
+                    req.correlation_id, req.value * 2)
+        agent.channel.send_many.coro.side_effect = send_many
+        assert await agent.kvjoin(
+            [('k', i) for i in range(5)]) == [0, 2, 4, 6, 8]
+        assert not reply_consumer._waiting
+
+    @pytest.mark.asyncio
+    async def test_kvmap__discards_pending_on_close(
+            self, *, app, agent, reply_consumer):
+        it = agent.kvmap([('k', i) for i in range(5)])
+        fut = asyncio.ensure_future(it.__anext__())
+        await asyncio.sleep(0)
+        assert len(reply_consumer._waiting) == 5
+        fut.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await fut
+        await it.aclose()
+        assert not reply_consumer._waiting
+
     @pytest.mark.asyncio
     async def test_send(self, *, agent):
         agent.channel = Mock(
@@ -0,0 +1,46 @@
+import pytest
+from faust.agents.models import ReqRepResponse
+from faust.agents.replies import BarrierState, ReplyConsumer, ReplyPromise
+from mode.utils.aiter import aiter
+from mode.utils.mocks import Mock
+
+
+class test_ReplyConsumer:
+
+    @pytest.fixture
+    def reply_consumer(self, *, app):
+        reply_consumer = ReplyConsumer(app)
+        reply_consumer._fetchers['reply_to'] = None
+        return reply_consumer
+
+    @pytest.mark.asyncio
+    async def test_add_many(self, *, reply_consumer):
+        barrier = BarrierState('reply_to')
+        await reply_consumer.add_many(['a', 'b'], barrier)
+        assert reply_consumer._waiting == {'a': barrier, 'b': barrier}
+        reply_consumer.discard(['a', 'c'])
+        assert reply_consumer._waiting == {'b': barrier}
+
+    @pytest.mark.asyncio
+    async def test_drain_replies(self, *, reply_consumer):
+        p1 = ReplyPromise('reply_to', 'p1')
+        p2 = ReplyPromise('reply_to', 'p2')
+        barrier = BarrierState('reply_to')
+        await reply_consumer.add('p1', p1)
+        await reply_consumer.add('p2', p2)
+        await reply_consumer.add_many(['b1', 'b2'], barrier)
+        barrier.add_many(2)
+        barrier.finalize()
+        p2.cancel()
+        channel = Mock(name='channel')
+        channel.stream.return_value = aiter([
+            ReqRepResponse(key=None, value=v, correlation_id=cid)
+            for cid, v in [('p1', 1), ('b2', 2), ('p2', 3),
+                           ('b1', 4), ('b1', 5), ('unknown', 6)]
+        ])
+        await reply_consumer._drain_replies(channel)
+        assert p1.result() == 1
+        assert barrier.done()
+        assert [tuple(r) async for r in barrier.iterate()] == [
+            ('b2', 2), ('b1', 4)]
+        assert not reply_consumer._waiting
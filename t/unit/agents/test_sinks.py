@@ -0,0 +1,91 @@
+import asyncio
+import pytest
+from faust.agents.sinks import SinkBuffer
+from mode.utils.mocks import AsyncMock, Mock
+
+
+class test_SinkBuffer:
+
+    @pytest.fixture
+    def deliver(self):
+        return AsyncMock(name='deliver')
+
+    @pytest.fixture
+    def app(self):
+        app = Mock(name='app')
+        app.add_future.side_effect = asyncio.ensure_future
+        return app
+
+    def buffer(self, app, deliver, **kwargs):
+        return SinkBuffer(app, deliver, **kwargs)
+
+    @pytest.mark.asyncio
+    async def test_size(self, *, app, deliver):
+        buffer = self.buffer(app, deliver, size=2)
+        event = Mock(name='event')
+        await buffer.add(1, event)
+        await buffer.add(2, None)
+        await buffer.add(3, None)
+        deliver.assert_called_once_with([1, 2])
+        event.message.incref.assert_called_once_with()
+        event.ack.assert_called_once_with()
+        app.sensors.on_message_out.assert_called_once_with(
+            event.message.tp, event.message.offset, event.message)
+        await buffer.close()
+        deliver.assert_called_with([3])
+
+    @pytest.mark.asyncio
+    async def test_not_last_ack(self, *, app, deliver):
+        buffer = self.buffer(app, deliver)
+        event = Mock(name='event')
+        event.ack.return_value = False
+        await buffer.add(1, event)
+        await buffer.flush()
+        event.ack.assert_called_once_with()
+        app.sensors.on_message_out.assert_not_called()
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize('ack_exceptions', [True, False])
+    async def test_flush__error(self, ack_exceptions, *, app, deliver):
+        deliver.coro.side_effect = KeyError()
+        buffer = self.buffer(app, deliver, ack_exceptions=ack_exceptions)
+        event = Mock(name='event')
+        await buffer.add(1, event)
+        with pytest.raises(KeyError):
+            await buffer.flush()
+        assert event.ack.called == ack_exceptions
+        assert not buffer.values
+        assert not buffer.events
+
+    def test_ack_exceptions__default(self, *, app, deliver):
+        app.conf.stream_ack_exceptions = False
+        assert not self.buffer(app, deliver).ack_exceptions
+
+    @pytest.mark.asyncio
+    async def test_timeout(self, *, app, deliver):
+        buffer = self.buffer(app, deliver, size=100, timeout=0.01)
+        await buffer.add(1, None)
+        await buffer.add(2, None)
+        deliver.assert_not_called()
+        await asyncio.sleep(0.05)
+        deliver.assert_called_once_with([1, 2])
+        assert buffer._timer is None
+        app.add_future.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_timeout__error(self, *, app, deliver):
+        deliver.coro.side_effect = KeyError()
+        buffer = self.buffer(app, deliver, timeout=0.01)
+        await buffer.add(1, None)
+        await asyncio.sleep(0.05)
+        with pytest.raises(KeyError):
+            await buffer.add(2, None)
+        assert buffer.error is None
+
+    @pytest.mark.asyncio
+    async def test_cancel(self, *, app, deliver):
+        buffer = self.buffer(app, deliver, timeout=0.01)
+        await buffer.add(1, None)
+        buffer.cancel()
+        await asyncio.sleep(0.05)
+        deliver.assert_not_called()
@@ -0,0 +1,53 @@
+import pytest
+from faust.app._attached import Attachments
+from faust.types import Message, TP
+from mode.utils.mocks import AsyncMock, Mock
+
+TP1 = TP('foo', 0)
+TP2 = TP('foo', 1)
+
+
+class test_Attachments:
+
+    @pytest.fixture
+    def attachments(self, *, app):
+        return Attachments(app)
+
+    def message(self, tp, offset):
+        return Mock(name='message', autospec=Message, tp=tp, offset=offset)
+
+    @pytest.mark.asyncio
+    async def test_publish_for_tp_offsets(self, *, attachments, app):
+        topic = app.topic('bar')
+        topic.publish_many = AsyncMock(name='publish_many')
+        channel = app.channel()
+        channel.publish_message = AsyncMock(name='publish_message')
+        futs = [
+            attachments.put(self.message(TP1, 1), topic, b'k', b'1'),
+            attachments.put(self.message(TP1, 2), channel, b'k', b'2'),
+            attachments.put(self.message(TP2, 1), topic, b'k', b'3'),
+            attachments.put(self.message(TP1, 3), topic, b'k', b'4'),
+        ]
+        pending = await attachments.publish_for_tp_offsets({TP1: 2, TP2: 9})
+        topic.publish_many.assert_called_once_with([futs[0], futs[2]])
+        channel.publish_message.assert_called_once_with(futs[1], wait=False)
+        assert pending == [
+            topic.publish_many.coro(),
+            channel.publish_message.coro(),
+        ]
+        assert [a.message for a in attachments._pending[TP1]] == [futs[3]]
+        assert not attachments._pending[TP2]
+
+        assert await attachments.publish_for_tp_offset(TP1, 2) == []
+        await attachments.publish_for_tp_offset(TP1, 3)
+        topic.publish_many.assert_called_with([futs[3]])
+
+    def test_attachments_for__out_of_order(self, *, attachments, app):
+        topic = app.topic('bar')
+        futs = [
+            attachments.put(self.message(TP1, offset), topic, b'k', b'v')
+            for offset in (1, 3, 2)
+        ]
+        # the message attached to offset 2 is sent with offset 3.
+        assert list(attachments._attachments_for(TP1, 2)) == [futs[0]]
+        assert list(attachments._attachments_for(TP1, 3)) == futs[1:]
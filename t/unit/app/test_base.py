@@ -400,7 +400,8 @@ class test_App:
 
         app.conf.datadir.mkdir.assert_called_once_with(exist_ok=True)
         app.conf.appdir.mkdir.assert_called_once_with(exist_ok=True)
-        app.conf.tabledir.mkdir.assert_called_once_with(exist_ok=True)
+        app.conf.tabledir.mkdir.assert_called_once_with(
+            parents=True, exist_ok=True)
 
     def test_repr(self, *, app):
         assert repr(app)
@@ -0,0 +1,122 @@
+import asyncio
+import pytest
+from faust.app.router import Router
+from faust.exceptions import SameNode
+from faust.web.exceptions import ServiceUnavailable
+from mode.utils.mocks import AsyncContextManagerMock, AsyncMock, Mock
+from yarl import URL
+
+
+class test_Router:
+
+    @pytest.fixture
+    def router(self, *, app):
+        app.conf.canonical_url = 'http://localhost:6066'
+        router = app.router
+        router.key_store = Mock(
+            name='key_store', return_value=URL('http://other:6066'))
+        return router
+
+    @pytest.fixture
+    def web(self):
+        web = Mock(name='web')
+        web.url_for.return_value = '/table/foo/'
+        return web
+
+    def _http_client(self, app, values=None):
+        # the response has the value of every key posted, one per line.
+        response = Mock(name='response')
+        app.http_client = Mock(name='http_client')
+
+        def post(url, json):
+            return AsyncContextManagerMock(return_value=Mock(
+                name='response',
+                raise_for_status=response.raise_for_status,
+                read=AsyncMock(return_value=b'\n'.join(
+                    (values or {}).get(key, b'') for key in json)),
+            ))
+        app.http_client.post.side_effect = post
+        return response
+
+    def test_init(self, *, app):
+        assert Router(app)._batches == {}
+
+    @pytest.mark.asyncio
+    async def test_route_key_req__same_node(self, *, router, web):
+        router.key_store.return_value = URL('http://localhost:6066')
+        with pytest.raises(SameNode):
+            await router.route_key_req('foo', 'k', web)
+
+    @pytest.mark.asyncio
+    async def test_route_key_req__no_route(self, *, router, web):
+        router.key_store.side_effect = KeyError()
+        with pytest.raises(ServiceUnavailable):
+            await router.route_key_req('foo', 'k', web)
+
+    @pytest.mark.asyncio
+    async def test_route_key_req__batches(self, *, app, router, web):
+        self._http_client(app, values={'a': b'"1"', 'c': b'"3"'})
+        results = await asyncio.gather(
+            router.route_key_req('foo', 'a', web),
+            router.route_key_req('foo', 'b', web),
+            router.route_key_req('foo', 'c', web),
+            router.route_key_req('foo', 'a', web),
+            return_exceptions=True,
+        )
+        app.http_client.post.assert_called_once()
+        url, = app.http_client.post.call_args[0]
+        assert url == URL('http://other:6066/table/foo/')
+        assert sorted(app.http_client.post.call_args[1]['json']) == [
+            'a', 'b', 'c']
+        web.url_for.assert_called_once_with('tables:detail', name='foo')
+        assert results[0] is web.bytes.return_value
+        assert isinstance(results[1], KeyError)
+        assert results[2] is web.bytes.return_value
+        assert results[3] is web.bytes.return_value
+        assert sorted(c[0][0] for c in web.bytes.call_args_list) == [
+            b'"1"', b'"1"', b'"3"']
+        assert not router._batches
+
+    @pytest.mark.asyncio
+    async def test_route_key_req__max_batch_size(self, *, app, router, web):
+        router.max_batch_size = 2
+        self._http_client(app, values={
+            'a': b'"1"', 'b': b'"2"', 'c': b'"3"', 'd': b'"4"'})
+        await asyncio.gather(
+            router.route_key_req('foo', 'a', web),
+            router.route_key_req('foo', 'b', web),
+            router.route_key_req('foo', 'c', web),
+            router.route_key_req('foo', 'd', web),
+        )
+        batches = [c[1]['json'] for c in app.http_client.post.call_args_list]
+        assert sorted(len(batch) for batch in batches) == [2, 2]
+        assert sorted(key for batch in batches for key in batch) == [
+            'a', 'b', 'c', 'd']
+        assert sorted(c[0][0] for c in web.bytes.call_args_list) == [
+            b'"1"', b'"2"', b'"3"', b'"4"']
+
+    @pytest.mark.asyncio
+    async def test_route_key_req__error(self, *, app, router, web):
+        response = self._http_client(app)
+        response.raise_for_status.side_effect = ServiceUnavailable()
+        with pytest.raises(ServiceUnavailable):
+            await router.route_key_req('foo', 'a', web)
+
+    @pytest.mark.asyncio
+    async def test_route_req(self, *, app, router, web):
+        response = Mock(
+            name='response',
+            status=404,
+            content_type='application/json',
+            read=AsyncMock(return_value=b'{}'),
+        )
+        app.http_client = Mock(name='http_client')
+        app.http_client.get.return_value = AsyncContextManagerMock(
+            return_value=response)
+        request = Mock(name='request', url=URL('http://localhost:6066/t/'))
+        assert await router.route_req(
+            'foo', 'k', web, request) is web.bytes.return_value
+        app.http_client.get.assert_called_once_with(
+            URL('http://other:6066/t/'))
+        web.bytes.assert_called_once_with(
+            b'{}', content_type='application/json', status=404)
@@ -46,12 +46,22 @@ class test_AppService:
         assert components == expected_components
 
     @pytest.mark.asyncio
-    async def test_on_first_start(self, *, app):
-        app.agents = Mock(name='agents')
+    @pytest.mark.parametrize('producer_only,client_only,started', [
+        (False, False, True),
+        (True, False, False),
+        (False, True, False),
+    ])
+    async def test_on_first_start(
+            self, producer_only, client_only, started, *, app):
+        agent = Mock(name='agent', start_executor=AsyncMock())
+        app.agents = {'agent': agent}
+        app.producer_only = producer_only
+        app.client_only = client_only
         app._create_directories = Mock(name='app._create_directories')
         await app.on_first_start()
 
         app._create_directories.assert_called_once_with()
+        assert agent.start_executor.called == started
 
     @pytest.mark.asyncio
     async def test_on_start(self, *, app):
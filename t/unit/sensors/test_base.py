@@ -1,6 +1,6 @@
 import pytest
 from faust import Event, Stream, Table, Topic
-from faust.sensors import Sensor
+from faust.sensors import Sensor, SensorBatch
 from faust.transport.consumer import Consumer
 from faust.transport.producer import Producer
 from faust.types import Message, TP
@@ -86,12 +86,16 @@ class test_Sensor:
     def test_on_send_completed(self, *, sensor, producer):
         sensor.on_send_completed(producer, Mock(name='state'))
 
+    def test_on_batch(self, *, sensor):
+        sensor.on_batch(SensorBatch())
+
 
 class test_SensorDelegate:
 
     @pytest.fixture
     def sensor(self):
-        return Mock(name='sensor', autospec=Sensor)
+        return Mock(
+            name='sensor', autospec=Sensor, per_message=True, batched=False)
 
     @pytest.fixture
     def sensors(self, *, app, sensor):
@@ -155,5 +159,69 @@ class test_SensorDelegate:
         sensor.on_send_completed.assert_called_once_with(
             producer, state[sensor])
 
+    def test_flush_batch__no_batched_sensors(self, *, sensors, sensor):
+        assert sensors._batch is None
+        sensors.flush_batch()
+        sensor.on_batch.assert_not_called()
+
     def test_repr(self, *, sensors):
         assert repr(sensors)
+
+
+class test_SensorDelegate_batched:
+
+    @pytest.fixture
+    def sensor(self):
+        return Mock(
+            name='sensor', autospec=Sensor, per_message=False, batched=True)
+
+    @pytest.fixture
+    def sensors(self, *, app, sensor):
+        sensors = app.sensors
+        sensors.add(sensor)
+        return sensors
+
+    @pytest.fixture
+    def message(self):
+        return Mock(name='message', autospec=Message, time_in=None)
+
+    def test_per_message_hooks_not_called(self, *, sensors, sensor,
+                                          message, stream, event):
+        sensors.on_message_in(TP1, 303, message)
+        sensors.on_stream_event_in(TP1, 303, stream, event)
+        sensors.on_stream_event_out(TP1, 303, stream, event)
+        sensors.on_message_out(TP1, 303, message)
+        sensor.on_message_in.assert_not_called()
+        sensor.on_stream_event_in.assert_not_called()
+        sensor.on_stream_event_out.assert_not_called()
+        sensor.on_message_out.assert_not_called()
+
+    def test_flush_batch(self, *, sensors, sensor, message, stream, event):
+        sensors.on_message_in(TP1, 303, message)
+        sensors.on_stream_event_in(TP1, 303, stream, event)
+        sensors.on_stream_event_out(TP1, 303, stream, event)
+        sensors.on_message_out(TP1, 303, message)
+        sensors.on_message_in(TP1, 304, message)
+
+        sensors.flush_batch()
+        sensor.on_batch.assert_called_once()
+        batch = sensor.on_batch.call_args[0][0]
+        assert batch.time_end is not None
+        stats = batch.tps[TP1]
+        assert stats.messages_in == 2
+        assert stats.messages_out == 1
+        assert stats.events_in == 1
+        assert stats.events_out == 1
+        assert stats.last_offset_in == 304
+        assert stats.last_offset_out == 303
+        assert stats.latency.count == 1
+        assert batch.events_by_stream[stream] == 1
+
+        sensor.on_batch.reset_mock()
+        sensors.flush_batch()
+        assert not sensor.on_batch.call_args[0][0].tps
+
+    def test_remove(self, *, sensors, sensor):
+        assert sensors._batch is not None
+        sensors.remove(sensor)
+        assert sensors._batch is None
@@ -0,0 +1,68 @@
+import pytest
+from faust.sensors.batch import SensorBatch, TPStats
+from faust.types import Message, TP
+from mode.utils.mocks import Mock
+
+TP1 = TP('foo', 0)
+TP2 = TP('foo', 1)
+
+
+class test_SensorBatch:
+
+    @pytest.fixture
+    def time(self):
+        timefun = Mock(name='time()')
+        timefun.return_value = 101.1
+        return timefun
+
+    @pytest.fixture
+    def batch(self, *, time):
+        return SensorBatch(time=time)
+
+    @pytest.fixture
+    def message(self):
+        return Mock(name='message', autospec=Message, time_in=None)
+
+    def test_message_latency(self, *, batch, time, message):
+        batch.on_message_in(TP1, 3, message)
+        assert message.time_in == 101.1
+        time.return_value = 101.6
+        batch.on_message_out(TP1, 3, message)
+        stats = batch.tps[TP1]
+        assert stats.latency.count == 1
+        assert stats.latency.max == pytest.approx(0.5)
+
+    def test_on_message_out__no_time_in(self, *, batch, message):
+        batch.on_message_out(TP1, 3, message)
+        assert batch.tps[TP1].messages_out == 1
+        assert not batch.tps[TP1].latency.count
+
+    def test_totals(self, *, batch, message):
+        stream = Mock(name='stream')
+        event = Mock(name='event')
+        batch.on_message_in(TP1, 3, message)
+        batch.on_message_in(TP2, 4, message)
+        batch.on_stream_event_in(TP1, 3, stream, event)
+        batch.on_stream_event_out(TP1, 3, stream, event)
+        batch.on_message_out(TP2, 4, message)
+        assert batch.messages_in == 2
+        assert batch.messages_out == 1
+        assert batch.events_in == 1
+        assert batch.events_out == 1
+        assert batch.latency().count == 1
+        assert repr(batch)
+
+    def test_interval(self, *, batch, time):
+        time.return_value = 102.1
+        assert batch.interval == pytest.approx(1.0)
+        batch.finish()
+        time.return_value = 110.0
+        assert batch.interval == pytest.approx(1.0)
+
+    def test_asdict(self, *, batch, message):
+        batch.on_message_in(TP1, 3, message)
+        assert batch.asdict()['tps'][TP1]['messages_in'] == 1
+
+
+def test_TPStats_asdict():
+    assert TPStats().asdict()['messages_in'] == 0
@@ -0,0 +1,170 @@
+import pytest
+from faust.sensors.histogram import Histogram, SlidingHistogram
+
+
+class test_Histogram:
+
+    @pytest.fixture
+    def h(self):
+        return Histogram()
+
+    def test_empty(self, *, h):
+        assert h.count == 0
+        assert h.mean == 0.0
+        assert h.percentile(99.0) == 0.0
+        assert h.asdict()['p999'] == 0.0
+
+    def test_record(self, *, h):
+        for value in (0.001, 0.002, 0.25):
+            h.record(value)
+        assert h.count == 3
+        assert h.min == 0.001
+        assert h.max == 0.25
+        assert h.mean == pytest.approx(0.253 / 3)
+        assert h.percentile(99.0) == 0.25
+        assert h.percentile(0.0) == pytest.approx(0.001, rel=0.02)
+
+    @pytest.mark.parametrize('percentile', [50.0, 90.0, 99.0, 99.9])
+    def test_percentile_precision(self, percentile, *, h):
+        values = [i / 10000.0 for i in range(1, 100001)]
+        for value in values:
+            h.record(value)
+        expected = values[int(len(values) * percentile / 100.0) - 1]
+        assert h.percentile(percentile) == pytest.approx(expected, rel=0.02)
+
+    def test_memory_is_bounded(self, *, h):
+        for i in range(100000):
+            h.record(i / 1000.0)
+        assert len(h.buckets) < 2000
+
+    def test_negative_value(self, *, h):
+        h.record(-1.0)
+        assert h.count == 1
+
+    def test_merge(self, *, h):
+        h.record(0.1)
+        other = Histogram()
+        other.record(0.01)
+        other.record(0.5)
+        h.merge(other)
+        assert h.count == 3
+        assert h.min == 0.01
+        assert h.max == 0.5
+        assert h.total == pytest.approx(0.61)
+
+    def test_merge__empty(self, *, h):
+        h.record(0.1)
+        h.merge(Histogram())
+        assert h.count == 1
+
+    def test_merge__incompatible(self, *, h):
+        with pytest.raises(ValueError):
+            h.merge(Histogram(precision=3))
+
+    def test_reset(self, *, h):
+        h.record(0.1)
+        h.reset()
+        assert h.count == 0
+        assert not h.buckets
+
+    def test_asdict(self, *, h):
+        h.record(0.1)
+        assert set(h.asdict()) == {
+            'count', 'min', 'max', 'mean',
+            'p50', 'p75', 'p95', 'p99', 'p999',
+        }
+
+    @pytest.mark.parametrize('percentile,key', [
+        (50.0, 'p50'),
+        (99.0, 'p99'),
+        (99.9, 'p999'),
+    ])
+    def test_percentile_key(self, percentile, key):
+        assert Histogram.percentile_key(percentile) == key
+
+    def test_repr(self, *, h):
+        assert repr(h)
+
+
+class test_SlidingHistogram:
+
+    @pytest.fixture
+    def clock(self):
+        return Clock()
+
+    @pytest.fixture
+    def h(self, *, clock):
+        return SlidingHistogram(window=60.0, window_buckets=6, clock=clock)
+
+    def test_empty(self, *, h):
+        assert h.count == 0
+        assert h.mean == 0.0
+        assert h.percentile(99.0) == 0.0
+        assert h.asdict()['count'] == 0
+
+    def test_record(self, *, h):
+        for value in (0.001, 0.002, 0.25):
+            h.record(value)
+        assert h.count == 3
+        assert h.total == pytest.approx(0.253)
+        assert h.min == 0.001
+        assert h.max == 0.25
+        assert h.mean == pytest.approx(0.253 / 3)
+        assert h.percentile(99.0) == 0.25
+        assert h.asdict()['count'] == 3
+
+    def test_window_slides(self, *, h, clock):
+        h.record(10.0)
+        clock.now += 30.0
+        h.record(0.1)
+        assert h.percentile(99.0) == 10.0
+        clock.now += 30.0
+        assert h.percentile(99.0) == pytest.approx(0.1, rel=0.02)
+        assert h.max == pytest.approx(0.1, rel=0.02)
+        clock.now += 30.0
+        assert h.percentile(99.0) == 0.0
+        assert h.asdict()['count'] == 0
+        # count and total are kept for the lifetime of the histogram.
+        assert h.count == 2
+        assert h.total == pytest.approx(10.1)
+
+    def test_window_slides__idle(self, *, h, clock):
+        h.record(10.0)
+        clock.now += 3600.0
+        assert h.percentile(99.0) == 0.0
+        assert len(h.histograms) == 6
+        h.record(0.1)
+        assert h.max == pytest.approx(0.1, rel=0.02)
+
+    def test_merge(self, *, h):
+        h.record(0.1)
+        other = Histogram()
+        other.record(0.01)
+        other.record(0.5)
+        h.merge(other)
+        assert h.count == 3
+        assert h.min == 0.01
+        assert h.max == 0.5
+        assert h.total == pytest.approx(0.61)
+
+    def test_merge__incompatible(self, *, h):
+        with pytest.raises(ValueError):
+            h.merge(Histogram(precision=3))
+
+    def test_reset(self, *, h):
+        h.record(0.1)
+        h.reset()
+        assert h.count == 0
+        assert h.asdict()['count'] == 0
+
+    def test_repr(self, *, h):
+        assert repr(h)
+
+
+class Clock:
+
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
@@ -4,6 +4,8 @@ from faust import Event, Stream, Table, Topic
 from faust.transport.consumer import Consumer
 from faust.transport.producer import Producer
 from faust.types import Message, TP
+from faust.sensors.batch import SensorBatch
+from faust.sensors.histogram import Histogram
 from faust.sensors.monitor import Monitor, TableState
 from mode.utils.mocks import AsyncMock, Mock
 
@@ -59,10 +61,14 @@ class test_Monitor:
             events_runtime_avg=0.03,
             events_by_task={'mytask': 105},  # noqa
             events_by_stream={'stream': 105},  # noqa
-            commit_latency=[1.03, 2.33, 16.33],  # noqa
-            send_latency=[0.01, 0.04, 0.06, 0.010],  # noqa
+            commit_latency=None,
+            send_latency=None,
             topic_buffer_full={'topic': 808},  # noqa
             **kwargs):
+        if commit_latency is None:
+            commit_latency = self.create_histogram(1.03, 2.33, 16.33)
+        if send_latency is None:
+            send_latency = self.create_histogram(0.01, 0.04, 0.06, 0.010)
         return self.create_monitor(
             messages_active=messages_active,
             messages_received_total=messages_received_total,
@@ -80,6 +86,12 @@ class test_Monitor:
             topic_buffer_full=topic_buffer_full,
             **kwargs)
 
+    def create_histogram(self, *values: float) -> Histogram:
+        histogram = Histogram()
+        for value in values:
+            histogram.record(value)
+        return histogram
+
     def test_asdict(self):
         mon = self.create_populated_monitor()
         assert mon.asdict() == {
@@ -93,10 +105,14 @@ class test_Monitor:
             'events_total': mon.events_total,
             'events_s': mon.events_s,
             'events_runtime_avg': mon.events_runtime_avg,
+            'events_runtime': mon.events_runtime.asdict(),
+            'events_runtime_by_stream': {},
             'events_by_task': mon._events_by_task_dict(),
             'events_by_stream': mon._events_by_stream_dict(),
-            'commit_latency': mon.commit_latency,
-            'send_latency': mon.send_latency,
+            'message_latency_by_topic': {},
+            'commit_latency': mon.commit_latency.asdict(),
+            'commit_interval': mon.commit_interval,
+            'send_latency': mon.send_latency.asdict(),
             'topic_buffer_full': mon._topic_buffer_full_dict(),
             'metric_counts': mon._metric_counts_dict(),
             'tables': {
@@ -107,50 +123,6 @@ class test_Monitor:
             'topic_end_offsets': {},
         }
 
-    def test_cleanup(self, *, mon):
-        mon._cleanup_max_avg_history = Mock(name='cleanup_max_avg')
-        mon._cleanup_commit_latency_history = Mock(name='cleanup_commit')
-        mon._cleanup_send_latency_history = Mock(name='cleanup_send')
-
-        mon._cleanup()
-
-        mon._cleanup_max_avg_history.assert_called_once_with()
-        mon._cleanup_commit_latency_history.assert_called_once_with()
-        mon._cleanup_send_latency_history.assert_called_once_with()
-
-    def test_cleanup_max_avg_history(self, *, mon):
-        mon.max_avg_history = 10
-
-        mon.events_runtime = list(range(5))
-        mon._cleanup_max_avg_history()
-        assert mon.events_runtime == list(range(5))
-
-        mon.events_runtime.extend(list(range(10)))
-        mon._cleanup_max_avg_history()
-        assert mon.events_runtime == list(range(10))
-
-    def test_cleanup_commit_latency_history(self, *, mon):
-        mon.max_commit_latency_history = 10
-
-        mon.commit_latency = list(range(5))
-        mon._cleanup_commit_latency_history()
-        assert mon.commit_latency == list(range(5))
-
-        mon.commit_latency.extend(list(range(10)))
-        mon._cleanup_commit_latency_history()
-        assert mon.commit_latency == list(range(10))
-
-    def test_cleanup_send_latency_history(self, *, mon):
-        mon.max_send_latency_history = 10
-
-        mon.send_latency = list(range(5))
-        mon._cleanup_send_latency_history()
-        assert mon.send_latency == list(range(5))
-
-        mon.send_latency.extend(list(range(10)))
-        mon._cleanup_send_latency_history()
-        assert mon.send_latency == list(range(10))
-
     def test_on_message_in(self, *, message, mon, time):
         for i in range(1, 11):
             offset = 3 + i
@@ -195,7 +167,11 @@ class test_Monitor:
                 'time_out': time(),
                 'time_total': time() - other_time,
             }
-            assert mon.events_runtime[-1] == time() - other_time
+            assert mon.events_runtime.count == i
+            assert mon.events_runtime.max == pytest.approx(
+                time() - other_time)
+            assert mon.events_runtime_by_stream[stream].count == i
+        assert mon.asdict()['events_runtime_by_stream']
 
     def test_on_topic_buffer_full(self, *, mon, topic):
         for i in range(1, 11):
@@ -213,6 +189,25 @@ class test_Monitor:
             assert mon.messages_active == 10 - i
             assert message.time_out == time()
             assert message.time_total == time() - message.time_in
+            assert mon.message_latency_by_topic[TP1.topic].count == i
+        assert mon.asdict()['message_latency_by_topic'][TP1.topic]
+
+    def test_on_batch(self, *, mon, stream):
+        batch = SensorBatch(time=Mock(name='time', return_value=1.0))
+        message = Mock(name='message', time_in=None)
+        batch.on_message_in(TP1, 3, message)
+        batch.on_message_in(TP1, 4, Mock(name='message2', time_in=None))
+        batch.on_stream_event_in(TP1, 3, stream, Mock(name='event'))
+        batch.on_message_out(TP1, 3, message)
+        mon.on_batch(batch)
+        assert mon.messages_received_total == 2
+        assert mon.messages_received_by_topic[TP1.topic] == 2
+        assert mon.messages_active == 1
+        assert mon.events_total == 1
+        assert mon.events_active == 1
+        assert mon.events_by_stream[stream] == 1
+        assert mon.tp_read_offsets[TP1] == 4
+        assert mon.message_latency_by_topic[TP1.topic].count == 1
 
     def test_on_table_get(self, *, mon, table):
         for i in range(1, 11):
@@ -235,9 +230,12 @@ class test_Monitor:
 
     def test_on_commit_completed(self, *, mon, time):
         other_time = 56.7
-        mon.on_commit_completed(
-            Mock(name='consumer', autospec=Consumer), other_time)
-        assert mon.commit_latency[-1] == time() - other_time
+        consumer = Mock(name='consumer', autospec=Consumer)
+        consumer.commit_policy.interval = 5.6
+        mon.on_commit_completed(consumer, other_time)
+        assert mon.commit_latency.count == 1
+        assert mon.commit_latency.max == pytest.approx(time() - other_time)
+        assert mon.commit_interval == 5.6
 
     def test_on_send_initiated(self, *, mon, time):
         for i in range(1, 11):
@@ -251,7 +249,8 @@ class test_Monitor:
         other_time = 56.7
         mon.on_send_completed(
             Mock(name='producer', autospec=Producer), other_time)
-        assert mon.send_latency[-1] == time() - other_time
+        assert mon.send_latency.count == 1
+        assert mon.send_latency.max == pytest.approx(time() - other_time)
 
     def test_TableState_asdict(self, *, mon, table):
         state = mon._table_or_create(table)
@@ -297,16 +296,18 @@ class test_Monitor:
         mon = Monitor()
 
         i = 0
-        mon.events_runtime = []
         mon.sleep = AsyncMock(name='sleep')
 
-        def on_cleanup():
+        async def on_sleep(seconds):
             nonlocal i
-            mon.events_runtime.append(i + 0.34)
+            mon.events_runtime.record(i + 0.34)
+            mon.events_runtime.record(i + 0.36)
+            mon.events_total += 2
             i += 1
             if i > 10:
                 mon._stopped.set()
-        mon._cleanup = Mock(name='_cleanup')
-        mon._cleanup.side_effect = on_cleanup
+        mon.sleep.side_effect = on_sleep
 
         await mon._sampler(mon)
+        assert mon.events_runtime_avg == pytest.approx(10.35)
+        assert mon.events_s == 2
@@ -0,0 +1,139 @@
+import asyncio
+import threading
+import pytest
+from faust.sensors.profiler import AgentProfile, ProfiledAwaitable, Profiler
+from mode.utils.compat import Counter
+from mode.utils.mocks import Mock
+
+
+class test_AgentProfile:
+
+    def test_record(self):
+        profile = AgentProfile()
+        profile.record(0.5, 0.25)
+        profile.record(1.5, 0.75)
+        assert profile.steps == 2
+        assert profile.wall_time == 2.0
+        assert profile.cpu_time == 1.0
+        assert profile.step_time.count == 2
+        d = profile.asdict()
+        assert d['steps'] == 2
+        assert d['step_time']['count'] == 2
+
+
+class test_ProfiledAwaitable:
+
+    @pytest.mark.asyncio
+    async def test_records_steps(self):
+        async def agent():
+            for _ in range(3):
+                await asyncio.sleep(0)
+            return 42
+
+        profile = AgentProfile()
+        assert await ProfiledAwaitable(agent(), profile) == 42
+        assert profile.steps == 4
+
+    @pytest.mark.asyncio
+    async def test_propagates_exception(self):
+        async def agent():
+            await asyncio.sleep(0)
+            raise KeyError('foo')
+
+        profile = AgentProfile()
+        with pytest.raises(KeyError):
+            await ProfiledAwaitable(agent(), profile)
+        assert profile.steps == 2
+
+    @pytest.mark.asyncio
+    async def test_cancel(self):
+        cancelled = asyncio.Event()
+
+        async def agent():
+            try:
+                await asyncio.sleep(10.0)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+
+        async def run():
+            await ProfiledAwaitable(agent(), AgentProfile())
+
+        task = asyncio.ensure_future(run())
+        await asyncio.sleep(0)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        assert cancelled.is_set()
+
+
+class test_Profiler:
+
+    @pytest.fixture
+    def profiler(self):
+        return Profiler(interval=0.01, sample_interval=0.001)
+
+    def test_per_message(self, *, profiler):
+        assert not profiler.per_message
+        assert not profiler.batched
+
+    def test_profile(self, *, profiler):
+        coro = Mock(name='coro')
+        ret = profiler.profile('agent1', coro)
+        assert isinstance(ret, ProfiledAwaitable)
+        assert ret.awaitable is coro
+        assert ret.profile is profiler.agents['agent1']
+        assert profiler.profile('agent1', coro).profile is ret.profile
+
+    @pytest.mark.asyncio
+    async def test_loop_lag_sampler(self, *, profiler):
+        times = iter([1.0, 1.2, 2.0, 2.01])
+
+        def on_sleep(n):
+            if profiler.loop_lag.count == 1:
+                profiler._stopped.set()
+
+        profiler.time = lambda: next(times)
+        profiler.sleep = Mock(name='sleep', side_effect=_async(on_sleep))
+        await profiler._loop_lag_sampler(profiler)
+        assert profiler.loop_lag.count == 2
+        assert profiler.loop_lag.max == pytest.approx(0.19, rel=0.02)
+        assert profiler.loop_lag_last == 0.0
+
+    @pytest.mark.asyncio
+    async def test_snapshot(self, *, profiler):
+        stacks = await profiler.snapshot(0.05)
+        assert stacks
+        assert profiler.format_snapshot(stacks)
+
+    @pytest.mark.asyncio
+    async def test_snapshot__samples_loop_thread(self, *, profiler):
+        await profiler.on_start()
+        assert profiler.loop_thread_id == threading.get_ident()
+        profiler.loop_thread_id = 303
+        profiler.sample_stacks = Mock(name='sample_stacks')
+        await profiler.snapshot(0.05)
+        profiler.sample_stacks.assert_called_once_with(303, 0.05)
+
+    def test_sample_stacks(self, *, profiler):
+        stacks = profiler.sample_stacks(threading.get_ident(), 0.01)
+        assert any('sample_stacks' in stack for stack in stacks)
+
+    def test_format_snapshot(self):
+        stacks = Counter({'a;b': 1, 'a;c': 3})
+        assert Profiler.format_snapshot(stacks) == 'a;c 3\na;b 1\n'
+
+    def test_asdict(self, *, profiler):
+        profiler.profile('agent1', Mock(name='coro'))
+        profiler.loop_lag.record(0.1)
+        profiler.loop_lag_last = 0.1
+        d = profiler.asdict()
+        assert d['loop_lag']['last'] == 0.1
+        assert d['loop_lag']['count'] == 1
+        assert d['agents']['agent1']['steps'] == 0
+
+
+def _async(fun):
+    async def _inner(*args, **kwargs):
+        return fun(*args, **kwargs)
+    return _inner
@@ -0,0 +1,141 @@
+import pytest
+from faust.sensors.histogram import SlidingHistogram
+from faust.sensors.monitor import TableState
+from faust.sensors.prometheus import (
+    CONTENT_TYPE,
+    MetricFamily,
+    PrometheusMonitor,
+    setup_prometheus_sensors,
+)
+from faust.types import TP
+from mode.utils.mocks import Mock
+
+TP1 = TP('foo', 3)
+
+
+class test_MetricFamily:
+
+    def test_render(self):
+        family = MetricFamily('faust_x_total', 'counter', 'Help\ntext')
+        family.add(3, topic='foo')
+        family.add(4.5, topic='b"a\\r\n')
+        assert list(family.render()) == [
+            '# HELP faust_x_total Help\\ntext',
+            '# TYPE faust_x_total counter',
+            'faust_x_total{topic="foo"} 3.0',
+            'faust_x_total{topic="b\\"a\\\\r\\n"} 4.5',
+        ]
+
+    def test_render__no_labels(self):
+        family = MetricFamily('faust_x', 'gauge', 'Help')
+        family.add(None)
+        assert list(family.render())[-1] == 'faust_x NaN'
+
+    def test_add_histogram(self):
+        histogram = SlidingHistogram()
+        for value in (0.1, 0.2, 0.3):
+            histogram.record(value)
+        family = MetricFamily('faust_latency', 'summary', 'Help')
+        family.add_histogram(histogram, topic='foo')
+        lines = list(family.render())
+        assert 'faust_latency{quantile="0.5",topic="foo"}' in lines[2]
+        assert 'faust_latency{quantile="0.999",topic="foo"}' in lines[6]
+        assert lines[-2].startswith('faust_latency_sum{topic="foo"} 0.6')
+        assert lines[-1] == 'faust_latency_count{topic="foo"} 3.0'
+
+    def test_add_histogram__window(self):
+        clock = Mock(name='clock', return_value=1000.0)
+        histogram = SlidingHistogram(window=60.0, clock=clock)
+        histogram.record(10.0)
+        clock.return_value = 1060.0
+        histogram.record(0.1)
+        family = MetricFamily('faust_latency', 'summary', 'Help')
+        family.add_histogram(histogram)
+        lines = list(family.render())
+        assert lines[6].startswith('faust_latency{quantile="0.999"} 0.1')
+        assert lines[-2].startswith('faust_latency_sum 10.1')
+        assert lines[-1] == 'faust_latency_count 2.0'
+
+    def test_repr(self):
+        assert repr(MetricFamily('x', 'gauge', 'Help'))
+
+
+class test_PrometheusMonitor:
+
+    @pytest.fixture
+    def mon(self):
+        return PrometheusMonitor(prefix='my-app')
+
+    @pytest.fixture
+    def stream(self):
+        stream = Mock(name='stream')
+        stream.shortlabel = 'Stream: <Topic: withdrawals>'
+        return stream
+
+    @pytest.mark.parametrize('shortlabel,expected', [
+        ('Stream: <Topic: withdrawals>', 'topic_withdrawals'),
+        ('Stream: <Topic: tracks>', 'topic_tracks'),
+        ('Stream:tracks', 'tracks'),
+        ('Stream: maestro', 'maestro'),
+        ('<Channel: stats>', 'channel_stats'),
+    ])
+    def test_stream_label(self, shortlabel, expected, *, mon, stream):
+        stream.shortlabel = shortlabel
+        assert mon._stream_label(stream) == expected
+
+    def test_prefix(self, mon):
+        assert mon.prefix == 'my_app'
+
+    def test_expose(self, *, mon, stream):
+        table = Mock(name='table')
+        mon.messages_received_by_topic['foo'] = 10
+        mon.messages_sent_by_topic['bar'] = 5
+        mon.events_by_stream[stream] = 7
+        mon.tp_read_offsets[TP1] = 100
+        mon.tp_committed_offsets[TP1] = 90
+        mon.tp_end_offsets[TP1] = 120
+        mon.tables['table1'] = TableState(
+            table, keys_retrieved=1, keys_updated=2, keys_deleted=3)
+        mon.metric_counts['custom'] = 33
+        mon.commit_latency.record(0.5)
+        mon.message_latency_by_topic['foo'] = SlidingHistogram()
+        mon.message_latency_by_topic['foo'].record(0.25)
+
+        output = mon.expose()
+        assert output.endswith('\n')
+        lines = output.splitlines()
+        assert '# TYPE my_app_messages_received_total counter' in lines
+        assert 'my_app_messages_received_total{topic="foo"} 10.0' in lines
+        assert 'my_app_messages_sent_total{topic="bar"} 5.0' in lines
+        assert 'my_app_events_total{stream="topic_withdrawals"} 7.0' in lines
+        assert 'my_app_messages_active 0.0' in lines
+        assert ('my_app_read_offset{topic="foo",partition="3"} 100.0'
+                in lines)
+        assert ('my_app_committed_offset{topic="foo",partition="3"} 90.0'
+                in lines)
+        assert ('my_app_end_offset{topic="foo",partition="3"} 120.0'
+                in lines)
+        assert 'my_app_table_keys_updated_total{table="table1"} 2.0' in lines
+        assert ('my_app_metric_counts_total{metric="custom"} 33.0'
+                in lines)
+        assert '# TYPE my_app_commit_latency_seconds summary' in lines
+        assert 'my_app_commit_latency_seconds_count 1.0' in lines
+        assert ('my_app_message_latency_seconds_count{topic="foo"} 1.0'
+                in lines)
+
+    def test_expose__empty(self, *, mon):
+        lines = mon.expose().splitlines()
+        assert 'my_app_send_latency_seconds_count 0.0' in lines
+        assert not [line for line in lines if 'topic=' in line]
+
+
+def test_setup_prometheus_sensors():
+    app = Mock(name='app')
+    monitor = setup_prometheus_sensors(app, pattern='/m/', prefix='x')
+    assert isinstance(monitor, PrometheusMonitor)
+    assert app.monitor is monitor
+    assert monitor.prefix == 'x'
+    app.page.assert_called_once_with('/m/')
+    view = app.page.return_value.call_args[0][0]
+    assert view.get
+    assert CONTENT_TYPE.startswith('text/plain')
@@ -16,6 +16,17 @@ class test_Store:
         store._clear()
         assert not store.data
 
+    def test_scan(self, *, store):
+        store.data.update({'a': 1, 'b': 2, 'c': 3})
+        assert list(store.scan()) == [
+            ('1', 'a', 1), ('2', 'b', 2), ('3', 'c', 3)]
+        assert list(store.scan('2')) == [('3', 'c', 3)]
+        assert list(store.scan('3')) == []
+        with pytest.raises(ValueError):
+            list(store.scan('-1'))
+        with pytest.raises(ValueError):
+            list(store.scan('x'))
+
     def test_apply_changelog_batch(self, *, store):
         event, to_key, to_value = self.mock_event_to_key_value()
         store.apply_changelog_batch([event], to_key=to_key, to_value=to_value)
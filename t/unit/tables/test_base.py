@@ -331,6 +331,12 @@ class test_Collection:
             to_key=table._to_key,
             to_value=table._to_value,
         )
+        assert table.version == 1
+        assert table.key_version('foo') == 1
+
+    def test_epoch(self, *, app, table):
+        assert table.epoch
+        assert MyTable(app, name='name').epoch != table.epoch
 
     def test_to_key(self, *, table):
         assert table._to_key([1, 2, 3]) == (1, 2, 3)
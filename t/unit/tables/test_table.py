@@ -122,6 +122,19 @@ class test_Table:
             table._send_changelog.asssert_called_once_with('foo', None)
             assert 'foo' not in table.data
 
+    def test_key_version(self, *, table):
+        assert table.key_version('foo') == 0
+        with patch('faust.tables.table.current_event'):
+            table._send_changelog = Mock(name='_send_changelog')
+            table['foo'] = 1
+            assert table.key_version('foo') == 1
+            assert table.version == 1
+            del table['foo']
+            assert table.key_version('foo') == 2
+            assert table.version == 2
+        table._key_versions = [0] * table.key_version_slots
+        assert table.key_version('foo') == 0
+
     def test_as_ansitable(self, *, table):
         table.data['foo'] = 'bar'
         table.data['bar'] = 'baz'
@@ -4,7 +4,7 @@ import pytest
 from faust import Event, Record
 from faust.exceptions import ValueDecodeError
 from faust.types import Message
-from mode.utils.mocks import AsyncMock, Mock
+from mode.utils.mocks import ANY, AsyncMock, Mock, call, patch
 
 
 class Dummy(Record):
@@ -39,6 +39,86 @@ class test_Topic:
         message.message.callback = None
         topic._on_published(fut, message)
 
+    @pytest.mark.asyncio
+    async def test_send_many(self, *, topic):
+        topic.publish_many = AsyncMock(name='publish_many')
+        futs = await topic.send_many([('k1', 'v1'), ('k2', 'v2')],
+                                     partition=3, force=True)
+        topic.publish_many.assert_called_once_with(futs)
+        assert [(fut.message.key, fut.message.value, fut.message.partition)
+                for fut in futs] == [(b'k1', b'"v1"', 3), (b'k2', b'"v2"', 3)]
+
+    @pytest.mark.asyncio
+    async def test_send_many__attaches_to_current_event(self, *, topic):
+        topic.app._attachments.enabled = True
+        event = Mock(name='event', autospec=Event)
+        with patch('faust.topics.current_event', return_value=event):
+            futs = await topic.send_many([('k1', 'v1'), ('k2', 'v2')])
+        assert futs == [event._attach(), event._attach()]
+        event._attach.assert_has_calls([
+            call(topic, 'k1', 'v1',
+                 partition=None, timestamp=None,
+                 key_serializer=None, value_serializer=None,
+                 callback=None),
+            call(topic, 'k2', 'v2',
+                 partition=None, timestamp=None,
+                 key_serializer=None, value_serializer=None,
+                 callback=None),
+        ], any_order=True)
+
+    @pytest.mark.asyncio
+    async def test_send_many__untracked_event_not_attached(self, *, topic):
+        # e.g. requests sent directly to an agent are never committed.
+        topic.app._attachments.enabled = True
+        topic.publish_many = AsyncMock(name='publish_many')
+        event = Mock(name='event', autospec=Event)
+        event.message.use_tracking = False
+        with patch('faust.topics.current_event', return_value=event):
+            futs = await topic.send_many([('k1', 'v1')])
+        event._attach.assert_not_called()
+        topic.publish_many.assert_called_once_with(futs)
+
+    @pytest.mark.asyncio
+    async def test_publish_many(self, *, topic):
+        producer = Mock(name='producer')
+        producer.send_many = AsyncMock(name='send_many')
+        topic._get_producer = AsyncMock(name='_get_producer',
+                                        return_value=producer)
+        topic.app.sensors.on_send_initiated = Mock(name='on_send_initiated')
+        futs = [topic.as_future_message(b'k', b'v1', timestamp=1.0),
+                topic.as_future_message(None, b'v2', partition=1)]
+        fut = await topic.publish_many(futs)
+        assert fut is producer.send_many.coro.return_value
+        producer.send_many.assert_called_once_with('foo', [
+            (b'k', b'v1', None, 1.0),
+            (None, b'v2', 1, None),
+        ])
+        topic.app.sensors.on_send_initiated.assert_has_calls([
+            call(producer, 'foo', keysize=1, valsize=2),
+            call(producer, 'foo', keysize=0, valsize=2),
+        ])
+        fut.add_done_callback.assert_called_once_with(ANY)
+
+    def test_on_published_many(self, *, topic):
+        callback = Mock(name='callback')
+        futs = [topic.as_future_message(b'k', b'v1', callback=callback),
+                topic.as_future_message(b'k', b'v2')]
+        fut = asyncio.Future()
+        fut.set_result([1, 2])
+        topic._on_published_many(fut, futs)
+        assert [f.result() for f in futs] == [1, 2]
+        callback.assert_called_once_with(futs[0])
+
+    def test_on_published_many__error(self, *, topic):
+        futs = [topic.as_future_message(b'k', b'v1'),
+                topic.as_future_message(b'k', b'v2')]
+        fut = asyncio.Future()
+        fut.set_exception(KeyError())
+        topic._on_published_many(fut, futs)
+        for f in futs:
+            with pytest.raises(KeyError):
+                f.result()
+
     def test_aiter_when_iterator(self, *, topic):
         topic.is_iterator = True
         assert topic.__aiter__() is topic
@@ -2,14 +2,15 @@ import asyncio
 import logging
 import warnings
 from pathlib import Path
+from time import monotonic
 
 import pytest
 from faust import Sensor
-from faust.worker import Worker
+from faust.worker import ProcessSupervisor, Worker
 from faust.utils import terminal
 from mode.utils.logging import CompositeLogger
 from mode.utils.trees import Node
-from mode.utils.mocks import AsyncMock, Mock, patch
+from mode.utils.mocks import ANY, AsyncMock, Mock, patch
 
 
 class CoroEq:
@@ -236,3 +237,107 @@ class test_Worker:
             ),
             logging.INFO,
         )
+
+
+class test_ProcessSupervisor:
+
+    @pytest.fixture
+    def supervisor(self):
+        supervisor = ProcessSupervisor(2, argv=['faust', 'worker'])
+        supervisor.poll_interval = 0.0
+        supervisor.restart_delay = 0.0
+        return supervisor
+
+    @pytest.fixture
+    def Popen(self):
+        with patch('subprocess.Popen') as Popen:
+            yield Popen
+
+    def test_current_argv(self):
+        with patch('sys.argv', ['/bin/faust', '-A', 'proj', 'worker']):
+            with patch.dict('sys.modules', {'__main__': Mock(__spec__=None)}):
+                assert ProcessSupervisor.current_argv()[1:] == [
+                    '/bin/faust', '-A', 'proj', 'worker']
+            main = Mock(__spec__=Mock())
+            main.__spec__.name = 'faust.__main__'
+            with patch.dict('sys.modules', {'__main__': main}):
+                assert ProcessSupervisor.current_argv()[1:] == [
+                    '-m', 'faust', '-A', 'proj', 'worker']
+
+    def test_start_child(self, *, supervisor, Popen):
+        process = supervisor.start_child(1)
+        assert supervisor.children[1] is process
+        Popen.assert_called_once_with(['faust', 'worker'], env=ANY)
+        assert Popen.call_args[1]['env']['FAUST_WORKER_PROCESS'] == '1'
+
+    def test_run__restarts_crashed_child(self, *, supervisor, Popen):
+        crashed = Mock(name='crashed')
+        crashed.poll.return_value = 1
+        exited = Mock(name='exited')
+        exited.poll.return_value = 0
+        restarted = Mock(name='restarted')
+        restarted.poll.return_value = 0
+        supervisor.children = {0: crashed, 1: exited}
+        Popen.return_value = restarted
+        supervisor.run()
+        Popen.assert_called_once()
+        assert Popen.call_args[1]['env']['FAUST_WORKER_PROCESS'] == '0'
+        assert not supervisor.children
+
+    def test_run__gives_up_after_max_restarts(self, *, supervisor, Popen):
+        supervisor.max_restarts = 3
+        crashed = Mock(name='crashed')
+        crashed.poll.return_value = 3
+        running = Mock(name='running')
+        running.poll.side_effect = lambda: (
+            -15 if running.terminate.called else None)
+        supervisor.children = {0: crashed, 1: running}
+        Popen.return_value = crashed
+        supervisor.run()
+        assert Popen.call_count == 3
+        assert supervisor._crashes[0] == 4
+        assert supervisor.exitcode == 3
+        running.terminate.assert_called_once_with()
+        assert not supervisor.children
+
+    def test_restart_delay_for(self, *, supervisor):
+        supervisor.restart_delay = 1.0
+        supervisor.max_restart_delay = 5.0
+        supervisor.max_restarts = None
+        assert [supervisor._restart_delay_for(0) for _ in range(5)] == [
+            1.0, 2.0, 4.0, 5.0, 5.0]
+
+    def test_restart_delay_for__resets_after_running(self, *, supervisor):
+        supervisor.restart_delay = 1.0
+        supervisor.max_restarts = 2
+        supervisor._restart_delay_for(0)
+        assert supervisor._restart_delay_for(0) == 2.0
+        assert supervisor._restart_delay_for(0) is None
+        supervisor._started_at[0] = monotonic() - 3600.0
+        assert supervisor._restart_delay_for(0) == 1.0
+
+    def test_run__does_not_restart_when_stopping(self, *, supervisor, Popen):
+        crashed = Mock(name='crashed')
+        crashed.poll.return_value = 1
+        supervisor.children = {0: crashed}
+        supervisor.stop()
+        crashed.terminate.assert_not_called()
+        supervisor.run()
+        Popen.assert_not_called()
+
+    def test_stop(self, *, supervisor):
+        running = Mock(name='running')
+        running.poll.return_value = None
+        supervisor.children = {0: running}
+        supervisor._on_signal(15, None)
+        assert supervisor._shutdown
+        running.terminate.assert_called_once_with()
+
+    def test_execute_from_commandline(self, *, supervisor, Popen):
+        Popen.return_value.poll.return_value = 0
+        with patch('signal.signal') as signal:
+            with patch('faust.worker.setup_logging'):
+                with pytest.raises(SystemExit):
+                    supervisor.execute_from_commandline()
+        assert signal.call_count == 2
+        assert Popen.call_count == 2
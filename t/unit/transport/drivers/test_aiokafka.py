@@ -0,0 +1,266 @@
+import asyncio
+import pytest
+from aiokafka.errors import KafkaError
+from aiokafka.producer.message_accumulator import BatchBuilder
+from faust.exceptions import ProducerSendError
+from faust.transport.drivers.aiokafka import Transport
+from faust.types import TP
+from mode.utils.futures import done_future
+from mode.utils.mocks import AsyncMock, Mock, patch
+from yarl import URL
+
+
+class test_Producer:
+
+    @pytest.fixture
+    def producer(self, *, app):
+        transport = Transport(url=[URL('kafka://localhost:9092')], app=app)
+        producer = transport.create_producer()
+        batches = []
+        _producer = producer._producer = Mock(name='_producer')
+        _producer.client._wait_on_metadata = AsyncMock()
+        _producer._partition.side_effect = (
+            lambda topic, partition, key, value, skey, svalue: len(skey))
+        _producer.create_batch.side_effect = lambda: BatchBuilder(
+            2, 300, 0, is_transactional=False)
+
+        async def send_batch(batch, topic, *, partition):
+            batches.append((batch, partition))
+            fut = asyncio.Future()
+            fut.set_result(Mock(name='metadata', offset=100 * len(batches)))
+            return fut
+        _producer.send_batch = send_batch
+        producer.batches = batches
+        return producer
+
+    @pytest.mark.asyncio
+    async def test_send_many(self, *, producer):
+        fut = await producer.send_many('foo', [
+            (b'k', b'v' * 100, None, None),
+            (b'kk', b'v', None, 3.0),
+            (b'k', b'v' * 100, None, None),
+            (b'k', b'v' * 100, None, None),
+            (None, b'v', 1, None),
+        ])
+        # partition 1 does not fit in one batch.
+        assert [p for _, p in producer.batches] == [1, 1, 2]
+        assert [(md.topic_partition, md.offset) for md in await fut] == [
+            (TP('foo', 1), 100),
+            (TP('foo', 2), 300),
+            (TP('foo', 1), 101),
+            (TP('foo', 1), 200),
+            (TP('foo', 1), 201),
+        ]
+
+    @pytest.mark.asyncio
+    async def test_send_many__error(self, *, producer):
+        producer._producer.client._wait_on_metadata.coro.side_effect = (
+            KafkaError())
+        with pytest.raises(ProducerSendError):
+            await producer.send_many('foo', [(b'k', b'v', None, None)])
+
+
+class test_Producer__transactions:
+
+    @pytest.fixture
+    def app(self, *, app):
+        app.conf.processing_guarantee = 'exactly_once'
+        return app
+
+    @pytest.fixture
+    def producer(self, *, app):
+        transport = Transport(url=[URL('kafka://localhost:9092')], app=app)
+        producer = transport.create_producer()
+        producer._producer = Mock(
+            name='_producer',
+            send_offsets_to_transaction=AsyncMock(),
+            begin_transaction=AsyncMock(),
+            commit_transaction=AsyncMock(),
+            abort_transaction=AsyncMock(),
+        )
+        return producer
+
+    def test_transactional_id(self, *, app):
+        transport = Transport(url=[URL('kafka://localhost:9092')], app=app)
+        producer = transport.create_producer()
+        other = transport.create_producer()
+        assert producer.transactional
+        txn_id = producer._producer._txn_manager.transactional_id
+        assert txn_id.startswith(f'{app.conf.id}-')
+        assert txn_id != other._producer._txn_manager.transactional_id
+
+    @pytest.mark.asyncio
+    async def test_commit_transaction(self, *, producer):
+        _producer = producer._producer
+        await producer.commit_transaction({TP('foo', 0): 3}, 'group')
+        offsets, group_id = (
+            _producer.send_offsets_to_transaction.call_args[0])
+        assert offsets[TP('foo', 0)].offset == 3
+        assert group_id == 'group'
+        _producer.commit_transaction.assert_called_once_with()
+        _producer.begin_transaction.assert_called_once_with()
+
+    @pytest.mark.asyncio
+    async def test_commit_transaction__no_offsets(self, *, producer):
+        await producer.commit_transaction({}, 'group')
+        producer._producer.send_offsets_to_transaction.assert_not_called()
+        producer._producer.commit_transaction.assert_called_once_with()
+
+    @pytest.mark.asyncio
+    async def test_commit_transaction__error(self, *, producer):
+        producer._producer.commit_transaction.coro.side_effect = KafkaError()
+        with pytest.raises(ProducerSendError):
+            await producer.commit_transaction({}, 'group')
+        producer._producer.begin_transaction.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_send__waits_for_next_transaction(self, *, producer):
+        _producer = producer._producer
+        committed = asyncio.Event()
+        calls = []
+
+        async def commit_transaction():
+            await committed.wait()
+            calls.append('commit')
+
+        async def begin_transaction():
+            calls.append('begin')
+
+        async def send(*args, **kwargs):
+            calls.append('send')
+            return done_future()
+        _producer.commit_transaction = commit_transaction
+        _producer.begin_transaction = begin_transaction
+        _producer.send = send
+        commit = asyncio.ensure_future(
+            producer.commit_transaction({}, 'group'))
+        await asyncio.sleep(0)
+        send_fut = asyncio.ensure_future(
+            producer.send('foo', b'k', b'v', 0, None))
+        await asyncio.sleep(0)
+        assert calls == []
+        committed.set()
+        await asyncio.gather(commit, send_fut)
+        assert calls == ['commit', 'begin', 'send']
+
+    @pytest.mark.asyncio
+    async def test_abort_transaction(self, *, producer):
+        await producer.abort_transaction()
+        producer._producer.abort_transaction.assert_called_once_with()
+        producer._producer.begin_transaction.assert_called_once_with()
+
+    @pytest.fixture
+    def partition_producers(self, *, producer):
+        def new_producer(transactional_id):
+            return Mock(
+                name=transactional_id,
+                transactional_id=transactional_id,
+                start=AsyncMock(),
+                stop=AsyncMock(),
+                send=AsyncMock(),
+                send_offsets_to_transaction=AsyncMock(),
+                begin_transaction=AsyncMock(),
+                commit_transaction=AsyncMock(),
+                abort_transaction=AsyncMock(),
+            )
+        producer._new_producer = Mock(side_effect=new_producer)
+        return producer._transactions
+
+    def test_transactional_id_for(self, *, app, producer):
+        assert producer._transactional_id_for(TP('foo', 3)) == (
+            f'{app.conf.id}-foo-3')
+
+    @pytest.mark.asyncio
+    async def test_assign_transactions(self, *, app, producer,
+                                       partition_producers):
+        await producer.assign_transactions({TP('foo', 0), TP('foo', 1)})
+        foo0 = partition_producers[TP('foo', 0)]
+        foo1 = partition_producers[TP('foo', 1)]
+        assert foo0.transactional_id == f'{app.conf.id}-foo-0'
+        foo0.start.assert_called_once_with()
+        foo0.begin_transaction.assert_called_once_with()
+
+        await producer.assign_transactions({TP('foo', 1), TP('foo', 2)})
+        assert set(partition_producers) == {TP('foo', 1), TP('foo', 2)}
+        assert partition_producers[TP('foo', 1)] is foo1
+        foo1.start.assert_called_once_with()
+        foo0.abort_transaction.assert_called_once_with()
+        foo0.stop.assert_called_once_with()
+
+    @pytest.mark.asyncio
+    async def test_assign_transactions__abort_error(self, *, producer,
+                                                    partition_producers):
+        await producer.assign_transactions({TP('foo', 0)})
+        foo0 = partition_producers[TP('foo', 0)]
+        foo0.abort_transaction.coro.side_effect = KafkaError()
+        await producer.assign_transactions(set())
+        assert not partition_producers
+        foo0.stop.assert_called_once_with()
+
+    @pytest.mark.asyncio
+    async def test_assign_transactions__start_error(self, *, producer):
+        producer._new_producer = Mock(
+            return_value=Mock(start=AsyncMock(side_effect=KafkaError())))
+        with pytest.raises(ProducerSendError):
+            await producer.assign_transactions({TP('foo', 0)})
+        assert not producer._transactions
+
+    @pytest.mark.asyncio
+    async def test_commit_transaction__by_partition(self, *, producer,
+                                                    partition_producers):
+        await producer.assign_transactions({TP('foo', 0), TP('foo', 1)})
+        await producer.commit_transaction(
+            {TP('foo', 0): 3, TP('bar', 0): 4}, 'group')
+        foo0 = partition_producers[TP('foo', 0)]
+        offsets, group_id = foo0.send_offsets_to_transaction.call_args[0]
+        assert list(offsets) == [TP('foo', 0)]
+        assert offsets[TP('foo', 0)].offset == 3
+        offsets, _ = (
+            producer._producer.send_offsets_to_transaction.call_args[0])
+        assert list(offsets) == [TP('bar', 0)]
+        # transactions without new offsets are committed too.
+        foo1 = partition_producers[TP('foo', 1)]
+        foo1.send_offsets_to_transaction.assert_not_called()
+        for p in (producer._producer, foo0, foo1):
+            p.commit_transaction.assert_called_once_with()
+
+    @pytest.mark.asyncio
+    async def test_abort_transaction__by_partition(self, *, producer,
+                                                   partition_producers):
+        await producer.assign_transactions({TP('foo', 0)})
+        await producer.abort_transaction()
+        producer._producer.abort_transaction.assert_called_once_with()
+        partition_producers[
+            TP('foo', 0)].abort_transaction.assert_called_once_with()
+
+    @pytest.mark.asyncio
+    async def test_send__in_transaction_of_event(self, *, producer,
+                                                 partition_producers):
+        await producer.assign_transactions({TP('foo', 0)})
+        foo0 = partition_producers[TP('foo', 0)]
+        producer._producer.send = AsyncMock()
+        event = Mock(name='event')
+        with patch('faust.transport.drivers.aiokafka.current_event') as ce:
+            ce.return_value = event
+            event.message.tp = TP('foo', 0)
+            await producer.send('bar', b'k', b'v', None, None)
+            foo0.send.assert_called_once_with(
+                'bar', b'v', key=b'k', partition=None, timestamp_ms=None)
+
+            # partition not assigned
+            event.message.tp = TP('foo', 1)
+            await producer.send('bar', b'k', b'v', None, None)
+            producer._producer.send.assert_called_once_with(
+                'bar', b'v', key=b'k', partition=None, timestamp_ms=None)
+
+    @pytest.mark.asyncio
+    async def test_on_stop__aborts_partition_transactions(
+            self, *, producer, partition_producers):
+        producer._producer.stop = AsyncMock()
+        await producer.assign_transactions({TP('foo', 0)})
+        foo0 = partition_producers[TP('foo', 0)]
+        await producer.on_stop()
+        foo0.abort_transaction.assert_called_once_with()
+        foo0.stop.assert_called_once_with()
+        assert not partition_producers
+        producer._producer.commit_transaction.assert_called_once_with()
@@ -0,0 +1,293 @@
+import asyncio
+import faust
+import pytest
+from faust.transport.drivers.memory import Broker, Transport
+from faust.types import TP
+from mode.utils.mocks import AsyncMock, Mock
+
+TP1 = TP('foo', 0)
+TP2 = TP('bar', 0)
+
+
+class test_Broker:
+
+    @pytest.fixture
+    def broker(self, *, event_loop):
+        return Broker(default_partitions=4, loop=event_loop)
+
+    def test_create_topic(self, *, broker):
+        broker.create_topic('foo', 2)
+        broker.create_topic('foo', 10)
+        assert broker.topics['foo'] == 2
+        assert broker.partitions_for_topic('foo') == {0, 1}
+        assert broker.partitions_for_topic('bar') == {0, 1, 2, 3}
+
+    def test_send(self, *, broker):
+        broker.create_topic('foo', 1)
+        md1 = broker.send('foo', b'k', b'v', None, None)
+        md2 = broker.send('foo', None, b'v2', None, 303.3)
+        assert md1.offset == 0
+        assert md2.offset == 1
+        assert md1.topic_partition == TP1
+        log = broker.logs[TP1]
+        assert [m.offset for m in log] == [0, 1]
+        assert log[0].key == b'k'
+        assert log[0].value == b'v'
+        assert log[1].timestamp == 303.3
+        assert broker.highwater(TP1) == 2
+        assert broker.messages_ready.is_set()
+
+    def test_send__explicit_partition(self, *, broker):
+        md = broker.send('foo', b'k', b'v', 3, None)
+        assert md.topic_partition == TP('foo', 3)
+        with pytest.raises(ValueError):
+            broker.send('foo', b'k', b'v', 4, None)
+
+    def test_key_partition(self, *, broker):
+        partitions = {
+            broker.key_partition('foo', f'key{i}'.encode())
+            for i in range(100)
+        }
+        assert partitions == {0, 1, 2, 3}
+        assert (broker.key_partition('foo', b'key1') ==
+                broker.key_partition('foo', b'key1'))
+        for i in range(10):
+            key = f'key{i}'.encode()
+            md = broker.send('foo', key, b'v', None, None)
+            assert md.partition == broker.key_partition('foo', key)
+
+    def test_key_partition__custom_partitioner(self, *, broker):
+        partitioner = Mock(name='partitioner', return_value=2)
+        assert broker.key_partition('foo', b'k', partitioner) == 2
+        partitioner.assert_called_once_with(b'k', [0, 1, 2, 3], [0, 1, 2, 3])
+
+    def test_group(self, *, broker):
+        group = broker.group('g')
+        assert group.group_id == 'g'
+        assert broker.group('g') is group
+
+
+class test_Transport:
+
+    def test_shares_broker(self, *, app):
+        transport1 = Transport(url=['memory://'], app=app)
+        transport2 = Transport(url=['memory://'], app=app)
+        transport3 = Transport(url=['memory://other'], app=app)
+        assert transport1.broker is transport2.broker
+        assert transport1.broker is not transport3.broker
+        assert transport1.broker.default_partitions == (
+            app.conf.topic_partitions)
+
+    @pytest.mark.asyncio
+    async def test_send(self, *, app):
+        transport = Transport(url=['memory://'], app=app)
+        transport.broker.create_topic('foo', 1)
+        md = await transport.send('foo', b'k', b'v', None, None)
+        assert md.topic_partition == TP1
+
+
+class test_Consumer:
+
+    @pytest.fixture
+    def transport(self, *, app):
+        transport = Transport(url=['memory://'], app=app)
+        transport.broker.rebalance_delay = 0.01
+        transport.broker.create_topic('foo', 1)
+        transport.broker.create_topic('bar', 1)
+        yield transport
+        for group in transport.broker.groups.values():
+            if group._rebalancer is not None:
+                group._rebalancer.cancel()
+
+    @pytest.fixture
+    def consumer(self, *, app, transport):
+        return self._create_consumer(transport, {TP1, TP2})
+
+    def _create_consumer(self, transport, assignment=None):
+        consumer = transport.create_consumer(
+            callback=Mock(name='callback'),
+            on_partitions_revoked=AsyncMock(name='on_partitions_revoked'),
+            on_partitions_assigned=AsyncMock(name='on_partitions_assigned'),
+        )
+        consumer._assignment = set(assignment or ())
+        return consumer
+
+    async def _send(self, transport, topic, n):
+        for i in range(n):
+            await transport.send(topic, None, str(i).encode(), None, None)
+
+    @pytest.mark.asyncio
+    async def test_rebalance(self, *, consumer, transport):
+        # we rebalance explicitly, not in the background.
+        transport.broker.rebalance_delay = 10.0
+        consumer._assignment = set()
+        consumer.group.committed[TP1] = 3
+        await consumer.subscribe(['foo', 'bar'])
+        await consumer.group.rebalance()
+        consumer._on_partitions_revoked.assert_called_once_with(set())
+        consumer._on_partitions_assigned.assert_called_once_with({TP1, TP2})
+        assert consumer.assignment() == {TP1, TP2}
+        assert consumer.app.assignor.assigned_actives() == {TP1, TP2}
+        assert await consumer.position(TP1) == 4
+        assert await consumer.position(TP2) == 0
+        assert consumer.group.generation == 1
+
+    @pytest.mark.asyncio
+    async def test_subscribe__rebalances_in_background(
+            self, *, consumer, transport):
+        await consumer.subscribe(['foo'])
+        assert consumer.group.subscriptions[consumer.member_id] == {'foo'}
+        consumer._on_partitions_assigned.assert_not_called()
+        await consumer.group._rebalancer
+        consumer._on_partitions_assigned.assert_called_once_with({TP1})
+
+    @pytest.mark.asyncio
+    async def test_rebalance__several_members(self, *, app, transport):
+        # we rebalance explicitly, not in the background.
+        transport.broker.rebalance_delay = 10.0
+        transport.broker.create_topic('multi', 4)
+        app2 = faust.App('testid', broker='memory://', web_port=6067)
+        app2.finalize()
+        transport2 = Transport(url=['memory://'], app=app2)
+        assert transport2.broker is transport.broker
+        consumer1 = self._create_consumer(transport)
+        consumer2 = self._create_consumer(transport2)
+        await consumer1.subscribe(['multi'])
+        await consumer2.subscribe(['multi'])
+        await consumer1.group.rebalance()
+        tps1, tps2 = consumer1.assignment(), consumer2.assignment()
+        assert len(tps1) == len(tps2) == 2
+        assert tps1 | tps2 == {TP('multi', i) for i in range(4)}
+        assert app.assignor.assigned_actives() == tps1
+        assert app2.assignor.assigned_actives() == tps2
+
+        consumer1.group.committed[TP('multi', 0)] = 9
+        consumer1.group.leave(consumer2.member_id)
+        await consumer1.group.rebalance()
+        consumer2._on_partitions_revoked.assert_called_once_with(set())
+        consumer1._on_partitions_revoked.assert_called_with(tps1)
+        assert consumer1.assignment() == {TP('multi', i) for i in range(4)}
+        assert await consumer1.position(TP('multi', 0)) == 10
+
+    @pytest.mark.asyncio
+    async def test_on_stop__leaves_group(self, *, consumer):
+        await consumer.subscribe(['foo'])
+        consumer.group.request_rebalance = Mock(name='request_rebalance')
+        await consumer.on_stop()
+        assert consumer.member_id not in consumer.group.members
+        assert not consumer.assignment()
+        consumer.group.request_rebalance.assert_called_once_with()
+
+    def test_resume_partitions__wakes_up_fetch(self, *, consumer):
+        consumer.broker.messages_ready.clear()
+        consumer.resume_partitions({TP1})
+        assert TP1 in consumer._get_active_partitions()
+        assert consumer.broker.messages_ready.is_set()
+
+    @pytest.mark.asyncio
+    async def test_getmany(self, *, consumer, transport):
+        consumer.max_poll_records = 3
+        await self._send(transport, 'foo', 5)
+        records = await consumer._getmany({TP1, TP2}, timeout=1.0)
+        assert [m.offset for m in records[TP1]] == [0, 1, 2]
+        assert TP2 not in records
+        records = await consumer._getmany({TP1, TP2}, timeout=1.0)
+        assert [m.offset for m in records[TP1]] == [3, 4]
+        assert consumer.highwater(TP1) == 5
+
+    @pytest.mark.asyncio
+    async def test_getmany__paused(self, *, consumer, transport):
+        await self._send(transport, 'foo', 5)
+        assert await consumer._getmany({TP2}, timeout=0.01) == {}
+
+    @pytest.mark.asyncio
+    async def test_getmany__not_assigned(self, *, consumer, transport):
+        consumer._assignment = {TP2}
+        await self._send(transport, 'foo', 5)
+        assert await consumer._getmany({TP1}, timeout=0.01) == {}
+
+    @pytest.mark.asyncio
+    async def test_getmany__waits_for_messages(self, *, consumer, transport):
+        fut = asyncio.ensure_future(consumer._getmany({TP1}, timeout=10.0))
+        await asyncio.sleep(0)
+        assert not fut.done()
+        await self._send(transport, 'foo', 1)
+        records = await fut
+        assert [m.offset for m in records[TP1]] == [0]
+
+    def test_to_message(self, *, consumer, transport):
+        record = Mock(name='record')
+        message = consumer._to_message(TP1, record)
+        assert message.tp == TP1
+        assert message.offset == record.offset
+        assert message.value == record.value
+        assert message.use_tracking
+
+    @pytest.mark.asyncio
+    async def test_commit_and_seek_to_committed(self, *, consumer, transport):
+        assert await consumer._commit({TP1: 10, TP('baz', 0): 3})
+        assert consumer.group.committed == {TP1: 10}
+        assert await consumer.seek_to_committed() == {TP1: 10}
+        assert await consumer.position(TP1) == 10
+
+    @pytest.mark.asyncio
+    async def test_seek(self, *, consumer, transport):
+        await self._send(transport, 'foo', 5)
+        await consumer.seek(TP1, 3)
+        assert consumer._read_offset[TP1] == 3
+        records = await consumer._getmany({TP1}, timeout=1.0)
+        assert [m.offset for m in records[TP1]] == [3, 4]
+        await consumer.seek_wait({TP1: 1})
+        assert await consumer.position(TP1) == 1
+        assert consumer._read_offset[TP1] == 1
+        await consumer.seek_to_beginning(TP1)
+        assert await consumer.position(TP1) == 0
+        await consumer.seek_to_latest(TP1)
+        assert await consumer.position(TP1) == 5
+
+    @pytest.mark.asyncio
+    async def test_offsets(self, *, consumer, transport):
+        await self._send(transport, 'foo', 5)
+        assert await consumer.earliest_offsets(TP1, TP2) == {TP1: 0, TP2: 0}
+        assert await consumer.highwaters(TP1, TP2) == {TP1: 5, TP2: 0}
+        assert consumer.topic_partitions('foo') == 1
+        assert consumer.topic_partitions('missing') is None
+
+
+class test_Producer:
+
+    @pytest.mark.asyncio
+    async def test_send_uses_partitioner(self, *, app):
+        transport = Transport(url=['memory://'], app=app)
+        producer = transport.create_producer()
+        producer.partitioner = Mock(name='partitioner', return_value=1)
+        md = await producer.send_and_wait('foo', b'k', b'v', None, None)
+        assert md.partition == 1
+        assert producer.key_partition('foo', b'k') == TP('foo', 1)
+        await producer.create_topic('new', 3, 1)
+        assert transport.broker.topics['new'] == 3
+
+    @pytest.mark.asyncio
+    async def test_send_many(self, *, app):
+        transport = Transport(url=['memory://'], app=app)
+        transport.broker.create_topic('foo', 2)
+        producer = transport.create_producer()
+        fut = await producer.send_many('foo', [
+            (b'k', b'v1', 1, None),
+            (b'k', b'v2', 1, None),
+            (b'k', b'v3', 0, None),
+        ])
+        assert [(md.partition, md.offset) for md in await fut] == [
+            (1, 0), (1, 1), (0, 0)]
+        assert [m.value for m in transport.broker.logs[TP('foo', 1)]] == [
+            b'v1', b'v2']
+
+    @pytest.mark.asyncio
+    async def test_commit_transaction(self, *, app):
+        transport = Transport(url=['memory://'], app=app)
+        producer = transport.create_producer()
+        await producer.assign_transactions({TP1})
+        await producer.begin_transaction()
+        await producer.commit_transaction({TP1: 3}, 'g')
+        await producer.abort_transaction()
+        assert transport.broker.group('g').committed == {TP1: 3}
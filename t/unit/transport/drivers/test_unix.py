@@ -0,0 +1,429 @@
+import asyncio
+import fcntl
+import io
+import os
+import pickle
+import faust
+import pytest
+from faust.exceptions import ImproperlyConfigured
+from faust.transport.drivers import memory
+from faust.transport.drivers.unix import (
+    BrokerClient,
+    BrokerServer,
+    Cluster,
+    FrameUnpickler,
+    GroupCoordinator,
+    Transport,
+    _servers,
+    private_dir,
+    verify_peer,
+)
+from faust.types import TP
+from mode.utils.mocks import AsyncMock, Mock, patch
+from yarl import URL
+
+TP1 = TP('foo', 0)
+
+
+@pytest.fixture
+def path(*, tmpdir):
+    path = str(tmpdir.join('broker.sock'))
+    yield path
+    server = _servers.pop(path, None)
+    if server is not None:
+        server._server.close()
+
+
+def test_FrameUnpickler():
+    frame = (1, 'send', [(TP1, b'k', None, 3.0, {'a': [1, 2]})])
+    data = pickle.dumps(frame, protocol=pickle.HIGHEST_PROTOCOL)
+    assert FrameUnpickler(io.BytesIO(data)).load() == frame
+    with pytest.raises(pickle.UnpicklingError):
+        FrameUnpickler(io.BytesIO(pickle.dumps(os.system))).load()
+
+
+def test_private_dir(*, tmpdir):
+    path = str(tmpdir.join('private'))
+    assert private_dir(path) == path
+    assert os.stat(path).st_mode & 0o777 == 0o700
+    assert private_dir(path) == path
+    os.chmod(path, 0o777)
+    with pytest.raises(PermissionError):
+        private_dir(path)
+
+
+def test_verify_peer__other_user(*, path):
+    writer = Mock(name='writer')
+    writer.get_extra_info.return_value = None
+    with patch('os.stat') as stat:
+        stat.return_value.st_uid = os.getuid() + 1
+        with pytest.raises(PermissionError):
+            verify_peer(writer, path)
+    writer.close.assert_called_once_with()
+
+
+def test_Cluster():
+    cluster = Cluster({'foo': 3})
+    assert cluster.partitions_for_topic('foo') == {0, 1, 2}
+    assert cluster.partitions_for_topic('bar') == set()
+
+
+class test_GroupCoordinator:
+
+    @pytest.fixture
+    def group(self, *, event_loop):
+        return GroupCoordinator(
+            'g',
+            rebalance_delay=0.0,
+            rebalance_timeout=0.1,
+            loop=event_loop,
+        )
+
+    @pytest.mark.asyncio
+    async def test_join_and_sync(self, *, group):
+        results = dict(zip(['m1', 'm2'], await asyncio.gather(
+            group.join('m1', b'md1'), group.join('m2', b'md2'))))
+        # the order members join in is not deterministic,
+        # so either of them can be elected leader.
+        leaders = {leader for _, leader, _ in results.values()}
+        assert len(leaders) == 1
+        leader = leaders.pop()
+        follower, = set(results) - {leader}
+        assert {gen for gen, _, _ in results.values()} == {group.generation}
+        assert group.generation == 1
+        assert results[leader][2] == {'m1': b'md1', 'm2': b'md2'}
+        assert results[follower][2] is None
+        assert group.heartbeat('m1', 1)
+        assert not group.heartbeat('m1', 0)
+        assert not group.heartbeat('m3', 1)
+
+        assignments = {'m1': b'a1', 'm2': b'a2'}
+        assert await asyncio.gather(
+            group.sync(follower, 1, None),
+            group.sync(leader, 1, assignments),
+        ) == [assignments[follower], assignments[leader]]
+        assert await group.sync(leader, 0, assignments) is None
+
+    @pytest.mark.asyncio
+    async def test_leave__starts_new_round(self, *, group):
+        await asyncio.gather(group.join('m1', b'md1'),
+                             group.join('m2', b'md2'))
+        group.leave('m2')
+        assert group.rebalancing
+        assert not group.heartbeat('m1', 1)
+        assert group.members == {'m1': b'md1'}
+        gen, leader, members = await group.join('m1', b'md1')
+        assert gen == 2
+        assert leader == 'm1'
+        assert members == {'m1': b'md1'}
+
+    @pytest.mark.asyncio
+    async def test_evicts_members_not_rejoining(self, *, group):
+        await asyncio.gather(group.join('m1', b'md1'),
+                             group.join('m2', b'md2'))
+        # m3 joining starts a round that m2 never rejoins.
+        await asyncio.gather(group.join('m3', b'md3'),
+                             group.join('m1', b'md1'))
+        assert group.generation == 2
+        assert set(group.members) == {'m1', 'm3'}
+
+    @pytest.mark.asyncio
+    async def test_commit(self, *, group):
+        await group.join('m1', b'md1')
+        assert group.commit('m1', 1, {TP1: 3})
+        assert not group.commit('m1', 0, {TP1: 4})
+        assert not group.commit('m2', 1, {TP1: 4})
+        assert group.committed == {TP1: 3}
+
+
+class test_BrokerServer:
+
+    @pytest.fixture
+    async def server(self, *, path, event_loop):
+        server = BrokerServer(
+            path,
+            broker=memory.Broker(default_partitions=2, loop=event_loop),
+            rebalance_timeout=0.1,
+            loop=event_loop,
+        )
+        await server.start()
+        yield server
+        await server.stop()
+
+    @pytest.fixture
+    def transport(self, *, path, app):
+        return Transport(url=[URL(f'unix://{path}')], app=app)
+
+    @pytest.mark.asyncio
+    async def test_requests(self, *, server, transport):
+        client = await transport.connect()
+        assert await client.request('create_topic', 'foo', 1) == 1
+        assert await client.request('metadata', ['foo', 'bar']) == {
+            'foo': 1, 'bar': 2,
+        }
+        assert await client.request(
+            'send', [('foo', b'k', b'v', None, None)] * 2) == [(0, 0), (0, 1)]
+        highwater, records = (await client.request(
+            'fetch', {TP1: 1}, 10, 1.0))[TP1]
+        assert highwater == 2
+        assert [r[0] for r in records] == [1]
+        assert await client.request('highwaters', [TP1]) == {TP1: 2}
+        client.close()
+
+    @pytest.mark.asyncio
+    async def test_request__error(self, *, server, transport):
+        client = await transport.connect()
+        with pytest.raises(RuntimeError):
+            await client.request('send', [('foo', None, b'v', 10, None)])
+        client.close()
+
+    @pytest.mark.asyncio
+    async def test_fetch__waits_for_messages(self, *, server, transport):
+        client = await transport.connect()
+        fut = asyncio.ensure_future(client.request('fetch', {TP1: 0}, 10, 10))
+        await asyncio.sleep(0.01)
+        assert not fut.done()
+        await client.request('send', [('foo', b'k', b'v', 0, None)])
+        assert [r[0] for r in (await fut)[TP1][1]] == [0]
+        client.close()
+
+    @pytest.mark.asyncio
+    async def test_disconnect__leaves_group(self, *, server, transport):
+        client = await transport.connect()
+        await client.request('join', 'g', 'm1', b'md')
+        assert 'm1' in server.group('g').members
+        client.close()
+        await asyncio.sleep(0.01)
+        assert 'm1' not in server.group('g').members
+
+    @pytest.mark.asyncio
+    async def test_connection_lost(self, *, server, transport):
+        client = await transport.connect()
+        fut = asyncio.ensure_future(client.request('fetch', {TP1: 0}, 10, 10))
+        await asyncio.sleep(0.01)
+        await server.stop()
+        client.reader.feed_eof()
+        with pytest.raises(ConnectionResetError):
+            await fut
+
+
+class test_Transport:
+
+    @pytest.mark.asyncio
+    async def test_connect__hosts_broker(self, *, path, app):
+        transport = Transport(url=[URL(f'unix://{path}')], app=app)
+        client = await transport.connect()
+        assert await transport.connect() is client
+        assert path in _servers
+        transport2 = Transport(url=[URL(f'unix://{path}')], app=app)
+        client2 = await transport2.connect()
+        assert client2 is not client
+        assert len(_servers) == 1
+        client.close()
+        client2.close()
+
+    def test_default_path(self, *, app):
+        with patch.dict(os.environ, {'XDG_RUNTIME_DIR': '/run/user/1'}):
+            transport = Transport(url=[URL('unix://')], app=app)
+        assert transport.path == f'/run/user/1/faust-{app.conf.id}.sock'
+
+    def test_default_path__no_runtime_dir(self, *, app):
+        with patch.dict(os.environ, clear=True):
+            transport = Transport(url=[URL('unix://')], app=app)
+        assert transport.path.endswith(
+            f'/faust-{os.getuid()}/faust-{app.conf.id}.sock')
+
+    @pytest.mark.asyncio
+    async def test_connect__default_path_is_private(self, *, tmpdir, app):
+        runtime_dir = str(tmpdir.join('run'))
+        with patch.dict(os.environ, {'XDG_RUNTIME_DIR': runtime_dir}):
+            transport = Transport(url=[URL('unix://')], app=app)
+        try:
+            client = await transport.connect()
+            assert os.stat(runtime_dir).st_mode & 0o777 == 0o700
+            client.close()
+        finally:
+            await transport.close()
+
+    @pytest.mark.asyncio
+    async def test_connect__refuses_other_user(self, *, path, app):
+        transport = Transport(url=[URL(f'unix://{path}')], app=app)
+        await transport.connect()
+        with patch('faust.transport.drivers.unix.peer_uid') as peer_uid:
+            peer_uid.return_value = os.getuid() + 1
+            with pytest.raises(PermissionError):
+                await BrokerClient.connect(path, loop=transport.loop)
+        await transport.close()
+
+    def test_exactly_once__not_supported(self, *, app):
+        app.conf.processing_guarantee = 'exactly_once'
+        with pytest.raises(ImproperlyConfigured):
+            Transport(url=[URL('unix://')], app=app)
+
+    @pytest.mark.asyncio
+    async def test_release__last_user_stops_broker(self, *, path, app):
+        transport = Transport(url=[URL(f'unix://{path}')], app=app)
+        producer = transport.create_producer()
+        consumer = transport.create_consumer(
+            callback=Mock(name='callback'),
+            on_partitions_revoked=AsyncMock(name='on_partitions_revoked'),
+            on_partitions_assigned=AsyncMock(name='on_partitions_assigned'),
+        )
+        client = await transport.connect()
+        await producer.stop()
+        assert transport._client is client
+        assert path in _servers
+        await consumer.stop()
+        assert transport._client is None
+        assert client.writer.transport.is_closing()
+        assert path not in _servers
+        assert not os.path.exists(path)
+
+    @pytest.mark.asyncio
+    async def test_lock__does_not_block(self, *, path, app):
+        transport = Transport(url=[URL(f'unix://{path}')], app=app)
+        transport.lock_retry_interval = 0.01
+        with open(f'{path}.lock', 'w') as held, \
+                open(f'{path}.lock', 'w') as lockfile:
+            fcntl.flock(held, fcntl.LOCK_EX)
+            fut = asyncio.ensure_future(transport._lock(lockfile))
+            await asyncio.sleep(0.05)
+            assert not fut.done()
+            fcntl.flock(held, fcntl.LOCK_UN)
+            await asyncio.wait_for(fut, timeout=1.0)
+
+
+class test_Consumer:
+
+    @pytest.fixture
+    def transport(self, *, path, app):
+        return Transport(url=[URL(f'unix://{path}')], app=app)
+
+    def _create_consumer(self, transport):
+        return transport.create_consumer(
+            callback=Mock(name='callback'),
+            on_partitions_revoked=AsyncMock(name='on_partitions_revoked'),
+            on_partitions_assigned=AsyncMock(name='on_partitions_assigned'),
+        )
+
+    @pytest.mark.asyncio
+    async def test_join_group__several_members(self, *, path, app, transport):
+        await transport.create_topic('multi', 4)
+        _servers[path].rebalance_delay = 0.0
+        app2 = faust.App('testid', broker=f'unix://{path}', web_port=6067)
+        app2.finalize()
+        transport2 = Transport(url=[URL(f'unix://{path}')], app=app2)
+        consumer1 = self._create_consumer(transport)
+        consumer2 = self._create_consumer(transport2)
+        await consumer1.subscribe(['multi'])
+        await consumer2.subscribe(['multi'])
+        assert all(await asyncio.gather(consumer1._join_group(),
+                                        consumer2._join_group()))
+        tps1, tps2 = consumer1.assignment(), consumer2.assignment()
+        assert len(tps1) == len(tps2) == 2
+        assert tps1 | tps2 == {TP('multi', i) for i in range(4)}
+        assert consumer1.generation == consumer2.generation == 1
+        consumer1._on_partitions_assigned.assert_called_once_with(tps1)
+
+        tp = next(iter(tps2))
+        assert await consumer2._commit({tp: 9, next(iter(tps1)): 3})
+        assert await consumer2._committed_offsets() == {tp: 9}
+
+        await consumer2._leave_group()
+        assert await consumer1._join_group()
+        assert consumer1.assignment() == {TP('multi', i) for i in range(4)}
+        assert await consumer1.position(tp) == 10
+        transport._client.close()
+        transport2._client.close()
+
+    @pytest.mark.asyncio
+    async def test_getmany(self, *, transport):
+        consumer = self._create_consumer(transport)
+        await transport.create_topic('foo', 1)
+        producer = transport.create_producer()
+        for i in range(5):
+            await producer.send('foo', None, str(i).encode(), None, None)
+        await producer.flush()
+        consumer._assignment = {TP1}
+        consumer.max_poll_records = 3
+        records = await consumer._getmany({TP1}, timeout=1.0)
+        assert [m[0] for m in records[TP1]] == [0, 1, 2]
+        assert consumer.highwater(TP1) == 5
+        message = consumer._to_message(TP1, records[TP1][0])
+        assert message.offset == 0
+        assert message.value == b'0'
+        records = await consumer._getmany({TP1}, timeout=1.0)
+        assert [m[0] for m in records[TP1]] == [3, 4]
+        assert await consumer._getmany(set(), timeout=0.01) == {}
+        transport._client.close()
+
+    @pytest.mark.asyncio
+    async def test_leave_group__not_connected(self, *, path, transport):
+        consumer = self._create_consumer(transport)
+        await consumer._leave_group()
+        assert path not in _servers
+
+
+class test_Producer:
+
+    @pytest.mark.asyncio
+    async def test_send__batches_requests(self, *, path, app):
+        transport = Transport(url=[URL(f'unix://{path}')], app=app)
+        client = await transport.connect()
+        await transport.create_topic('foo', 2)
+        client.request = AsyncMock(
+            name='request', return_value=[(0, 0), (1, 0), (0, 1)])
+        producer = transport.create_producer()
+        futs = [
+            await producer.send('foo', b'k', b'v', 0, None),
+            await producer.send('foo', b'k', b'v', 1, None),
+            await producer.send('foo', b'k', b'v', 0, None),
+        ]
+        await producer.flush()
+        client.request.assert_called_once_with('send', [
+            ('foo', b'k', b'v', 0, None),
+            ('foo', b'k', b'v', 1, None),
+            ('foo', b'k', b'v', 0, None),
+        ])
+        assert [(fut.result().partition, fut.result().offset)
+                for fut in futs] == [(0, 0), (1, 0), (0, 1)]
+        client.close()
+
+    @pytest.mark.asyncio
+    async def test_send__error(self, *, path, app):
+        transport = Transport(url=[URL(f'unix://{path}')], app=app)
+        client = await transport.connect()
+        client.request = AsyncMock(name='request', side_effect=KeyError())
+        producer = transport.create_producer()
+        fut = await producer.send('foo', b'k', b'v', 0, None)
+        await producer.flush()
+        with pytest.raises(KeyError):
+            fut.result()
+        client.close()
+
+    @pytest.mark.asyncio
+    async def test_send__unknown_topic_asks_broker(self, *, path, app):
+        transport = Transport(url=[URL(f'unix://{path}')], app=app)
+        client = await transport.connect()
+        await client.request('create_topic', 'bar', 3)
+        producer = transport.create_producer()
+        producer.partitioner = Mock(name='partitioner', return_value=2)
+        fut = await producer.send('bar', b'k', b'v', None, None)
+        await producer.flush()
+        assert transport.topic_partitions['bar'] == 3
+        producer.partitioner.assert_called_once_with(
+            b'k', [0, 1, 2], [0, 1, 2])
+        assert fut.result().partition == 2
+        client.close()
+
+    @pytest.mark.asyncio
+    async def test_key_partition(self, *, path, app):
+        transport = Transport(url=[URL(f'unix://{path}')], app=app)
+        transport.topic_partitions['foo'] = 4
+        producer = transport.create_producer()
+        assert {producer.key_partition('foo', f'k{i}'.encode()).partition
+                for i in range(100)} == {0, 1, 2, 3}
+        producer.partitioner = Mock(name='partitioner', return_value=1)
+        assert producer.key_partition('foo', b'k') == TP('foo', 1)
+        with pytest.raises(KeyError):
+            producer.key_partition('bar', b'k')
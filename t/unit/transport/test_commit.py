@@ -0,0 +1,88 @@
+import pytest
+from faust.transport.commit import AdaptiveCommitPolicy, CommitPolicy
+from faust.types import TP
+from mode.utils.mocks import Mock, patch
+
+TP1 = TP('foo', 0)
+TP2 = TP('foo', 1)
+
+
+@pytest.fixture
+def consumer(*, app):
+    app.conf.broker_commit_every = 100
+    consumer = Mock(name='consumer', app=app, commit_interval=2.0)
+    consumer.assignment.return_value = {TP1, TP2}
+    consumer.highwater.return_value = 10
+    consumer._read_offset = {TP1: 9, TP2: 9}
+    return consumer
+
+
+class test_CommitPolicy:
+
+    @pytest.fixture
+    def policy(self, *, consumer):
+        return CommitPolicy(consumer)
+
+    def test_next_interval(self, *, policy):
+        assert policy.next_interval() == 2.0
+        policy.on_commit_completed(1000, 0.001)
+        assert policy.next_interval() == 2.0
+
+    def test_should_commit(self, *, policy):
+        assert not policy.should_commit(99)
+        assert policy.should_commit(100)
+        policy.commit_every = None
+        assert not policy.should_commit(100)
+
+
+class test_AdaptiveCommitPolicy:
+
+    @pytest.fixture
+    def policy(self, *, consumer):
+        return AdaptiveCommitPolicy(consumer, low_lag=10)
+
+    @pytest.fixture
+    def monotonic(self):
+        with patch('faust.transport.commit.monotonic') as monotonic:
+            monotonic.return_value = 0.0
+            yield monotonic
+
+    def commit(self, policy, monotonic, n_acked, latency=0.001):
+        monotonic.return_value += policy.interval
+        policy.on_commit_completed(n_acked, latency)
+        return policy.next_interval()
+
+    def test_init(self, *, policy):
+        assert policy.min_interval == 0.5
+        assert policy.max_interval == 16.0
+        assert policy.low_lag == 10
+
+    def test_busy__increases_interval(self, *, policy, consumer, monotonic):
+        consumer.highwater.return_value = 1000
+        policy.on_commit_completed(0, 0.0)
+        assert self.commit(policy, monotonic, 4000) == 4.0
+        assert policy.commit_every == 200
+        assert self.commit(policy, monotonic, 8000) == 8.0
+        assert self.commit(policy, monotonic, 16000) == 16.0
+        assert self.commit(policy, monotonic, 32000) == 16.0
+        # expensive commit resets to default interval
+        assert self.commit(policy, monotonic, 32000, latency=2.0) == 2.0
+        assert policy.commit_every == 100
+
+    def test_low_lag__decreases_interval(self, *, policy, monotonic):
+        policy.on_commit_completed(0, 0.0)
+        assert self.commit(policy, monotonic, 10) == 1.0
+        assert self.commit(policy, monotonic, 10) == 0.5
+        assert self.commit(policy, monotonic, 10) == 0.5
+        assert policy.commit_every == 25
+
+    def test_rebalancing(self, *, policy, consumer, monotonic):
+        consumer.app.rebalancing = True
+        policy.on_commit_completed(0, 0.0)
+        assert self.commit(policy, monotonic, 4000) == 0.5
+
+    def test_lag(self, *, policy, consumer):
+        consumer._read_offset = {TP1: 4}
+        assert policy.lag() == 5 + 10
+        consumer.highwater.return_value = None
+        assert policy.lag() == 0
@@ -6,6 +6,7 @@ from faust.exceptions import AlreadyConfiguredWarning
 from faust.tables.manager import TableManager
 from faust.transport.consumer import Consumer, Fetcher, ProducerSendError
 from faust.transport.conductor import Conductor
+from faust.transport.utils import AckTracker
 from faust.types import Message, TP
 from mode import Service
 from mode.utils.mocks import ANY, AsyncMock, Mock, call
@@ -14,6 +15,20 @@ TP1 = TP('foo', 0)
 TP2 = TP('foo', 1)
 
 
+def acked(*offsets, base=None, read=None):
+    # unless given, every offset from base up to the
+    # highest offset acked was read.
+    base = base if base is not None else min(offsets, default=0)
+    tracker = AckTracker(base)
+    if read is None:
+        read = range(base, max(offsets, default=base - 1) + 1)
+    for offset in read:
+        tracker.read(offset)
+    for offset in offsets:
+        tracker.ack(offset)
+    return tracker
+
+
 class test_Fetcher:
 
     @pytest.fixture
@@ -163,10 +178,94 @@ class test_Consumer:
     async def test_on_partitions_revoked(self, *, consumer):
         consumer._on_partitions_revoked = AsyncMock(name='opr')
         tps = {TP('foo', 0), TP('bar', 2)}
+        consumer._acked = {TP('foo', 0): acked(1), TP('foo', 1): acked(1)}
         await consumer.on_partitions_revoked(tps)
 
         consumer._on_partitions_revoked.assert_called_once_with(
             tps)
+        assert set(consumer._acked) == {TP('foo', 1)}
+
+    @pytest.mark.asyncio
+    async def test_on_partitions_assigned__in_transaction(
+            self, *, consumer, app):
+        consumer.in_transaction = True
+        consumer._on_partitions_assigned = AsyncMock(name='opa')
+        app.producer = Mock(name='producer', assign_transactions=AsyncMock())
+        app.tables = Mock(name='tables', autospec=TableManager)
+        app.tables.changelog_topics = {'foo-changelog'}
+        tps = {TP('foo', 0), TP('foo-changelog', 0)}
+        await consumer.on_partitions_assigned(tps)
+
+        app.producer.assign_transactions.assert_called_once_with(
+            {TP('foo', 0)})
+
+    @pytest.mark.asyncio
+    async def test_on_partitions_revoked__commits_transaction(
+            self, *, consumer, app):
+        app.topics = Mock(name='app.topics', autospec=Conductor)
+        app.topics.acks_enabled_for.return_value = True
+        consumer.in_transaction = True
+        consumer._on_partitions_revoked = AsyncMock(name='opr')
+        app.producer = Mock(
+            name='producer',
+            commit_transaction=AsyncMock(),
+            abort_transaction=AsyncMock(),
+        )
+        consumer._acked = {TP1: acked(1, 2, 3), TP2: acked(1)}
+        consumer._read_offset.update({TP1: 3, TP2: 1})
+        await consumer.on_partitions_revoked({TP1, TP2})
+
+        app.producer.commit_transaction.assert_called_once_with(
+            {TP1: 3, TP2: 1}, group_id=app.conf.id)
+        app.producer.abort_transaction.assert_not_called()
+        assert consumer._committed_offset[TP1] == 3
+
+    @pytest.mark.asyncio
+    async def test_on_partitions_revoked__aborts_transaction(
+            self, *, consumer, app):
+        app.topics = Mock(name='app.topics', autospec=Conductor)
+        app.topics.acks_enabled_for.return_value = True
+        consumer.in_transaction = True
+        consumer._on_partitions_revoked = AsyncMock(name='opr')
+        app.producer = Mock(
+            name='producer',
+            commit_transaction=AsyncMock(),
+            abort_transaction=AsyncMock(),
+        )
+        # offset 3 is still being processed.
+        consumer._acked = {TP1: acked(1, 2, read=[1, 2, 3])}
+        consumer._read_offset[TP1] = 3
+        await consumer.on_partitions_revoked({TP1})
+
+        app.producer.abort_transaction.assert_called_once_with()
+        app.producer.commit_transaction.assert_not_called()
+        assert consumer._committed_offset[TP1] is None
+
+    @pytest.mark.asyncio
+    async def test_perform_seek__restarts_ack_window(self, *, consumer, app):
+        app.topics = Mock(name='app.topics', autospec=Conductor)
+        app.topics.acks_enabled_for.return_value = True
+        # offsets 3 and 4 were never acked, and another worker
+        # committed offset 100 since.
+        consumer._acked = {TP1: acked(1, 2, 5, base=1)}
+        consumer.seek_to_committed = AsyncMock(
+            name='seek_to_committed', return_value={TP1: 100})
+        await Consumer.perform_seek(consumer)
+        assert consumer._read_offset[TP1] == 100
+        message = Mock(name='message', autospec=Message,
+                       tp=TP1, offset=101, acked=False)
+        consumer._ack_tracker(TP1, 101).read(101)
+        assert consumer.ack(message)
+        assert consumer._filter_committable_offsets([TP1]) == {TP1: 101}
+
+    @pytest.mark.asyncio
+    async def test_seek__restarts_ack_window(self, *, consumer):
+        consumer._seek = AsyncMock(name='_seek')
+        consumer._acked = {TP1: acked(1, 2, 5, base=1), TP2: acked(1)}
+        await Consumer.seek(consumer, TP1, 30)
+        consumer._seek.assert_called_once_with(TP1, 30)
+        assert consumer._read_offset[TP1] == 30
+        assert set(consumer._acked) == {TP2}
 
     def test_track_message(self, *, consumer, message):
         consumer._on_message_in = Mock(name='omin')
@@ -186,10 +285,9 @@ class test_Consumer:
         consumer.app.topics.acks_enabled_for.return_value = True
         consumer._committed_offset[message.tp] = 3
         message.offset = offset
-        consumer._acked_index[message.tp] = set()
-        consumer.ack(message)
+        assert consumer.ack(message) == (offset > 3)
         message.acked = False
-        consumer.ack(message)
+        assert not consumer.ack(message)
 
     def test_ack__already_acked(self, *, consumer, message):
         message.acked = True
@@ -201,6 +299,97 @@ class test_Consumer:
         app.topics.acks_enabled_for.return_value = False
         consumer.ack(message)
 
+    def test_ack__out_of_order(self, *, consumer, app):
+        app.topics = Mock(name='app.topics', autospec=Conductor)
+        app.topics.acks_enabled_for.return_value = True
+        consumer._on_message_in = Mock(name='omin')
+        messages = [
+            Mock(name=f'message{offset}', autospec=Message,
+                 tp=TP1, offset=offset, acked=False)
+            for offset in (10, 11, 12)
+        ]
+        for message in messages:
+            consumer._ack_tracker(TP1, message.offset).read(message.offset)
+            consumer.track_message(message)
+        assert consumer.ack(messages[1])
+        assert consumer.ack(messages[2])
+        # offset 10 is still being processed.
+        assert consumer._filter_committable_offsets([TP1]) == {}
+        assert consumer.ack(messages[0])
+        assert consumer._filter_committable_offsets([TP1]) == {TP1: 12}
+
+    @pytest.mark.asyncio
+    async def test_drain_messages__starts_ack_window(self, *, consumer, app):
+        app.topics = Mock(name='app.topics', autospec=Conductor)
+        app.topics.acks_enabled_for.return_value = True
+        messages = [
+            Mock(name=f'message{offset}', autospec=Message,
+                 tp=TP1, offset=offset, acked=False)
+            for offset in (10, 11, 12)
+        ]
+
+        async def getmany(timeout):
+            for message in messages:
+                yield message.tp, message
+        consumer.getmany = getmany
+        consumer.callback = AsyncMock(name='callback')
+        consumer.sleep = AsyncMock(name='sleep')
+        fetcher = Mock(name='fetcher')
+        fetcher._stopped.is_set.side_effect = [False, True]
+        await consumer._drain_messages(fetcher)
+        assert consumer._read_offset[TP1] == 12
+
+        # offset 10 was read, but not taken from the queue by a stream yet.
+        assert consumer.ack(messages[1])
+        assert consumer.ack(messages[2])
+        assert consumer._filter_committable_offsets([TP1]) == {}
+        assert consumer.ack(messages[0])
+        assert consumer._filter_committable_offsets([TP1]) == {TP1: 12}
+
+    def test_ack__anchored_at_committed_offset(self, *, consumer, app):
+        app.topics = Mock(name='app.topics', autospec=Conductor)
+        app.topics.acks_enabled_for.return_value = True
+        consumer._committed_offset[TP1] = 9
+        for offset in (10, 11):
+            consumer._ack_tracker(TP1, offset).read(offset)
+        message = Mock(name='message', autospec=Message,
+                       tp=TP1, offset=11, acked=False)
+        assert consumer.ack(message)
+        assert consumer._filter_committable_offsets([TP1]) == {}
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize('offsets', [
+        [11, 12, 13, 14, 15, 16, 17, 18, 19],  # leading gap
+        [10, 11, 14, 15, 19],  # e.g. compacted or transaction markers
+    ])
+    async def test_drain_messages__offset_gaps(
+            self, offsets, *, consumer, app):
+        app.topics = Mock(name='app.topics', autospec=Conductor)
+        app.topics.acks_enabled_for.return_value = True
+        consumer._committed_offset[TP1] = 9
+        messages = [
+            Mock(name=f'message{offset}', autospec=Message,
+                 tp=TP1, offset=offset, acked=False)
+            for offset in offsets
+        ]
+
+        async def getmany(timeout):
+            for message in messages:
+                yield message.tp, message
+        consumer.getmany = getmany
+        consumer.callback = AsyncMock(name='callback')
+        consumer.sleep = AsyncMock(name='sleep')
+        fetcher = Mock(name='fetcher')
+        fetcher._stopped.is_set.side_effect = [False, True]
+        await consumer._drain_messages(fetcher)
+
+        for message in messages[1:]:
+            assert consumer.ack(message)
+        assert consumer._filter_committable_offsets([TP1]) == {}
+        assert consumer.ack(messages[0])
+        assert consumer._filter_committable_offsets([TP1]) == {TP1: 19}
+        assert not consumer._acked[TP1].reads
+
     @pytest.mark.asyncio
     async def test_wait_empty(self, *, consumer):
         consumer._unacked_messages = {Mock(autospec=Message)}
@@ -234,15 +423,20 @@ class test_Consumer:
         occ = consumer.app.sensors.on_commit_completed
         consumer._commit_tps = AsyncMock(name='_commit_tps')
         consumer._acked = {
-            TP1: [1, 2, 3, 4, 5],
+            TP1: acked(1, 2, 3, 4, 5),
         }
         consumer._committed_offset = {
             TP1: 2,
         }
+        consumer._n_acked = 5
+        consumer.commit_policy = Mock(name='commit_policy')
         await consumer.force_commit({TP1})
         oci.assert_called_once_with(consumer)
         consumer._commit_tps.assert_called_once_with([TP1])
         occ.assert_called_once_with(consumer, oci())
+        consumer.commit_policy.on_commit_completed.assert_called_once_with(
+            5, ANY)
+        assert consumer._n_acked == 0
 
     @pytest.mark.asyncio
     async def test_commit_tps(self, *, consumer):
@@ -284,10 +478,41 @@ class test_Consumer:
         consumer._filter_commitable_offsets.return_value = {}
         await consumer._commit_tps({TP1, TP2})
 
+    @pytest.mark.asyncio
+    async def test_commit_tps__in_transaction(self, *, consumer):
+        consumer.in_transaction = True
+        consumer._handle_attached = AsyncMock(name='_handle_attached')
+        consumer._commit_offsets = AsyncMock(name='_commit_offsets')
+        consumer._filter_committable_offsets = Mock(name='filt')
+        consumer._filter_committable_offsets.return_value = {}
+        await consumer._commit_tps({TP1, TP2})
+
+        consumer._handle_attached.assert_not_called()
+        consumer._commit_offsets.assert_called_once_with({})
+
+    @pytest.mark.asyncio
+    async def test_commit_tps__in_transaction_waits_for_inflight(
+            self, *, consumer, app):
+        app.topics = Mock(name='app.topics', autospec=Conductor)
+        app.topics.acks_enabled_for.return_value = True
+        consumer.in_transaction = True
+        consumer.commit_interval = 0.0
+        consumer._commit_offsets = AsyncMock(name='_commit_offsets')
+        consumer.current_assignment.update({TP1})
+        # offsets 1-3 were read, but offset 3 is still being processed.
+        consumer._acked = {TP1: acked(1, 2, read=[1, 2, 3])}
+        consumer._read_offset[TP1] = 3
+        assert not await consumer._commit_tps([TP1])
+        consumer._commit_offsets.assert_not_called()
+
+        consumer._acked[TP1].ack(3)
+        await consumer._commit_tps([TP1])
+        consumer._commit_offsets.assert_called_once_with({TP1: 3})
+
     def test_filter_committable_offsets(self, *, consumer):
         consumer._acked = {
-            TP1: [1, 2, 3, 4, 7, 8],
-            TP2: [30, 31, 32, 33, 34, 35, 36, 40],
+            TP1: acked(1, 2, 3, 4, 7, 8),
+            TP2: acked(30, 31, 32, 33, 34, 35, 36, 40),
         }
         consumer._committed_offset = {
             TP1: 4,
@@ -304,7 +529,7 @@ class test_Consumer:
             autospec=App,
             _attachments=Mock(
                 autospec=Attachments,
-                publish_for_tp_offset=AsyncMock(),
+                publish_for_tp_offsets=AsyncMock(),
             ),
             producer=Mock(
                 autospec=Service,
@@ -315,12 +540,12 @@ class test_Consumer:
             TP1: 3003,
             TP2: 6006,
         })
-        consumer.app._attachments.publish_for_tp_offset.coro.assert_has_calls([
-            call(TP1, 3003),
-            call(TP2, 6006),
-        ])
+        attachments = consumer.app._attachments
+        attachments.publish_for_tp_offsets.assert_called_once_with(
+            {TP1: 3003, TP2: 6006})
 
-        consumer.app.producer.wait_many.coro.assert_called_with(ANY)
+        consumer.app.producer.wait_many.coro.assert_called_once_with(
+            attachments.publish_for_tp_offsets.coro())
 
     @pytest.mark.asyncio
     async def test_commit_offsets(self, *, consumer):
@@ -335,10 +560,53 @@ class test_Consumer:
             TP2: 6006,
         })
 
+    @pytest.mark.asyncio
+    async def test_commit_offsets__in_transaction(self, *, consumer):
+        consumer.in_transaction = True
+        consumer._commit = AsyncMock(name='_commit')
+        consumer.app.producer = Mock(
+            name='producer',
+            commit_transaction=AsyncMock(),
+        )
+        consumer.current_assignment.update({TP1})
+        assert await consumer._commit_offsets({TP1: 3003, TP2: 6006})
+        consumer.app.producer.commit_transaction.assert_called_once_with(
+            {TP1: 3003}, group_id=consumer.app.conf.id)
+        consumer._commit.assert_not_called()
+        assert consumer._committed_offset[TP1] == 3003
+
+    @pytest.mark.asyncio
+    async def test_commit_offsets__in_transaction_no_offsets(
+            self, *, consumer):
+        consumer.in_transaction = True
+        consumer.app.producer = Mock(
+            name='producer',
+            commit_transaction=AsyncMock(),
+        )
+        assert not await consumer._commit_offsets({})
+        consumer.app.producer.commit_transaction.assert_called_once_with(
+            {}, group_id=consumer.app.conf.id)
+
+    @pytest.mark.asyncio
+    async def test_commit_offsets__transaction_error(self, *, consumer):
+        consumer.in_transaction = True
+        exc = ProducerSendError()
+        consumer.app.producer = Mock(
+            name='producer',
+            commit_transaction=AsyncMock(side_effect=exc),
+            abort_transaction=AsyncMock(),
+        )
+        consumer.crash = AsyncMock(name='crash')
+        consumer.current_assignment.update({TP1})
+        assert not await consumer._commit_offsets({TP1: 3003})
+        consumer.app.producer.abort_transaction.assert_called_once_with()
+        consumer.crash.assert_called_once_with(exc)
+        assert consumer._committed_offset[TP1] is None
+
     def test_filter_tps_with_pending_acks(self, *, consumer):
         consumer._acked = {
-            TP1: [1, 2, 3, 4, 5, 6],
-            TP2: [3, 4, 5, 6],
+            TP1: acked(1, 2, 3, 4, 5, 6),
+            TP2: acked(3, 4, 5, 6),
         }
         assert list(consumer._filter_tps_with_pending_acks()) == [
             TP1, TP2,
@@ -360,15 +628,15 @@ class test_Consumer:
         consumer._committed_offset[tp] = committed
         assert consumer._should_commit(tp, offset) == should
 
-    @pytest.mark.parametrize('tp,acked,expected_offset', [
+    @pytest.mark.parametrize('tp,offsets,expected_offset', [
         (TP1, [], None),
         (TP1, [1, 2, 3, 4, 5, 6, 7, 8, 9, 10], 10),
         (TP1, [1, 2, 3, 4, 5, 6, 7, 8, 10], 8),
         (TP1, [1, 2, 3, 4, 6, 7, 8, 10], 4),
         (TP1, [1, 3, 4, 6, 7, 8, 10], 1),
     ])
-    def test_new_offset(self, tp, acked, expected_offset, *, consumer):
-        consumer._acked[tp] = acked
+    def test_new_offset(self, tp, offsets, expected_offset, *, consumer):
+        consumer._acked[tp] = acked(*offsets)
         assert consumer._new_offset(tp) == expected_offset
 
     @pytest.mark.asyncio
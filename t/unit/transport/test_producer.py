@@ -1,5 +1,6 @@
 import pytest
 from faust.transport.producer import Producer
+from mode.utils.futures import done_future
 
 
 class test_Producer:
@@ -18,6 +19,24 @@ class test_Producer:
         with pytest.raises(NotImplementedError):
             await producer.send_and_wait('topic', 'key', 'value', 1, None)
 
+    @pytest.mark.asyncio
+    async def test_send_many(self, *, producer):
+        sent = []
+
+        async def send(*args):
+            sent.append(args)
+            return done_future(len(sent))
+        producer.send = send
+        fut = await producer.send_many('topic', [
+            (b'k1', b'v1', None, None),
+            (b'k2', b'v2', 3, 1.0),
+        ])
+        assert await fut == [1, 2]
+        assert sent == [
+            ('topic', b'k1', b'v1', None, None),
+            ('topic', b'k2', b'v2', 3, 1.0),
+        ]
+
     @pytest.mark.asyncio
     async def test_create_topic(self, *, producer):
         with pytest.raises(NotImplementedError):
@@ -26,3 +45,17 @@ class test_Producer:
     def test_key_partition(self, *, producer):
         with pytest.raises(NotImplementedError):
             producer.key_partition('topic', 'key')
+
+    def test_transactional(self, *, producer):
+        assert not producer.transactional
+
+    @pytest.mark.asyncio
+    async def test_transactions(self, *, producer):
+        with pytest.raises(NotImplementedError):
+            await producer.begin_transaction()
+        with pytest.raises(NotImplementedError):
+            await producer.assign_transactions(set())
+        with pytest.raises(NotImplementedError):
+            await producer.commit_transaction({}, 'group')
+        with pytest.raises(NotImplementedError):
+            await producer.abort_transaction()
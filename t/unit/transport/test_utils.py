@@ -0,0 +1,130 @@
+import pytest
+from faust.transport.utils import AckTracker
+
+
+def tracker_for(base, read, acked=()):
+    tracker = AckTracker(base)
+    for offset in read:
+        tracker.read(offset)
+    for offset in acked:
+        tracker.ack(offset)
+    return tracker
+
+
+class test_AckTracker:
+
+    @pytest.fixture
+    def tracker(self):
+        return tracker_for(10, range(10, 20))
+
+    def test_empty(self, *, tracker):
+        assert not tracker
+        assert tracker.pop_committable() is None
+
+    def test_ack(self, *, tracker):
+        assert tracker.ack(10)
+        assert not tracker.ack(10)
+        assert tracker.ack(12)
+        assert len(tracker) == 2
+        assert tracker.pop_committable() == 10
+        assert tracker.pop_committable() is None
+        assert tracker.ack(11)
+        assert tracker.pop_committable() == 12
+        assert tracker.pop_committable() is None
+        assert not tracker
+
+    def test_ack__before_window(self, *, tracker):
+        assert not tracker.ack(9)
+        assert not tracker
+        assert tracker.ack(10)
+        assert tracker.pop_committable() == 10
+        assert not tracker.ack(10)
+
+    def test_read__ignores_old_offsets(self):
+        tracker = tracker_for(10, [9, 10, 12, 11, 12])
+        assert list(tracker.reads) == [10, 12]
+
+    def test_acked_up_to(self, *, tracker):
+        assert tracker.acked_up_to(9)
+        assert not tracker.acked_up_to(10)
+        tracker.ack(10)
+        tracker.ack(12)
+        assert tracker.acked_up_to(10)
+        assert not tracker.acked_up_to(12)
+        tracker.ack(11)
+        assert tracker.acked_up_to(12)
+        assert tracker.pop_committable() == 12
+        assert tracker.acked_up_to(12)
+        assert not tracker.acked_up_to(13)
+
+    def test_acked_up_to__gaps(self):
+        tracker = tracker_for(10, [10, 15], acked=[10])
+        assert tracker.acked_up_to(14)
+        assert not tracker.acked_up_to(15)
+
+    @pytest.mark.parametrize('base,offsets,expected', [
+        (1, [1, 2, 3, 4, 5, 6, 7, 8, 9, 10], 10),
+        (1, [1, 2, 3, 4, 5, 6, 7, 8, 10], 8),
+        (34, [34, 35, 36, 40, 41, 42, 43, 44], 36),
+        (3, [10, 3, 4, 5, 7, 6], 7),
+        (10, [11, 12], None),
+    ])
+    def test_pop_committable(self, base, offsets, expected):
+        # every offset from base up to the highest one was read.
+        tracker = tracker_for(
+            base, range(base, max(offsets) + 1), acked=offsets)
+        assert tracker.pop_committable() == expected
+
+    def test_pop_committable__leading_gap(self):
+        # nothing read between the committed offset and offset 11.
+        tracker = tracker_for(10, range(11, 20), acked=range(11, 20))
+        assert tracker.pop_committable() == 19
+        assert tracker.base == 20
+        assert not tracker.reads
+        assert not tracker
+
+    def test_pop_committable__offset_gaps(self):
+        # e.g. compacted topic, or transaction markers.
+        tracker = tracker_for(10, [10, 11, 14, 15, 100])
+        assert tracker.ack(14)
+        assert tracker.ack(100)
+        assert tracker.ack(11)
+        assert tracker.pop_committable() is None
+        assert tracker.ack(10)
+        assert tracker.pop_committable() == 14
+        assert tracker.ack(15)
+        assert tracker.pop_committable() == 100
+        assert not tracker.reads
+        assert not tracker
+
+    def test_pop_committable__gap(self):
+        tracker = tracker_for(
+            34, range(34, 45), acked=(34, 35, 36, 40, 41, 42, 43, 44))
+        assert tracker.pop_committable() == 36
+        # 37-39 are still being processed.
+        assert tracker.pop_committable() is None
+        assert tracker.ack(38)
+        assert tracker.pop_committable() is None
+        assert tracker.ack(37)
+        assert tracker.pop_committable() == 38
+        assert tracker.ack(39)
+        assert tracker.pop_committable() == 44
+        assert not tracker
+
+    def test_pop_committable__out_of_order(self, *, tracker):
+        assert tracker.ack(12)
+        assert tracker.ack(11)
+        assert tracker.pop_committable() is None
+        assert tracker.ack(10)
+        assert tracker.pop_committable() == 12
+
+    def test_ack__after_pop(self):
+        tracker = tracker_for(1, range(1, 7), acked=(1, 2, 3, 5))
+        assert tracker.pop_committable() == 3
+        assert tracker.ack(4)
+        assert tracker.ack(6)
+        assert tracker.pop_committable() == 6
+        assert not tracker.reads
+        assert tracker.base == 7
+        assert tracker.ack(100)
+        assert tracker.pop_committable() is None